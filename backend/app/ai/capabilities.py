@@ -1,14 +1,15 @@
+import asyncio
 import base64
 import json
 import mimetypes
 import re
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Callable
+from typing import TYPE_CHECKING, Any, Callable
 
 from app.constants import MOBILE_RULES_VERSION, PRODUCT_PROFILE_SUPPORTED_CATEGORIES, ROUTE_MAPPING_SUPPORTED_CATEGORIES
 from app.ai.errors import AIServiceError
-from app.ai.prompts import load_prompt, render_prompt
+from app.ai.prompts import PromptBundle, load_json_asset, load_prompt, render_prompt, render_prompt_parts
 from app.schemas import (
     BodywashProductAnalysisResult,
     CleanserProductAnalysisResult,
@@ -19,10 +20,13 @@ from app.schemas import (
     ProductAnalysisContextPayload,
     ShampooProductAnalysisResult,
 )
-from app.services.doubao_openai_client import DoubaoOpenAIClient
 from app.services.storage import read_rel_bytes, save_doubao_artifact
 from app.settings import settings
 
+if TYPE_CHECKING:
+    # OpenAI SDK 导入约 0.5s：只在真正构造客户端时加载，worker / 冷启动不为此付费
+    from app.services.doubao_openai_client import AsyncDoubaoOpenAIClient, DoubaoOpenAIClient
+
 SUPPORTED_CAPABILITIES = {
     "doubao.stage1_vision",
     "doubao.stage2_struct",
@@ -51,6 +55,7 @@ SUPPORTED_CAPABILITIES = {
 }
 
 MODEL_TIER_VALUES = {"mini", "lite", "pro"}
+ROUTE_MAPPING_DECISION_TABLES_ROOT = Path(__file__).resolve().parent / "decision_tables"
 
 
 @dataclass
@@ -63,6 +68,34 @@ class CapabilityExecutionResult:
     response_payload: dict[str, Any] | None = None
 
 
+@dataclass
+class _StageCall:
+    """
+    stage1 / stage2 的一次模型调用：准备（读图、选模型）与收尾（抽取、落产物）同步 / 异步共用，
+    只有 send 在同步客户端上直接返回结果、在 AsyncDoubaoOpenAIClient 上返回协程。
+    sample 模式下 result 已就绪，不发请求。
+    """
+
+    stage: str
+    prompt: PromptBundle
+    prompt_text: str
+    model: str
+    image_paths: list[str] | None = None
+    image_data_urls: list[str] | None = None
+    result: CapabilityExecutionResult | None = None
+
+    def send(self, sdk: Any, event_callback: Callable[[dict[str, Any]], None] | None) -> Any:
+        handlers = {
+            "stream": event_callback is not None,
+            **_build_doubao_stream_handlers(event_callback=event_callback, stage=self.stage),
+        }
+        if self.image_data_urls is None:
+            return sdk.chat_with_text(self.prompt_text, model=self.model, **handlers)
+        if len(self.image_data_urls) == 1:
+            return sdk.chat_with_image(self.image_data_urls[0], self.prompt_text, model=self.model, **handlers)
+        return sdk.chat_with_images(self.image_data_urls, self.prompt_text, model=self.model, **handlers)
+
+
 def execute_capability(
     capability: str,
     input_payload: dict[str, Any],
@@ -132,11 +165,55 @@ def execute_capability(
     )
 
 
+async def execute_capability_async(
+    capability: str,
+    input_payload: dict[str, Any],
+    trace_id: str | None = None,
+    event_callback: Callable[[dict[str, Any]], None] | None = None,
+) -> CapabilityExecutionResult:
+    """
+    图片解析链路（stage1 / stage2 / two_stage_parse）走 AsyncDoubaoOpenAIClient，等上游期间不占线程；
+    其余能力仍是同步实现，放到线程池里执行。
+    """
+    if capability == "doubao.stage1_vision":
+        return await _cap_stage1_vision_async(input_payload, trace_id, event_callback=event_callback)
+    if capability == "doubao.stage2_struct":
+        return await _cap_stage2_struct_async(input_payload, trace_id, event_callback=event_callback)
+    if capability == "doubao.two_stage_parse":
+        return await _cap_two_stage_parse_async(input_payload, trace_id, event_callback=event_callback)
+    return await asyncio.to_thread(execute_capability, capability, input_payload, trace_id, event_callback)
+
+
 def _cap_stage1_vision(
     input_payload: dict[str, Any],
     trace_id: str | None,
     event_callback: Callable[[dict[str, Any]], None] | None = None,
 ) -> CapabilityExecutionResult:
+    call = _prepare_stage1_vision(input_payload, trace_id, event_callback)
+    if call.result is not None:
+        return call.result
+    sdk, _, _, _ = _build_sdk_and_models()
+    response_raw = _safe_sdk_call(lambda: call.send(sdk, event_callback))
+    return _finish_stage1_vision(call, response_raw, trace_id, event_callback)
+
+
+async def _cap_stage1_vision_async(
+    input_payload: dict[str, Any],
+    trace_id: str | None,
+    event_callback: Callable[[dict[str, Any]], None] | None = None,
+) -> CapabilityExecutionResult:
+    call = await asyncio.to_thread(_prepare_stage1_vision, input_payload, trace_id, event_callback)
+    if call.result is not None:
+        return call.result
+    response_raw = await _send_stage_call_async(call, event_callback)
+    return await asyncio.to_thread(_finish_stage1_vision, call, response_raw, trace_id, event_callback)
+
+
+def _prepare_stage1_vision(
+    input_payload: dict[str, Any],
+    trace_id: str | None,
+    event_callback: Callable[[dict[str, Any]], None] | None,
+) -> "_StageCall":
     image_paths = _normalize_stage1_image_paths(input_payload)
     prompt = load_prompt("doubao.stage1_vision")
     _emit(
@@ -162,16 +239,22 @@ def _cap_stage1_vision(
                 "image_paths": image_paths,
             },
         )
-        return CapabilityExecutionResult(
-            output={"vision_text": vision_text, "model": "sample", "artifact": artifact},
-            prompt_key=prompt.key,
-            prompt_version=prompt.version,
+        return _StageCall(
+            stage="stage1_vision",
+            prompt=prompt,
+            prompt_text=prompt.text,
             model="sample",
-            request_payload={"image_paths": image_paths, "prompt": prompt.text},
-            response_payload={"mode": "sample"},
+            result=CapabilityExecutionResult(
+                output={"vision_text": vision_text, "model": "sample", "artifact": artifact},
+                prompt_key=prompt.key,
+                prompt_version=prompt.version,
+                model="sample",
+                request_payload={"image_paths": image_paths, "prompt": prompt.text},
+                response_payload={"mode": "sample"},
+            ),
         )
 
-    sdk, vision_model, _, _ = _build_sdk_and_models()
+    _, vision_model, _, _ = _doubao_client_config()
     selected_tier = _normalize_model_tier(input_payload.get("model_tier"), field_name="model_tier")
     selected_model = _resolve_model_by_tier(
         tier=selected_tier,
@@ -184,44 +267,42 @@ def _cap_stage1_vision(
         event_callback,
         {"type": "step", "stage": "stage1_vision", "message": f"Calling model {selected_model}."},
     )
-    image_data_urls = [_to_data_url(item) for item in image_paths]
-    response_raw = _safe_sdk_call(
-        lambda: sdk.chat_with_image(
-            image_data_urls[0],
-            prompt.text,
-            model=selected_model,
-            stream=event_callback is not None,
-            **_build_doubao_stream_handlers(event_callback=event_callback, stage="stage1_vision"),
-        )
-        if len(image_data_urls) == 1
-        else sdk.chat_with_images(
-            image_data_urls,
-            prompt.text,
-            model=selected_model,
-            stream=event_callback is not None,
-            **_build_doubao_stream_handlers(event_callback=event_callback, stage="stage1_vision"),
-        )
+    return _StageCall(
+        stage="stage1_vision",
+        prompt=prompt,
+        prompt_text=prompt.text,
+        model=selected_model,
+        image_paths=image_paths,
+        image_data_urls=[_to_data_url(item) for item in image_paths],
     )
+
+
+def _finish_stage1_vision(
+    call: "_StageCall",
+    response_raw: dict[str, Any],
+    trace_id: str | None,
+    event_callback: Callable[[dict[str, Any]], None] | None,
+) -> CapabilityExecutionResult:
     vision_text = _extract_content(response_raw)
     _emit(event_callback, {"type": "step", "stage": "stage1_vision", "message": "Stage1 text extracted."})
     artifact = _maybe_save_artifact(
         trace_id=trace_id,
         stage="stage1_vision",
         payload={
-            "model": selected_model,
-            "prompt": prompt.text,
+            "model": call.model,
+            "prompt": call.prompt_text,
             "response": response_raw,
             "text": vision_text,
-            "image_paths": image_paths,
+            "image_paths": call.image_paths,
         },
     )
 
     return CapabilityExecutionResult(
-        output={"vision_text": vision_text, "model": selected_model, "artifact": artifact},
-        prompt_key=prompt.key,
-        prompt_version=prompt.version,
-        model=selected_model,
-        request_payload={"image_paths": image_paths, "prompt": prompt.text},
+        output={"vision_text": vision_text, "model": call.model, "artifact": artifact},
+        prompt_key=call.prompt.key,
+        prompt_version=call.prompt.version,
+        model=call.model,
+        request_payload={"image_paths": call.image_paths, "prompt": call.prompt_text},
         response_payload=response_raw,
     )
 
@@ -231,9 +312,34 @@ def _cap_stage2_struct(
     trace_id: str | None,
     event_callback: Callable[[dict[str, Any]], None] | None = None,
 ) -> CapabilityExecutionResult:
+    call = _prepare_stage2_struct(input_payload, trace_id, event_callback)
+    if call.result is not None:
+        return call.result
+    sdk, _, _, _ = _build_sdk_and_models()
+    response_raw = _safe_sdk_call(lambda: call.send(sdk, event_callback))
+    return _finish_stage2_struct(call, response_raw, trace_id, event_callback)
+
+
+async def _cap_stage2_struct_async(
+    input_payload: dict[str, Any],
+    trace_id: str | None,
+    event_callback: Callable[[dict[str, Any]], None] | None = None,
+) -> CapabilityExecutionResult:
+    call = await asyncio.to_thread(_prepare_stage2_struct, input_payload, trace_id, event_callback)
+    if call.result is not None:
+        return call.result
+    response_raw = await _send_stage_call_async(call, event_callback)
+    return await asyncio.to_thread(_finish_stage2_struct, call, response_raw, trace_id, event_callback)
+
+
+def _prepare_stage2_struct(
+    input_payload: dict[str, Any],
+    trace_id: str | None,
+    event_callback: Callable[[dict[str, Any]], None] | None,
+) -> "_StageCall":
     vision_text = _required_nonempty_str(input_payload, "vision_text")
     prompt = load_prompt("doubao.stage2_struct")
-    rendered_prompt = render_prompt(prompt.text, {"vision_text": vision_text})
+    rendered_prompt = render_prompt(prompt, {"vision_text": vision_text})
     _emit(event_callback, {"type": "step", "stage": "stage2_struct", "message": "Rendering struct prompt."})
 
     if _is_sample_mode():
@@ -244,21 +350,27 @@ def _cap_stage2_struct(
             stage="stage2_struct",
             payload={"model": "sample", "prompt": rendered_prompt, "response": {"mode": "sample"}, "text": json.dumps(sample_doc, ensure_ascii=False)},
         )
-        return CapabilityExecutionResult(
-            output={
-                "doc": sample_doc,
-                "struct_text": json.dumps(sample_doc, ensure_ascii=False),
-                "model": "sample",
-                "artifact": artifact,
-            },
-            prompt_key=prompt.key,
-            prompt_version=prompt.version,
+        return _StageCall(
+            stage="stage2_struct",
+            prompt=prompt,
+            prompt_text=rendered_prompt,
             model="sample",
-            request_payload={"prompt": rendered_prompt},
-            response_payload={"mode": "sample"},
+            result=CapabilityExecutionResult(
+                output={
+                    "doc": sample_doc,
+                    "struct_text": json.dumps(sample_doc, ensure_ascii=False),
+                    "model": "sample",
+                    "artifact": artifact,
+                },
+                prompt_key=prompt.key,
+                prompt_version=prompt.version,
+                model="sample",
+                request_payload={"prompt": rendered_prompt},
+                response_payload={"mode": "sample"},
+            ),
         )
 
-    sdk, _, struct_model, _ = _build_sdk_and_models()
+    _, _, struct_model, _ = _doubao_client_config()
     selected_tier = _normalize_model_tier(input_payload.get("model_tier"), field_name="model_tier")
     selected_model = _resolve_model_by_tier(
         tier=selected_tier,
@@ -271,29 +383,30 @@ def _cap_stage2_struct(
         event_callback,
         {"type": "step", "stage": "stage2_struct", "message": f"Calling model {selected_model}."},
     )
-    response_raw = _safe_sdk_call(
-        lambda: sdk.chat_with_text(
-            rendered_prompt,
-            model=selected_model,
-            stream=event_callback is not None,
-            **_build_doubao_stream_handlers(event_callback=event_callback, stage="stage2_struct"),
-        )
-    )
+    return _StageCall(stage="stage2_struct", prompt=prompt, prompt_text=rendered_prompt, model=selected_model)
+
+
+def _finish_stage2_struct(
+    call: "_StageCall",
+    response_raw: dict[str, Any],
+    trace_id: str | None,
+    event_callback: Callable[[dict[str, Any]], None] | None,
+) -> CapabilityExecutionResult:
     struct_text = _extract_content(response_raw)
     struct_doc = _extract_json_object(struct_text)
     _emit(event_callback, {"type": "step", "stage": "stage2_struct", "message": "Stage2 JSON extracted."})
     artifact = _maybe_save_artifact(
         trace_id=trace_id,
         stage="stage2_struct",
-        payload={"model": selected_model, "prompt": rendered_prompt, "response": response_raw, "text": struct_text},
+        payload={"model": call.model, "prompt": call.prompt_text, "response": response_raw, "text": struct_text},
     )
 
     return CapabilityExecutionResult(
-        output={"doc": struct_doc, "struct_text": struct_text, "model": selected_model, "artifact": artifact},
-        prompt_key=prompt.key,
-        prompt_version=prompt.version,
-        model=selected_model,
-        request_payload={"prompt": rendered_prompt},
+        output={"doc": struct_doc, "struct_text": struct_text, "model": call.model, "artifact": artifact},
+        prompt_key=call.prompt.key,
+        prompt_version=call.prompt.version,
+        model=call.model,
+        request_payload={"prompt": call.prompt_text},
         response_payload=response_raw,
     )
 
@@ -303,6 +416,30 @@ def _cap_two_stage_parse(
     trace_id: str | None,
     event_callback: Callable[[dict[str, Any]], None] | None = None,
 ) -> CapabilityExecutionResult:
+    image_path, stage1_input, stage2_input = _two_stage_inputs(input_payload)
+    _emit(event_callback, {"type": "step", "stage": "two_stage_parse", "message": "Running stage1 vision."})
+    stage1 = _cap_stage1_vision(stage1_input, trace_id=trace_id, event_callback=event_callback)
+    _emit(event_callback, {"type": "step", "stage": "two_stage_parse", "message": "Running stage2 struct."})
+    stage2_input["vision_text"] = stage1.output["vision_text"]
+    stage2 = _cap_stage2_struct(stage2_input, trace_id=trace_id, event_callback=event_callback)
+    return _merge_two_stage_results(image_path, stage1, stage2)
+
+
+async def _cap_two_stage_parse_async(
+    input_payload: dict[str, Any],
+    trace_id: str | None,
+    event_callback: Callable[[dict[str, Any]], None] | None = None,
+) -> CapabilityExecutionResult:
+    image_path, stage1_input, stage2_input = _two_stage_inputs(input_payload)
+    _emit(event_callback, {"type": "step", "stage": "two_stage_parse", "message": "Running stage1 vision."})
+    stage1 = await _cap_stage1_vision_async(stage1_input, trace_id=trace_id, event_callback=event_callback)
+    _emit(event_callback, {"type": "step", "stage": "two_stage_parse", "message": "Running stage2 struct."})
+    stage2_input["vision_text"] = stage1.output["vision_text"]
+    stage2 = await _cap_stage2_struct_async(stage2_input, trace_id=trace_id, event_callback=event_callback)
+    return _merge_two_stage_results(image_path, stage1, stage2)
+
+
+def _two_stage_inputs(input_payload: dict[str, Any]) -> tuple[str, dict[str, Any], dict[str, Any]]:
     image_path = _required_str(input_payload, "image_path")
     stage1_model_tier = input_payload.get("stage1_model_tier")
     stage2_model_tier = input_payload.get("stage2_model_tier")
@@ -312,12 +449,14 @@ def _cap_two_stage_parse(
     stage2_input: dict[str, Any] = {"vision_text": ""}
     if stage2_model_tier is not None:
         stage2_input["model_tier"] = stage2_model_tier
-    _emit(event_callback, {"type": "step", "stage": "two_stage_parse", "message": "Running stage1 vision."})
-    stage1 = _cap_stage1_vision(stage1_input, trace_id=trace_id, event_callback=event_callback)
-    _emit(event_callback, {"type": "step", "stage": "two_stage_parse", "message": "Running stage2 struct."})
-    stage2_input["vision_text"] = stage1.output["vision_text"]
-    stage2 = _cap_stage2_struct(stage2_input, trace_id=trace_id, event_callback=event_callback)
+    return image_path, stage1_input, stage2_input
+
 
+def _merge_two_stage_results(
+    image_path: str,
+    stage1: CapabilityExecutionResult,
+    stage2: CapabilityExecutionResult,
+) -> CapabilityExecutionResult:
     doc = stage2.output["doc"]
     evidence = doc.setdefault("evidence", {})
     evidence["doubao_raw"] = stage2.output.get("struct_text")
@@ -347,7 +486,7 @@ def _cap_ingredient_enrich(
     ingredient = _required_nonempty_str(input_payload, "ingredient")
     context = str(input_payload.get("context") or "").strip()
     prompt = load_prompt("doubao.ingredient_enrich")
-    rendered_prompt = render_prompt(prompt.text, {"ingredient": ingredient, "context": context})
+    rendered_prompt = render_prompt(prompt, {"ingredient": ingredient, "context": context})
     _emit(event_callback, {"type": "step", "stage": "ingredient_enrich", "message": "Prompt prepared."})
 
     if _is_sample_mode():
@@ -426,7 +565,7 @@ def _cap_ingredient_category_profile(
 
     prompt = load_prompt("doubao.ingredient_category_profile")
     rendered_prompt = render_prompt(
-        prompt.text,
+        prompt,
         {
             "ingredient": ingredient,
             "category": category,
@@ -509,7 +648,7 @@ def _cap_image_json_consistency(
 
     prompt = load_prompt("doubao.image_json_consistency")
     rendered_prompt = render_prompt(
-        prompt.text,
+        prompt,
         {"vision_text": stage1.output.get("vision_text", ""), "json_text": json_text},
     )
 
@@ -575,7 +714,7 @@ def _cap_product_dedup_decision(
 
     prompt = load_prompt("doubao.product_dedup_decision")
     rendered_prompt = render_prompt(
-        prompt.text,
+        prompt,
         {
             "candidate_json": candidate_json,
             "existing_jsons": json.dumps(existing_jsons, ensure_ascii=False),
@@ -641,7 +780,7 @@ def _cap_product_dedup_group(
 
     prompt = load_prompt("doubao.product_dedup_group")
     rendered_prompt = render_prompt(
-        prompt.text,
+        prompt,
         {
             "anchor_product_json": json.dumps(anchor_product, ensure_ascii=False),
             "candidate_products_json": json.dumps(candidate_products, ensure_ascii=False),
@@ -715,12 +854,8 @@ def _cap_mobile_compare_summary(
 ) -> CapabilityExecutionResult:
     compare_context_json = _required_nonempty_str(input_payload, "compare_context_json")
     prompt = load_prompt("doubao.mobile_compare_summary")
-    rendered_prompt = render_prompt(
-        prompt.text,
-        {
-            "compare_context_json": compare_context_json,
-        },
-    )
+    prompt_context = {"compare_context_json": compare_context_json}
+    rendered_prompt = render_prompt(prompt, prompt_context)
 
     if _is_sample_mode():
         sample = {
@@ -754,13 +889,15 @@ def _cap_mobile_compare_summary(
         event_callback,
         {"type": "step", "stage": "mobile_compare_summary", "message": f"Calling model {text_model}."},
     )
-    response_raw = _safe_sdk_call(
-        lambda: sdk.chat_with_text(
-            rendered_prompt,
-            model=text_model,
-            stream=event_callback is not None,
-            **_build_doubao_stream_handlers(event_callback=event_callback, stage="mobile_compare_summary"),
-        )
+    response_raw, request_payload = _chat_text_with_prompt_prefix(
+        sdk,
+        prompt=prompt,
+        context=prompt_context,
+        variable=("compare_context_json",),
+        rendered_prompt=rendered_prompt,
+        model=text_model,
+        event_callback=event_callback,
+        stage="mobile_compare_summary",
     )
     text = _extract_content(response_raw)
     parsed = _extract_json_object(text)
@@ -776,7 +913,7 @@ def _cap_mobile_compare_summary(
         prompt_key=prompt.key,
         prompt_version=prompt.version,
         model=text_model,
-        request_payload={"prompt": rendered_prompt},
+        request_payload=request_payload,
         response_payload=response_raw,
     )
 
@@ -797,16 +934,14 @@ def _cap_route_mapping(
 
     product_context_json = _required_nonempty_str(input_payload, "product_context_json")
     decision_table = _load_route_mapping_decision_table(normalized_category)
-    decision_table_json = json.dumps(decision_table, ensure_ascii=False)
+    decision_table_json = _load_route_mapping_decision_table_json(normalized_category)
     prompt_key = f"doubao.route_mapping_{normalized_category}"
     prompt = load_prompt(prompt_key)
-    rendered_prompt = render_prompt(
-        prompt.text,
-        {
-            "decision_table_json": decision_table_json,
-            "product_context_json": product_context_json,
-        },
-    )
+    prompt_context = {
+        "decision_table_json": decision_table_json,
+        "product_context_json": product_context_json,
+    }
+    rendered_prompt = render_prompt(prompt, prompt_context)
 
     stage = f"route_mapping_{normalized_category}"
     if _is_sample_mode():
@@ -865,13 +1000,15 @@ def _cap_route_mapping(
         event_callback,
         {"type": "step", "stage": stage, "message": f"Calling model {pro_model}."},
     )
-    response_raw = _safe_sdk_call(
-        lambda: sdk.chat_with_text(
-            rendered_prompt,
-            model=pro_model,
-            stream=event_callback is not None,
-            **_build_doubao_stream_handlers(event_callback=event_callback, stage=stage),
-        )
+    response_raw, request_payload = _chat_text_with_prompt_prefix(
+        sdk,
+        prompt=prompt,
+        context=prompt_context,
+        variable=("product_context_json",),
+        rendered_prompt=rendered_prompt,
+        model=pro_model,
+        event_callback=event_callback,
+        stage=stage,
     )
     text = _extract_content(response_raw)
     parsed = _extract_json_object(text)
@@ -887,7 +1024,7 @@ def _cap_route_mapping(
         prompt_key=prompt.key,
         prompt_version=prompt.version,
         model=pro_model,
-        request_payload={"prompt": rendered_prompt},
+        request_payload=request_payload,
         response_payload=response_raw,
     )
 
@@ -944,12 +1081,8 @@ def _cap_product_profile(
     normalized_context_json = json.dumps(validated_context.model_dump(), ensure_ascii=False)
     prompt_key = f"doubao.product_profile_{normalized_category}"
     prompt = load_prompt(prompt_key)
-    rendered_prompt = render_prompt(
-        prompt.text,
-        {
-            "product_analysis_context_json": normalized_context_json,
-        },
-    )
+    prompt_context = {"product_analysis_context_json": normalized_context_json}
+    rendered_prompt = render_prompt(prompt, prompt_context)
 
     stage = f"product_profile_{normalized_category}"
     if _is_sample_mode():
@@ -980,13 +1113,15 @@ def _cap_product_profile(
         event_callback,
         {"type": "step", "stage": stage, "message": f"Calling model {pro_model}."},
     )
-    response_raw = _safe_sdk_call(
-        lambda: sdk.chat_with_text(
-            rendered_prompt,
-            model=pro_model,
-            stream=event_callback is not None,
-            **_build_doubao_stream_handlers(event_callback=event_callback, stage=stage),
-        )
+    response_raw, request_payload = _chat_text_with_prompt_prefix(
+        sdk,
+        prompt=prompt,
+        context=prompt_context,
+        variable=("product_analysis_context_json",),
+        rendered_prompt=rendered_prompt,
+        model=pro_model,
+        event_callback=event_callback,
+        stage=stage,
     )
     text = _extract_content(response_raw)
     parsed = _extract_json_object(text)
@@ -1002,7 +1137,7 @@ def _cap_product_profile(
         prompt_key=prompt.key,
         prompt_version=prompt.version,
         model=pro_model,
-        request_payload={"prompt": rendered_prompt},
+        request_payload=request_payload,
         response_payload=response_raw,
     )
 
@@ -1059,12 +1194,8 @@ def _cap_mobile_selection_result(
     normalized_context_json = json.dumps(validated_context.model_dump(mode="json"), ensure_ascii=False)
     prompt_key = f"doubao.mobile_selection_result_{normalized_category}"
     prompt = load_prompt(prompt_key)
-    rendered_prompt = render_prompt(
-        prompt.text,
-        {
-            "selection_result_context_json": normalized_context_json,
-        },
-    )
+    prompt_context = {"selection_result_context_json": normalized_context_json}
+    rendered_prompt = render_prompt(prompt, prompt_context)
 
     stage = f"mobile_selection_result_{normalized_category}"
     if _is_sample_mode():
@@ -1095,13 +1226,15 @@ def _cap_mobile_selection_result(
         event_callback,
         {"type": "step", "stage": stage, "message": f"Calling model {pro_model}."},
     )
-    response_raw = _safe_sdk_call(
-        lambda: sdk.chat_with_text(
-            rendered_prompt,
-            model=pro_model,
-            stream=event_callback is not None,
-            **_build_doubao_stream_handlers(event_callback=event_callback, stage=stage),
-        )
+    response_raw, request_payload = _chat_text_with_prompt_prefix(
+        sdk,
+        prompt=prompt,
+        context=prompt_context,
+        variable=("selection_result_context_json",),
+        rendered_prompt=rendered_prompt,
+        model=pro_model,
+        event_callback=event_callback,
+        stage=stage,
     )
     text = _extract_content(response_raw)
     parsed = _extract_json_object(text)
@@ -1117,7 +1250,7 @@ def _cap_mobile_selection_result(
         prompt_key=prompt.key,
         prompt_version=prompt.version,
         model=pro_model,
-        request_payload={"prompt": rendered_prompt},
+        request_payload=request_payload,
         response_payload=response_raw,
     )
 
@@ -1151,7 +1284,7 @@ def _is_sample_mode() -> bool:
     return settings.doubao_mode.lower().strip() in {"mock", "sample"}
 
 
-def _build_sdk_and_models() -> tuple[DoubaoOpenAIClient, str, str, str]:
+def _doubao_client_config() -> tuple[dict[str, Any], str, str, str]:
     mode = settings.doubao_mode.lower().strip()
     if mode != "real":
         raise AIServiceError(
@@ -1173,17 +1306,76 @@ def _build_sdk_and_models() -> tuple[DoubaoOpenAIClient, str, str, str]:
     struct_model = settings.doubao_struct_model or settings.doubao_model or vision_model
     pro_model = settings.doubao_pro_model or "doubao-seed-2-0-pro-260215"
     advanced_text_model = settings.doubao_advanced_text_model or pro_model or struct_model
+    client_kwargs = {
+        "api_key": api_key,
+        "endpoint": endpoint,
+        "model": vision_model,
+        "timeout": settings.doubao_timeout_seconds,
+        "max_retries": settings.doubao_max_retries,
+        "retry_backoff_seconds": settings.doubao_retry_backoff_seconds,
+    }
+    return client_kwargs, vision_model, struct_model, advanced_text_model
+
+
+def _build_sdk_and_models() -> tuple["DoubaoOpenAIClient", str, str, str]:
+    client_kwargs, vision_model, struct_model, advanced_text_model = _doubao_client_config()
+    from app.services.doubao_openai_client import DoubaoOpenAIClient
+
     sdk = DoubaoOpenAIClient(
-        api_key=api_key,
-        endpoint=endpoint,
-        model=vision_model,
-        timeout=settings.doubao_timeout_seconds,
-        max_retries=settings.doubao_max_retries,
-        retry_backoff_seconds=settings.doubao_retry_backoff_seconds,
+        **client_kwargs,
+        prefix_cache_ttl_seconds=settings.doubao_prompt_prefix_cache_ttl_seconds,
     )
     return sdk, vision_model, struct_model, advanced_text_model
 
 
+def _build_async_sdk() -> "AsyncDoubaoOpenAIClient":
+    client_kwargs, _, _, _ = _doubao_client_config()
+    from app.services.doubao_openai_client import AsyncDoubaoOpenAIClient
+
+    return AsyncDoubaoOpenAIClient(**client_kwargs)
+
+
+def _chat_text_with_prompt_prefix(
+    sdk: "DoubaoOpenAIClient",
+    *,
+    prompt: PromptBundle,
+    context: dict[str, Any],
+    variable: tuple[str, ...],
+    rendered_prompt: str,
+    model: str,
+    event_callback: Callable[[dict[str, Any]], None] | None,
+    stage: str,
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    """
+    批量能力的模型调用：开启前缀复用时，variable 之外的内容作为稳定前缀走服务端缓存，只发送变量后缀；
+    否则与 chat_with_text 完全一致。返回 (response_raw, request_payload)。
+    """
+    handlers = {
+        "stream": event_callback is not None,
+        **_build_doubao_stream_handlers(event_callback=event_callback, stage=stage),
+    }
+    if not settings.doubao_prompt_prefix_cache_enabled:
+        response_raw = _safe_sdk_call(lambda: sdk.chat_with_text(rendered_prompt, model=model, **handlers))
+        return response_raw, {"prompt": rendered_prompt}
+
+    parts = render_prompt_parts(prompt, context, variable=variable)
+    response_raw, prefix_status = _safe_sdk_call(
+        lambda: sdk.chat_with_prefix(
+            parts.prefix,
+            parts.suffix,
+            prefix_key=parts.prefix_hash,
+            fallback_prompt=rendered_prompt,
+            model=model,
+            **handlers,
+        )
+    )
+    return response_raw, {
+        "prompt": rendered_prompt,
+        "prompt_prefix_hash": parts.prefix_hash,
+        "prompt_prefix_cache": prefix_status,
+    }
+
+
 def _normalize_model_tier(value: Any, *, field_name: str = "model_tier") -> str | None:
     text = str(value or "").strip().lower()
     if not text:
@@ -1218,9 +1410,26 @@ def _safe_sdk_call(callable_fn):
     try:
         return callable_fn()
     except RuntimeError as e:
-        message = str(e).strip() or "Doubao request failed."
-        status = 400 if message.startswith("Doubao configuration") else 502
-        raise AIServiceError(code="doubao_request_failed", message=message, http_status=status) from e
+        raise _sdk_error(e) from e
+
+
+async def _send_stage_call_async(
+    call: "_StageCall",
+    event_callback: Callable[[dict[str, Any]], None] | None,
+) -> dict[str, Any]:
+    sdk = _build_async_sdk()
+    try:
+        return await call.send(sdk, event_callback)
+    except RuntimeError as e:
+        raise _sdk_error(e) from e
+    finally:
+        await sdk.close()
+
+
+def _sdk_error(error: RuntimeError) -> AIServiceError:
+    message = str(error).strip() or "Doubao request failed."
+    status = 400 if message.startswith("Doubao configuration") else 502
+    return AIServiceError(code="doubao_request_failed", message=message, http_status=status)
 
 
 def _to_data_url(image_rel_path: str) -> str:
@@ -1962,6 +2171,15 @@ def _ensure_string_list(
 
 
 def _load_route_mapping_decision_table(category: str) -> dict[str, Any]:
+    """返回已校验的决策表（进程内缓存，文件 mtime 变化才重新加载）；返回值在进程内共享，调用方只读。"""
+    return _load_route_mapping_decision_table_entry(category)[0]
+
+
+def _load_route_mapping_decision_table_json(category: str) -> str:
+    return _load_route_mapping_decision_table_entry(category)[1]
+
+
+def _load_route_mapping_decision_table_entry(category: str) -> tuple[dict[str, Any], str]:
     normalized_category = str(category or "").strip().lower()
     if normalized_category not in ROUTE_MAPPING_SUPPORTED_CATEGORIES:
         raise AIServiceError(
@@ -1969,16 +2187,20 @@ def _load_route_mapping_decision_table(category: str) -> dict[str, Any]:
             message=f"route mapping does not support category '{normalized_category}'.",
             http_status=400,
         )
-    rel = f"{normalized_category}/v{MOBILE_RULES_VERSION}.json"
-    path = Path(__file__).resolve().parent / "decision_tables" / rel
-    if not path.exists():
+    path = ROUTE_MAPPING_DECISION_TABLES_ROOT / normalized_category / f"v{MOBILE_RULES_VERSION}.json"
+    try:
+        return load_json_asset(
+            path,
+            build=lambda payload: _validate_route_mapping_decision_table(normalized_category, payload),
+        )
+    except AIServiceError:
+        raise
+    except FileNotFoundError as e:
         raise AIServiceError(
             code="route_mapping_decision_table_missing",
             message=f"route mapping decision table missing for category '{normalized_category}': {path.name}",
             http_status=500,
-        )
-    try:
-        payload = json.loads(path.read_text(encoding="utf-8"))
+        ) from e
     except Exception as e:
         raise AIServiceError(
             code="route_mapping_decision_table_invalid",
@@ -1986,6 +2208,8 @@ def _load_route_mapping_decision_table(category: str) -> dict[str, Any]:
             http_status=500,
         ) from e
 
+
+def _validate_route_mapping_decision_table(normalized_category: str, payload: Any) -> tuple[dict[str, Any], str]:
     if not isinstance(payload, dict):
         raise AIServiceError(
             code="route_mapping_decision_table_invalid",
@@ -2019,7 +2243,7 @@ def _load_route_mapping_decision_table(category: str) -> dict[str, Any]:
             ),
             http_status=500,
         )
-    return payload
+    return payload, json.dumps(payload, ensure_ascii=False)
 
 
 def _normalize_route_mapping_result(
@@ -1,16 +1,24 @@
+import asyncio
 import json
 import time
 from datetime import datetime, timedelta
 from typing import Callable
 from typing import Any
 
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import case, func, or_, select
+from sqlalchemy.orm import Session, defer
 
-from app.ai.capabilities import CapabilityExecutionResult, SUPPORTED_CAPABILITIES, execute_capability
+from app.ai.capabilities import (
+    CapabilityExecutionResult,
+    SUPPORTED_CAPABILITIES,
+    execute_capability,
+    execute_capability_async,
+)
 from app.ai.errors import AIServiceError
+from app.ai.run_payloads import load_run_payload_texts, put_run_payload
 from app.db.models import AIJob, AIRun
 from app.db.session import SessionLocal
+from app.platform.request_metrics import record_model_call
 from app.services.storage import new_id, now_iso
 from app.settings import settings
 
@@ -49,6 +57,48 @@ class AIOrchestrator:
         return job
 
     def run_job(self, job_id: str, event_callback: Callable[[dict[str, Any]], None] | None = None) -> AIJob:
+        started_run = self._start_run(job_id, event_callback)
+        if isinstance(started_run, AIJob):
+            return started_run
+        job, run, request_payload = started_run
+        started = time.perf_counter()
+        try:
+            result = execute_capability(
+                job.capability,
+                request_payload,
+                trace_id=job.trace_id,
+                event_callback=_capability_event_forwarder(job, event_callback),
+            )
+        except Exception as e:
+            return self._settle_run(job, run, started, event_callback, error=e)
+        return self._settle_run(job, run, started, event_callback, result=result)
+
+    async def run_job_async(self, job_id: str, event_callback: Callable[[dict[str, Any]], None] | None = None) -> AIJob:
+        """
+        run_job 的协程版本：任务 / 运行记录读写仍走同步 Session（放线程池），
+        模型调用经 execute_capability_async，等上游期间不占线程。
+        """
+        started_run = await asyncio.to_thread(self._start_run, job_id, event_callback)
+        if isinstance(started_run, AIJob):
+            return started_run
+        job, run, request_payload = started_run
+        started = time.perf_counter()
+        try:
+            result = await execute_capability_async(
+                job.capability,
+                request_payload,
+                trace_id=job.trace_id,
+                event_callback=_capability_event_forwarder(job, event_callback),
+            )
+        except Exception as e:
+            return await asyncio.to_thread(self._settle_run, job, run, started, event_callback, error=e)
+        return await asyncio.to_thread(self._settle_run, job, run, started, event_callback, result=result)
+
+    def _start_run(
+        self,
+        job_id: str,
+        event_callback: Callable[[dict[str, Any]], None] | None,
+    ) -> AIJob | tuple[AIJob, AIRun, dict[str, Any]]:
         job = self.db.get(AIJob, job_id)
         if not job:
             raise AIServiceError(code="job_not_found", message=f"AI job '{job_id}' not found.", http_status=404)
@@ -69,6 +119,7 @@ class AIOrchestrator:
         job.error_message = None
         self.db.add(job)
 
+        stored_request = put_run_payload(self.db, _dump_json(request_payload))
         run = AIRun(
             id=new_id(),
             job_id=job.id,
@@ -77,7 +128,8 @@ class AIOrchestrator:
             prompt_key=None,
             prompt_version=None,
             model=None,
-            request_json=_dump_json(request_payload),
+            request_json=stored_request.inline,
+            request_digest=stored_request.digest,
             response_json=None,
             latency_ms=None,
             error_code=None,
@@ -90,44 +142,36 @@ class AIOrchestrator:
         self.db.refresh(job)
         self.db.refresh(run)
         _emit_event(event_callback, {"type": "job_started", "job_id": job.id, "capability": job.capability})
-
-        started = time.perf_counter()
-        try:
-            result = execute_capability(
-                job.capability,
-                request_payload,
-                trace_id=job.trace_id,
-                event_callback=lambda event: _emit_event(
-                    event_callback,
-                    {"type": "capability_event", "job_id": job.id, "capability": job.capability, **event},
-                ),
-            )
+        return job, run, request_payload
+
+    def _settle_run(
+        self,
+        job: AIJob,
+        run: AIRun,
+        started: float,
+        event_callback: Callable[[dict[str, Any]], None] | None,
+        *,
+        result: CapabilityExecutionResult | None = None,
+        error: Exception | None = None,
+    ) -> AIJob:
+        if error is None and result is not None:
             self._mark_succeeded(job, run, result, started)
             _emit_event(event_callback, {"type": "job_succeeded", "job_id": job.id, "capability": job.capability})
-        except AIServiceError as e:
-            self._mark_failed(job, run, e.code, e.message, e.http_status, started)
+        else:
+            if isinstance(error, AIServiceError):
+                code, message, http_status = error.code, error.message, error.http_status
+            else:  # pragma: no cover - defensive fallback
+                code, message, http_status = "ai_internal_error", str(error), 500
+            self._mark_failed(job, run, code, message, http_status, started)
             _emit_event(
                 event_callback,
                 {
                     "type": "job_failed",
                     "job_id": job.id,
                     "capability": job.capability,
-                    "error_code": e.code,
-                    "error_message": e.message,
-                    "error_http_status": e.http_status,
-                },
-            )
-        except Exception as e:  # pragma: no cover - defensive fallback
-            self._mark_failed(job, run, "ai_internal_error", str(e), 500, started)
-            _emit_event(
-                event_callback,
-                {
-                    "type": "job_failed",
-                    "job_id": job.id,
-                    "capability": job.capability,
-                    "error_code": "ai_internal_error",
-                    "error_message": str(e),
-                    "error_http_status": 500,
+                    "error_code": code,
+                    "error_message": message,
+                    "error_http_status": http_status,
                 },
             )
 
@@ -147,86 +191,202 @@ class AIOrchestrator:
         stmt = stmt.order_by(AIJob.created_at.desc()).offset(offset).limit(limit)
         return list(self.db.execute(stmt).scalars().all())
 
-    def list_runs(self, job_id: str | None = None, limit: int = 100, offset: int = 0) -> list[AIRun]:
+    def list_runs(
+        self,
+        job_id: str | None = None,
+        limit: int = 100,
+        offset: int = 0,
+        *,
+        include_payloads: bool = False,
+    ) -> list[AIRun]:
         stmt = select(AIRun)
+        if not include_payloads:
+            # 列表只展示元数据：内联载荷列不读出，行外载荷更不会碰。
+            stmt = stmt.options(defer(AIRun.request_json), defer(AIRun.response_json))
         if job_id:
             stmt = stmt.where(AIRun.job_id == job_id)
         stmt = stmt.order_by(AIRun.created_at.desc()).offset(offset).limit(limit)
         return list(self.db.execute(stmt).scalars().all())
 
-    def metrics_summary(self, capability: str | None = None, since_hours: int = 168) -> dict[str, Any]:
+    def load_run_payloads(self, runs: list[AIRun]) -> dict[str, tuple[str | None, str | None]]:
+        return load_run_payload_texts(self.db, runs)
+
+    def metrics_summary(
+        self,
+        capability: str | None = None,
+        since_hours: int = 168,
+        breakdown: str | None = None,
+    ) -> dict[str, Any]:
         since_hours = max(1, int(since_hours))
         window_start = (datetime.utcnow() - timedelta(hours=since_hours)).strftime("%Y-%m-%dT%H:%M:%SZ")
 
-        jobs_stmt = select(AIJob).where(AIJob.created_at >= window_start)
-        runs_stmt = select(AIRun).where(AIRun.created_at >= window_start)
+        job_filters = [AIJob.created_at >= window_start]
+        run_filters = [AIRun.created_at >= window_start]
         if capability:
-            jobs_stmt = jobs_stmt.where(AIJob.capability == capability)
-            runs_stmt = runs_stmt.where(AIRun.capability == capability)
-
-        jobs = list(self.db.execute(jobs_stmt).scalars().all())
-        runs = list(self.db.execute(runs_stmt).scalars().all())
-
-        total_jobs = len(jobs)
-        succeeded_jobs = sum(1 for j in jobs if j.status == "succeeded")
-        failed_jobs = sum(1 for j in jobs if j.status == "failed")
-        running_jobs = sum(1 for j in jobs if j.status == "running")
-        queued_jobs = sum(1 for j in jobs if j.status == "queued")
-        timeout_failures = sum(1 for j in jobs if _is_timeout_failure(j.error_code, j.error_message))
-
-        total_runs = len(runs)
-        succeeded_runs = sum(1 for r in runs if r.status == "succeeded")
-        failed_runs = sum(1 for r in runs if r.status == "failed")
-
-        latencies = sorted(int(r.latency_ms) for r in runs if isinstance(r.latency_ms, int))
-        avg_latency_ms = (sum(latencies) / len(latencies)) if latencies else None
-        p95_latency_ms = latencies[max(0, (len(latencies) * 95 + 99) // 100 - 1)] if latencies else None
+            job_filters.append(AIJob.capability == capability)
+            run_filters.append(AIRun.capability == capability)
 
-        model_costs = _load_model_costs()
-        model_token_pricing = _load_model_token_pricing()
-        priced_runs = 0
-        total_estimated_cost = 0.0
-        for run in runs:
-            estimated = _estimate_run_cost(run, model_token_pricing=model_token_pricing, model_costs=model_costs)
-            if estimated is None:
-                continue
-            priced_runs += 1
-            total_estimated_cost += estimated
-
-        return {
+        # 全部在 SQL 内聚合（走 (capability, created_at) 复合索引），不再把窗口内 job/run 整表加载进内存。
+        timeout_expr = or_(
+            func.lower(func.coalesce(AIJob.error_code, "")).like("%timeout%"),
+            func.lower(func.coalesce(AIJob.error_message, "")).like("%timeout%"),
+        )
+        job_counts: dict[str, int] = {}
+        timeout_failures = 0
+        for status, count, timeouts in self.db.execute(
+            select(AIJob.status, func.count(), func.sum(case((timeout_expr, 1), else_=0)))
+            .where(*job_filters)
+            .group_by(AIJob.status)
+        ).all():
+            job_counts[str(status)] = int(count or 0)
+            timeout_failures += int(timeouts or 0)
+        total_jobs = sum(job_counts.values())
+        succeeded_jobs = job_counts.get("succeeded", 0)
+
+        run_totals = self._aggregate_runs(run_filters)
+        p95_latency_ms = self._latency_percentile(run_filters, 95, latency_count=run_totals["latency_count"])
+
+        out = {
             "capability": capability,
             "since_hours": since_hours,
             "window_start": window_start,
             "total_jobs": total_jobs,
             "succeeded_jobs": succeeded_jobs,
-            "failed_jobs": failed_jobs,
-            "running_jobs": running_jobs,
-            "queued_jobs": queued_jobs,
+            "failed_jobs": job_counts.get("failed", 0),
+            "running_jobs": job_counts.get("running", 0),
+            "queued_jobs": job_counts.get("queued", 0),
             "success_rate": (succeeded_jobs / total_jobs) if total_jobs else 0.0,
             "timeout_failures": timeout_failures,
             "timeout_rate": (timeout_failures / total_jobs) if total_jobs else 0.0,
-            "total_runs": total_runs,
-            "succeeded_runs": succeeded_runs,
-            "failed_runs": failed_runs,
-            "avg_latency_ms": avg_latency_ms,
-            "p95_latency_ms": p95_latency_ms,
-            "total_estimated_cost": total_estimated_cost,
-            "avg_task_cost": (total_estimated_cost / priced_runs) if priced_runs else None,
-            "priced_runs": priced_runs,
-            "cost_coverage_rate": (priced_runs / total_runs) if total_runs else 0.0,
+            **_run_metrics_view(run_totals, p95_latency_ms),
+            "breakdown_by": breakdown,
+            "breakdown": [],
         }
+        if breakdown:
+            out["breakdown"] = self._runs_breakdown(run_filters, breakdown)
+        return out
+
+    def _aggregate_runs(self, filters: list[Any], group_column: Any | None = None) -> dict[Any, dict[str, Any]]:
+        columns = [
+            AIRun.status,
+            func.count(),
+            func.count(AIRun.latency_ms),
+            func.sum(AIRun.latency_ms),
+            func.count(AIRun.estimated_cost),
+            func.sum(AIRun.estimated_cost),
+            func.sum(AIRun.input_tokens),
+            func.sum(AIRun.output_tokens),
+            func.sum(AIRun.cached_tokens),
+        ]
+        group_by = [AIRun.status]
+        if group_column is not None:
+            columns.insert(0, group_column)
+            group_by.insert(0, group_column)
+        out: dict[Any, dict[str, Any]] = {}
+        for row in self.db.execute(select(*columns).where(*filters).group_by(*group_by)).all():
+            key = row[0] if group_column is not None else None
+            values = row[1:] if group_column is not None else row
+            status, count, latency_count, latency_sum, priced, cost_sum, input_sum, output_sum, cached_sum = values
+            bucket = out.setdefault(key, _empty_run_totals())
+            bucket["total_runs"] += int(count or 0)
+            if status in {"succeeded", "failed"}:
+                bucket[f"{status}_runs"] += int(count or 0)
+            bucket["latency_count"] += int(latency_count or 0)
+            bucket["latency_sum"] += float(latency_sum or 0)
+            bucket["priced_runs"] += int(priced or 0)
+            bucket["total_estimated_cost"] += float(cost_sum or 0.0)
+            bucket["input_tokens"] += int(input_sum or 0)
+            bucket["output_tokens"] += int(output_sum or 0)
+            bucket["cached_tokens"] += int(cached_sum or 0)
+        if group_column is None:
+            return out.get(None) or _empty_run_totals()
+        return out
+
+    def _runs_breakdown(self, filters: list[Any], breakdown: str) -> list[dict[str, Any]]:
+        column = {"capability": AIRun.capability, "model": AIRun.model}.get(breakdown)
+        if column is None:
+            raise AIServiceError(
+                code="ai_metrics_breakdown_invalid",
+                message=f"Unsupported metrics breakdown '{breakdown}'.",
+                http_status=400,
+            )
+        grouped = self._aggregate_runs(filters, group_column=column)
+        p95_by_key = self._latency_percentile_by(
+            filters,
+            column,
+            95,
+            latency_counts={key: totals["latency_count"] for key, totals in grouped.items()},
+        )
+        items = [
+            {"key": key, **_run_metrics_view(totals, p95_by_key.get(key))}
+            for key, totals in grouped.items()
+        ]
+        items.sort(key=lambda item: (-item["total_runs"], str(item["key"] or "")))
+        return items
+
+    def _latency_percentile(self, filters: list[Any], pct: int, latency_count: int) -> int | None:
+        latency_filters = [*filters, AIRun.latency_ms.is_not(None)]
+        if self._dialect_name() == "postgresql":
+            value = self.db.execute(
+                select(func.percentile_disc(pct / 100.0).within_group(AIRun.latency_ms.asc())).where(*latency_filters)
+            ).scalar()
+            return int(value) if value is not None else None
+        # 通用回退（SQLite 无 percentile 聚合）：复用分组聚合得到的样本数，按 latency 排序取第 k 名
+        # （nearest-rank，与 percentile_disc 同义）。
+        n = int(latency_count or 0)
+        if n <= 0:
+            return None
+        offset = max(0, (n * pct + 99) // 100 - 1)
+        value = self.db.execute(
+            select(AIRun.latency_ms).where(*latency_filters).order_by(AIRun.latency_ms.asc()).limit(1).offset(offset)
+        ).scalar()
+        return int(value) if value is not None else None
+
+    def _latency_percentile_by(
+        self,
+        filters: list[Any],
+        column: Any,
+        pct: int,
+        latency_counts: dict[Any, int],
+    ) -> dict[Any, int | None]:
+        if self._dialect_name() == "postgresql":
+            rows = self.db.execute(
+                select(column, func.percentile_disc(pct / 100.0).within_group(AIRun.latency_ms.asc()))
+                .where(*filters, AIRun.latency_ms.is_not(None))
+                .group_by(column)
+            ).all()
+            return {key: (int(value) if value is not None else None) for key, value in rows}
+        return {
+            key: self._latency_percentile(
+                [*filters, column.is_(None) if key is None else column == key],
+                pct,
+                latency_count=count,
+            )
+            for key, count in latency_counts.items()
+        }
+
+    def _dialect_name(self) -> str:
+        return str(self.db.get_bind().dialect.name or "").lower()
 
     def _mark_succeeded(self, job: AIJob, run: AIRun, result: CapabilityExecutionResult, started: float) -> None:
-        latency_ms = int((time.perf_counter() - started) * 1000)
+        elapsed = time.perf_counter() - started
+        record_model_call(elapsed)
+        latency_ms = int(elapsed * 1000)
         run.status = "succeeded"
         run.prompt_key = result.prompt_key
         run.prompt_version = result.prompt_version
         run.model = result.model
-        run.response_json = _dump_json(result.response_payload if result.response_payload is not None else result.output)
+        stored_response = put_run_payload(
+            self.db,
+            _dump_json(result.response_payload if result.response_payload is not None else result.output),
+        )
+        run.response_json = stored_response.inline
+        run.response_digest = stored_response.digest
         run.latency_ms = latency_ms
         run.error_code = None
         run.error_http_status = None
         run.error_message = None
+        _apply_run_usage(run, result.response_payload if result.response_payload is not None else result.output)
         self.db.add(run)
 
         job.status = "succeeded"
@@ -242,7 +402,9 @@ class AIOrchestrator:
         self.db.commit()
 
     def _mark_failed(self, job: AIJob, run: AIRun, code: str, message: str, http_status: int, started: float) -> None:
-        latency_ms = int((time.perf_counter() - started) * 1000)
+        elapsed = time.perf_counter() - started
+        record_model_call(elapsed)
+        latency_ms = int(elapsed * 1000)
         run.status = "failed"
         run.error_code = code
         run.error_http_status = http_status
@@ -271,20 +433,45 @@ def run_capability_now(
         orchestrator = AIOrchestrator(db)
         job = orchestrator.create_job(capability=capability, input_payload=input_payload, trace_id=trace_id)
         job = orchestrator.run_job(job.id, event_callback=event_callback)
-        if job.status != "succeeded":
-            raise AIServiceError(
-                code=job.error_code or "ai_job_failed",
-                message=job.error_message or "Capability execution failed.",
-                http_status=job.error_http_status or 400,
-            )
-        output = _load_json(job.output_json)
-        if isinstance(output, dict):
-            return output
-        raise AIServiceError(code="invalid_job_output", message="Capability output must be a JSON object.", http_status=500)
+        return _job_output_or_raise(job)
     finally:
         db.close()
 
 
+async def run_capability_now_async(
+    capability: str,
+    input_payload: dict[str, Any],
+    trace_id: str | None = None,
+    event_callback: Callable[[dict[str, Any]], None] | None = None,
+) -> dict[str, Any]:
+    db = SessionLocal()
+    try:
+        orchestrator = AIOrchestrator(db)
+        job = await asyncio.to_thread(
+            orchestrator.create_job,
+            capability=capability,
+            input_payload=input_payload,
+            trace_id=trace_id,
+        )
+        job = await orchestrator.run_job_async(job.id, event_callback=event_callback)
+        return _job_output_or_raise(job)
+    finally:
+        await asyncio.to_thread(db.close)
+
+
+def _job_output_or_raise(job: AIJob) -> dict[str, Any]:
+    if job.status != "succeeded":
+        raise AIServiceError(
+            code=job.error_code or "ai_job_failed",
+            message=job.error_message or "Capability execution failed.",
+            http_status=job.error_http_status or 400,
+        )
+    output = _load_json(job.output_json)
+    if isinstance(output, dict):
+        return output
+    raise AIServiceError(code="invalid_job_output", message="Capability output must be a JSON object.", http_status=500)
+
+
 def _dump_json(payload: Any) -> str:
     return json.dumps(payload, ensure_ascii=False)
 
@@ -380,18 +567,87 @@ def _load_model_token_pricing() -> dict[str, dict[str, float]]:
     return out
 
 
+def _empty_run_totals() -> dict[str, Any]:
+    return {
+        "total_runs": 0,
+        "succeeded_runs": 0,
+        "failed_runs": 0,
+        "latency_count": 0,
+        "latency_sum": 0.0,
+        "priced_runs": 0,
+        "total_estimated_cost": 0.0,
+        "input_tokens": 0,
+        "output_tokens": 0,
+        "cached_tokens": 0,
+    }
+
+
+def _run_metrics_view(totals: dict[str, Any], p95_latency_ms: int | None) -> dict[str, Any]:
+    total_runs = totals["total_runs"]
+    priced_runs = totals["priced_runs"]
+    total_estimated_cost = totals["total_estimated_cost"]
+    return {
+        "total_runs": total_runs,
+        "succeeded_runs": totals["succeeded_runs"],
+        "failed_runs": totals["failed_runs"],
+        "avg_latency_ms": (totals["latency_sum"] / totals["latency_count"]) if totals["latency_count"] else None,
+        "p95_latency_ms": p95_latency_ms,
+        "total_estimated_cost": total_estimated_cost,
+        "avg_task_cost": (total_estimated_cost / priced_runs) if priced_runs else None,
+        "priced_runs": priced_runs,
+        "cost_coverage_rate": (priced_runs / total_runs) if total_runs else 0.0,
+        "total_input_tokens": totals["input_tokens"],
+        "total_output_tokens": totals["output_tokens"],
+        "total_cached_tokens": totals["cached_tokens"],
+    }
+
+
+def _apply_run_usage(run: AIRun, response_payload: Any) -> None:
+    usage = _extract_usage(response_payload)
+    run.input_tokens = int(usage["input_tokens"]) if usage else None
+    run.output_tokens = int(usage["output_tokens"]) if usage else None
+    run.cached_tokens = int(usage["cached_tokens"]) if usage else None
+    try:
+        model_token_pricing = _load_model_token_pricing()
+        model_costs = _load_model_costs()
+    except AIServiceError:
+        # 计费配置写错不能让已成功的任务失败：成本留空，metrics 中体现为未定价。
+        run.estimated_cost = None
+        return
+    run.estimated_cost = _estimate_cost(run.model, usage, model_token_pricing=model_token_pricing, model_costs=model_costs)
+
+
 def _estimate_run_cost(
     run: AIRun,
     model_token_pricing: dict[str, dict[str, float]],
     model_costs: dict[str, float],
+    *,
+    response_text: str | None = None,
 ) -> float | None:
-    model = (run.model or "").strip()
+    # 行外存储的响应内联列是空串：调用方先用 load_run_payload_texts 取回正文传入 response_text。
+    if response_text is None and not run.response_digest:
+        response_text = run.response_json
+    return _estimate_cost(
+        run.model,
+        _extract_usage_from_response(response_text),
+        model_token_pricing=model_token_pricing,
+        model_costs=model_costs,
+    )
+
+
+def _estimate_cost(
+    model_name: str | None,
+    usage: dict[str, float] | None,
+    *,
+    model_token_pricing: dict[str, dict[str, float]],
+    model_costs: dict[str, float],
+) -> float | None:
+    model = (model_name or "").strip()
     if not model:
         return None
 
     pricing = model_token_pricing.get(model)
     if pricing:
-        usage = _extract_usage_from_response(run.response_json)
         if usage is not None:
             input_tokens = usage.get("input_tokens", 0.0)
             output_tokens = usage.get("output_tokens", 0.0)
@@ -415,6 +671,10 @@ def _extract_usage_from_response(response_json: str | None) -> dict[str, float]
         payload = json.loads(response_json)
     except json.JSONDecodeError:
         return None
+    return _extract_usage(payload)
+
+
+def _extract_usage(payload: Any) -> dict[str, float] | None:
     if not isinstance(payload, dict):
         return None
     usage = payload.get("usage")
@@ -472,6 +732,16 @@ def _to_non_negative_float(value: Any, key: str) -> float:
     return number
 
 
+def _capability_event_forwarder(
+    job: AIJob,
+    event_callback: Callable[[dict[str, Any]], None] | None,
+) -> Callable[[dict[str, Any]], None]:
+    return lambda event: _emit_event(
+        event_callback,
+        {"type": "capability_event", "job_id": job.id, "capability": job.capability, **event},
+    )
+
+
 def _emit_event(event_callback: Callable[[dict[str, Any]], None] | None, payload: dict[str, Any]) -> None:
     if not event_callback:
         return
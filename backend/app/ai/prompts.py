@@ -1,7 +1,12 @@
+import hashlib
+import json
 import re
-from dataclasses import dataclass
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
 from app.ai.errors import AIServiceError
 
@@ -35,23 +40,182 @@ DEFAULT_PROMPT_VERSIONS = {
 
 _PLACEHOLDER = re.compile(r"\{\{\s*([a-zA-Z0-9_]+)\s*\}\}")
 
+# 提示词 / 静态资产注册表：
+# - 首次使用时读盘并编译成“字面量 + 占位符”片段序列，占位符语法在加载时校验
+# - 之后每次调用只比对文件 mtime（同一文件最多每 ASSET_RELOAD_CHECK_SECONDS 秒 stat 一次），变化才重新加载
+# - 每个 prompt 版本暴露首个占位符之前的稳定前缀及其哈希，供下游做前缀/上下文缓存
+ASSET_RELOAD_CHECK_SECONDS = 1.0
+# 拆分前缀时，变量参数在前缀中的占位说明（原文放在后缀消息里）。
+PROMPT_VARIABLE_REFERENCE = "（{name} 见后续输入消息）"
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    # 偶数下标是字面量，奇数下标是占位符名：[lit0, name0, lit1, name1, ..., litN]
+    segments: tuple[str, ...]
+    placeholders: frozenset[str]
+
+    @property
+    def prefix(self) -> str:
+        return self.segments[0]
+
+    def render(self, context: dict[str, Any]) -> str:
+        segments = self.segments
+        parts: list[str] = [segments[0]]
+        for idx in range(1, len(segments), 2):
+            name = segments[idx]
+            if name not in context:
+                raise AIServiceError(
+                    code="prompt_param_missing",
+                    message=f"Prompt parameter '{name}' is missing.",
+                    http_status=400,
+                )
+            value = context[name]
+            text = str(value if value is not None else "")
+            if "{{" in text and _PLACEHOLDER.search(text):
+                # 与旧实现一致：参数值里残留的模板占位符视为未解析。
+                leftovers = sorted(set(_PLACEHOLDER.findall(text)))
+                raise AIServiceError(
+                    code="prompt_param_unresolved",
+                    message=f"Unresolved prompt parameters: {', '.join(leftovers)}.",
+                    http_status=500,
+                )
+            parts.append(text)
+            parts.append(segments[idx + 1])
+        return "".join(parts)
+
+
+@dataclass(frozen=True)
+class PromptParts:
+    """
+    同一次渲染的两种形态：
+    - full：完整提示词（未启用前缀复用、落 artifact / AIRun 时使用）
+    - prefix + suffix：稳定前缀（指令 + 固定参数，变量位置换成引用说明）与变量后缀（变量参数原文）
+    prefix_hash 只由前缀文本决定，可作为服务端上下文缓存的键。
+    """
+
+    full: str
+    prefix: str
+    suffix: str
+    prefix_hash: str
+
 
 @dataclass
 class PromptBundle:
     key: str
     version: str
     text: str
+    template: CompiledTemplate | None = field(default=None, repr=False, compare=False)
+    prefix_hash: str = ""
 
+    @property
+    def placeholders(self) -> frozenset[str]:
+        return self.compiled().placeholders
 
-def load_prompt(prompt_key: str, prompt_version: str | None = None) -> PromptBundle:
-    version = prompt_version or DEFAULT_PROMPT_VERSIONS.get(prompt_key)
-    if not version:
+    def compiled(self) -> CompiledTemplate:
+        return self.template or compile_template(self.text)
+
+
+@lru_cache(maxsize=256)
+def compile_template(text: str) -> CompiledTemplate:
+    segments: list[str] = []
+    placeholders: set[str] = set()
+    cursor = 0
+    for match in _PLACEHOLDER.finditer(text):
+        literal = text[cursor : match.start()]
+        _validate_literal_segment(literal)
+        segments.append(literal)
+        segments.append(match.group(1))
+        placeholders.add(match.group(1))
+        cursor = match.end()
+    tail = text[cursor:]
+    _validate_literal_segment(tail)
+    segments.append(tail)
+    return CompiledTemplate(segments=tuple(segments), placeholders=frozenset(placeholders))
+
+
+def _validate_literal_segment(literal: str) -> None:
+    if "{{" in literal:
+        snippet = literal[literal.index("{{") :][:40]
         raise AIServiceError(
-            code="prompt_version_missing",
-            message=f"Prompt version is missing for key '{prompt_key}'.",
+            code="prompt_template_invalid",
+            message=f"Malformed prompt placeholder near '{snippet}'.",
             http_status=500,
         )
 
+
+def prompt_prefix_hash(prompt_key: str, version: str, template: CompiledTemplate) -> str:
+    raw = f"{prompt_key}\n{version}\n{template.prefix}".encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+
+@dataclass
+class _AssetEntry:
+    path: Path
+    mtime_ns: int
+    size: int
+    value: Any
+    checked_at: float
+
+
+class _AssetRegistry:
+    def __init__(self) -> None:
+        self._entries: dict[Any, _AssetEntry] = {}
+        self._lock = threading.Lock()
+        self.stats = {"loads": 0, "hits": 0, "stat_checks": 0}
+
+    def get(self, cache_key: Any, path: Path, build: Callable[[Path], Any]) -> Any:
+        now = time.monotonic()
+        entry = self._entries.get(cache_key)
+        if entry is not None and entry.path == path and now - entry.checked_at < ASSET_RELOAD_CHECK_SECONDS:
+            self.stats["hits"] += 1
+            return entry.value
+        try:
+            stat = path.stat()
+        except OSError:
+            stat = None
+        self.stats["stat_checks"] += 1
+        if (
+            entry is not None
+            and stat is not None
+            and entry.path == path
+            and entry.mtime_ns == stat.st_mtime_ns
+            and entry.size == stat.st_size
+        ):
+            entry.checked_at = now
+            self.stats["hits"] += 1
+            return entry.value
+        with self._lock:
+            value = build(path)
+            if stat is not None:
+                self._entries[cache_key] = _AssetEntry(
+                    path=path,
+                    mtime_ns=stat.st_mtime_ns,
+                    size=stat.st_size,
+                    value=value,
+                    checked_at=now,
+                )
+            self.stats["loads"] += 1
+        return value
+
+    def forget(self, cache_key: Any) -> None:
+        with self._lock:
+            self._entries.pop(cache_key, None)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.stats = {"loads": 0, "hits": 0, "stat_checks": 0}
+
+
+_ASSETS = _AssetRegistry()
+_PROMPT_PATHS: dict[tuple[str, str], Path] = {}
+
+
+def _resolve_prompt_path(prompt_key: str, version: str) -> Path:
+    cached = _PROMPT_PATHS.get((prompt_key, version))
+    if cached is not None:
+        return cached
     key_path = Path(*prompt_key.split("."))
     md_path = PROMPTS_ROOT / key_path / f"{version}.md"
     txt_path = PROMPTS_ROOT / key_path / f"{version}.txt"
@@ -62,28 +226,91 @@ def load_prompt(prompt_key: str, prompt_version: str | None = None) -> PromptBun
             message=f"Prompt not found: key={prompt_key}, version={version}.",
             http_status=500,
         )
+    _PROMPT_PATHS[(prompt_key, version)] = path
+    return path
 
-    return PromptBundle(key=prompt_key, version=version, text=path.read_text(encoding="utf-8").strip())
 
+def load_prompt(prompt_key: str, prompt_version: str | None = None) -> PromptBundle:
+    version = prompt_version or DEFAULT_PROMPT_VERSIONS.get(prompt_key)
+    if not version:
+        raise AIServiceError(
+            code="prompt_version_missing",
+            message=f"Prompt version is missing for key '{prompt_key}'.",
+            http_status=500,
+        )
+
+    path = _resolve_prompt_path(prompt_key, version)
 
-def render_prompt(template: str, context: dict[str, Any]) -> str:
-    def _replace(match: re.Match[str]) -> str:
-        name = match.group(1)
-        if name not in context:
+    def _build(prompt_path: Path) -> PromptBundle:
+        try:
+            text = prompt_path.read_text(encoding="utf-8").strip()
+        except FileNotFoundError as e:
+            _PROMPT_PATHS.pop((prompt_key, version), None)
             raise AIServiceError(
-                code="prompt_param_missing",
-                message=f"Prompt parameter '{name}' is missing.",
-                http_status=400,
-            )
-        value = context[name]
-        return str(value if value is not None else "")
-
-    rendered = _PLACEHOLDER.sub(_replace, template)
-    leftovers = _PLACEHOLDER.findall(rendered)
-    if leftovers:
+                code="prompt_not_found",
+                message=f"Prompt not found: key={prompt_key}, version={version}.",
+                http_status=500,
+            ) from e
+        template = compile_template(text)
+        return PromptBundle(
+            key=prompt_key,
+            version=version,
+            text=text,
+            template=template,
+            prefix_hash=prompt_prefix_hash(prompt_key, version, template),
+        )
+
+    return _ASSETS.get(("prompt", prompt_key, version), path, _build)
+
+
+def load_json_asset(path: Path, build: Callable[[Any], Any] | None = None) -> Any:
+    """
+    读取并缓存 JSON 资产（mtime 变化才重新加载）。build 对解析结果做校验/派生，缓存的是 build 的返回值；
+    返回值在进程内共享，调用方只读。
+    """
+
+    def _build(asset_path: Path) -> Any:
+        payload = json.loads(asset_path.read_text(encoding="utf-8"))
+        return build(payload) if build is not None else payload
+
+    return _ASSETS.get(("json", str(path)), path, _build)
+
+
+def render_prompt_parts(bundle: PromptBundle, context: dict[str, Any], *, variable: tuple[str, ...]) -> PromptParts:
+    """按“稳定前缀 + 变量后缀”渲染；variable 中的参数只出现在后缀里，其余参数原位渲染进前缀。"""
+    compiled = bundle.compiled()
+    unknown = [name for name in variable if name not in compiled.placeholders]
+    if unknown:
         raise AIServiceError(
-            code="prompt_param_unresolved",
-            message=f"Unresolved prompt parameters: {', '.join(sorted(set(leftovers)))}.",
+            code="prompt_param_unknown",
+            message=f"Prompt '{bundle.key}' has no parameter(s): {', '.join(unknown)}.",
             http_status=500,
         )
-    return rendered
+    full = compiled.render(context)
+    stable_context = {name: value for name, value in context.items() if name not in variable}
+    for name in variable:
+        stable_context[name] = PROMPT_VARIABLE_REFERENCE.format(name=name)
+    prefix = compiled.render(stable_context)
+    suffix = "\n\n".join(
+        f"{name}:\n{'' if context.get(name) is None else context.get(name)}" for name in variable
+    )
+    prefix_hash = hashlib.sha256(f"{bundle.key}\n{bundle.version}\n{prefix}".encode("utf-8")).hexdigest()
+    return PromptParts(full=full, prefix=prefix, suffix=suffix, prefix_hash=prefix_hash)
+
+
+def render_prompt(template: "str | PromptBundle", context: dict[str, Any]) -> str:
+    if isinstance(template, PromptBundle):
+        compiled = template.compiled()
+    else:
+        compiled = compile_template(template)
+    return compiled.render(context)
+
+
+def prompt_registry_stats() -> dict[str, int]:
+    return dict(_ASSETS.stats)
+
+
+def reset_prompt_registry() -> None:
+    _ASSETS.reset()
+    _PROMPT_PATHS.clear()
+    compile_template.cache_clear()
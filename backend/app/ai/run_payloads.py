@@ -0,0 +1,104 @@
+import hashlib
+import zlib
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from app.db.models import AIPayloadBlob, AIRun
+from app.services.storage import now_iso
+from app.settings import settings
+
+# AIRun 请求 / 响应体的行外存储：
+# - 不超过 ai_run_payload_inline_max_bytes 的 JSON 文本照旧内联在 ai_runs
+# - 更大的按 sha256 内容寻址写入 ai_payload_blobs（zlib 压缩），ai_runs 只留摘要；相同内容只存一份
+# - 列表 / 指标查询不读正文，查看单个 run（或显式要求载荷）时才批量取回并解压
+AI_PAYLOAD_CODEC_ZLIB = "zlib"
+AI_PAYLOAD_ZLIB_LEVEL = 6
+
+
+@dataclass(frozen=True)
+class StoredRunPayload:
+    inline: str | None
+    digest: str | None
+
+
+def put_run_payload(db: Session, text: str | None) -> StoredRunPayload:
+    if text is None:
+        return StoredRunPayload(inline=None, digest=None)
+    raw = text.encode("utf-8")
+    if len(raw) <= max(0, int(settings.ai_run_payload_inline_max_bytes)):
+        return StoredRunPayload(inline=text, digest=None)
+    digest = hashlib.sha256(raw).hexdigest()
+    body = zlib.compress(raw, AI_PAYLOAD_ZLIB_LEVEL)
+    _insert_blob_if_absent(
+        db,
+        {
+            "digest": digest,
+            "codec": AI_PAYLOAD_CODEC_ZLIB,
+            "raw_bytes": len(raw),
+            "stored_bytes": len(body),
+            "body": body,
+            "created_at": now_iso(),
+        },
+    )
+    # request_json 历史上是 NOT NULL：行外存储时内联列统一留空串，以 digest 为准。
+    return StoredRunPayload(inline="", digest=digest)
+
+
+def load_run_payload_texts(db: Session, runs: Iterable[AIRun]) -> dict[str, tuple[str | None, str | None]]:
+    """批量取回 run 的 (request_json, response_json) 文本，按 run.id 返回；一页 run 只查一次 blob 表。"""
+    items = list(runs)
+    digests = {d for run in items for d in (run.request_digest, run.response_digest) if d}
+    blobs = _load_blob_texts(db, digests)
+    out: dict[str, tuple[str | None, str | None]] = {}
+    for run in items:
+        request_text = blobs.get(run.request_digest) if run.request_digest else run.request_json
+        response_text = blobs.get(run.response_digest) if run.response_digest else run.response_json
+        out[run.id] = (request_text, response_text)
+    return out
+
+
+def describe_run_payload_storage(db: Session) -> dict[str, Any]:
+    blob_count, raw_bytes, stored_bytes = db.execute(
+        select(
+            func.count(AIPayloadBlob.digest),
+            func.coalesce(func.sum(AIPayloadBlob.raw_bytes), 0),
+            func.coalesce(func.sum(AIPayloadBlob.stored_bytes), 0),
+        )
+    ).one()
+    return {
+        "blobs": int(blob_count or 0),
+        "raw_bytes": int(raw_bytes or 0),
+        "stored_bytes": int(stored_bytes or 0),
+    }
+
+
+def _load_blob_texts(db: Session, digests: set[str]) -> dict[str, str]:
+    if not digests:
+        return {}
+    rows = db.execute(
+        select(AIPayloadBlob.digest, AIPayloadBlob.codec, AIPayloadBlob.body).where(AIPayloadBlob.digest.in_(sorted(digests)))
+    ).all()
+    return {digest: _decode_blob(codec, body) for digest, codec, body in rows}
+
+
+def _decode_blob(codec: str, body: bytes) -> str:
+    if codec == AI_PAYLOAD_CODEC_ZLIB:
+        return zlib.decompress(body).decode("utf-8")
+    raise ValueError(f"Unsupported AI payload codec: {codec!r}.")
+
+
+def _insert_blob_if_absent(db: Session, values: dict[str, Any]) -> None:
+    # 并发写同一内容（重跑同一 job、并发批量构建）时由主键冲突去重，不能让任务失败。
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        if db.get(AIPayloadBlob, values["digest"]) is None:
+            db.execute(insert(AIPayloadBlob).values(**values))
+        return
+    db.execute(dialect_insert(AIPayloadBlob).values(**values).on_conflict_do_nothing(index_elements=["digest"]))
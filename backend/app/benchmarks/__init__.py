@@ -0,0 +1 @@
+"""Reproducible benchmark harness: deterministic data generators and JSON-emitting scenarios."""
@@ -0,0 +1,395 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterator
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.constants import MOBILE_RULES_VERSION, VALID_CATEGORIES
+from app.db.models import (
+    MobileClientEvent,
+    MobileSelectionSession,
+    ProductAnalysisIndex,
+    ProductIndex,
+    ProductRouteMappingIndex,
+)
+from app.domain.mobile.decision import load_mobile_decision_category_config
+from app.services.storage import save_product_analysis, save_product_json
+
+# 基准数据生成：
+# - 全部由 seed + 规模参数决定（random.Random，不读当前时间 / uuid），同一参数在任意机器上生成完全相同的数据，
+#   跨提交的基准结果才有可比性
+# - 时间戳从固定基准时刻 BASE_TIME 往后推；分析接口用 analytics_window() 给出的日期区间查询
+# - 产品 / 成分 / 路线映射 / 产品分析与线上结构一致，走真实路由与服务代码，不打桩
+BASE_TIME = datetime(2026, 3, 1, tzinfo=timezone.utc)
+EVENT_WINDOW_DAYS = 30
+_BATCH_ROWS = 2000
+
+# 事件名按线上大致分布加权：浏览类最多，错误 / 卡顿类少量
+_EVENT_NAMES: tuple[tuple[str, int], ...] = (
+    ("page_view", 30),
+    ("wiki_list_view", 10),
+    ("wiki_product_click", 8),
+    ("wiki_ingredient_click", 4),
+    ("choose_view", 6),
+    ("choose_start_click", 4),
+    ("compare_run_start", 3),
+    ("compare_stage_progress", 6),
+    ("compare_result_view", 3),
+    ("compare_result_cta_click", 2),
+    ("compare_result_cta_land", 2),
+    ("compare_result_leave", 2),
+    ("scroll_depth", 8),
+    ("feedback_prompt_show", 2),
+    ("compare_stage_error", 1),
+    ("stall_detected", 1),
+    ("rage_click", 1),
+)
+_EVENT_PAGES = ("home", "wiki_list", "wiki_product_detail", "choose", "compare", "compare_result", "me")
+_EVENT_STAGES = ("uploading", "analyzing", "comparing", "done")
+_ERROR_CODES = ("upload_timeout", "compare_failed", "network_error", "image_invalid")
+_BROWSERS = ("safari", "chrome", "wechat", "edge")
+_OS = ("ios", "android", "windows", "macos")
+_NETWORKS = ("wifi", "4g", "5g", "3g")
+
+
+@dataclass(frozen=True)
+class SyntheticProduct:
+    product_id: str
+    category: str
+    route_key: str
+    route_title: str
+
+
+@dataclass
+class SyntheticCatalog:
+    products: list[SyntheticProduct] = field(default_factory=list)
+    vocabulary: list[str] = field(default_factory=list)
+
+    def product_ids(self, category: str | None = None) -> list[str]:
+        return [item.product_id for item in self.products if category is None or item.category == category]
+
+    def categories(self) -> list[str]:
+        return sorted({item.category for item in self.products})
+
+
+def _iso(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def _stable_hex(*parts: Any, length: int = 32) -> str:
+    return hashlib.sha1("::".join(str(part) for part in parts).encode("utf-8")).hexdigest()[:length]
+
+
+def analytics_window() -> tuple[str, str]:
+    """生成事件覆盖的日期区间（date_from / date_to 查询参数）。"""
+    return BASE_TIME.strftime("%Y-%m-%d"), (BASE_TIME + timedelta(days=EVENT_WINDOW_DAYS - 1)).strftime("%Y-%m-%d")
+
+
+def route_candidates(category: str) -> list[tuple[str, str]]:
+    config = load_mobile_decision_category_config(category)
+    return sorted(config.route_titles.items())
+
+
+def ingredient_vocabulary(size: int) -> list[str]:
+    return [f"基准成分{idx:05d}" for idx in range(max(1, int(size)))]
+
+
+def synthetic_product_doc(idx: int, *, category: str, vocabulary: list[str], ingredients_per_product: int, seed: int) -> dict[str, Any]:
+    rng = random.Random(f"{seed}:product:{idx}")
+    picked = rng.sample(vocabulary, k=min(max(1, int(ingredients_per_product)), len(vocabulary)))
+    return {
+        "product": {"category": category, "brand": f"品牌{idx % 97:02d}", "name": f"基准款{idx:06d}"},
+        "summary": {
+            "one_sentence": f"基准产品 {idx}",
+            "pros": ["温和清洁"],
+            "cons": [],
+            "who_for": ["日常使用"],
+            "who_not_for": [],
+        },
+        "ingredients": [
+            {
+                "name": name,
+                "type": "功能成分",
+                "functions": ["清洁", "保湿"] if rank % 2 else ["舒缓"],
+                "risk": "low",
+                "notes": "",
+                "rank": rank,
+                "abundance_level": "major" if rank <= 3 else "trace",
+                "order_confidence": 90,
+            }
+            for rank, name in enumerate(picked, start=1)
+        ],
+        "evidence": {"doubao_raw": ""},
+    }
+
+
+def seed_catalog(
+    SessionLocal: sessionmaker,
+    *,
+    products: int,
+    seed: int,
+    ingredients_per_product: int = 12,
+    vocabulary_size: int = 400,
+    categories: list[str] | None = None,
+) -> SyntheticCatalog:
+    """产品 + 产品 JSON + 路线映射 + 产品分析（wiki / 选型 / 结果构建需要的全部前置数据）。"""
+    targets = sorted(categories or VALID_CATEGORIES)
+    vocabulary = ingredient_vocabulary(vocabulary_size)
+    routes = {category: route_candidates(category) for category in targets}
+    catalog = SyntheticCatalog(vocabulary=vocabulary)
+    rng = random.Random(f"{seed}:catalog")
+    with SessionLocal() as db:
+        for idx in range(max(1, int(products))):
+            category = targets[idx % len(targets)]
+            product_id = f"bench-{category}-{idx:06d}"
+            candidates = routes[category]
+            primary_key, primary_title = candidates[idx % len(candidates)]
+            created_at = _iso(BASE_TIME - timedelta(minutes=idx))
+            doc = synthetic_product_doc(
+                idx,
+                category=category,
+                vocabulary=vocabulary,
+                ingredients_per_product=ingredients_per_product,
+                seed=seed,
+            )
+            json_path = save_product_json(product_id, doc, category=category)
+            analysis_path = save_product_analysis(category, product_id, {"product_id": product_id, "profile": {}})
+            scores = [
+                {"route_key": key, "route_title": title, "confidence": 90 if key == primary_key else rng.randint(5, 70), "reason": "bench"}
+                for key, title in candidates
+            ]
+            db.add(
+                ProductIndex(
+                    id=product_id,
+                    category=category,
+                    brand=doc["product"]["brand"],
+                    name=doc["product"]["name"],
+                    one_sentence=doc["summary"]["one_sentence"],
+                    tags_json="[]",
+                    image_path=None,
+                    json_path=json_path,
+                    created_at=created_at,
+                )
+            )
+            db.add(
+                ProductRouteMappingIndex(
+                    product_id=product_id,
+                    category=category,
+                    rules_version=MOBILE_RULES_VERSION,
+                    fingerprint=_stable_hex("mapping", product_id),
+                    status="ready",
+                    primary_route_key=primary_key,
+                    primary_route_title=primary_title,
+                    primary_confidence=90,
+                    scores_json=json.dumps(scores, ensure_ascii=False),
+                    last_generated_at=created_at,
+                )
+            )
+            db.add(
+                ProductAnalysisIndex(
+                    product_id=product_id,
+                    category=category,
+                    rules_version=MOBILE_RULES_VERSION,
+                    fingerprint=_stable_hex("analysis", product_id),
+                    status="ready",
+                    storage_path=analysis_path,
+                    route_key=primary_key,
+                    route_title=primary_title,
+                    headline=f"基准分析 {idx}",
+                    last_generated_at=created_at,
+                )
+            )
+            catalog.products.append(
+                SyntheticProduct(product_id=product_id, category=category, route_key=primary_key, route_title=primary_title)
+            )
+            if (idx + 1) % _BATCH_ROWS == 0:
+                db.commit()
+        db.commit()
+    return catalog
+
+
+def synthetic_image_bytes(idx: int, *, seed: int, size: int = 512, fmt: str = "JPEG") -> bytes:
+    """确定性图片：低频渐变 + 固定噪声块，编码后体积接近真实商品照片（纯色图压缩率过高，测不出编码开销）。"""
+    from PIL import Image
+
+    rng = random.Random(f"{seed}:image:{idx}")
+    side = max(16, int(size))
+    image = Image.linear_gradient("L").resize((side, side)).convert("RGB")
+    tile = max(8, side // 16)
+    noise = Image.frombytes("RGB", (tile, tile), rng.randbytes(tile * tile * 3)).resize((side, side), Image.NEAREST)
+    blended = Image.blend(image, noise, 0.35)
+    out = io.BytesIO()
+    blended.save(out, format=fmt, quality=90)
+    return out.getvalue()
+
+
+def _weighted_names() -> tuple[list[str], list[int]]:
+    return [name for name, _ in _EVENT_NAMES], [weight for _, weight in _EVENT_NAMES]
+
+
+def iter_mobile_client_events(
+    count: int,
+    *,
+    seed: int,
+    product_ids: list[str],
+    owners: int = 5000,
+) -> Iterator[dict[str, Any]]:
+    """按 seed 生成埋点事件行（dict，可直接用于 Core 批量 insert）；时间在 EVENT_WINDOW_DAYS 内单调递增。"""
+    rng = random.Random(f"{seed}:events")
+    names, weights = _weighted_names()
+    total = max(0, int(count))
+    span_seconds = EVENT_WINDOW_DAYS * 86400
+    owner_pool = max(1, int(owners))
+    for idx in range(total):
+        owner = rng.randrange(owner_pool)
+        name = rng.choices(names, weights=weights, k=1)[0]
+        product_id = rng.choice(product_ids) if product_ids and rng.random() < 0.6 else None
+        category = product_id.split("-")[1] if product_id else None
+        is_error = name in {"compare_stage_error", "stall_detected"}
+        created = BASE_TIME + timedelta(seconds=span_seconds * idx / max(1, total))
+        props = {
+            "client_ts": _iso(created),
+            "browser_family": rng.choice(_BROWSERS),
+            "os_family": rng.choice(_OS),
+            "device_type": "phone",
+            "network_type": rng.choice(_NETWORKS),
+            "lang": "zh-CN",
+        }
+        yield {
+            "event_id": _stable_hex(seed, "event", idx, length=32),
+            "owner_type": "device",
+            "owner_id": f"bench-owner-{owner:05d}",
+            "session_id": f"bench-sess-{owner:05d}-{idx // 40}",
+            "name": name,
+            "page": rng.choice(_EVENT_PAGES),
+            "route": f"/m/wiki/product/{product_id}" if product_id else "/m",
+            "source": "bench",
+            "category": category,
+            "product_id": product_id,
+            "compare_id": f"bench-cmp-{owner:05d}" if name.startswith("compare_") else None,
+            "stage": rng.choice(_EVENT_STAGES) if name.startswith("compare_stage") else None,
+            "dwell_ms": rng.randint(200, 60000) if name in {"page_view", "compare_result_leave"} else None,
+            "error_code": rng.choice(_ERROR_CODES) if is_error else None,
+            "http_status": 500 if name == "compare_stage_error" else None,
+            "props_json": json.dumps(props, ensure_ascii=False),
+            "created_at": _iso(created),
+        }
+
+
+def seed_mobile_client_events(SessionLocal: sessionmaker, count: int, *, seed: int, product_ids: list[str]) -> int:
+    """Core executemany 分批写入（百万级事件走 ORM 会慢一个数量级）。"""
+    table = MobileClientEvent.__table__
+    written = 0
+    batch: list[dict[str, Any]] = []
+    with SessionLocal() as db:
+        for row in iter_mobile_client_events(count, seed=seed, product_ids=product_ids):
+            batch.append(row)
+            if len(batch) >= _BATCH_ROWS * 5:
+                written += _flush_events(db, table, batch)
+        written += _flush_events(db, table, batch)
+    return written
+
+
+def _flush_events(db: Session, table: Any, batch: list[dict[str, Any]]) -> int:
+    if not batch:
+        return 0
+    db.execute(insert(table), batch)
+    db.commit()
+    size = len(batch)
+    batch.clear()
+    return size
+
+
+def seed_selection_sessions(
+    SessionLocal: sessionmaker,
+    count: int,
+    *,
+    seed: int,
+    catalog: SyntheticCatalog,
+    owners: int = 2000,
+) -> int:
+    """历史选型会话：答案组合取真实矩阵枚举，结果载荷与 /selection/resolve 写入的结构一致。"""
+    from app.routes import mobile_selection as selection_routes
+    from app.schemas import (
+        MobileSelectionChoice,
+        MobileSelectionLinks,
+        MobileSelectionMatrixAnalysis,
+        MobileSelectionResolveResponse,
+        MobileSelectionRoute,
+        MobileSelectionRuleHit,
+    )
+    from app.services.mobile_selection_result_builder import _enumerate_selection_answers
+
+    rng = random.Random(f"{seed}:sessions")
+    categories = catalog.categories()
+    answers_by_category = {category: _enumerate_selection_answers(category) for category in categories}
+    by_route: dict[tuple[str, str], list[str]] = {}
+    for product in catalog.products:
+        by_route.setdefault((product.category, product.route_key), []).append(product.product_id)
+    templates: dict[tuple[str, int], tuple[dict[str, Any], dict[str, Any], str]] = {}
+    written = 0
+    with SessionLocal() as db:
+        for idx in range(max(0, int(count))):
+            category = categories[idx % len(categories)]
+            choice = rng.randrange(len(answers_by_category[category]))
+            key = (category, choice)
+            if key not in templates:
+                resolved = selection_routes._resolve_selection(category=category, answers=answers_by_category[category][choice])
+                candidates = by_route.get((category, str(resolved["route_key"]))) or catalog.product_ids(category)
+                product = selection_routes._row_to_product_card(db.get(ProductIndex, candidates[0]))
+                payload = MobileSelectionResolveResponse(
+                    status="ok",
+                    session_id="template",
+                    reused=False,
+                    is_pinned=False,
+                    pinned_at=None,
+                    category=category,
+                    rules_version=MOBILE_RULES_VERSION,
+                    route=MobileSelectionRoute(key=resolved["route_key"], title=resolved["route_title"]),
+                    choices=[MobileSelectionChoice.model_validate(item) for item in resolved["choices"]],
+                    rule_hits=[MobileSelectionRuleHit.model_validate(item) for item in resolved["rule_hits"]],
+                    recommendation_source="route_mapping",
+                    matrix_analysis=MobileSelectionMatrixAnalysis.model_validate(resolved.get("matrix_analysis") or {}),
+                    recommended_product=product,
+                    links=MobileSelectionLinks(product=f"/product/{product.id}", wiki=resolved["wiki_href"]),
+                    created_at=_iso(BASE_TIME),
+                ).model_dump()
+                answers_hash = selection_routes._build_answers_hash(category=category, answers=resolved["answers"])
+                templates[key] = (resolved, payload, answers_hash)
+            resolved, payload, answers_hash = templates[key]
+            session_id = _stable_hex(seed, "session", idx, length=32)
+            created_at = _iso(BASE_TIME + timedelta(seconds=idx * 7))
+            pinned = rng.random() < 0.05
+            db.add(
+                MobileSelectionSession(
+                    id=session_id,
+                    owner_type="device",
+                    owner_id=f"bench-owner-{rng.randrange(max(1, int(owners))):05d}",
+                    category=category,
+                    rules_version=MOBILE_RULES_VERSION,
+                    answers_hash=answers_hash,
+                    route_key=resolved["route_key"],
+                    route_title=resolved["route_title"],
+                    product_id=payload["recommended_product"]["id"],
+                    answers_json=json.dumps(resolved["answers"], ensure_ascii=False),
+                    result_json=json.dumps(
+                        {**payload, "session_id": session_id, "created_at": created_at, "is_pinned": pinned},
+                        ensure_ascii=False,
+                    ),
+                    is_pinned=pinned,
+                    pinned_at=created_at if pinned else None,
+                    created_at=created_at,
+                )
+            )
+            written += 1
+            if written % _BATCH_ROWS == 0:
+                db.commit()
+        db.commit()
+    return written
@@ -0,0 +1,369 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from contextlib import ExitStack, contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+from fastapi import FastAPI
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+from app.benchmarks.generators import (
+    SyntheticCatalog,
+    seed_catalog,
+    seed_mobile_client_events,
+    seed_selection_sessions,
+    synthetic_image_bytes,
+)
+from app.db import runtime_schema
+from app.db.session import _engine_kwargs_for, get_db, install_sqlite_performance_mode
+from app.services.fake_responses_provider import FakeResponsesProvider
+from app.settings import settings
+
+# 基准 harness：
+# - BenchParams 决定全部生成数据与假模型延迟；同一参数 + 同一提交的两次运行只差机器噪声
+# - 每个场景 = 一次可重复的调用（HTTP 路由走进程内 ASGI，服务函数直接调用），先预热再计 rounds 轮
+# - 结果 JSON 沿用 pytest-benchmark 的结构（machine_info / commit_info / benchmarks[].stats），
+#   compare_results 按中位数对比两次结果并标出回归
+# - 运行期间改动的 settings / 模块属性全部在 ExitStack 里恢复，可以在测试进程里跑
+RESULT_VERSION = "bench-suite.v1"
+
+
+@dataclass(frozen=True)
+class BenchParams:
+    products: int = 1000
+    events: int = 100_000
+    sessions: int = 10_000
+    images: int = 16
+    image_size: int = 512
+    ingredients_per_product: int = 12
+    vocabulary: int = 400
+    model_latency_ms: float = 20.0
+    model_latency_jitter_ms: float = 5.0
+    seed: int = 20261019
+    rounds: int | None = None
+
+
+@dataclass
+class BenchEnv:
+    params: BenchParams
+    root: Path
+    engine: Engine
+    SessionLocal: sessionmaker
+    app: FastAPI
+    catalog: SyntheticCatalog
+    provider: FakeResponsesProvider
+    images: list[bytes]
+    state: dict[str, Any] = field(default_factory=dict)
+    _loop: asyncio.AbstractEventLoop | None = None
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        *,
+        query: str = "",
+        json_body: Any = None,
+        headers: dict[str, str] | None = None,
+    ) -> tuple[int, bytes]:
+        """进程内 ASGI 调用（不经过 TestClient 的线程桥接），返回 (status, body)。"""
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(_asgi_call(self.app, method, path, query, json_body, headers or {}))
+
+    def close(self) -> None:
+        if self._loop is not None:
+            self._loop.close()
+            self._loop = None
+        self.engine.dispose()
+
+
+async def _asgi_call(
+    app: FastAPI,
+    method: str,
+    path: str,
+    query: str,
+    json_body: Any,
+    headers: dict[str, str],
+) -> tuple[int, bytes]:
+    body = b"" if json_body is None else json.dumps(json_body, ensure_ascii=False).encode("utf-8")
+    raw_headers = [(b"host", b"bench")] + [(key.lower().encode("latin-1"), value.encode("latin-1")) for key, value in headers.items()]
+    if json_body is not None:
+        raw_headers += [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": raw_headers,
+        "client": ("127.0.0.1", 1),
+        "server": ("bench", 80),
+    }
+    status = 0
+    chunks: list[bytes] = []
+    sent = False
+
+    async def receive() -> dict[str, Any]:
+        nonlocal sent
+        if sent:
+            return {"type": "http.disconnect"}
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message: dict[str, Any]) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = int(message["status"])
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, b"".join(chunks)
+
+
+def _set(stack: ExitStack, target: Any, name: str, value: Any) -> None:
+    previous = getattr(target, name)
+    setattr(target, name, value)
+    stack.callback(setattr, target, name, previous)
+
+
+def _build_app(SessionLocal: sessionmaker) -> FastAPI:
+    from app.routes.mobile import router as mobile_router
+    from app.routes.products import router as products_router
+
+    app = FastAPI()
+    app.include_router(products_router)
+    app.include_router(mobile_router)
+
+    def override_get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    return app
+
+
+@contextmanager
+def bench_environment(params: BenchParams, root: Path) -> Iterator[BenchEnv]:
+    """建库、生成数据、装上假模型；退出时恢复全部全局状态。"""
+    from app.ai import orchestrator
+    from app.routes import products as products_routes
+    from app.services import doubao_openai_client
+
+    with ExitStack() as stack:
+        _set(stack, settings, "storage_dir", str(root / "storage"))
+        _set(stack, settings, "user_storage_dir", str(root / "user_storage"))
+        _set(stack, settings, "doubao_mode", "real")
+        _set(stack, settings, "doubao_api_key", settings.doubao_api_key or "bench-key")
+        _set(stack, settings, "doubao_max_retries", 0)
+        _set(stack, settings, "doubao_prompt_prefix_cache_enabled", False)
+        (root / "storage").mkdir(parents=True, exist_ok=True)
+        (root / "user_storage").mkdir(parents=True, exist_ok=True)
+
+        url = f"sqlite:///{root / 'bench.db'}"
+        engine = create_engine(url, **_engine_kwargs_for(url))
+        install_sqlite_performance_mode(engine)
+        runtime_schema.apply_runtime_schema(engine)
+        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        _set(stack, products_routes, "SessionLocal", SessionLocal)
+        # SQLite 单写者：构建流程的主事务持有写锁时，worker 线程里编排器的 AIJob/AIRun 提交会一直等到
+        # busy_timeout（PostgreSQL 没有这个限制）。编排器记录放到独立库文件，仍然照常落库。
+        jobs_url = f"sqlite:///{root / 'bench_ai_jobs.db'}"
+        jobs_engine = create_engine(jobs_url, **_engine_kwargs_for(jobs_url))
+        install_sqlite_performance_mode(jobs_engine)
+        runtime_schema.apply_runtime_schema(jobs_engine)
+        stack.callback(jobs_engine.dispose)
+        _set(stack, orchestrator, "SessionLocal", sessionmaker(autocommit=False, autoflush=False, bind=jobs_engine))
+
+        provider = FakeResponsesProvider(
+            latency_seconds=max(0.0, params.model_latency_ms) / 1000,
+            latency_jitter_seconds=max(0.0, params.model_latency_jitter_ms) / 1000,
+            seed=params.seed,
+        )
+        _set(stack, doubao_openai_client, "OpenAI", lambda **_kwargs: provider)
+        doubao_openai_client.reset_prefix_response_cache()
+
+        catalog = seed_catalog(
+            SessionLocal,
+            products=params.products,
+            seed=params.seed,
+            ingredients_per_product=params.ingredients_per_product,
+            vocabulary_size=params.vocabulary,
+        )
+        seed_selection_sessions(SessionLocal, params.sessions, seed=params.seed, catalog=catalog)
+        seed_mobile_client_events(SessionLocal, params.events, seed=params.seed, product_ids=catalog.product_ids())
+        images = [synthetic_image_bytes(idx, seed=params.seed, size=params.image_size) for idx in range(max(1, params.images))]
+        env = BenchEnv(
+            params=params,
+            root=root,
+            engine=engine,
+            SessionLocal=SessionLocal,
+            app=_build_app(SessionLocal),
+            catalog=catalog,
+            provider=provider,
+            images=images,
+        )
+        stack.callback(env.close)
+        yield env
+
+
+def summarize(samples: list[float]) -> dict[str, Any]:
+    """pytest-benchmark 同名字段（秒）。"""
+    ordered = sorted(samples)
+    count = len(ordered)
+    if count >= 2:
+        q1, _median, q3 = statistics.quantiles(ordered, n=4, method="inclusive")
+    else:
+        q1 = q3 = ordered[0]
+    mean = statistics.fmean(ordered)
+    return {
+        "min": ordered[0],
+        "max": ordered[-1],
+        "mean": mean,
+        "stddev": statistics.stdev(ordered) if count >= 2 else 0.0,
+        "median": statistics.median(ordered),
+        "q1": q1,
+        "q3": q3,
+        "iqr": q3 - q1,
+        "rounds": count,
+        "iterations": 1,
+        "total": sum(ordered),
+        "ops": (1.0 / mean) if mean > 0 else None,
+    }
+
+
+def measure(fn: Callable[[int], Any], *, rounds: int, warmup: int) -> tuple[list[float], Any]:
+    last: Any = None
+    for idx in range(max(0, warmup)):
+        last = fn(idx)
+    samples: list[float] = []
+    for idx in range(max(1, rounds)):
+        started = time.perf_counter()
+        last = fn(warmup + idx)
+        samples.append(time.perf_counter() - started)
+    return samples, last
+
+
+def machine_info() -> dict[str, Any]:
+    return {
+        "node": platform.node(),
+        "processor": platform.processor(),
+        "machine": platform.machine(),
+        "python_implementation": platform.python_implementation(),
+        "python_version": platform.python_version(),
+        "system": platform.system(),
+        "release": platform.release(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def commit_info(cwd: Path | None = None) -> dict[str, Any]:
+    def git(*args: str) -> str:
+        try:
+            out = subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True, timeout=10, check=False)
+        except (OSError, subprocess.SubprocessError):
+            return ""
+        return out.stdout.strip() if out.returncode == 0 else ""
+
+    return {
+        "id": git("rev-parse", "HEAD") or None,
+        "branch": git("rev-parse", "--abbrev-ref", "HEAD") or None,
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+    }
+
+
+def run_scenarios(env: BenchEnv, names: list[str] | None = None) -> list[dict[str, Any]]:
+    from app.benchmarks.scenarios import SCENARIOS
+
+    selected = names or list(SCENARIOS)
+    unknown = [name for name in selected if name not in SCENARIOS]
+    if unknown:
+        raise ValueError(f"unknown benchmark scenario(s): {', '.join(unknown)}")
+    results: list[dict[str, Any]] = []
+    for name in selected:
+        scenario = SCENARIOS[name]
+        rounds = env.params.rounds or scenario.rounds
+        entry: dict[str, Any] = {
+            "name": scenario.name,
+            "group": scenario.group,
+            "fullname": f"{scenario.group}::{scenario.name}",
+            "params": {"rounds": rounds, "warmup": scenario.warmup},
+            "extra_info": {},
+        }
+        try:
+            if scenario.setup is not None:
+                scenario.setup(env)
+            samples, last = measure(lambda idx: scenario.run(env, idx), rounds=rounds, warmup=scenario.warmup)
+            entry["stats"] = summarize(samples)
+            if scenario.describe is not None:
+                entry["extra_info"] = scenario.describe(env, last)
+        except Exception as exc:  # 单个场景失败（例如规模超出某条路径的上限）不影响其余场景
+            entry["stats"] = None
+            entry["error"] = f"{type(exc).__name__}: {exc}"
+        results.append(entry)
+    return results
+
+
+def run_suite(params: BenchParams, root: Path, names: list[str] | None = None) -> dict[str, Any]:
+    started = time.perf_counter()
+    with bench_environment(params, root) as env:
+        seed_seconds = time.perf_counter() - started
+        benchmarks = run_scenarios(env, names)
+        fake_model = dict(env.provider.stats)
+    return {
+        "version": RESULT_VERSION,
+        "datetime": datetime.now(timezone.utc).isoformat(),
+        "machine_info": machine_info(),
+        "commit_info": commit_info(Path(__file__).resolve().parent),
+        "params": asdict(params),
+        "seed_seconds": round(seed_seconds, 3),
+        "fake_model": fake_model,
+        "benchmarks": benchmarks,
+    }
+
+
+def compare_results(baseline: dict[str, Any], current: dict[str, Any], *, max_regression_pct: float) -> dict[str, Any]:
+    """按场景中位数对比两次结果；中位数比基线慢超过 max_regression_pct 记为回归。"""
+    base_by_name = {item["fullname"]: item for item in baseline.get("benchmarks") or [] if item.get("stats")}
+    rows: list[dict[str, Any]] = []
+    for item in current.get("benchmarks") or []:
+        base = base_by_name.get(item["fullname"])
+        if base is None or not item.get("stats"):
+            continue
+        before = float(base["stats"]["median"])
+        after = float(item["stats"]["median"])
+        change_pct = (after - before) / before * 100 if before > 0 else 0.0
+        rows.append(
+            {
+                "name": item["fullname"],
+                "baseline_median_ms": round(before * 1000, 3),
+                "current_median_ms": round(after * 1000, 3),
+                "change_pct": round(change_pct, 2),
+                "regressed": change_pct > max_regression_pct,
+            }
+        )
+    return {
+        "baseline_commit": (baseline.get("commit_info") or {}).get("id"),
+        "params_match": baseline.get("params") == current.get("params"),
+        "max_regression_pct": max_regression_pct,
+        "scenarios": rows,
+        "regressions": [row["name"] for row in rows if row["regressed"]],
+    }
@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from app.benchmarks.generators import analytics_window
+from app.benchmarks.harness import BenchEnv
+
+# 场景注册表：名称 → 一次可重复调用。覆盖目前没有任何测量的热路径：
+# - HTTP：/mobile/wiki/products、/mobile/selection/resolve、后台埋点分析接口
+# - 服务：build_mobile_selection_results、成分库构建（经假豆包端点，延迟由 BenchParams 控制）
+# - 存储：save_image（真实 Pillow 编码 + 落盘）
+# 场景之间共享同一份生成数据；会写库的场景（resolve / 构建）放在只读场景之后，避免影响读路径的结果。
+
+
+@dataclass(frozen=True)
+class BenchScenario:
+    name: str
+    group: str
+    run: Callable[[BenchEnv, int], Any]
+    rounds: int = 30
+    warmup: int = 2
+    setup: Callable[[BenchEnv], None] | None = None
+    describe: Callable[[BenchEnv, Any], dict[str, Any]] | None = None
+
+
+SCENARIOS: dict[str, BenchScenario] = {}
+
+
+def scenario(
+    name: str,
+    group: str,
+    *,
+    rounds: int = 30,
+    warmup: int = 2,
+    setup: Callable[[BenchEnv], None] | None = None,
+    describe: Callable[[BenchEnv, Any], dict[str, Any]] | None = None,
+):
+    def register(fn: Callable[[BenchEnv, int], Any]) -> Callable[[BenchEnv, int], Any]:
+        SCENARIOS[name] = BenchScenario(
+            name=name, group=group, run=fn, rounds=rounds, warmup=warmup, setup=setup, describe=describe
+        )
+        return fn
+
+    return register
+
+
+def _ok(status: int, body: bytes, what: str) -> dict[str, Any]:
+    if status != 200:
+        raise RuntimeError(f"{what} returned HTTP {status}: {body[:300]!r}")
+    return json.loads(body)
+
+
+def _category(env: BenchEnv, idx: int) -> str:
+    categories = env.catalog.categories()
+    return categories[idx % len(categories)]
+
+
+# ---------- HTTP：只读 ----------
+
+
+@scenario(
+    "mobile_wiki_products",
+    "http",
+    describe=lambda env, out: {"total": out["total"], "items": len(out["items"])},
+)
+def _mobile_wiki_products(env: BenchEnv, idx: int) -> dict[str, Any]:
+    status, body = env.request("GET", "/api/mobile/wiki/products", query=f"category={_category(env, idx)}&limit=20")
+    return _ok(status, body, "/api/mobile/wiki/products")
+
+
+def _analytics(path: str):
+    def run(env: BenchEnv, idx: int) -> dict[str, Any]:
+        date_from, date_to = analytics_window()
+        status, body = env.request("GET", path, query=f"date_from={date_from}&date_to={date_to}")
+        return _ok(status, body, path)
+
+    return run
+
+
+for _name in ("overview", "funnel", "errors", "experience"):
+    scenario(f"mobile_analytics_{_name}", "http", rounds=10, warmup=1)(
+        _analytics(f"/api/products/analytics/mobile/{_name}")
+    )
+
+
+# ---------- 存储 ----------
+
+
+@scenario("save_image", "storage", describe=lambda env, rel: {"image_bytes": len(env.images[0]), "sample_path": rel})
+def _save_image(env: BenchEnv, idx: int) -> str:
+    from app.services.storage import save_image
+
+    return save_image(f"bench-image-{idx:06d}", "bench.jpg", env.images[idx % len(env.images)], "image/jpeg")
+
+
+# ---------- HTTP：写路径 ----------
+
+
+def _selection_answers(env: BenchEnv) -> dict[str, list[dict[str, str]]]:
+    from app.services.mobile_selection_result_builder import _enumerate_selection_answers
+
+    cached = env.state.get("selection_answers")
+    if cached is None:
+        cached = env.state["selection_answers"] = {
+            category: _enumerate_selection_answers(category) for category in env.catalog.categories()
+        }
+    return cached
+
+
+@scenario(
+    "mobile_selection_resolve",
+    "http",
+    describe=lambda env, out: {"recommendation_source": out["recommendation_source"], "route": out["route"]["key"]},
+)
+def _mobile_selection_resolve(env: BenchEnv, idx: int) -> dict[str, Any]:
+    category = _category(env, idx)
+    answers = _selection_answers(env)[category]
+    status, body = env.request(
+        "POST",
+        "/api/mobile/selection/resolve",
+        json_body={"category": category, "answers": answers[idx % len(answers)], "reuse_existing": False},
+        headers={"x-mobile-device-id": f"bench-owner-{idx % 500:05d}"},
+    )
+    return _ok(status, body, "/api/mobile/selection/resolve")
+
+
+# ---------- 服务：经假豆包端点 ----------
+
+
+def _setup_selection_result_responder(env: BenchEnv) -> None:
+    from app.ai.capabilities import _build_sample_mobile_selection_result
+    from app.services.mobile_selection_result_builder import _build_selection_result_context
+
+    category = "shampoo"
+    with env.SessionLocal() as db:
+        context = _build_selection_result_context(db=db, category=category, answers=_selection_answers(env)[category][0])
+    text = json.dumps(_build_sample_mobile_selection_result(context), ensure_ascii=False)
+    env.provider.responder = lambda _prompt: text
+
+
+@scenario(
+    "build_mobile_selection_results",
+    "service",
+    rounds=3,
+    warmup=1,
+    setup=_setup_selection_result_responder,
+    describe=lambda env, out: {
+        "scenarios": out.scanned_scenarios,
+        "submitted_to_model": out.submitted_to_model,
+        "failed": out.failed,
+        "model_latency_ms": env.params.model_latency_ms,
+    },
+)
+def _build_mobile_selection_results(env: BenchEnv, idx: int):
+    from app.schemas import MobileSelectionResultBuildRequest
+    from app.services.mobile_selection_result_builder import build_mobile_selection_results
+
+    with env.SessionLocal() as db:
+        return build_mobile_selection_results(
+            MobileSelectionResultBuildRequest(category="shampoo", force_regenerate=True), db=db
+        )
+
+
+_INGREDIENT_PROFILE_TEXT = json.dumps(
+    {
+        "summary": "基准成分画像：在该品类中主要承担清洁与保湿作用。",
+        "benefits": ["保湿", "温和"],
+        "risks": [],
+        "usage_tips": ["按需使用"],
+        "suitable_for": ["日常护理"],
+        "avoid_for": [],
+        "confidence": 80,
+        "reason": "bench",
+    },
+    ensure_ascii=False,
+)
+
+
+def _setup_ingredient_responder(env: BenchEnv) -> None:
+    env.provider.responder = lambda _prompt: _INGREDIENT_PROFILE_TEXT
+
+
+def _ingredient_build(env: BenchEnv, *, force_regenerate: bool):
+    from app.routes.products import _build_ingredient_library_impl
+    from app.schemas import IngredientLibraryBuildRequest
+
+    with env.SessionLocal() as db:
+        return _build_ingredient_library_impl(
+            IngredientLibraryBuildRequest(category="shampoo", force_regenerate=force_regenerate), db, event_callback=None
+        )
+
+
+def _describe_ingredient_build(env: BenchEnv, out: Any) -> dict[str, Any]:
+    return {
+        "unique_ingredients": out.unique_ingredients,
+        "submitted_to_model": out.submitted_to_model,
+        "skipped": out.skipped,
+        "failed": out.failed,
+    }
+
+
+@scenario(
+    "ingredient_library_build",
+    "service",
+    rounds=3,
+    warmup=0,
+    setup=_setup_ingredient_responder,
+    describe=_describe_ingredient_build,
+)
+def _ingredient_library_build(env: BenchEnv, idx: int):
+    return _ingredient_build(env, force_regenerate=True)
+
+
+@scenario(
+    "ingredient_library_noop_rebuild",
+    "service",
+    rounds=5,
+    warmup=1,
+    setup=_setup_ingredient_responder,
+    describe=_describe_ingredient_build,
+)
+def _ingredient_library_noop_rebuild(env: BenchEnv, idx: int):
+    return _ingredient_build(env, force_regenerate=False)
@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+from sqlalchemy import Table
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.db.write_queue import sqlite_write_queue_for
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# 写后计数器：
+# - 请求路径只在进程内累加增量（不读行、不提交），同一键的多次自增在内存里合并
+# - 每个 engine 一个刷盘线程，按 db_write_behind_flush_seconds 间隔把增量合成一条多行
+#   INSERT ... ON CONFLICT DO UPDATE SET count = count + excluded.count；多进程 / 多副本各自累加也不会互相覆盖
+# - SQLite 下刷盘经单写者队列执行，与其他排队写入合批；刷盘失败时增量放回缓冲区，下次重试
+# - 崩溃最多丢失一个刷盘间隔内的增量；读取方可用 pending_counts 叠加尚未落库的部分
+# 只适合纯累加、允许短暂延迟可见的统计值，不要用于需要强一致扣减的场景。
+_UPSERT_CHUNK_ROWS = 500
+_FLUSHER_IDLE_EXIT_ROUNDS = 5
+
+
+@dataclass(frozen=True)
+class CounterSpec:
+    """一类计数器：目标表、主键列、计数列与可选的“最后更新时间”列。"""
+
+    name: str
+    table: Table
+    key_columns: tuple[str, ...]
+    count_column: str
+    touched_column: str | None = None
+
+
+class WriteBehindCounters:
+    def __init__(self, engine: Engine):
+        self._engine_ref = weakref.ref(engine)
+        self._guard = threading.Lock()
+        self._wake = threading.Event()
+        # 刷盘线程与显式 flush 不并发落库，_inflight 始终只有一批。
+        self._flush_lock = threading.Lock()
+        self._pending: dict[tuple[CounterSpec, tuple[Any, ...]], list[Any]] = {}
+        # 正在落库的一批：提交完成前仍计入 pending_counts，读取方不会在刷盘瞬间少算。
+        self._inflight: dict[tuple[CounterSpec, tuple[Any, ...]], list[Any]] = {}
+        self._thread: threading.Thread | None = None
+        self.stats = {"increments": 0, "flushes": 0, "rows_flushed": 0, "statements": 0, "flush_failures": 0}
+
+    def add(self, spec: CounterSpec, key: tuple[Any, ...], n: int = 1, *, touched: Any = None) -> None:
+        with self._guard:
+            entry = self._pending.get((spec, key))
+            if entry is None:
+                self._pending[(spec, key)] = [int(n), touched]
+            else:
+                entry[0] += int(n)
+                if touched is not None:
+                    entry[1] = touched
+            self.stats["increments"] += 1
+            size = len(self._pending)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="write-behind-counters", daemon=True)
+                self._thread.start()
+        if size >= max(1, int(settings.db_write_behind_max_pending)):
+            self._wake.set()
+
+    def pending_counts(self, spec: CounterSpec, **match: Any) -> dict[tuple[Any, ...], int]:
+        positions = {spec.key_columns.index(column): value for column, value in match.items()}
+        out: dict[tuple[Any, ...], int] = {}
+        with self._guard:
+            for source in (self._inflight, self._pending):
+                for (item_spec, key), entry in source.items():
+                    if item_spec is spec and all(key[pos] == value for pos, value in positions.items()):
+                        out[key] = out.get(key, 0) + entry[0]
+        return out
+
+    def _run(self) -> None:
+        idle_rounds = 0
+        while True:
+            self._wake.wait(timeout=max(0.05, float(settings.db_write_behind_flush_seconds)))
+            self._wake.clear()
+            if self.flush():
+                idle_rounds = 0
+                continue
+            idle_rounds += 1
+            if idle_rounds < _FLUSHER_IDLE_EXIT_ROUNDS:
+                continue
+            with self._guard:
+                # 加锁后再确认一次：add 写入缓冲后才检查线程存活，这里退出不会漏增量。
+                if not self._pending:
+                    self._thread = None
+                    return
+
+    def flush(self, *, direct: bool = False) -> int:
+        """把当前缓冲的增量落库，返回写入的键数；direct=True 时不经单写者队列（进程退出时用）。"""
+        with self._flush_lock:
+            with self._guard:
+                batch, self._pending = self._pending, {}
+                self._inflight = batch
+            if not batch:
+                return 0
+            try:
+                return self._flush_batch(batch, direct=direct)
+            finally:
+                with self._guard:
+                    self._inflight = {}
+
+    def _flush_batch(self, batch: dict[tuple[CounterSpec, tuple[Any, ...]], list[Any]], *, direct: bool) -> int:
+        engine = self._engine_ref()
+        if engine is None:
+            return 0
+        by_spec: dict[CounterSpec, list[dict[str, Any]]] = {}
+        for (spec, key), (n, touched) in batch.items():
+            row = dict(zip(spec.key_columns, key))
+            row[spec.count_column] = n
+            if spec.touched_column is not None:
+                row[spec.touched_column] = touched
+            by_spec.setdefault(spec, []).append(row)
+        try:
+            statements = self._write(engine, by_spec, direct=direct)
+        except Exception:
+            logger.exception("write-behind counter flush failed; %s keys kept for retry", len(batch))
+            with self._guard:
+                self.stats["flush_failures"] += 1
+                self._inflight = {}
+                for item_key, (n, touched) in batch.items():
+                    entry = self._pending.get(item_key)
+                    if entry is None:
+                        self._pending[item_key] = [n, touched]
+                    else:
+                        entry[0] += n
+                        if entry[1] is None:
+                            entry[1] = touched
+            return 0
+        with self._guard:
+            self.stats["flushes"] += 1
+            self.stats["rows_flushed"] += len(batch)
+            self.stats["statements"] += statements
+        return len(batch)
+
+    def _write(self, engine: Engine, by_spec: dict[CounterSpec, list[dict[str, Any]]], *, direct: bool) -> int:
+        def apply(db: Session) -> int:
+            count = 0
+            for spec, rows in by_spec.items():
+                for start in range(0, len(rows), _UPSERT_CHUNK_ROWS):
+                    _apply_increments(db, spec, rows[start : start + _UPSERT_CHUNK_ROWS])
+                    count += 1
+            return count
+
+        write_queue = None if direct else sqlite_write_queue_for(engine)
+        if write_queue is not None:
+            return write_queue.submit(apply).result()
+        with Session(bind=engine, autoflush=False) as db:
+            statements = apply(db)
+            db.commit()
+            return statements
+
+    def describe(self) -> dict[str, Any]:
+        with self._guard:
+            stats = dict(self.stats)
+            stats["pending_keys"] = len(self._pending)
+            stats["flusher_alive"] = bool(self._thread is not None and self._thread.is_alive())
+        return stats
+
+
+def _apply_increments(db: Session, spec: CounterSpec, rows: list[dict[str, Any]]) -> None:
+    table = spec.table
+    dialect = db.get_bind().dialect.name
+    if dialect in {"sqlite", "postgresql"}:
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(table).values(rows)
+        set_: dict[str, Any] = {spec.count_column: table.c[spec.count_column] + stmt.excluded[spec.count_column]}
+        if spec.touched_column is not None:
+            set_[spec.touched_column] = stmt.excluded[spec.touched_column]
+        db.execute(stmt.on_conflict_do_update(index_elements=[table.c[column] for column in spec.key_columns], set_=set_))
+        return
+    # 其他方言没有 ON CONFLICT：逐键更新，更新不到再插入。
+    for row in rows:
+        where = [table.c[column] == row[column] for column in spec.key_columns]
+        values: dict[str, Any] = {spec.count_column: table.c[spec.count_column] + row[spec.count_column]}
+        if spec.touched_column is not None:
+            values[spec.touched_column] = row[spec.touched_column]
+        if not db.execute(table.update().where(*where).values(**values)).rowcount:
+            db.execute(table.insert().values(**row))
+
+
+_COUNTERS: "weakref.WeakKeyDictionary[Engine, WriteBehindCounters]" = weakref.WeakKeyDictionary()
+_COUNTERS_GUARD = threading.Lock()
+
+
+def _counters_for(bind: Any, *, create: bool) -> WriteBehindCounters | None:
+    target = getattr(bind, "engine", bind)
+    if not isinstance(target, Engine):
+        return None
+    with _COUNTERS_GUARD:
+        counters = _COUNTERS.get(target)
+        if counters is None and create:
+            counters = WriteBehindCounters(target)
+            _COUNTERS[target] = counters
+        return counters
+
+
+def increment_counter(db: Session, spec: CounterSpec, key: Iterable[Any], n: int = 1, *, touched: Any = None) -> None:
+    """累加计数。开关打开时只记进内存、由刷盘线程批量落库；关闭时在 db 上原地 upsert（调用方负责提交）。"""
+    key_tuple = tuple(key)
+    if len(key_tuple) != len(spec.key_columns):
+        raise ValueError(f"counter '{spec.name}' expects {len(spec.key_columns)} key parts, got {len(key_tuple)}.")
+    if not bool(settings.db_write_behind_counters):
+        row = dict(zip(spec.key_columns, key_tuple))
+        row[spec.count_column] = int(n)
+        if spec.touched_column is not None:
+            row[spec.touched_column] = touched
+        _apply_increments(db, spec, [row])
+        return
+    counters = _counters_for(db.get_bind(), create=True)
+    if counters is None:
+        raise RuntimeError("write-behind counters need a Session bound to an Engine.")
+    counters.add(spec, key_tuple, n, touched=touched)
+
+
+def pending_counter_increments(bind: Any, spec: CounterSpec, **match: Any) -> dict[tuple[Any, ...], int]:
+    """尚未落库的增量（按键），读取方叠加到查询结果上以读到自己的写入。"""
+    counters = _counters_for(bind, create=False)
+    return counters.pending_counts(spec, **match) if counters is not None else {}
+
+
+def flush_write_behind_counters(bind: Any) -> int:
+    """立即落库该 engine 的全部缓冲增量（清理 / 导出等需要完整数据的流程先调用）。"""
+    counters = _counters_for(bind, create=False)
+    return counters.flush() if counters is not None else 0
+
+
+def describe_write_behind_counters(bind: Any) -> dict[str, Any] | None:
+    counters = _counters_for(bind, create=False)
+    return counters.describe() if counters is not None else None
+
+
+@atexit.register
+def _flush_all_write_behind_counters() -> None:
+    with _COUNTERS_GUARD:
+        all_counters = list(_COUNTERS.values())
+    for counters in all_counters:
+        try:
+            counters.flush(direct=True)
+        except Exception:
+            logger.exception("write-behind counter flush at exit failed")
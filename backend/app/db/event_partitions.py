@@ -0,0 +1,484 @@
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Iterable, Iterator
+
+from sqlalchemy import Column, Index, MetaData, Table, delete, func, insert, inspect, select, text, union_all
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.schema import CreateIndex
+
+from app.db.models import MobileClientEvent, MobileClientEventPartition
+from app.services.storage import mobile_event_archive_rel_path, now_iso, read_rel_bytes, write_rel_bytes
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# 移动端埋点按月分区：
+# - 逻辑表仍是 mobile_client_events，写入路径不变；created_at 是定宽 ISO 文本，前 7 位（YYYY-MM）即月份，
+#   文本比较 '2026-03' <= created_at < '2026-04' 与时间顺序一致
+# - PostgreSQL：mobile_client_events 是 RANGE(created_at) 分区父表（每月一个分区 + DEFAULT 兜底），
+#   查询照旧打父表，由规划器裁剪分区
+#   （存量普通表转分区表走一次性迁移脚本 app.scripts.migrate_mobile_event_partitions，运行时补丁只补建未来分区）
+# - SQLite：热表只留当月；已结束的月份由 maintain_mobile_client_event_partitions 整月搬进
+#   mobile_client_events_pYYYY_MM 分表，查询只 UNION 与时间区间有交集的分表（应用侧裁剪）
+# - 超出保留期的月份导出为 gzip JSON Lines 归档后删除分区 / 分表（DROP 代替大表 DELETE + VACUUM）；
+#   归档登记在 mobile_client_event_partitions，历史报表按区间把归档读回参与统计
+EVENTS_TABLE = MobileClientEvent.__table__
+PARTITION_PREFIX = "mobile_client_events_p"
+POSTGRES_DEFAULT_PARTITION = "mobile_client_events_pdefault"
+POSTGRES_LEGACY_TABLE = "mobile_client_events_unpartitioned"
+STORAGE_TABLE = "table"
+STORAGE_ARCHIVE = "archive"
+_ARCHIVE_BATCH_ROWS = 5000
+
+# 分表只读（整月搬入后不再写），只保留分析查询用得上的索引；热表上的单列索引不复制
+_SHARD_INDEXES: tuple[tuple[str, tuple[str, ...]], ...] = (
+    ("created", ("created_at",)),
+    ("owner_scope", ("owner_type", "owner_id", "created_at")),
+    ("name_scope", ("name", "created_at")),
+    ("session_scope", ("session_id", "created_at")),
+    ("compare_scope", ("compare_id", "created_at")),
+)
+_SHARD_METADATA = MetaData()
+
+
+def month_of(created_at: str) -> str:
+    return str(created_at or "")[:7]
+
+
+def shift_month(month: str, delta: int) -> str:
+    year, mon = int(month[:4]), int(month[5:7])
+    index = year * 12 + (mon - 1) + int(delta)
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def month_bounds(month: str) -> tuple[str, str]:
+    """[lower, upper) 文本区间：created_at >= lower AND created_at < upper。"""
+    return month, shift_month(month, 1)
+
+
+def partition_table_name(month: str) -> str:
+    return f"{PARTITION_PREFIX}{month.replace('-', '_')}"
+
+
+def _current_month(now: datetime | None = None) -> str:
+    return (now or datetime.now(timezone.utc)).strftime("%Y-%m")
+
+
+def _month_overlaps(month: str, start_iso: str, end_iso: str) -> bool:
+    lower, upper = month_bounds(month)
+    return lower <= end_iso and upper > start_iso
+
+
+def shard_table(month: str) -> Table:
+    name = partition_table_name(month)
+    existing = _SHARD_METADATA.tables.get(name)
+    if existing is not None:
+        return existing
+    columns = [
+        Column(col.name, col.type, primary_key=col.primary_key, nullable=col.nullable) for col in EVENTS_TABLE.columns
+    ]
+    indexes = [Index(f"ix_{name}_{suffix}", *cols) for suffix, cols in _SHARD_INDEXES]
+    return Table(name, _SHARD_METADATA, *columns, *indexes)
+
+
+# ---------- 读路径 ----------
+
+
+@dataclass
+class MobileClientEventSource:
+    """一次分析查询的数据源：entity 用于 select()（热表或热表 + 分表的 UNION ALL），archived_months 需从归档读回。"""
+
+    entity: Any
+    tables: list[str] = field(default_factory=list)
+    archived: list[MobileClientEventPartition] = field(default_factory=list)
+
+
+def mobile_client_event_source(db: Session, *, start_iso: str, end_iso: str) -> MobileClientEventSource:
+    partitions = db.execute(select(MobileClientEventPartition).order_by(MobileClientEventPartition.month.asc())).scalars().all()
+    overlapping = [item for item in partitions if _month_overlaps(item.month, start_iso, end_iso)]
+    archived = [item for item in overlapping if item.storage == STORAGE_ARCHIVE and item.archive_path]
+    shards = [
+        item.table_name
+        for item in overlapping
+        if item.storage == STORAGE_TABLE and item.table_name and item.table_name != EVENTS_TABLE.name
+    ]
+    # PostgreSQL 的分区挂在父表下，规划器自己裁剪；只有 SQLite 分表需要在这里拼 UNION ALL
+    if not shards or db.get_bind().dialect.name == "postgresql":
+        return MobileClientEventSource(entity=MobileClientEvent, tables=[EVENTS_TABLE.name], archived=archived)
+    names = [col.name for col in EVENTS_TABLE.columns]
+    arms = [select(*[EVENTS_TABLE.c[name] for name in names])]
+    for month in (item.month for item in overlapping if item.table_name in shards):
+        table = shard_table(month)
+        arms.append(select(*[table.c[name] for name in names]))
+    union = union_all(*arms).subquery("mobile_client_events_union")
+    return MobileClientEventSource(
+        entity=aliased(MobileClientEvent, union, adapt_on_names=True),
+        tables=[EVENTS_TABLE.name, *shards],
+        archived=archived,
+    )
+
+
+def _archived_row_matches(
+    record: dict[str, Any],
+    *,
+    start_iso: str,
+    end_iso: str,
+    equals: dict[str, Any],
+    names: Iterable[str] | None,
+) -> bool:
+    created_at = str(record.get("created_at") or "")
+    if created_at < start_iso or created_at > end_iso:
+        return False
+    if names is not None and record.get("name") not in names:
+        return False
+    return all(record.get(key) == value for key, value in equals.items())
+
+
+def load_archived_events(
+    partitions: Iterable[MobileClientEventPartition],
+    *,
+    start_iso: str,
+    end_iso: str,
+    equals: dict[str, Any] | None = None,
+    names: Iterable[str] | None = None,
+) -> list[MobileClientEvent]:
+    """读回归档月份里落在区间内、满足等值过滤的事件（游离对象，不挂 Session）。"""
+    wanted_names = set(names) if names else None
+    out: list[MobileClientEvent] = []
+    for partition in partitions:
+        for record in _iter_archive_records(str(partition.archive_path)):
+            if _archived_row_matches(record, start_iso=start_iso, end_iso=end_iso, equals=equals or {}, names=wanted_names):
+                out.append(MobileClientEvent(**record))
+    return out
+
+
+def _iter_archive_records(rel_path: str) -> Iterator[dict[str, Any]]:
+    for line in gzip.decompress(read_rel_bytes(rel_path)).splitlines():
+        if line.strip():
+            yield json.loads(line)
+
+
+# ---------- 维护：滚动分区 / 归档 ----------
+
+
+def _registry(conn: Connection) -> dict[str, MobileClientEventPartition]:
+    rows = conn.execute(select(MobileClientEventPartition.__table__)).mappings().all()
+    return {row["month"]: MobileClientEventPartition(**row) for row in rows}
+
+
+def _upsert_registry(conn: Connection, month: str, **values: Any) -> None:
+    table = MobileClientEventPartition.__table__
+    values["updated_at"] = now_iso()
+    updated = conn.execute(table.update().where(table.c.month == month).values(**values)).rowcount
+    if not updated:
+        conn.execute(table.insert().values(month=month, **values))
+
+
+def _range_stats(conn: Connection, table: Table, month: str) -> tuple[int, str | None, str | None]:
+    lower, upper = month_bounds(month)
+    row = conn.execute(
+        select(func.count(), func.min(table.c.created_at), func.max(table.c.created_at)).where(
+            table.c.created_at >= lower, table.c.created_at < upper
+        )
+    ).one()
+    return int(row[0] or 0), row[1], row[2]
+
+
+def _stale_months(conn: Connection, table: Table, before_month: str) -> list[str]:
+    """表里早于 before_month 的月份（按 created_at 索引取首尾，再逐月确认，避免整表 substr 扫描）。"""
+    months: list[str] = []
+    lower = conn.execute(select(func.min(table.c.created_at))).scalar()
+    while lower and month_of(lower) < before_month:
+        month = month_of(lower)
+        months.append(month)
+        lower = conn.execute(select(func.min(table.c.created_at)).where(table.c.created_at >= month_bounds(month)[1])).scalar()
+    return months
+
+
+def _write_archive(conn: Connection, month: str, sources: list[Table], existing_path: str | None) -> tuple[str, int, int]:
+    lower, upper = month_bounds(month)
+    lines: list[bytes] = []
+    if existing_path:
+        # 同一月份之前已归档过（迟到的行）：合并后整体重写
+        lines.extend(json.dumps(record, ensure_ascii=False).encode("utf-8") for record in _iter_archive_records(existing_path))
+    for table in sources:
+        result = conn.execution_options(yield_per=_ARCHIVE_BATCH_ROWS).execute(
+            select(table).where(table.c.created_at >= lower, table.c.created_at < upper).order_by(table.c.created_at.asc())
+        )
+        for row in result.mappings():
+            lines.append(json.dumps(dict(row), ensure_ascii=False, default=str).encode("utf-8"))
+    payload = gzip.compress(b"\n".join(lines) + b"\n", compresslevel=6)
+    rel_path = mobile_event_archive_rel_path(month)
+    write_rel_bytes(rel_path, payload)
+    return rel_path, len(lines), len(payload)
+
+
+def _postgres_partition_months(conn: Connection) -> list[str]:
+    rows = conn.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :parent"
+        ),
+        {"parent": EVENTS_TABLE.name},
+    ).scalars()
+    return sorted(
+        name[len(PARTITION_PREFIX) :].replace("_", "-")
+        for name in rows
+        if name.startswith(PARTITION_PREFIX) and name != POSTGRES_DEFAULT_PARTITION
+    )
+
+
+def postgres_partition_ddl(month: str) -> str:
+    lower, upper = month_bounds(month)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_table_name(month)} PARTITION OF {EVENTS_TABLE.name} "
+        f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+    )
+
+
+def postgres_partitioning_statements(existing_months: Iterable[str], *, current_month: str, ahead: int) -> list[str]:
+    """把普通表 mobile_client_events 原地改为按月 RANGE 分区表的 DDL（单事务执行）。"""
+    months = sorted({*existing_months, *(shift_month(current_month, delta) for delta in range(max(0, ahead) + 1))})
+    dialect = postgresql.dialect()
+    statements = [
+        f"ALTER TABLE {EVENTS_TABLE.name} RENAME TO {POSTGRES_LEGACY_TABLE}",
+        f"CREATE TABLE {EVENTS_TABLE.name} (LIKE {POSTGRES_LEGACY_TABLE} INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)",
+        *(postgres_partition_ddl(month) for month in months),
+        f"CREATE TABLE IF NOT EXISTS {POSTGRES_DEFAULT_PARTITION} PARTITION OF {EVENTS_TABLE.name} DEFAULT",
+        f"INSERT INTO {EVENTS_TABLE.name} SELECT * FROM {POSTGRES_LEGACY_TABLE}",
+        # 旧表连同其主键 / 索引名一起删掉后，再在父表上建（分区键必须进主键）
+        f"DROP TABLE {POSTGRES_LEGACY_TABLE}",
+        f"ALTER TABLE {EVENTS_TABLE.name} ADD PRIMARY KEY (event_id, created_at)",
+    ]
+    for index in sorted(EVENTS_TABLE.indexes, key=lambda item: str(item.name)):
+        statements.append(str(CreateIndex(index, if_not_exists=True).compile(dialect=dialect)))
+    return statements
+
+
+def _postgres_relkind(conn: Connection) -> str | None:
+    return conn.execute(
+        text("SELECT relkind FROM pg_class WHERE relname = :name AND relkind IN ('r', 'p')"),
+        {"name": EVENTS_TABLE.name},
+    ).scalar()
+
+
+def _register_postgres_partitions(conn: Connection) -> None:
+    registry = _registry(conn)
+    for month in _postgres_partition_months(conn):
+        if month not in registry:
+            _upsert_registry(conn, month, storage=STORAGE_TABLE, table_name=partition_table_name(month), row_count=0)
+
+
+def ensure_event_partitioning(bind: Any) -> list[str]:
+    """
+    运行时 schema 补丁：PostgreSQL 上 mobile_client_events 已是分区父表时只补建当月起的未来分区；SQLite 无需处理。
+    普通表转分区表（改名 + 全量搬数据 + 重建索引）耗时与表大小成正比，不在启动路径上做，
+    由 app.scripts.migrate_mobile_event_partitions 在维护窗口显式执行。
+    """
+    engine: Engine = getattr(bind, "engine", bind)
+    if engine.dialect.name != "postgresql":
+        return []
+    current = _current_month()
+    ahead = max(0, int(settings.mobile_event_partitions_ahead_months))
+    statements: list[str] = []
+    with engine.begin() as conn:
+        relkind = _postgres_relkind(conn)
+        if relkind != "p":
+            if relkind == "r":
+                logger.warning(
+                    "mobile_client_events is not partitioned; run `python -m app.scripts.migrate_mobile_event_partitions`"
+                )
+            return []
+        for delta in range(ahead + 1):
+            stmt = postgres_partition_ddl(shift_month(current, delta))
+            conn.execute(text(stmt))
+            statements.append(stmt)
+        _register_postgres_partitions(conn)
+    return statements
+
+
+def migrate_events_to_partitioned(bind: Any, *, now: datetime | None = None, dry_run: bool = False) -> list[str]:
+    """
+    一次性迁移：把 PostgreSQL 上的普通表 mobile_client_events 原地改为按月 RANGE 分区父表（单事务）。
+    已是分区表 / 非 PostgreSQL 时返回空列表；dry_run 只返回将要执行的 DDL。
+    """
+    engine: Engine = getattr(bind, "engine", bind)
+    if engine.dialect.name != "postgresql":
+        return []
+    ahead = max(0, int(settings.mobile_event_partitions_ahead_months))
+    with engine.begin() as conn:
+        if _postgres_relkind(conn) != "r":
+            return []
+        existing = conn.execute(
+            text(f"SELECT DISTINCT substr(created_at, 1, 7) FROM {EVENTS_TABLE.name} WHERE created_at IS NOT NULL")
+        ).scalars()
+        statements = postgres_partitioning_statements(
+            [month for month in existing if len(month) == 7], current_month=_current_month(now), ahead=ahead
+        )
+        if dry_run:
+            return statements
+        for stmt in statements:
+            conn.execute(text(stmt))
+        _register_postgres_partitions(conn)
+    return statements
+
+
+@dataclass
+class PartitionMaintenanceReport:
+    dialect: str
+    current_month: str
+    archive_before: str | None
+    rolled: list[dict[str, Any]] = field(default_factory=list)
+    archived: list[dict[str, Any]] = field(default_factory=list)
+    created_partitions: list[str] = field(default_factory=list)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "dialect": self.dialect,
+            "current_month": self.current_month,
+            "archive_before": self.archive_before,
+            "created_partitions": self.created_partitions,
+            "rolled": self.rolled,
+            "archived": self.archived,
+        }
+
+
+def maintain_mobile_client_event_partitions(
+    bind: Any,
+    *,
+    now: datetime | None = None,
+    retention_months: int | None = None,
+) -> PartitionMaintenanceReport:
+    """
+    幂等的分区维护（建议每天跑一次）：
+    - PostgreSQL：补建当月起的未来分区；保留期外的分区导出归档后 DETACH + DROP
+    - SQLite：热表里已结束的月份整月搬进分表；保留期外的月份（热表 / 分表）导出归档后删除
+    retention_months=0 表示不归档。
+    """
+    engine: Engine = getattr(bind, "engine", bind)
+    current = _current_month(now)
+    keep = int(settings.mobile_event_retention_months if retention_months is None else retention_months)
+    archive_before = shift_month(current, -keep) if keep > 0 else None
+    report = PartitionMaintenanceReport(dialect=engine.dialect.name, current_month=current, archive_before=archive_before)
+    if engine.dialect.name == "postgresql":
+        _maintain_postgres(engine, report)
+    else:
+        _maintain_sqlite(engine, report)
+    return report
+
+
+def _archive_month(conn: Connection, month: str, sources: list[Table], registry: dict[str, MobileClientEventPartition]) -> dict[str, Any]:
+    existing = registry.get(month)
+    existing_path = existing.archive_path if existing is not None and existing.storage == STORAGE_ARCHIVE else None
+    rel_path, rows, size = _write_archive(conn, month, sources, existing_path)
+    _upsert_registry(
+        conn,
+        month,
+        storage=STORAGE_ARCHIVE,
+        table_name=None,
+        archive_path=rel_path,
+        row_count=rows,
+        archive_bytes=size,
+    )
+    return {"month": month, "rows": rows, "archive_path": rel_path, "archive_bytes": size}
+
+
+def _maintain_sqlite(engine: Engine, report: PartitionMaintenanceReport) -> None:
+    with engine.begin() as conn:
+        stale = _stale_months(conn, EVENTS_TABLE, report.current_month)
+    for month in stale:
+        with engine.begin() as conn:
+            registry = _registry(conn)
+            lower, upper = month_bounds(month)
+            in_range = (EVENTS_TABLE.c.created_at >= lower) & (EVENTS_TABLE.c.created_at < upper)
+            if report.archive_before is not None and month < report.archive_before:
+                entry = registry.get(month)
+                sources = [EVENTS_TABLE]
+                if entry is not None and entry.storage == STORAGE_TABLE and entry.table_name:
+                    sources.append(shard_table(month))
+                report.archived.append(_archive_month(conn, month, sources, registry))
+                conn.execute(delete(EVENTS_TABLE).where(in_range))
+                if len(sources) > 1:
+                    shard_table(month).drop(conn, checkfirst=True)
+                continue
+            shard = shard_table(month)
+            shard.create(conn, checkfirst=True)
+            names = [col.name for col in EVENTS_TABLE.columns]
+            moved = conn.execute(
+                insert(shard).from_select(names, select(*[EVENTS_TABLE.c[name] for name in names]).where(in_range))
+            ).rowcount
+            conn.execute(delete(EVENTS_TABLE).where(in_range))
+            rows, min_at, max_at = _range_stats(conn, shard, month)
+            _upsert_registry(
+                conn,
+                month,
+                storage=STORAGE_TABLE,
+                table_name=shard.name,
+                archive_path=None,
+                row_count=rows,
+                min_created_at=min_at,
+                max_created_at=max_at,
+            )
+            report.rolled.append({"month": month, "table": shard.name, "moved_rows": int(moved or 0), "rows": rows})
+
+    if report.archive_before is None:
+        return
+    with engine.begin() as conn:
+        registry = _registry(conn)
+    for month, entry in sorted(registry.items()):
+        if month >= report.archive_before or entry.storage != STORAGE_TABLE or not entry.table_name:
+            continue
+        with engine.begin() as conn:
+            shard = shard_table(month)
+            if shard.name in inspect(conn).get_table_names():
+                report.archived.append(_archive_month(conn, month, [shard], _registry(conn)))
+                shard.drop(conn)
+            else:
+                _upsert_registry(conn, month, storage=STORAGE_ARCHIVE, table_name=None)
+
+
+def _maintain_postgres(engine: Engine, report: PartitionMaintenanceReport) -> None:
+    ahead = max(0, int(settings.mobile_event_partitions_ahead_months))
+    with engine.begin() as conn:
+        known = set(_postgres_partition_months(conn))
+        for delta in range(ahead + 1):
+            month = shift_month(report.current_month, delta)
+            if month not in known:
+                conn.execute(text(postgres_partition_ddl(month)))
+                report.created_partitions.append(partition_table_name(month))
+            _upsert_registry(conn, month, storage=STORAGE_TABLE, table_name=partition_table_name(month))
+        months = _postgres_partition_months(conn)
+    if report.archive_before is None:
+        return
+    for month in months:
+        if month >= report.archive_before:
+            continue
+        with engine.begin() as conn:
+            name = partition_table_name(month)
+            table = shard_table(month)
+            report.archived.append(_archive_month(conn, month, [table], _registry(conn)))
+            conn.execute(text(f"ALTER TABLE {EVENTS_TABLE.name} DETACH PARTITION {name}"))
+            conn.execute(text(f"DROP TABLE {name}"))
+
+
+def describe_mobile_client_event_partitions(db: Session) -> list[dict[str, Any]]:
+    rows = db.execute(select(MobileClientEventPartition).order_by(MobileClientEventPartition.month.asc())).scalars().all()
+    return [
+        {
+            "month": row.month,
+            "storage": row.storage,
+            "table_name": row.table_name,
+            "archive_path": row.archive_path,
+            "row_count": row.row_count,
+            "archive_bytes": row.archive_bytes,
+        }
+        for row in rows
+    ]
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from typing import Any, Sequence
+
+from sqlalchemy import Select, tuple_
+from sqlalchemy.orm import InstrumentedAttribute, Session
+
+# Keyset（seek）分页：
+# - 列表统一按 (时间列, 主键) 倒序；主键兜底，时间戳相同的行也有确定顺序
+# - 游标是上一页最后一行的排序键，下一页用行值比较 (t, id) < (?, ?) 直接在复合索引上定位，
+#   第 N 页与第 1 页代价相同；翻页期间新插入的行只会出现在已翻过的前面，不会造成跳行 / 重复
+# - 时间列应当写入后不变（任务列表用 created_at）：若按 updated_at 翻页，翻页途中被更新的行会跳到已翻过的前面，
+#   尚未翻到的这类行会被漏掉（不会重复）。对比会话列表有意按最近活跃排序，接受这一点
+# - 游标对客户端不透明（base64url JSON），并带列表作用域，拿别的列表的游标来翻页直接 400
+# - 列表响应体保持数组不变，下一页游标放在响应头里；没有下一页则不带该头
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class KeysetPage:
+    rows: list[Any]
+    next_cursor: str | None
+
+
+def encode_cursor(scope: str, values: Sequence[Any]) -> str:
+    raw = json.dumps({"s": scope, "k": list(values)}, ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str | None, *, scope: str, size: int) -> list[Any] | None:
+    text = str(cursor or "").strip()
+    if not text:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+        payload = json.loads(raw.decode("utf-8"))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise InvalidCursorError("Invalid cursor.") from exc
+    if not isinstance(payload, dict) or payload.get("s") != scope:
+        raise InvalidCursorError(f"Cursor does not belong to listing '{scope}'.")
+    values = payload.get("k")
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursorError("Invalid cursor.")
+    return values
+
+
+def row_key(row: Any, columns: Sequence[InstrumentedAttribute]) -> list[Any]:
+    return [getattr(row, column.key) for column in columns]
+
+
+def fetch_keyset_page(
+    db: Session,
+    stmt: Select,
+    *,
+    columns: Sequence[InstrumentedAttribute],
+    scope: str,
+    cursor: str | None,
+    limit: int,
+    offset: int = 0,
+) -> KeysetPage:
+    """
+    按 columns 倒序取一页（多取一行判断是否还有下一页）。
+    offset 只为兼容旧客户端保留，不能和 cursor 同时使用；返回的 next_cursor 可从任意 offset 页切换到 keyset。
+    """
+    values = decode_cursor(cursor, scope=scope, size=len(columns))
+    if values is not None and offset:
+        raise InvalidCursorError("cursor and offset cannot be combined.")
+    if values is not None:
+        stmt = stmt.where(tuple_(*columns) < tuple_(*values))
+    stmt = stmt.order_by(*(column.desc() for column in columns))
+    if offset:
+        stmt = stmt.offset(offset)
+    rows = list(db.execute(stmt.limit(limit + 1)).scalars().all())
+    if len(rows) <= limit:
+        return KeysetPage(rows=rows, next_cursor=None)
+    rows = rows[:limit]
+    # 在调用方对行做任何修改（状态对账会改 updated_at）之前取键
+    return KeysetPage(rows=rows, next_cursor=encode_cursor(scope, row_key(rows[-1], columns)))
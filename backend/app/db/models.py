@@ -1,5 +1,5 @@
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
-from sqlalchemy import Boolean, Integer, String, Text, Index
+from sqlalchemy import Boolean, Float, Integer, LargeBinary, String, Text, Index, text
 
 class Base(DeclarativeBase):
     pass
@@ -118,6 +118,8 @@ class IngredientLibraryIndex(Base):
 
     source_trace_ids_json: Mapped[str] = mapped_column(Text, default="[]")
     hit_count: Mapped[int] = mapped_column(Integer, default=0)
+    # 生成画像时的统计签名（与画像 JSON generator.source_signature 一致），构建时据此批量判断跳过
+    source_signature: Mapped[str | None] = mapped_column(String(64), nullable=True)
 
     first_seen_at: Mapped[str] = mapped_column(String(32), index=True)
     last_seen_at: Mapped[str] = mapped_column(String(32), index=True)
@@ -125,6 +127,41 @@ class IngredientLibraryIndex(Base):
     last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
 
 
+class IngredientProductContribution(Base):
+    __tablename__ = "ingredient_product_contributions"
+
+    # 每个产品对成分库统计的贡献：已校验/归一化的成分条目，按产品 JSON 的 stat 指纹判断是否需要重新解析
+    product_id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    category: Mapped[str] = mapped_column(String(32), index=True)
+    json_path: Mapped[str] = mapped_column(Text)
+    doc_fingerprint: Mapped[str] = mapped_column(String(64))
+    items_json: Mapped[str] = mapped_column(Text, default="[]")
+    updated_at: Mapped[str] = mapped_column(String(32))
+
+
+class IngredientAggregateMember(Base):
+    __tablename__ = "ingredient_aggregate_members"
+
+    # 增量成分聚合的产品侧状态，按聚合口径（scope_key = category|normalization_packages|max_sources）隔离：
+    # token 变化即视为该产品贡献变化，raw/group keys 为其涉及的原始 / 归并后成分键
+    scope_key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    product_id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    token: Mapped[str] = mapped_column(Text)
+    raw_keys_json: Mapped[str] = mapped_column(Text, default="[]")
+    group_keys_json: Mapped[str] = mapped_column(Text, default="[]")
+    updated_at: Mapped[str] = mapped_column(String(32))
+
+
+class IngredientAggregate(Base):
+    __tablename__ = "ingredient_aggregates"
+
+    # 每个成分的聚合结果（统计 / 样本 / 签名），与贡献表在同一事务里按受影响成分更新
+    scope_key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    ingredient_key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    aggregate_json: Mapped[str] = mapped_column(Text)
+    updated_at: Mapped[str] = mapped_column(String(32))
+
+
 class IngredientLibraryAlias(Base):
     __tablename__ = "ingredient_library_alias_index"
     __table_args__ = (
@@ -160,12 +197,17 @@ class IngredientLibraryRedirect(Base):
 class IngredientLibraryBuildJob(Base):
     __tablename__ = "ingredient_library_build_jobs"
     __table_args__ = (
-        Index("ix_ing_lib_build_jobs_scope", "status", "category", "updated_at"),
+        # 列表四种过滤组合（状态 / 品类 / 两者 / 都不带）均按 (created_at, job_id) 倒序 keyset 翻页；
+        # created_at 不随进度刷新变化，翻页途中被更新的任务不会被跳过或重复
+        Index("ix_ing_lib_build_jobs_scope", "status", "category", "created_at", "job_id"),
+        Index("ix_ing_lib_build_jobs_status_created", "status", "created_at", "job_id"),
+        Index("ix_ing_lib_build_jobs_category_created", "category", "created_at", "job_id"),
+        Index("ix_ing_lib_build_jobs_created", "created_at", "job_id"),
     )
 
     job_id: Mapped[str] = mapped_column(String(36), primary_key=True)
-    status: Mapped[str] = mapped_column(String(32), index=True, default="queued")
-    category: Mapped[str | None] = mapped_column(String(32), nullable=True, index=True)
+    status: Mapped[str] = mapped_column(String(32), default="queued")
+    category: Mapped[str | None] = mapped_column(String(32), nullable=True)
     force_regenerate: Mapped[bool] = mapped_column(Boolean, default=False)
     max_sources_per_ingredient: Mapped[int] = mapped_column(Integer, default=8)
     normalization_packages_json: Mapped[str] = mapped_column(Text, default="[]")
@@ -193,7 +235,7 @@ class IngredientLibraryBuildJob(Base):
     result_json: Mapped[str | None] = mapped_column(Text, nullable=True)
     error_json: Mapped[str | None] = mapped_column(Text, nullable=True)
 
-    created_at: Mapped[str] = mapped_column(String(32), index=True)
+    created_at: Mapped[str] = mapped_column(String(32))
     updated_at: Mapped[str] = mapped_column(String(32), index=True)
     started_at: Mapped[str | None] = mapped_column(String(32), nullable=True, index=True)
     finished_at: Mapped[str | None] = mapped_column(String(32), nullable=True, index=True)
@@ -202,12 +244,16 @@ class IngredientLibraryBuildJob(Base):
 class UploadIngestJob(Base):
     __tablename__ = "upload_ingest_jobs"
     __table_args__ = (
-        Index("ix_upload_ingest_jobs_scope", "status", "updated_at"),
+        # 列表带 / 不带状态均按 (created_at, job_id) 倒序 keyset 翻页（created_at 不变，翻页中途的状态刷新不影响位置）
+        Index("ix_upload_ingest_jobs_scope", "status", "created_at", "job_id"),
+        Index("ix_upload_ingest_jobs_recent", "created_at", "job_id"),
+        # 轮询：status=queued 按 updated_at 取最早
+        Index("ix_upload_ingest_jobs_status_updated", "status", "updated_at"),
     )
 
     job_id: Mapped[str] = mapped_column(String(36), primary_key=True)
-    status: Mapped[str] = mapped_column(String(32), index=True, default="queued")
-    stage: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
+    status: Mapped[str] = mapped_column(String(32), default="queued")
+    stage: Mapped[str | None] = mapped_column(String(64), nullable=True)
     stage_label: Mapped[str | None] = mapped_column(String(256), nullable=True)
     message: Mapped[str | None] = mapped_column(Text, nullable=True)
     percent: Mapped[int] = mapped_column(Integer, default=0)
@@ -234,30 +280,34 @@ class UploadIngestJob(Base):
     models_json: Mapped[str | None] = mapped_column(Text, nullable=True)
     artifacts_json: Mapped[str | None] = mapped_column(Text, nullable=True)
 
-    cancel_requested: Mapped[bool] = mapped_column(Boolean, default=False, index=True)
-    resume_requested: Mapped[bool] = mapped_column(Boolean, default=False, index=True)
+    cancel_requested: Mapped[bool] = mapped_column(Boolean, default=False)
+    resume_requested: Mapped[bool] = mapped_column(Boolean, default=False)
     result_json: Mapped[str | None] = mapped_column(Text, nullable=True)
     error_json: Mapped[str | None] = mapped_column(Text, nullable=True)
 
-    created_at: Mapped[str] = mapped_column(String(32), index=True)
-    updated_at: Mapped[str] = mapped_column(String(32), index=True)
-    started_at: Mapped[str | None] = mapped_column(String(32), nullable=True, index=True)
-    finished_at: Mapped[str | None] = mapped_column(String(32), nullable=True, index=True)
+    created_at: Mapped[str] = mapped_column(String(32))
+    updated_at: Mapped[str] = mapped_column(String(32))
+    started_at: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    finished_at: Mapped[str | None] = mapped_column(String(32), nullable=True)
 
 
 class ProductWorkbenchJob(Base):
     __tablename__ = "product_workbench_jobs"
     __table_args__ = (
-        Index("ix_product_workbench_jobs_scope", "job_type", "status", "updated_at"),
+        # 按任务类型列表：带 / 不带状态，均按 (created_at, job_id) 倒序 keyset 翻页
+        Index("ix_product_workbench_jobs_scope", "job_type", "status", "created_at", "job_id"),
+        Index("ix_product_workbench_jobs_type_created", "job_type", "created_at", "job_id"),
+        # 轮询：status=queued 按 updated_at 取最早
+        Index("ix_product_workbench_jobs_status_updated", "status", "updated_at"),
     )
 
     job_id: Mapped[str] = mapped_column(String(36), primary_key=True)
-    job_type: Mapped[str] = mapped_column(String(48), index=True)
-    status: Mapped[str] = mapped_column(String(32), index=True, default="queued")
+    job_type: Mapped[str] = mapped_column(String(48))
+    status: Mapped[str] = mapped_column(String(32), default="queued")
 
     params_json: Mapped[str] = mapped_column(Text, default="{}")
 
-    stage: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
+    stage: Mapped[str | None] = mapped_column(String(64), nullable=True)
     stage_label: Mapped[str | None] = mapped_column(String(256), nullable=True)
     message: Mapped[str | None] = mapped_column(Text, nullable=True)
     percent: Mapped[int] = mapped_column(Integer, default=0)
@@ -272,23 +322,28 @@ class ProductWorkbenchJob(Base):
     result_json: Mapped[str | None] = mapped_column(Text, nullable=True)
     error_json: Mapped[str | None] = mapped_column(Text, nullable=True)
 
-    cancel_requested: Mapped[bool] = mapped_column(Boolean, default=False, index=True)
+    cancel_requested: Mapped[bool] = mapped_column(Boolean, default=False)
 
-    created_at: Mapped[str] = mapped_column(String(32), index=True)
-    updated_at: Mapped[str] = mapped_column(String(32), index=True)
-    started_at: Mapped[str | None] = mapped_column(String(32), nullable=True, index=True)
-    finished_at: Mapped[str | None] = mapped_column(String(32), nullable=True, index=True)
+    created_at: Mapped[str] = mapped_column(String(32))
+    updated_at: Mapped[str] = mapped_column(String(32))
+    started_at: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    finished_at: Mapped[str | None] = mapped_column(String(32), nullable=True)
 
 
 class AIJob(Base):
     __tablename__ = "ai_jobs"
+    __table_args__ = (
+        # 列表（按能力 / 状态过滤，按 created_at 倒序）与 metrics 时间窗聚合
+        Index("ix_ai_jobs_capability_created_at", "capability", "created_at"),
+        Index("ix_ai_jobs_status_created_at", "status", "created_at"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True)
-    capability: Mapped[str] = mapped_column(String(128), index=True)
-    status: Mapped[str] = mapped_column(String(32), index=True)
+    capability: Mapped[str] = mapped_column(String(128))
+    status: Mapped[str] = mapped_column(String(32))
     input_json: Mapped[str] = mapped_column(Text)
     output_json: Mapped[str | None] = mapped_column(Text, nullable=True)
-    trace_id: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
+    trace_id: Mapped[str | None] = mapped_column(String(64), nullable=True)
 
     prompt_key: Mapped[str | None] = mapped_column(String(128), nullable=True)
     prompt_version: Mapped[str | None] = mapped_column(String(32), nullable=True)
@@ -305,27 +360,89 @@ class AIJob(Base):
 
 class AIRun(Base):
     __tablename__ = "ai_runs"
+    __table_args__ = (
+        Index("ix_ai_runs_capability_created_at", "capability", "created_at"),
+        # 按 job 查看运行记录（按 created_at 倒序）
+        Index("ix_ai_runs_job_created_at", "job_id", "created_at"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True)
-    job_id: Mapped[str] = mapped_column(String(36), index=True)
-    capability: Mapped[str] = mapped_column(String(128), index=True)
-    status: Mapped[str] = mapped_column(String(32), index=True)
+    job_id: Mapped[str] = mapped_column(String(36))
+    capability: Mapped[str] = mapped_column(String(128))
+    status: Mapped[str] = mapped_column(String(32))
 
     prompt_key: Mapped[str | None] = mapped_column(String(128), nullable=True)
     prompt_version: Mapped[str | None] = mapped_column(String(32), nullable=True)
     model: Mapped[str | None] = mapped_column(String(128), nullable=True)
 
+    # 小载荷内联；超过阈值的载荷存到 ai_payload_blobs（行内留空串 / NULL，只记摘要），见 app/ai/run_payloads.py
     request_json: Mapped[str] = mapped_column(Text)
     response_json: Mapped[str | None] = mapped_column(Text, nullable=True)
+    request_digest: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    response_digest: Mapped[str | None] = mapped_column(String(64), nullable=True)
     latency_ms: Mapped[int | None] = mapped_column(Integer, nullable=True)
 
     error_code: Mapped[str | None] = mapped_column(String(64), nullable=True)
     error_http_status: Mapped[int | None] = mapped_column(Integer, nullable=True)
     error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
 
+    # 写入时从 response usage 提取，供 metrics 直接在 SQL 中聚合（不再回读 response_json）
+    input_tokens: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    output_tokens: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    cached_tokens: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    estimated_cost: Mapped[float | None] = mapped_column(Float, nullable=True)
+
     created_at: Mapped[str] = mapped_column(String(32), index=True)
 
 
+class AIPayloadBlob(Base):
+    # AIRun 请求 / 响应体的内容寻址存储：digest = sha256(原始 JSON 文本)，相同内容只存一份
+    __tablename__ = "ai_payload_blobs"
+
+    digest: Mapped[str] = mapped_column(String(64), primary_key=True)
+    codec: Mapped[str] = mapped_column(String(16))
+    raw_bytes: Mapped[int] = mapped_column(Integer)
+    stored_bytes: Mapped[int] = mapped_column(Integer)
+    body: Mapped[bytes] = mapped_column(LargeBinary)
+    created_at: Mapped[str] = mapped_column(String(32))
+
+
+class MobileWikiProductSnapshot(Base):
+    # 移动端百科产品详情的物化快照：预序列化的响应 JSON + 输入版本戳；版本戳变化（产品 / 映射 / 成分库 / 精选位）即重建
+    __tablename__ = "mobile_wiki_product_snapshots"
+
+    product_id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    category: Mapped[str] = mapped_column(String(32), index=True)
+    source_version: Mapped[str] = mapped_column(String(64))
+    etag: Mapped[str] = mapped_column(String(80))
+    body: Mapped[bytes] = mapped_column(LargeBinary)
+    body_bytes: Mapped[int] = mapped_column(Integer, default=0)
+    built_at: Mapped[str] = mapped_column(String(32))
+
+
+class ProductStorageTombstone(Base):
+    # 已删除产品的待回收文件清单：删除请求只在同一事务里写入这一行，文件由后台回收器按批 unlink
+    __tablename__ = "product_storage_tombstones"
+    __table_args__ = (
+        Index("ix_product_storage_tombstones_scope", "status", "deleted_at", "product_id"),
+    )
+
+    product_id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    category: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    # {"files": [...], "dirs": [...]}；图片变体候选路径由回收器按 product_id / category 确定性推导，不落库
+    manifest_json: Mapped[str] = mapped_column(Text, default="{}")
+    status: Mapped[str] = mapped_column(String(16), default="pending")
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    files_removed: Mapped[int] = mapped_column(Integer, default=0)
+    dirs_removed: Mapped[int] = mapped_column(Integer, default=0)
+    bytes_freed: Mapped[int] = mapped_column(Integer, default=0)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    deleted_at: Mapped[str] = mapped_column(String(32))
+    reclaimed_at: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    # failed 墓碑最早的重试时间（按 attempts 指数退避），由周期补扫 / worker 到期后重新回收
+    next_attempt_at: Mapped[str | None] = mapped_column(String(32), nullable=True)
+
+
 class ProductRouteMappingIndex(Base):
     __tablename__ = "product_route_mapping_index"
 
@@ -394,23 +511,58 @@ class ProductFeaturedSlot(Base):
 
 class MobileSelectionSession(Base):
     __tablename__ = "mobile_selection_sessions"
+    # 用户侧查询都带 deleted_at IS NULL：只索引未删除的行（SQLite / PostgreSQL 部分索引）。
+    __table_args__ = (
+        # 最近一次 / 复用已有结果：(owner, category) 按 created_at 倒序
+        Index(
+            "ix_mobile_selection_sessions_live_category",
+            "owner_type",
+            "owner_id",
+            "category",
+            "created_at",
+            sqlite_where=text("deleted_at IS NULL"),
+            postgresql_where=text("deleted_at IS NULL"),
+        ),
+        # 历史列表：置顶优先，再按 pinned_at / created_at / id 倒序（keyset 翻页）
+        Index(
+            "ix_mobile_selection_sessions_live_pinned",
+            "owner_type",
+            "owner_id",
+            "is_pinned",
+            "pinned_at",
+            "created_at",
+            "id",
+            sqlite_where=text("deleted_at IS NULL"),
+            postgresql_where=text("deleted_at IS NULL"),
+        ),
+        # 清理预览：owner 下早于截止时间的行
+        Index(
+            "ix_mobile_selection_sessions_live_created",
+            "owner_type",
+            "owner_id",
+            "created_at",
+            sqlite_where=text("deleted_at IS NULL"),
+            postgresql_where=text("deleted_at IS NULL"),
+        ),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True)
-    owner_type: Mapped[str] = mapped_column(String(32), index=True, default="device")
-    owner_id: Mapped[str] = mapped_column(String(128), index=True)
-    category: Mapped[str] = mapped_column(String(32), index=True)
-    rules_version: Mapped[str] = mapped_column(String(32), index=True)
-    answers_hash: Mapped[str] = mapped_column(String(64), index=True)
-    route_key: Mapped[str] = mapped_column(String(128), index=True)
+    owner_type: Mapped[str] = mapped_column(String(32), default="device")
+    owner_id: Mapped[str] = mapped_column(String(128))
+    category: Mapped[str] = mapped_column(String(32))
+    rules_version: Mapped[str] = mapped_column(String(32))
+    answers_hash: Mapped[str] = mapped_column(String(64))
+    route_key: Mapped[str] = mapped_column(String(128))
     route_title: Mapped[str] = mapped_column(String(256))
+    # 产品失效引用清理按 product_id 回查
     product_id: Mapped[str | None] = mapped_column(String(36), nullable=True, index=True)
     answers_json: Mapped[str] = mapped_column(Text)
     result_json: Mapped[str] = mapped_column(Text)
-    is_pinned: Mapped[bool] = mapped_column(Boolean, default=False, index=True)
-    pinned_at: Mapped[str | None] = mapped_column(String(32), nullable=True, index=True)
-    deleted_at: Mapped[str | None] = mapped_column(String(32), nullable=True, index=True)
+    is_pinned: Mapped[bool] = mapped_column(Boolean, default=False)
+    pinned_at: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    deleted_at: Mapped[str | None] = mapped_column(String(32), nullable=True)
     deleted_by: Mapped[str | None] = mapped_column(Text, nullable=True)
-    created_at: Mapped[str] = mapped_column(String(32), index=True)
+    created_at: Mapped[str] = mapped_column(String(32))
 
 
 class MobileSelectionResultIndex(Base):
@@ -467,12 +619,21 @@ class MobileSelectionResultIndex(Base):
 class MobileCompareSessionIndex(Base):
     __tablename__ = "mobile_compare_session_index"
     __table_args__ = (
+        # 会话列表：按 (updated_at, compare_id) 倒序 keyset 翻页，带 / 不带品类
         Index(
             "ix_mobile_compare_session_owner_scope",
             "owner_type",
             "owner_id",
             "category",
             "updated_at",
+            "compare_id",
+        ),
+        Index(
+            "ix_mobile_compare_session_owner_recent",
+            "owner_type",
+            "owner_id",
+            "updated_at",
+            "compare_id",
         ),
     )
 
@@ -595,6 +756,21 @@ class MobileClientEvent(Base):
     created_at: Mapped[str] = mapped_column(String(32), index=True)
 
 
+class MobileClientEventPartition(Base):
+    # mobile_client_events 的月份登记：storage=table 表示在分区 / 分表里，archive 表示已导出为 gzip JSON Lines 归档
+    __tablename__ = "mobile_client_event_partitions"
+
+    month: Mapped[str] = mapped_column(String(7), primary_key=True)
+    storage: Mapped[str] = mapped_column(String(16), default="table")
+    table_name: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    archive_path: Mapped[str | None] = mapped_column(String(256), nullable=True)
+    row_count: Mapped[int] = mapped_column(Integer, default=0)
+    archive_bytes: Mapped[int] = mapped_column(Integer, default=0)
+    min_created_at: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    max_created_at: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    updated_at: Mapped[str] = mapped_column(String(32))
+
+
 class UserUploadAsset(Base):
     __tablename__ = "user_upload_assets"
     __table_args__ = (
@@ -663,3 +839,11 @@ class UserProduct(Base):
     created_at: Mapped[str] = mapped_column(String(32), index=True)
     updated_at: Mapped[str] = mapped_column(String(32), index=True)
     last_analyzed_at: Mapped[str | None] = mapped_column(String(32), nullable=True, index=True)
+
+
+class RuntimeSchemaVersion(Base):
+    __tablename__ = "runtime_schema_versions"
+
+    schema_key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    version: Mapped[str] = mapped_column(String(64))
+    verified_at: Mapped[str] = mapped_column(String(32))
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import re
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Iterable, Iterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# 查询计划检查：
+# - capture_queries 在 engine 上挂 before_cursor_execute，记录真实代码路径发出的 SELECT（语句 + 参数）
+# - explain_query_plan 用同样的语句与参数取执行计划：SQLite 走 EXPLAIN QUERY PLAN；
+#   PostgreSQL 在只读事务里关闭 enable_seqscan 后 EXPLAIN，空表 / 小表也能看出索引是否“可用”
+# - full_table_scans / sorts_without_index 从计划文本里挑出整表扫描与额外排序，供测试与基准断言
+# - tables_touched 列出计划实际访问的表，用来确认分区 / 分表被裁剪
+_SQLITE_FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(?P<table>\w+)(?: AS \w+)?$")
+_SQLITE_TEMP_SORT = re.compile(r"USE TEMP B-TREE FOR (?:LAST \d+ TERMS OF )?ORDER BY")
+_POSTGRES_SEQ_SCAN = re.compile(r"Seq Scan on (?P<table>\w+)")
+_POSTGRES_SORT = re.compile(r"^\s*(?:->\s*)?(?:Incremental )?Sort\b")
+_SQLITE_TABLE_ACCESS = re.compile(r"^(?:SCAN|SEARCH) (?:TABLE )?(?P<table>\w+)")
+_POSTGRES_TABLE_ACCESS = re.compile(r"(?<!Bitmap Index )\bScan (?:Backward )?(?:using \w+ )?on (?P<table>\w+)")
+
+
+@dataclass(frozen=True)
+class CapturedQuery:
+    statement: str
+    parameters: Any
+
+
+@dataclass(frozen=True)
+class QueryPlan:
+    dialect: str
+    statement: str
+    lines: tuple[str, ...]
+
+    def full_table_scans(self, tables: Iterable[str] | None = None) -> list[str]:
+        return full_table_scans(self, tables)
+
+    def tables_touched(self) -> list[str]:
+        """计划里实际读到的表（分区 / 分表裁剪的检查依据），按首次出现排序。"""
+        pattern = _SQLITE_TABLE_ACCESS if self.dialect == "sqlite" else _POSTGRES_TABLE_ACCESS
+        out: list[str] = []
+        for line in self.lines:
+            matched = pattern.search(line.strip())
+            if matched and matched.group("table") not in out:
+                out.append(matched.group("table"))
+        return out
+
+    def sorts_without_index(self) -> list[str]:
+        pattern = _SQLITE_TEMP_SORT if self.dialect == "sqlite" else _POSTGRES_SORT
+        return [line for line in self.lines if pattern.search(line)]
+
+
+def _engine_of(bind: Any) -> Engine:
+    return getattr(bind, "engine", bind)
+
+
+@contextmanager
+def capture_queries(bind: Any) -> Iterator[list[CapturedQuery]]:
+    """记录块内在该 engine 上执行的 SELECT（不含 EXPLAIN 自身）。"""
+    engine = _engine_of(bind)
+    captured: list[CapturedQuery] = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany) -> None:
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append(CapturedQuery(statement=statement, parameters=parameters))
+
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        yield captured
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+
+
+def explain_query_plan(bind: Any, statement: str, parameters: Any = None) -> QueryPlan:
+    engine = _engine_of(bind)
+    dialect = engine.dialect.name
+    params = parameters if parameters is not None else ()
+    with engine.connect() as conn:
+        if dialect == "sqlite":
+            rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", params).all()
+            lines = tuple(str(row[-1]) for row in rows)
+        elif dialect == "postgresql":
+            trans = conn.begin()
+            try:
+                conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+                rows = conn.exec_driver_sql(f"EXPLAIN {statement}", params).all()
+            finally:
+                trans.rollback()
+            lines = tuple(str(row[0]) for row in rows)
+        else:
+            raise ValueError(f"query plan inspection is not supported for dialect '{dialect}'.")
+    return QueryPlan(dialect=dialect, statement=statement, lines=lines)
+
+
+def full_table_scans(plan: QueryPlan, tables: Iterable[str] | None = None) -> list[str]:
+    """计划中对 tables（默认全部表）的整表扫描；走索引的全索引扫描（SCAN ... USING INDEX）不算。"""
+    wanted = {str(item) for item in tables} if tables is not None else None
+    pattern = _SQLITE_FULL_SCAN if plan.dialect == "sqlite" else _POSTGRES_SEQ_SCAN
+    out: list[str] = []
+    for line in plan.lines:
+        matched = pattern.search(line.strip())
+        if matched and (wanted is None or matched.group("table") in wanted):
+            out.append(line.strip())
+    return out
+
+
+def explain_captured_queries(bind: Any, queries: Iterable[CapturedQuery]) -> list[QueryPlan]:
+    return [explain_query_plan(bind, item.statement, item.parameters) for item in queries]
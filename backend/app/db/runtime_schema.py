@@ -0,0 +1,412 @@
+from __future__ import annotations
+
+import threading
+import weakref
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterator
+
+from sqlalchemy import inspect, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from app.db.event_partitions import ensure_event_partitioning
+from app.db.models import (
+    AIJob,
+    AIRun,
+    Base,
+    IngredientLibraryBuildJob,
+    MobileCompareSessionIndex,
+    MobileCompareUsageStat,
+    MobileSelectionSession,
+    ProductWorkbenchJob,
+    RuntimeSchemaVersion,
+    UploadIngestJob,
+)
+
+# 运行时 schema 就绪检查：
+# - 启动（init_db）或首次使用时执行一次：create_all + 各表补列/补索引，完成后写入版本戳
+# - 进程内按 engine 记忆“已校验”，热路径不再访问系统目录（inspect / checkfirst）
+# - 任何补丁变更都必须递增 RUNTIME_SCHEMA_VERSION，已部署实例会在下次启动/首次访问时重新补齐
+RUNTIME_SCHEMA_KEY = "runtime"
+RUNTIME_SCHEMA_VERSION = "2026-10-r14"
+# pg_advisory_xact_lock 的键（任意固定 bigint，仅用于本补丁流程）
+RUNTIME_SCHEMA_ADVISORY_LOCK_ID = 7_315_420_260_100_301
+
+_VERIFIED_ENGINES: "weakref.WeakKeyDictionary[Engine, str]" = weakref.WeakKeyDictionary()
+_VERIFY_LOCK = threading.RLock()
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _add_missing_columns(
+    bind: Any,
+    table_name: str,
+    columns: dict[str, str],
+    *,
+    indexes: tuple[str, ...] = (),
+) -> list[str]:
+    inspector = inspect(bind)
+    if table_name not in inspector.get_table_names():
+        return []
+    existing = {item["name"] for item in inspector.get_columns(table_name)}
+    statements = [
+        f"ALTER TABLE {table_name} ADD COLUMN {name} {ddl}" for name, ddl in columns.items() if name not in existing
+    ]
+    if statements or indexes:
+        with bind.begin() as conn:
+            for stmt in statements:
+                conn.execute(text(stmt))
+            for stmt in indexes:
+                conn.execute(text(stmt))
+    return statements
+
+
+def _patch_mobile_selection_sessions(bind: Any) -> list[str]:
+    return _add_missing_columns(
+        bind,
+        "mobile_selection_sessions",
+        {
+            "owner_type": "VARCHAR(32) NOT NULL DEFAULT 'device'",
+            # Legacy rows are isolated by marking owner_id as 'legacy' instead of exposing to all devices.
+            "owner_id": "VARCHAR(128) NOT NULL DEFAULT 'legacy'",
+            "deleted_at": "VARCHAR(32)",
+            "deleted_by": "TEXT",
+            "is_pinned": "BOOLEAN NOT NULL DEFAULT 0",
+            "pinned_at": "VARCHAR(32)",
+        },
+    )
+
+
+def _patch_mobile_selection_result_index(bind: Any) -> list[str]:
+    return _add_missing_columns(
+        bind,
+        "mobile_selection_result_index",
+        {
+            "fingerprint": "VARCHAR(64)",
+            "published_payload_json": "TEXT",
+            "fixed_contract_json": "TEXT",
+            "artifact_manifest_json": "TEXT",
+            "payload_backend": "VARCHAR(32) NOT NULL DEFAULT 'postgres_payload'",
+        },
+        indexes=(
+            "CREATE INDEX IF NOT EXISTS ix_mobile_selection_result_index_fingerprint "
+            "ON mobile_selection_result_index (fingerprint)",
+            "CREATE INDEX IF NOT EXISTS ix_mobile_selection_result_index_payload_backend "
+            "ON mobile_selection_result_index (payload_backend)",
+        ),
+    )
+
+
+def _patch_mobile_compare_session_index(bind: Any) -> list[str]:
+    MobileCompareSessionIndex.__table__.create(bind=bind, checkfirst=True)
+    MobileCompareUsageStat.__table__.create(bind=bind, checkfirst=True)
+    return _add_missing_columns(
+        bind,
+        "mobile_compare_session_index",
+        {
+            "job_version": "VARCHAR(32)",
+            "execution_backend": "VARCHAR(32)",
+            "job_payload_json": "TEXT",
+        },
+        indexes=(
+            "CREATE INDEX IF NOT EXISTS ix_mobile_compare_session_execution_scope "
+            "ON mobile_compare_session_index (status, stage, updated_at)",
+        ),
+    )
+
+
+def _patch_upload_ingest_jobs(bind: Any) -> list[str]:
+    UploadIngestJob.__table__.create(bind=bind, checkfirst=True)
+    return _add_missing_columns(
+        bind,
+        "upload_ingest_jobs",
+        {
+            "resume_requested": "BOOLEAN NOT NULL DEFAULT false",
+            "stage1_reasoning_text": "TEXT",
+            "stage2_reasoning_text": "TEXT",
+        },
+    )
+
+
+def _patch_product_workbench_jobs(bind: Any) -> list[str]:
+    ProductWorkbenchJob.__table__.create(bind=bind, checkfirst=True)
+    return _add_missing_columns(bind, "product_workbench_jobs", {"live_text_json": "TEXT"})
+
+
+def _patch_ingredient_library_build_jobs(bind: Any) -> list[str]:
+    IngredientLibraryBuildJob.__table__.create(bind=bind, checkfirst=True)
+    return _add_missing_columns(
+        bind,
+        "ingredient_library_build_jobs",
+        {
+            "normalization_packages_json": "TEXT NOT NULL DEFAULT '[]'",
+            "live_text_json": "TEXT",
+        },
+    )
+
+
+def _patch_ingredient_library_index(bind: Any) -> list[str]:
+    return _add_missing_columns(bind, "ingredient_library_index", {"source_signature": "VARCHAR(64)"})
+
+
+def _patch_product_storage_tombstones(bind: Any) -> list[str]:
+    return _add_missing_columns(bind, "product_storage_tombstones", {"next_attempt_at": "VARCHAR(32)"})
+
+
+def _patch_ai_runs(bind: Any) -> list[str]:
+    return _add_missing_columns(
+        bind,
+        "ai_runs",
+        {
+            "input_tokens": "INTEGER",
+            "output_tokens": "INTEGER",
+            "cached_tokens": "INTEGER",
+            "estimated_cost": "FLOAT",
+            "request_digest": "VARCHAR(64)",
+            "response_digest": "VARCHAR(64)",
+        },
+        indexes=(
+            "CREATE INDEX IF NOT EXISTS ix_ai_runs_capability_created_at ON ai_runs (capability, created_at)",
+            "CREATE INDEX IF NOT EXISTS ix_ai_jobs_capability_created_at ON ai_jobs (capability, created_at)",
+        ),
+    )
+
+
+# 按真实查询形状重建索引的高写入表：模型里声明的复合 / 部分索引缺失则补建、同名但列不同则按模型重建，
+# 被复合索引前缀覆盖或没有任何查询使用的旧索引删除（每次插入 / 更新都要维护，纯写放大）。
+QUERY_SHAPE_INDEXED_TABLES = (
+    MobileSelectionSession.__table__,
+    AIJob.__table__,
+    AIRun.__table__,
+    UploadIngestJob.__table__,
+    ProductWorkbenchJob.__table__,
+    IngredientLibraryBuildJob.__table__,
+    MobileCompareSessionIndex.__table__,
+)
+REDUNDANT_INDEXES: dict[str, tuple[str, ...]] = {
+    "mobile_selection_sessions": (
+        "ix_mobile_selection_sessions_owner_type",
+        "ix_mobile_selection_sessions_owner_id",
+        "ix_mobile_selection_sessions_category",
+        "ix_mobile_selection_sessions_rules_version",
+        "ix_mobile_selection_sessions_answers_hash",
+        "ix_mobile_selection_sessions_route_key",
+        "ix_mobile_selection_sessions_is_pinned",
+        "ix_mobile_selection_sessions_pinned_at",
+        "ix_mobile_selection_sessions_deleted_at",
+        "ix_mobile_selection_sessions_created_at",
+        # 由只含未删除行的 live_* 部分索引取代
+        "ix_mobile_selection_sessions_owner_scope",
+        "ix_mobile_selection_sessions_owner_pinned_scope",
+    ),
+    "ai_jobs": (
+        "ix_ai_jobs_capability",
+        "ix_ai_jobs_status",
+        "ix_ai_jobs_trace_id",
+    ),
+    "ai_runs": (
+        "ix_ai_runs_job_id",
+        "ix_ai_runs_capability",
+        "ix_ai_runs_status",
+    ),
+    "upload_ingest_jobs": (
+        "ix_upload_ingest_jobs_status",
+        "ix_upload_ingest_jobs_stage",
+        "ix_upload_ingest_jobs_cancel_requested",
+        "ix_upload_ingest_jobs_resume_requested",
+        "ix_upload_ingest_jobs_created_at",
+        "ix_upload_ingest_jobs_started_at",
+        "ix_upload_ingest_jobs_finished_at",
+        # 列表改按 created_at 翻页后不再使用
+        "ix_upload_ingest_jobs_updated_at",
+    ),
+    "product_workbench_jobs": (
+        "ix_product_workbench_jobs_job_type",
+        "ix_product_workbench_jobs_status",
+        "ix_product_workbench_jobs_stage",
+        "ix_product_workbench_jobs_cancel_requested",
+        "ix_product_workbench_jobs_created_at",
+        "ix_product_workbench_jobs_updated_at",
+        "ix_product_workbench_jobs_started_at",
+        "ix_product_workbench_jobs_finished_at",
+        "ix_product_workbench_jobs_type_updated",
+    ),
+    "ingredient_library_build_jobs": (
+        # 由 (status|category, created_at, job_id) 复合索引前缀覆盖
+        "ix_ingredient_library_build_jobs_status",
+        "ix_ingredient_library_build_jobs_category",
+        "ix_ingredient_library_build_jobs_created_at",
+        # 列表改按 created_at 翻页后不再使用
+        "ix_ing_lib_build_jobs_status_updated",
+        "ix_ing_lib_build_jobs_category_updated",
+        "ix_ing_lib_build_jobs_updated",
+    ),
+}
+
+
+def _rebuild_query_shape_indexes(bind: Any) -> list[str]:
+    inspector = inspect(bind)
+    tables = set(inspector.get_table_names())
+    statements: list[str] = []
+    with bind.begin() as conn:
+        for table in QUERY_SHAPE_INDEXED_TABLES:
+            if table.name not in tables:
+                continue
+            existing = {item["name"]: list(item.get("column_names") or []) for item in inspector.get_indexes(table.name)}
+            for name in REDUNDANT_INDEXES.get(table.name, ()):
+                if name in existing:
+                    stmt = f"DROP INDEX IF EXISTS {name}"
+                    conn.execute(text(stmt))
+                    statements.append(stmt)
+            for index in sorted(table.indexes, key=lambda item: str(item.name)):
+                columns = [column.name for column in index.columns]
+                if index.name in existing and existing[index.name] != columns:
+                    # 同名索引列已变（例如为 keyset 翻页追加主键）：按模型定义重建
+                    stmt = f"DROP INDEX IF EXISTS {index.name}"
+                    conn.execute(text(stmt))
+                    statements.append(stmt)
+                    existing.pop(index.name)
+                if index.name not in existing:
+                    index.create(conn)
+                    statements.append(f"CREATE INDEX {index.name} ON {table.name}")
+    return statements
+
+
+RUNTIME_SCHEMA_PATCHERS: dict[str, Callable[[Any], list[str]]] = {
+    "mobile_selection_sessions": _patch_mobile_selection_sessions,
+    "mobile_selection_result_index": _patch_mobile_selection_result_index,
+    "mobile_compare_session_index": _patch_mobile_compare_session_index,
+    "upload_ingest_jobs": _patch_upload_ingest_jobs,
+    "product_workbench_jobs": _patch_product_workbench_jobs,
+    "ingredient_library_build_jobs": _patch_ingredient_library_build_jobs,
+    "ingredient_library_index": _patch_ingredient_library_index,
+    "ai_runs": _patch_ai_runs,
+    "product_storage_tombstones": _patch_product_storage_tombstones,
+    # PostgreSQL：mobile_client_events 已是分区父表时预建未来分区（转换走迁移脚本）；SQLite 为空操作
+    "mobile_client_events": ensure_event_partitioning,
+    # 放在最后：部分索引依赖上面补齐的列（deleted_at 等）。
+    "query_shape_indexes": _rebuild_query_shape_indexes,
+}
+
+
+def _engine_of(bind: Any) -> Engine:
+    return getattr(bind, "engine", bind)
+
+
+def _read_schema_version(engine: Engine) -> str | None:
+    try:
+        with engine.connect() as conn:
+            return conn.execute(
+                select(RuntimeSchemaVersion.version).where(RuntimeSchemaVersion.schema_key == RUNTIME_SCHEMA_KEY)
+            ).scalar_one_or_none()
+    except SQLAlchemyError:
+        # 版本表尚不存在（老库 / 全新库）：走完整补丁流程。
+        return None
+
+
+def _write_schema_version(engine: Engine) -> None:
+    table = RuntimeSchemaVersion.__table__
+    values = {"schema_key": RUNTIME_SCHEMA_KEY, "version": RUNTIME_SCHEMA_VERSION, "verified_at": _now_iso()}
+    dialect = engine.dialect.name
+    try:
+        with engine.begin() as conn:
+            if dialect in {"sqlite", "postgresql"}:
+                if dialect == "sqlite":
+                    from sqlalchemy.dialects.sqlite import insert as dialect_insert
+                else:
+                    from sqlalchemy.dialects.postgresql import insert as dialect_insert
+                stmt = dialect_insert(table).values(**values)
+                conn.execute(
+                    stmt.on_conflict_do_update(
+                        index_elements=[table.c.schema_key],
+                        set_={"version": stmt.excluded.version, "verified_at": stmt.excluded.verified_at},
+                    )
+                )
+                return
+            # 其他方言没有 ON CONFLICT：先更新，更新不到再插入。
+            updated = conn.execute(
+                table.update().where(table.c.schema_key == RUNTIME_SCHEMA_KEY).values(
+                    version=values["version"], verified_at=values["verified_at"]
+                )
+            )
+            if not updated.rowcount:
+                conn.execute(table.insert().values(**values))
+    except IntegrityError:
+        # 另一个进程抢先插入了同一行：版本戳已经写好，不算失败。
+        return
+
+
+@contextmanager
+def _schema_apply_lock(engine: Engine) -> Iterator[None]:
+    """
+    跨进程串行化补丁流程（多个 API / worker 进程同时启动时，分区转换、索引重建不能交错执行）。
+    PostgreSQL 用事务级 advisory lock：持锁连接的事务结束即释放，进程崩溃也不会残留；
+    其它方言只有进程内 _VERIFY_LOCK。
+    """
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+    with engine.connect() as conn, conn.begin():
+        conn.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": RUNTIME_SCHEMA_ADVISORY_LOCK_ID})
+        yield
+
+
+def _apply_patches_locked(engine: Engine) -> dict[str, list[str]]:
+    Base.metadata.create_all(bind=engine)
+    applied: dict[str, list[str]] = {}
+    for name, patcher in RUNTIME_SCHEMA_PATCHERS.items():
+        statements = patcher(engine)
+        if statements:
+            applied[name] = statements
+    _write_schema_version(engine)
+    _VERIFIED_ENGINES[engine] = RUNTIME_SCHEMA_VERSION
+    return applied
+
+
+def apply_runtime_schema(bind: Any) -> dict[str, Any]:
+    """
+    执行全部运行时补丁并写入版本戳（幂等）。由 init_db / 迁移脚本调用，或在首次校验发现版本落后时调用。
+    """
+    engine = _engine_of(bind)
+    with _VERIFY_LOCK, _schema_apply_lock(engine):
+        applied = _apply_patches_locked(engine)
+    return {"version": RUNTIME_SCHEMA_VERSION, "applied": applied}
+
+
+def ensure_runtime_schema(bind: Any) -> None:
+    """
+    热路径入口：进程内已校验过的 engine 直接返回（零查询）；
+    否则读一次版本戳，版本一致即记忆，落后则补齐后记忆。
+    """
+    engine = _engine_of(bind)
+    if _VERIFIED_ENGINES.get(engine) == RUNTIME_SCHEMA_VERSION:
+        return
+    with _VERIFY_LOCK:
+        if _VERIFIED_ENGINES.get(engine) == RUNTIME_SCHEMA_VERSION:
+            return
+        if _read_schema_version(engine) == RUNTIME_SCHEMA_VERSION:
+            _VERIFIED_ENGINES[engine] = RUNTIME_SCHEMA_VERSION
+            return
+        with _schema_apply_lock(engine):
+            # 等锁期间其它进程可能已经补齐：拿到锁后再读一次版本戳
+            if _read_schema_version(engine) == RUNTIME_SCHEMA_VERSION:
+                _VERIFIED_ENGINES[engine] = RUNTIME_SCHEMA_VERSION
+                return
+            _apply_patches_locked(engine)
+
+
+def reset_runtime_schema_memo() -> None:
+    with _VERIFY_LOCK:
+        _VERIFIED_ENGINES.clear()
+
+
+def describe_runtime_schema_contract() -> dict[str, Any]:
+    return {
+        "schema_key": RUNTIME_SCHEMA_KEY,
+        "version": RUNTIME_SCHEMA_VERSION,
+        "patchers": list(RUNTIME_SCHEMA_PATCHERS),
+        "request_path_catalog_queries": "once_per_process_per_engine",
+    }
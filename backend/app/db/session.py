@@ -1,8 +1,10 @@
 from __future__ import annotations
 
 import os
+from typing import Any
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
 
 from app.db.models import (
@@ -14,6 +16,7 @@ from app.db.models import (
     PRODUCT_WORKBENCH_STRUCTURED_TABLES,
     describe_postgresql_migration_boundary,
 )
+from app.db.write_queue import describe_sqlite_write_queue
 from app.settings import settings
 
 
@@ -61,10 +64,51 @@ def _driver_name(url: str) -> str:
     return head or "unknown"
 
 
+def _sqlite_performance_pragmas() -> list[tuple[str, Any]]:
+    return [
+        ("journal_mode", "WAL"),
+        ("synchronous", "NORMAL"),
+        ("busy_timeout", max(0, int(settings.db_sqlite_busy_timeout_ms))),
+        ("cache_size", -max(0, int(settings.db_sqlite_cache_size_kib))),
+        ("mmap_size", max(0, int(settings.db_sqlite_mmap_size_bytes))),
+        ("temp_store", "MEMORY"),
+    ]
+
+
+def install_sqlite_performance_mode(target: Engine) -> None:
+    """在每个新 SQLite 连接上设置性能 pragma。WAL 是库级持久设置，其余按连接生效。"""
+    if target.dialect.name != "sqlite" or not bool(settings.db_sqlite_performance_mode):
+        return
+    pragmas = _sqlite_performance_pragmas()
+
+    @event.listens_for(target, "connect")
+    def _apply_sqlite_pragmas(dbapi_connection, _connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def describe_sqlite_connection_pragmas(target: Engine) -> dict[str, Any]:
+    if target.dialect.name != "sqlite":
+        return {}
+    names = ("journal_mode", "synchronous", "busy_timeout", "cache_size", "mmap_size")
+    with target.connect() as conn:
+        return {name: conn.exec_driver_sql(f"PRAGMA {name}").scalar() for name in names}
+
+
 def _engine_kwargs_for(url: str) -> dict:
     is_sqlite = _is_sqlite_url(url)
+    connect_args: dict = {}
+    if is_sqlite:
+        connect_args["check_same_thread"] = False
+        if bool(settings.db_sqlite_performance_mode):
+            # pysqlite 的 timeout 就是驱动侧的 busy handler，与 PRAGMA busy_timeout 保持一致。
+            connect_args["timeout"] = max(0, int(settings.db_sqlite_busy_timeout_ms)) / 1000.0
     kwargs: dict = {
-        "connect_args": {"check_same_thread": False} if is_sqlite else {},
+        "connect_args": connect_args,
     }
     if not is_sqlite:
         kwargs.update(
@@ -126,6 +170,7 @@ def _build_engine_with_optional_downgrade():
     )
     try:
         created = create_engine(configured_url, **_engine_kwargs_for(configured_url))
+        install_sqlite_performance_mode(created)
         return (
             created,
             configured_url,
@@ -144,6 +189,7 @@ def _build_engine_with_optional_downgrade():
         if (not effective_downgrade_enabled) or _is_sqlite_url(configured_url):
             raise
         created = create_engine(downgrade_url, **_engine_kwargs_for(downgrade_url))
+        install_sqlite_performance_mode(created)
         reason = f"{type(exc).__name__}: {exc}"
         return (
             created,
@@ -411,6 +457,11 @@ def describe_database_engine_contract() -> dict:
             "pool_recycle_seconds": max(30, int(settings.db_pool_recycle_seconds)),
             "pool_pre_ping": bool(settings.db_pool_pre_ping),
         },
+        "sqlite_tuning": {
+            "performance_mode": bool(is_sqlite and settings.db_sqlite_performance_mode),
+            "pragmas": dict(_sqlite_performance_pragmas()) if is_sqlite and settings.db_sqlite_performance_mode else {},
+            "single_writer_queue": describe_sqlite_write_queue(engine),
+        },
         "downgrade": {
             "enabled": bool(runtime_effective_enabled),
             "configured_enabled": bool(runtime_configured_enabled),
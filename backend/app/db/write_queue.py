@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import queue
+import threading
+import weakref
+from concurrent.futures import Future
+from typing import Any, Callable, TypeVar
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.settings import settings
+
+T = TypeVar("T")
+
+# SQLite 单写者队列：
+# - SQLite 同一时刻只有一个写者；API 线程、上传 / 对比执行器同时提交时，落选方在驱动的 busy 重试里退避睡眠，
+#   既不公平也会把尾延迟拉到秒级
+# - 每个 SQLite engine 配一个写线程，调用方把“往 session 里写什么”交给它；写线程把排队中的操作合进同一事务提交
+#   （group commit），调用方等提交完成再返回，语义与原地 commit 一致
+# - 写线程空闲一段时间后自行退出，下次提交时再拉起；PostgreSQL 或关闭开关时原地执行并提交
+# 只适合追加 / 无读改写冲突的写入（事件、计数器）：fn 在写线程的 session 里执行，不能再等待本队列。
+_WRITER_IDLE_EXIT_SECONDS = 5.0
+
+
+class _WriteJob:
+    __slots__ = ("fn", "future")
+
+    def __init__(self, fn: Callable[[Session], Any]):
+        self.fn = fn
+        self.future: Future = Future()
+
+
+class SQLiteWriteQueue:
+    def __init__(self, engine: Engine):
+        self._engine_ref = weakref.ref(engine)
+        self._jobs: "queue.Queue[_WriteJob]" = queue.Queue()
+        self._guard = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self.stats = {"jobs": 0, "batches": 0, "max_batch": 0, "failed_jobs": 0, "batch_retries": 0}
+
+    def submit(self, fn: Callable[[Session], T]) -> "Future[T]":
+        job = _WriteJob(fn)
+        self._jobs.put(job)
+        with self._guard:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+                self._thread.start()
+        return job.future
+
+    def _run(self) -> None:
+        while True:
+            try:
+                first = self._jobs.get(timeout=_WRITER_IDLE_EXIT_SECONDS)
+            except queue.Empty:
+                with self._guard:
+                    # 加锁后再确认一次：submit 放入任务后才检查线程存活，这里退出不会漏任务。
+                    if self._jobs.empty():
+                        self._thread = None
+                        return
+                continue
+            batch = [first]
+            batch_max = max(1, int(settings.db_sqlite_write_batch_max))
+            while len(batch) < batch_max:
+                try:
+                    batch.append(self._jobs.get_nowait())
+                except queue.Empty:
+                    break
+            self._execute(batch)
+
+    def _execute(self, batch: list[_WriteJob]) -> None:
+        engine = self._engine_ref()
+        if engine is None:
+            for job in batch:
+                job.future.set_exception(RuntimeError("SQLite engine was disposed before the write ran."))
+            return
+        with self._guard:
+            self.stats["batches"] += 1
+            self.stats["jobs"] += len(batch)
+            self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
+        # expire_on_commit=False：调用方在自己的线程里还会读写入对象的属性，不能触发写线程 session 的刷新。
+        with Session(bind=engine, autoflush=False, expire_on_commit=False) as db:
+            try:
+                results = [job.fn(db) for job in batch]
+                db.commit()
+            except Exception as exc:
+                db.rollback()
+                if len(batch) == 1:
+                    with self._guard:
+                        self.stats["failed_jobs"] += 1
+                    batch[0].future.set_exception(exc)
+                    return
+                with self._guard:
+                    self.stats["batch_retries"] += 1
+            else:
+                for job, result in zip(batch, results):
+                    job.future.set_result(result)
+                return
+        # 合批失败时逐条重试，只让真正出错的那条失败。
+        for job in batch:
+            self._execute([job])
+
+    def describe(self) -> dict[str, Any]:
+        with self._guard:
+            stats = dict(self.stats)
+            stats["writer_alive"] = bool(self._thread is not None and self._thread.is_alive())
+        stats["pending"] = self._jobs.qsize()
+        stats["avg_batch"] = round(stats["jobs"] / stats["batches"], 2) if stats["batches"] else None
+        return stats
+
+
+_WRITE_QUEUES: "weakref.WeakKeyDictionary[Engine, SQLiteWriteQueue]" = weakref.WeakKeyDictionary()
+_WRITE_QUEUES_GUARD = threading.Lock()
+
+
+def sqlite_write_queue_for(bind: Any) -> SQLiteWriteQueue | None:
+    target = getattr(bind, "engine", bind)
+    if not isinstance(target, Engine) or target.dialect.name != "sqlite":
+        return None
+    if not bool(settings.db_sqlite_single_writer):
+        return None
+    with _WRITE_QUEUES_GUARD:
+        write_queue = _WRITE_QUEUES.get(target)
+        if write_queue is None:
+            write_queue = SQLiteWriteQueue(target)
+            _WRITE_QUEUES[target] = write_queue
+        return write_queue
+
+
+def run_serialized_write(db: Session, fn: Callable[[Session], T]) -> T:
+    """在 db 绑定的数据库上执行 fn(session) 并提交；SQLite 下经单写者队列合批，其余原地执行。
+
+    fn 拿到的 session 可能不是 db 本身，只应 add / execute 写语句，不要依赖 db 里已加载的对象。
+    """
+    write_queue = sqlite_write_queue_for(db.get_bind())
+    if write_queue is None:
+        result = fn(db)
+        db.commit()
+        return result
+    return write_queue.submit(fn).result()
+
+
+def describe_sqlite_write_queue(bind: Any) -> dict[str, Any] | None:
+    write_queue = sqlite_write_queue_for(bind)
+    return write_queue.describe() if write_queue is not None else None
@@ -0,0 +1 @@
+"""Role-pinned ASGI entry points: `uvicorn app.entrypoints.api:app` / `uvicorn app.entrypoints.worker:app`."""
@@ -0,0 +1,5 @@
+# backend/app/entrypoints/api.py
+# api 角色入口：导入全部业务路由并挂载静态目录。
+from app.main import create_app
+
+app = create_app("api")
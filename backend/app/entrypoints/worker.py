@@ -0,0 +1,6 @@
+# backend/app/entrypoints/worker.py
+# worker 角色入口：只有 healthz / readyz / metrics + 后台轮询线程；
+# 业务路由模块在轮询到对应任务时才按需导入（见 app.services.runtime_worker）。
+from app.main import create_app
+
+app = create_app("worker")
@@ -3,27 +3,30 @@ from contextlib import asynccontextmanager
 import os
 import mimetypes
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from sqlalchemy import text
 
 from app.db.init_db import init_db
+from app.db.keyset import NEXT_CURSOR_HEADER
 from app.db.session import (
     assert_phase_23_pg_only_truth_contract,
     assert_phase_24_mobile_state_pg_only_truth_contract,
     assert_phase_25_sqlite_closure_contract,
     engine,
 )
+from app.platform.request_metrics import install_request_metrics, render_request_metrics
 from app.platform.runtime_profile import describe_runtime_profile
 from app.platform.storage_backend import get_runtime_storage
-from app.routes.ai import router as ai_router
-from app.routes.ingest import router as ingest_router
-from app.routes.mobile import router as mobile_router
-from app.routes.products import router as products_router
 from app.settings import settings
 from app.services.runtime_topology import api_routes_enabled, should_initialize_runtime_schema
-from app.services.runtime_worker import start_runtime_worker_daemon
+from app.services.runtime_worker import (
+    start_runtime_worker_daemon,
+    start_storage_reclaim_sweeper,
+    stop_storage_reclaim_sweeper,
+)
+from app.services.storage import shutdown_image_encode_pool
 
 
 def _startup_init_db() -> None:
@@ -33,39 +36,22 @@ def _startup_init_db() -> None:
     assert_phase_24_mobile_state_pg_only_truth_contract()
     assert_phase_25_sqlite_closure_contract()
     start_runtime_worker_daemon()
+    start_storage_reclaim_sweeper()
 
 
 @asynccontextmanager
 async def lifespan(_app: FastAPI):
     _startup_init_db()
     yield
+    stop_storage_reclaim_sweeper()
+    shutdown_image_encode_pool()
 
 
-app = FastAPI(title="Shampoo Picker API", version="0.1.0", lifespan=lifespan)
-
 # Ensure uncommon image mime types are recognized in both StaticFiles and data-url generation.
 mimetypes.add_type("image/heic", ".heic")
 mimetypes.add_type("image/heif", ".heif")
 
-# CORS
-origins = [o.strip() for o in settings.cors_origins.split(",") if o.strip()]
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_origin_regex=settings.cors_origin_regex or None,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# routes
-if api_routes_enabled():
-    app.include_router(ingest_router)
-    app.include_router(products_router)
-    app.include_router(ai_router)
-    app.include_router(mobile_router)
 
-@app.get("/healthz")
 def healthz():
     try:
         runtime = describe_runtime_profile()
@@ -77,7 +63,17 @@ def healthz():
         }
     return {"status": "ok", "service": "backend", "env": settings.app_env, "runtime": runtime}
 
-@app.get("/readyz")
+
+def metrics():
+    content = render_request_metrics()
+    if api_routes_enabled():
+        # 逆解析缓存只在 api 角色里有流量；运维统计走 /metrics，不再挂在公开的 /api/mobile 下
+        from app.services.mobile_location import render_mobile_location_cache_metrics
+
+        content += render_mobile_location_cache_metrics()
+    return Response(content=content, media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 def readyz():
     try:
         with engine.connect() as conn:
@@ -99,14 +95,74 @@ def readyz():
 
     return {"status": "ready", "runtime": describe_runtime_profile()}
 
-if api_routes_enabled():
+
+def _include_api_routes(application: FastAPI) -> None:
+    # 业务路由模块（products / mobile / ingest / ai）合计上万行、连带 schemas 与豆包 pipeline，
+    # 只在 api 角色里导入；worker 进程不为它们付导入时间和常驻内存。
+    from app.routes.ai import router as ai_router
+    from app.routes.ingest import router as ingest_router
+    from app.routes.mobile import router as mobile_router
+    from app.routes.products import router as products_router
+
+    application.include_router(ingest_router)
+    application.include_router(products_router)
+    application.include_router(ai_router)
+    application.include_router(mobile_router)
+
+
+def _mount_static_dirs(application: FastAPI) -> None:
     # static files: always mount /images so route is stable even on first boot
     os.makedirs(settings.storage_dir, exist_ok=True)
     images_dir = os.path.join(settings.storage_dir, "images")
     os.makedirs(images_dir, exist_ok=True)
-    app.mount("/images", StaticFiles(directory=images_dir), name="images")
+    application.mount("/images", StaticFiles(directory=images_dir), name="images")
 
     os.makedirs(settings.user_storage_dir, exist_ok=True)
     user_images_dir = os.path.join(settings.user_storage_dir, "images")
     os.makedirs(user_images_dir, exist_ok=True)
-    app.mount("/user-images", StaticFiles(directory=user_images_dir), name="user-images")
+    application.mount("/user-images", StaticFiles(directory=user_images_dir), name="user-images")
+
+
+def create_app(role: str | None = None) -> FastAPI:
+    """
+    按运行角色组装应用；role 为空时沿用 RUNTIME_ROLE。
+    worker 只暴露 healthz / readyz / metrics（编排健康检查用），业务路由与静态目录只在 api 角色挂载。
+    """
+    if role is not None:
+        settings.runtime_role = role
+    application = FastAPI(title="Shampoo Picker API", version="0.1.0", lifespan=lifespan)
+
+    # CORS
+    origins = [o.strip() for o in settings.cors_origins.split(",") if o.strip()]
+    application.add_middleware(
+        CORSMiddleware,
+        allow_origins=origins,
+        allow_origin_regex=settings.cors_origin_regex or None,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        # 允许前端读取 Server-Timing 与列表下一页游标（跨域时浏览器默认不暴露）
+        expose_headers=["Server-Timing", NEXT_CURSOR_HEADER],
+    )
+    # 请求级埋点放在最外层：CORS 预检也计入
+    install_request_metrics(application)
+
+    # routes
+    if api_routes_enabled():
+        _include_api_routes(application)
+    application.add_api_route("/healthz", healthz, methods=["GET"])
+    application.add_api_route("/metrics", metrics, methods=["GET"], include_in_schema=False)
+    application.add_api_route("/readyz", readyz, methods=["GET"])
+    if api_routes_enabled():
+        _mount_static_dirs(application)
+    return application
+
+
+def __getattr__(name: str):
+    # `uvicorn app.main:app` 兼容入口：首次访问才按 RUNTIME_ROLE 构建，
+    # 角色专用入口（app.entrypoints.*）导入本模块时不会先多建一份默认应用。
+    if name == "app":
+        application = create_app()
+        globals()["app"] = application
+        return application
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,303 @@
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.settings import settings
+
+# 请求级性能埋点：
+# - 纯 ASGI 中间件为每个 HTTP 请求放一个 RequestTimings 到 ContextVar（同步路由在线程池里执行时 anyio 会复制上下文）
+# - SQL：Engine 级 before/after_cursor_execute 统计条数与耗时；存储：app/services/storage 的读写入口上报次数 / 字节 / 耗时；
+#   模型：AIOrchestrator.run_job 包住 execute_capability 上报耗时
+# - 响应头带 Server-Timing（db / storage / model / total），同时按路由模板（不是原始路径，避免标签爆炸）聚合到进程内注册表，
+#   由 /metrics 以 Prometheus 文本格式输出
+# - 请求上下文之外（后台线程、worker）的 SQL / 存储 / 模型调用不计入
+# 热路径只有 perf_counter、ContextVar.get 与几次整数累加；同一请求内的并发线程累加不加锁，计数是尽力而为的。
+METRIC_PREFIX = "backend"
+LATENCY_BUCKETS_SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+_QUERY_STARTED_ATTR = "_request_metrics_query_started"
+_UNMATCHED_ROUTE = "<unmatched>"
+
+
+class RequestTimings:
+    __slots__ = (
+        "started",
+        "db_queries",
+        "db_seconds",
+        "storage_reads",
+        "storage_read_bytes",
+        "storage_writes",
+        "storage_write_bytes",
+        "storage_seconds",
+        "model_calls",
+        "model_seconds",
+    )
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.storage_reads = 0
+        self.storage_read_bytes = 0
+        self.storage_writes = 0
+        self.storage_write_bytes = 0
+        self.storage_seconds = 0.0
+        self.model_calls = 0
+        self.model_seconds = 0.0
+
+    def server_timing(self, total_seconds: float) -> str:
+        parts = [f'db;dur={self.db_seconds * 1000:.1f};desc="{self.db_queries} queries"']
+        if self.storage_reads or self.storage_writes:
+            parts.append(
+                f'storage;dur={self.storage_seconds * 1000:.1f};desc="{self.storage_reads} reads '
+                f'{self.storage_read_bytes}B / {self.storage_writes} writes {self.storage_write_bytes}B"'
+            )
+        if self.model_calls:
+            parts.append(f'model;dur={self.model_seconds * 1000:.1f};desc="{self.model_calls} calls"')
+        parts.append(f"total;dur={total_seconds * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_CURRENT: ContextVar[RequestTimings | None] = ContextVar("request_timings", default=None)
+
+
+def current_request_timings() -> RequestTimings | None:
+    return _CURRENT.get()
+
+
+def record_storage_io(kind: str, nbytes: int, seconds: float) -> None:
+    """存储读写上报（kind: read / write）；不在请求上下文内时直接忽略。"""
+    timings = _CURRENT.get()
+    if timings is None:
+        return
+    if kind == "read":
+        timings.storage_reads += 1
+        timings.storage_read_bytes += int(nbytes)
+    else:
+        timings.storage_writes += 1
+        timings.storage_write_bytes += int(nbytes)
+    timings.storage_seconds += seconds
+
+
+def record_model_call(seconds: float) -> None:
+    timings = _CURRENT.get()
+    if timings is None:
+        return
+    timings.model_calls += 1
+    timings.model_seconds += seconds
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    # 起始时间挂在本条语句的执行上下文上，而不是连接级的栈：语句抛错时不会留下错位的条目
+    if context is not None and _CURRENT.get() is not None:
+        setattr(context, _QUERY_STARTED_ATTR, time.perf_counter())
+
+
+def _record_query(context) -> None:
+    timings = _CURRENT.get()
+    started = getattr(context, _QUERY_STARTED_ATTR, None) if context is not None else None
+    if timings is None or started is None:
+        return
+    setattr(context, _QUERY_STARTED_ATTR, None)
+    timings.db_queries += 1
+    timings.db_seconds += time.perf_counter() - started
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    _record_query(context)
+
+
+def _handle_error(exception_context) -> None:
+    # 抛错的语句没有 after_cursor_execute：在这里计入条数与耗时
+    _record_query(exception_context.execution_context)
+
+
+_ENGINE_LISTENERS = (
+    ("before_cursor_execute", _before_cursor_execute),
+    ("after_cursor_execute", _after_cursor_execute),
+    ("handle_error", _handle_error),
+)
+_ENGINE_LISTENERS_GUARD = threading.Lock()
+_engine_listeners_installed = False
+
+
+def install_engine_listeners() -> None:
+    """在 Engine 类上挂 SQL 计时（对已有与之后创建的全部 engine 生效，幂等）。"""
+    global _engine_listeners_installed
+    with _ENGINE_LISTENERS_GUARD:
+        if _engine_listeners_installed:
+            return
+        for name, fn in _ENGINE_LISTENERS:
+            event.listen(Engine, name, fn)
+        _engine_listeners_installed = True
+
+
+def remove_engine_listeners() -> None:
+    global _engine_listeners_installed
+    with _ENGINE_LISTENERS_GUARD:
+        if not _engine_listeners_installed:
+            return
+        for name, fn in _ENGINE_LISTENERS:
+            event.remove(Engine, name, fn)
+        _engine_listeners_installed = False
+
+
+class _RouteSeries:
+    __slots__ = ("buckets", "count", "sum_seconds", "statuses", "totals")
+
+    def __init__(self) -> None:
+        self.buckets = [0] * (len(LATENCY_BUCKETS_SECONDS) + 1)
+        self.count = 0
+        self.sum_seconds = 0.0
+        self.statuses: dict[str, int] = {}
+        self.totals = [0.0] * len(_TOTAL_FIELDS)
+
+
+# _RouteSeries.totals 的下标与导出名
+_TOTAL_FIELDS = (
+    ("db_queries", "db_queries_total", "SQL statements executed while serving the route."),
+    ("db_seconds", "db_seconds_total", "Time spent in SQL statements."),
+    ("storage_reads", "storage_reads_total", "Storage reads."),
+    ("storage_read_bytes", "storage_read_bytes_total", "Bytes read from storage."),
+    ("storage_writes", "storage_writes_total", "Storage writes."),
+    ("storage_write_bytes", "storage_write_bytes_total", "Bytes written to storage."),
+    ("storage_seconds", "storage_seconds_total", "Time spent in storage reads and writes."),
+    ("model_calls", "model_calls_total", "Model capability calls."),
+    ("model_seconds", "model_seconds_total", "Time spent in model capability calls."),
+)
+
+
+class RequestMetricsRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._series: dict[tuple[str, str], _RouteSeries] = {}
+
+    def observe(self, *, method: str, route: str, status: int, seconds: float, timings: RequestTimings) -> None:
+        bucket = bisect_left(LATENCY_BUCKETS_SECONDS, seconds)
+        status_key = str(status)
+        with self._lock:
+            series = self._series.get((method, route))
+            if series is None:
+                series = self._series[(method, route)] = _RouteSeries()
+            series.buckets[bucket] += 1
+            series.count += 1
+            series.sum_seconds += seconds
+            series.statuses[status_key] = series.statuses.get(status_key, 0) + 1
+            totals = series.totals
+            for idx, (attr, _name, _help) in enumerate(_TOTAL_FIELDS):
+                totals[idx] += getattr(timings, attr)
+
+    def render(self) -> str:
+        with self._lock:
+            snapshot = {
+                key: (list(series.buckets), series.count, series.sum_seconds, dict(series.statuses), list(series.totals))
+                for key, series in self._series.items()
+            }
+        prefix = f"{METRIC_PREFIX}_http_request"
+        lines = [
+            f"# HELP {METRIC_PREFIX}_http_requests_total HTTP requests by route template and status.",
+            f"# TYPE {METRIC_PREFIX}_http_requests_total counter",
+        ]
+        ordered = sorted(snapshot.items())
+        for (method, route), (_buckets, _count, _sum, statuses, _totals) in ordered:
+            for status, value in sorted(statuses.items()):
+                lines.append(
+                    f'{METRIC_PREFIX}_http_requests_total{{method="{method}",route="{_escape(route)}",status="{status}"}} {value}'
+                )
+        lines.append(f"# HELP {prefix}_duration_seconds HTTP request latency by route template.")
+        lines.append(f"# TYPE {prefix}_duration_seconds histogram")
+        for (method, route), (buckets, count, total_seconds, _statuses, _totals) in ordered:
+            labels = f'method="{method}",route="{_escape(route)}"'
+            cumulative = 0
+            for bound, value in zip(LATENCY_BUCKETS_SECONDS, buckets):
+                cumulative += value
+                lines.append(f'{prefix}_duration_seconds_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+            lines.append(f'{prefix}_duration_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"{prefix}_duration_seconds_sum{{{labels}}} {total_seconds:.6f}")
+            lines.append(f"{prefix}_duration_seconds_count{{{labels}}} {count}")
+        for idx, (_attr, name, help_text) in enumerate(_TOTAL_FIELDS):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for (method, route), (_buckets, _count, _sum, _statuses, totals) in ordered:
+                value = totals[idx]
+                rendered = f"{value:.6f}" if isinstance(value, float) and not value.is_integer() else f"{int(value)}"
+                lines.append(f'{prefix}_{name}{{method="{method}",route="{_escape(route)}"}} {rendered}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUEST_METRICS = RequestMetricsRegistry()
+
+
+def _route_label(scope: dict[str, Any]) -> str:
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    if path:
+        return str(path)
+    # 挂载的静态目录没有 route 对象，按挂载前缀聚合
+    mount = str(scope.get("root_path") or "").rstrip("/")
+    return mount or _UNMATCHED_ROUTE
+
+
+class RequestMetricsMiddleware:
+    """纯 ASGI 中间件（不缓冲响应体，SSE / 流式响应照常透传）。"""
+
+    def __init__(self, app: Any, *, registry: RequestMetricsRegistry = REQUEST_METRICS) -> None:
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or not bool(settings.request_metrics_enabled):
+            await self.app(scope, receive, send)
+            return
+        timings = RequestTimings()
+        token = _CURRENT.set(timings)
+        status = 500
+        emit_header = bool(settings.request_metrics_server_timing)
+
+        async def send_with_timing(message: dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = int(message.get("status") or 500)
+                if emit_header:
+                    header = timings.server_timing(time.perf_counter() - timings.started)
+                    message["headers"] = [*message.get("headers", []), (b"server-timing", header.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _CURRENT.reset(token)
+            self.registry.observe(
+                method=str(scope.get("method") or "GET"),
+                route=_route_label(scope),
+                status=status,
+                seconds=time.perf_counter() - timings.started,
+                timings=timings,
+            )
+
+
+def install_request_metrics(app: Any) -> None:
+    install_engine_listeners()
+    app.add_middleware(RequestMetricsMiddleware)
+
+
+def render_request_metrics() -> str:
+    return REQUEST_METRICS.render()
+
+
+def reset_request_metrics() -> None:
+    REQUEST_METRICS.reset()
@@ -28,6 +28,7 @@ from app.services.runtime_topology import (
     compare_dispatch_mode,
     is_worker_runtime,
     product_workbench_dispatch_mode,
+    storage_reclaim_dispatch_mode,
     upload_ingest_dispatch_mode,
 )
 from app.services.runtime_worker import describe_runtime_worker_state
@@ -100,6 +101,7 @@ def describe_runtime_profile() -> dict[str, Any]:
             "upload_ingest_dispatch_mode": upload_ingest_dispatch_mode(),
             "compare_dispatch_mode": compare_dispatch_mode(),
             "product_workbench_dispatch_mode": product_workbench_dispatch_mode(),
+            "storage_reclaim_dispatch_mode": storage_reclaim_dispatch_mode(),
             "worker_state": describe_runtime_worker_state(),
         },
     }
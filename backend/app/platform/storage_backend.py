@@ -157,6 +157,13 @@ class LocalFileRuntimeStorage:
             "private_prefixes": list(_private_prefixes()),
             "signed_url_ttl_seconds": _signed_ttl_seconds(None),
             "signed_url_enforced": bool(getattr(settings, "asset_signed_url_enforced", False)),
+            "json_writer": {
+                "atomic_replace": True,
+                "compact_separators": True,
+                "binary_codec": legacy_storage._json_binary_codec(),
+                "binary_kinds": sorted(legacy_storage._json_binary_kinds()),
+                "binary_min_bytes": max(0, int(getattr(settings, "storage_json_binary_min_bytes", 0) or 0)),
+            },
         }
 
 
@@ -1,7 +1,7 @@
 import json
 import queue
 import threading
-from typing import Any
+from typing import Any, Literal
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
@@ -128,22 +128,36 @@ def list_ai_runs(
     job_id: str | None = Query(None),
     offset: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=200),
+    include_payloads: bool = Query(False),
     db: Session = Depends(get_db),
 ):
     orchestrator = AIOrchestrator(db)
-    runs = orchestrator.list_runs(job_id=job_id, limit=limit, offset=offset)
-    return [_to_run_view(run) for run in runs]
+    runs = orchestrator.list_runs(job_id=job_id, limit=limit, offset=offset, include_payloads=include_payloads)
+    if not include_payloads:
+        return [_to_run_view(run) for run in runs]
+    payloads = orchestrator.load_run_payloads(runs)
+    return [_to_run_view(run, payloads=payloads[run.id]) for run in runs]
+
+
+@router.get("/runs/{run_id}", response_model=AIRunView)
+def get_ai_run(run_id: str, db: Session = Depends(get_db)):
+    run = db.get(AIRun, run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="AI run not found.")
+    payloads = AIOrchestrator(db).load_run_payloads([run])
+    return _to_run_view(run, payloads=payloads[run.id])
 
 
 @router.get("/metrics/summary", response_model=AIMetricsSummaryView)
 def get_ai_metrics_summary(
     capability: str | None = Query(None),
     since_hours: int = Query(168, ge=1, le=24 * 365),
+    breakdown: Literal["capability", "model"] | None = Query(None),
     db: Session = Depends(get_db),
 ):
     orchestrator = AIOrchestrator(db)
     try:
-        return orchestrator.metrics_summary(capability=capability, since_hours=since_hours)
+        return orchestrator.metrics_summary(capability=capability, since_hours=since_hours, breakdown=breakdown)
     except AIServiceError as e:
         raise HTTPException(status_code=e.http_status, detail=e.message) from e
 
@@ -168,7 +182,8 @@ def _to_job_view(job: AIJob) -> AIJobView:
     )
 
 
-def _to_run_view(run: AIRun) -> AIRunView:
+def _to_run_view(run: AIRun, *, payloads: tuple[str | None, str | None] | None = None) -> AIRunView:
+    request_json, response_json = payloads if payloads is not None else (None, None)
     return AIRunView(
         id=run.id,
         job_id=run.job_id,
@@ -177,9 +192,13 @@ def _to_run_view(run: AIRun) -> AIRunView:
         prompt_key=run.prompt_key,
         prompt_version=run.prompt_version,
         model=run.model,
-        request=_parse_json(run.request_json),
-        response=_parse_json(run.response_json),
+        request=_parse_json(request_json),
+        response=_parse_json(response_json),
         latency_ms=run.latency_ms,
+        input_tokens=run.input_tokens,
+        output_tokens=run.output_tokens,
+        cached_tokens=run.cached_tokens,
+        estimated_cost=run.estimated_cost,
         error_code=run.error_code,
         error_http_status=run.error_http_status,
         error_message=run.error_message,
@@ -6,30 +6,35 @@ import mimetypes
 from datetime import datetime, timezone
 from typing import Any
 from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse, Response
 from pydantic import ValidationError
 from sqlalchemy.orm import Session, sessionmaker
-from sqlalchemy import inspect as sa_inspect, select, text
+from sqlalchemy import select
 
 from app.ai.errors import AIServiceError
 from app.constants import VALID_CATEGORIES, VALID_SOURCES
+from app.db.keyset import NEXT_CURSOR_HEADER, InvalidCursorError, fetch_keyset_page
+from app.db.runtime_schema import ensure_runtime_schema
 from app.db.session import get_db
 from app.db.models import ProductIndex, UploadIngestJob
 from app.platform.storage_backend import get_runtime_storage
 from app.platform.task_queue import get_runtime_task_queue
 from app.services.runtime_topology import should_inline_dispatch_upload_job
 from app.services.storage import (
+    UploadTooLargeError,
     cleanup_doubao_artifacts,
     convert_temp_upload_to_storage_image,
     exists_rel_path,
     move_image_to_category,
     new_id,
     now_iso,
+    read_stream_limited,
     save_doubao_artifact,
     save_image,
     save_product_json,
     remove_rel_path,
-    save_temp_upload_image,
+    save_temp_upload_stream,
 )
 from app.services.doubao_pipeline_service import DoubaoPipelineService
 from app.services.parser import normalize_doc
@@ -86,18 +91,8 @@ async def ingest(
     product_id = new_id()
     image_rel = None
     if upload:
-        content = await upload.read()
-        if len(content) > settings.max_upload_bytes:
-            raise HTTPException(status_code=413, detail=f"Image too large. Max {settings.max_upload_bytes} bytes.")
-        try:
-            image_rel = save_image(
-                product_id,
-                upload.filename or "upload.jpg",
-                content,
-                content_type=upload.content_type,
-            )
-        except ValueError as e:
-            raise HTTPException(status_code=400, detail=str(e)) from e
+        content = await _read_upload_content(upload)
+        image_rel = await _save_upload_image(product_id, upload, content)
 
     # 1) choose document source
     meta_raw = meta_json or payload_json
@@ -107,7 +102,7 @@ async def ingest(
     elif normalized_source in {"doubao", "auto"}:
         if not image_rel:
             raise HTTPException(status_code=400, detail="source=doubao requires image/file.")
-        doc = _analyze_with_doubao(
+        doc = await _analyze_with_doubao_async(
             image_rel,
             product_id,
             stage1_model_tier=normalized_stage1_model_tier,
@@ -118,7 +113,7 @@ async def ingest(
         # manual upload without JSON: still allow, use doubao mock/real to bootstrap.
         if not image_rel:
             raise HTTPException(status_code=400, detail="manual upload without JSON still requires image/file.")
-        doc = _analyze_with_doubao(
+        doc = await _analyze_with_doubao_async(
             image_rel,
             product_id,
             stage1_model_tier=normalized_stage1_model_tier,
@@ -141,7 +136,8 @@ async def ingest(
 
     normalized_category = str(normalized.get("product", {}).get("category") or "").strip().lower()
     if image_rel and normalized_category:
-        moved_image_rel = move_image_to_category(
+        moved_image_rel = await run_in_threadpool(
+            move_image_to_category,
             image_rel,
             category=normalized_category,
             image_id=product_id,
@@ -153,7 +149,7 @@ async def ingest(
                 evidence["image_path"] = image_rel
 
     # 4) save json
-    json_rel = save_product_json(product_id, normalized, category=normalized_category or None)
+    json_rel = await run_in_threadpool(save_product_json, product_id, normalized, category=normalized_category or None)
 
     # 5) index into sqlite
     one_sentence = normalized.get("summary", {}).get("one_sentence")
@@ -172,7 +168,7 @@ async def ingest(
     )
     db.add(rec)
     try:
-        db.commit()
+        await run_in_threadpool(db.commit)
     except Exception as e:
         db.rollback()
         remove_rel_path(json_rel)
@@ -215,26 +211,14 @@ async def ingest_stage1(
     normalized_model_tier = _normalize_model_tier(model_tier, field_name="model_tier")
 
     product_id = new_id()
-    content = await upload.read()
-    if len(content) > settings.max_upload_bytes:
-        raise HTTPException(status_code=413, detail=f"Image too large. Max {settings.max_upload_bytes} bytes.")
-    try:
-        image_rel = save_image(
-            product_id,
-            upload.filename or "upload.jpg",
-            content,
-            content_type=upload.content_type,
-        )
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e)) from e
+    content = await _read_upload_content(upload)
+    image_rel = await _save_upload_image(product_id, upload, content)
 
     try:
-        stage1 = _invoke_stage1_analyzer(
+        stage1 = await _invoke_stage1_analyzer_async(
             image_rel=image_rel,
             trace_id=product_id,
             model_tier=normalized_model_tier,
-            image_paths=None,
-            event_callback=None,
         )
     except HTTPException:
         remove_rel_path(image_rel)
@@ -260,7 +244,7 @@ async def ingest_stage1(
         "created_at": now_iso(),
     }
     try:
-        context_rel = save_doubao_artifact(product_id, "stage1_context", context)
+        context_rel = await run_in_threadpool(save_doubao_artifact, product_id, "stage1_context", context)
     except Exception as e:
         remove_rel_path(stage1.get("artifact"))
         remove_rel_path(image_rel)
@@ -332,21 +316,11 @@ async def ingest_stage1_stream(
         raise HTTPException(status_code=400, detail=f"Invalid category: {category_override}.")
     normalized_model_tier = _normalize_model_tier(model_tier, field_name="model_tier")
 
-    content = await upload.read()
-    if len(content) > settings.max_upload_bytes:
-        raise HTTPException(status_code=413, detail=f"Image too large. Max {settings.max_upload_bytes} bytes.")
+    content = await _read_upload_content(upload)
 
     events: queue.Queue[tuple[str, dict[str, Any]] | None] = queue.Queue()
     trace_id = new_id()
-    try:
-        image_rel = save_image(
-            trace_id,
-            upload.filename or "upload.jpg",
-            content,
-            content_type=upload.content_type,
-        )
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e)) from e
+    image_rel = await _save_upload_image(trace_id, upload, content)
 
     def emit(event: str, payload: dict[str, Any]) -> None:
         events.put((event, payload))
@@ -444,10 +418,9 @@ async def ingest_stage1_supplement(
     normalized_model_tier = _normalize_model_tier(model_tier, field_name="model_tier")
     upload_filename = upload.filename or "supplement.jpg"
 
-    content = await upload.read()
-    if len(content) > settings.max_upload_bytes:
-        raise HTTPException(status_code=413, detail=f"Image too large. Max {settings.max_upload_bytes} bytes.")
-    return _run_stage1_supplement(
+    content = await _read_upload_content(upload)
+    return await run_in_threadpool(
+        _run_stage1_supplement,
         trace_id=tid,
         filename=upload_filename,
         content=content,
@@ -477,9 +450,7 @@ async def ingest_stage1_supplement_stream(
     normalized_model_tier = _normalize_model_tier(model_tier, field_name="model_tier")
     upload_filename = upload.filename or "supplement.jpg"
 
-    content = await upload.read()
-    if len(content) > settings.max_upload_bytes:
-        raise HTTPException(status_code=413, detail=f"Image too large. Max {settings.max_upload_bytes} bytes.")
+    content = await _read_upload_content(upload)
 
     events: queue.Queue[tuple[str, dict[str, Any]] | None] = queue.Queue()
 
@@ -608,39 +579,29 @@ async def create_upload_ingest_job(
     normalized_stage1_model_tier = _normalize_model_tier(stage1_model_tier, field_name="stage1_model_tier")
     normalized_stage2_model_tier = _normalize_model_tier(stage2_model_tier, field_name="stage2_model_tier")
 
-    content = await upload.read()
-    if len(content) > settings.max_upload_bytes:
-        raise HTTPException(status_code=413, detail=f"Image too large. Max {settings.max_upload_bytes} bytes.")
-
-    _ensure_upload_ingest_job_table(db)
+    await run_in_threadpool(_ensure_upload_ingest_job_table, db)
     job_id = new_id()
-    try:
-        temp_rel = save_temp_upload_image(
-            job_id,
-            upload.filename or "upload.img",
-            content,
-            content_type=upload.content_type,
-        )
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Temp upload persistence failed: {e}") from e
+    temp_rel = await _spool_upload_to_temp(
+        upload,
+        upload_id=job_id,
+        default_filename="upload.img",
+        failure_detail="Temp upload persistence failed",
+    )
 
     supplement_temp_rel: str | None = None
     if supplement_upload is not None:
-        supplement_content = await supplement_upload.read()
-        if len(supplement_content) > settings.max_upload_bytes:
-            remove_rel_path(temp_rel)
-            raise HTTPException(status_code=413, detail=f"Supplement image too large. Max {settings.max_upload_bytes} bytes.")
         try:
-            supplement_temp_rel = save_temp_upload_image(
-                job_id,
-                supplement_upload.filename or "supplement.img",
-                supplement_content,
-                content_type=supplement_upload.content_type,
+            supplement_temp_rel = await _spool_upload_to_temp(
+                supplement_upload,
+                upload_id=job_id,
+                default_filename="supplement.img",
                 suffix="supp1",
+                label="Supplement image",
+                failure_detail="Supplement temp persistence failed",
             )
-        except Exception as e:
+        except HTTPException:
             remove_rel_path(temp_rel)
-            raise HTTPException(status_code=400, detail=f"Supplement temp persistence failed: {e}") from e
+            raise
 
     now = now_iso()
     rec = UploadIngestJob(
@@ -679,15 +640,16 @@ async def create_upload_ingest_job(
         finished_at=None,
     )
     db.add(rec)
-    db.commit()
-    db.refresh(rec)
+    await run_in_threadpool(_commit_and_refresh, db, rec)
     _submit_upload_ingest_job(bind=db.get_bind(), job_id=job_id, resume=False)
     return _to_upload_ingest_job_view(rec)
 
 
 @router.get("/upload/jobs", response_model=list[UploadIngestJobView])
 def list_upload_ingest_jobs(
+    response: Response,
     status: str | None = Query(None),
+    cursor: str | None = Query(None, description=f"opaque keyset cursor from the {NEXT_CURSOR_HEADER} header"),
     offset: int = Query(0, ge=0),
     limit: int = Query(30, ge=1, le=200),
     db: Session = Depends(get_db),
@@ -700,10 +662,23 @@ def list_upload_ingest_jobs(
     stmt = select(UploadIngestJob)
     if normalized_status:
         stmt = stmt.where(UploadIngestJob.status == normalized_status)
-    rows = db.execute(stmt.order_by(UploadIngestJob.updated_at.desc()).offset(offset).limit(limit)).scalars().all()
+    try:
+        page = fetch_keyset_page(
+            db,
+            stmt,
+            columns=(UploadIngestJob.created_at, UploadIngestJob.job_id),
+            scope="upload_jobs",
+            cursor=cursor,
+            limit=limit,
+            offset=offset,
+        )
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
     views: list[UploadIngestJobView] = []
     now_utc = datetime.now(timezone.utc)
-    for row in rows:
+    for row in page.rows:
         _reconcile_upload_ingest_job_state(db=db, rec=row, now_utc=now_utc)
         if normalized_status and str(row.status or "").strip().lower() != normalized_status:
             continue
@@ -908,8 +883,8 @@ async def resume_upload_ingest_job(
     name: str | None = Form(None),
     db: Session = Depends(get_db),
 ):
-    _ensure_upload_ingest_job_table(db)
-    rec = db.get(UploadIngestJob, str(job_id or "").strip())
+    await run_in_threadpool(_ensure_upload_ingest_job_table, db)
+    rec = await run_in_threadpool(db.get, UploadIngestJob, str(job_id or "").strip())
     if rec is None:
         raise HTTPException(status_code=404, detail=f"Upload ingest job '{job_id}' not found.")
 
@@ -939,7 +914,7 @@ async def resume_upload_ingest_job(
     if upload is not None:
         context_rel = f"doubao_runs/{rec.job_id}/stage1_context.json"
         if exists_rel_path(context_rel):
-            context = get_runtime_storage().load_json(context_rel)
+            context = await run_in_threadpool(get_runtime_storage().load_json, context_rel)
             context_paths = context.get("image_paths")
             if isinstance(context_paths, list):
                 existing_paths = [str(item or "").strip() for item in context_paths if str(item or "").strip()]
@@ -952,19 +927,13 @@ async def resume_upload_ingest_job(
                 )
         if not upload.content_type or not upload.content_type.startswith("image/"):
             raise HTTPException(status_code=400, detail="Only image upload is supported.")
-        content = await upload.read()
-        if len(content) > settings.max_upload_bytes:
-            raise HTTPException(status_code=413, detail=f"Image too large. Max {settings.max_upload_bytes} bytes.")
-        try:
-            supplement_temp_rel = save_temp_upload_image(
-                rec.job_id,
-                upload.filename or "supplement.img",
-                content,
-                content_type=upload.content_type,
-                suffix="supp1",
-            )
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"Supplement image persistence failed: {e}") from e
+        supplement_temp_rel = await _spool_upload_to_temp(
+            upload,
+            upload_id=rec.job_id,
+            default_filename="supplement.img",
+            suffix="supp1",
+            failure_detail="Supplement image persistence failed",
+        )
 
     now = now_iso()
     if normalized_category is not None:
@@ -988,8 +957,7 @@ async def resume_upload_ingest_job(
     rec.finished_at = None
     rec.updated_at = now
     db.add(rec)
-    db.commit()
-    db.refresh(rec)
+    await run_in_threadpool(_commit_and_refresh, db, rec)
     _submit_upload_ingest_job(bind=db.get_bind(), job_id=rec.job_id, resume=True)
     return _to_upload_ingest_job_view(rec)
 
@@ -1000,6 +968,58 @@ def cleanup_doubao(days: int = Query(14, ge=1, le=3650)):
     return {"status": "ok", **result}
 
 
+async def _read_upload_content(upload: UploadFile, *, label: str = "Image") -> bytes:
+    # UploadFile 底层是 SpooledTemporaryFile（大文件已落盘），分块读取放到线程池，超限立即 413。
+    try:
+        return await run_in_threadpool(read_stream_limited, upload.file, max_bytes=settings.max_upload_bytes)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=f"{label} too large. Max {settings.max_upload_bytes} bytes.") from e
+
+
+async def _save_upload_image(image_id: str, upload: UploadFile, content: bytes) -> str:
+    # save_image 包含 Pillow 解码/双编码（可经 image_encode_process_workers 下放进程池）与落盘，不能占用事件循环。
+    try:
+        return await run_in_threadpool(
+            save_image,
+            image_id,
+            upload.filename or "upload.jpg",
+            content,
+            content_type=upload.content_type,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+
+async def _spool_upload_to_temp(
+    upload: UploadFile,
+    *,
+    upload_id: str,
+    default_filename: str,
+    failure_detail: str,
+    suffix: str | None = None,
+    label: str = "Image",
+) -> str:
+    try:
+        return await run_in_threadpool(
+            save_temp_upload_stream,
+            upload_id,
+            upload.filename or default_filename,
+            upload.file,
+            max_bytes=settings.max_upload_bytes,
+            content_type=upload.content_type,
+            suffix=suffix,
+        )
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=f"{label} too large. Max {settings.max_upload_bytes} bytes.") from e
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"{failure_detail}: {e}") from e
+
+
+def _commit_and_refresh(db: Session, rec: Any) -> None:
+    db.commit()
+    db.refresh(rec)
+
+
 def _run_stage1_supplement(
     *,
     trace_id: str,
@@ -1245,21 +1265,7 @@ def _upload_ingest_queue_message(*, action: str, supplement: bool = False) -> st
 
 
 def _ensure_upload_ingest_job_table(db: Session) -> None:
-    bind = db.get_bind()
-    UploadIngestJob.__table__.create(bind=bind, checkfirst=True)
-    inspector = sa_inspect(bind)
-    columns = {item["name"] for item in inspector.get_columns("upload_ingest_jobs")}
-    statements: list[str] = []
-    if "resume_requested" not in columns:
-        statements.append("ALTER TABLE upload_ingest_jobs ADD COLUMN resume_requested BOOLEAN NOT NULL DEFAULT false")
-    if "stage1_reasoning_text" not in columns:
-        statements.append("ALTER TABLE upload_ingest_jobs ADD COLUMN stage1_reasoning_text TEXT")
-    if "stage2_reasoning_text" not in columns:
-        statements.append("ALTER TABLE upload_ingest_jobs ADD COLUMN stage2_reasoning_text TEXT")
-    if statements:
-        with bind.begin() as conn:
-            for stmt in statements:
-                conn.execute(text(stmt))
+    ensure_runtime_schema(db.get_bind())
 
 
 def _submit_upload_ingest_job(*, bind: Any, job_id: str, resume: bool) -> None:
@@ -2287,6 +2293,28 @@ def _analyze_with_doubao(
         raise HTTPException(status_code=502, detail=f"Doubao request failed: {e}") from e
 
 
+# /upload 与 /upload/stage1 直接 await 异步客户端（AsyncDoubaoOpenAIClient），等上游期间不占线程；
+# stream / 补充图 / stage2 / 上传任务仍复用下面的同步实现，模型调用占用线程池或 worker 线程。
+async def _analyze_with_doubao_async(
+    image_rel: str,
+    trace_id: str,
+    stage1_model_tier: str | None = None,
+    stage2_model_tier: str | None = None,
+) -> dict[str, Any]:
+    client = DoubaoPipelineService()
+    try:
+        return await client.analyze_async(
+            image_rel,
+            trace_id=trace_id,
+            stage1_model_tier=stage1_model_tier,
+            stage2_model_tier=stage2_model_tier,
+        )
+    except AIServiceError as e:
+        raise HTTPException(status_code=e.http_status, detail=e.message) from e
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Doubao request failed: {e}") from e
+
+
 def _analyze_with_doubao_stage1(
     image_rel: str,
     trace_id: str,
@@ -2309,6 +2337,20 @@ def _analyze_with_doubao_stage1(
         raise HTTPException(status_code=502, detail=f"Doubao request failed: {e}") from e
 
 
+async def _analyze_with_doubao_stage1_async(
+    image_rel: str,
+    trace_id: str,
+    model_tier: str | None = None,
+) -> dict[str, Any]:
+    client = DoubaoPipelineService()
+    try:
+        return await client.analyze_stage1_async(image_rel, trace_id=trace_id, model_tier=model_tier)
+    except AIServiceError as e:
+        raise HTTPException(status_code=e.http_status, detail=e.message) from e
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Doubao request failed: {e}") from e
+
+
 def _analyze_with_doubao_stage2(
     vision_text: str,
     trace_id: str,
@@ -2718,6 +2760,19 @@ def _invoke_stage1_analyzer(
     return fn(image_rel, trace_id, **kwargs)
 
 
+async def _invoke_stage1_analyzer_async(
+    *,
+    image_rel: str,
+    trace_id: str,
+    model_tier: str | None,
+) -> dict[str, Any]:
+    fn = _analyze_with_doubao_stage1_async
+    kwargs: dict[str, Any] = {}
+    if _accepts_parameter(fn, "model_tier"):
+        kwargs["model_tier"] = model_tier
+    return await fn(image_rel, trace_id, **kwargs)
+
+
 def _invoke_stage2_analyzer(
     *,
     vision_text: str,
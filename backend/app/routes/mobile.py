@@ -4,6 +4,7 @@ import re
 import time
 from datetime import datetime
 from collections import defaultdict
+from functools import lru_cache
 from itertools import combinations
 from pathlib import Path
 from typing import Any, Callable, Literal
@@ -11,7 +12,7 @@ from uuid import uuid4
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, UploadFile, File, Form
 from fastapi.responses import StreamingResponse
-from sqlalchemy import inspect, select, text
+from sqlalchemy import select
 from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session, sessionmaker
 
@@ -19,9 +20,6 @@ from app.ai.errors import AIServiceError
 from app.ai.orchestrator import run_capability_now
 from app.constants import MOBILE_RULES_VERSION, VALID_CATEGORIES, ROUTE_MAPPING_SUPPORTED_CATEGORIES
 from app.db.models import (
-    IngredientLibraryAlias,
-    IngredientLibraryIndex,
-    IngredientLibraryRedirect,
     MobileBagItem,
     MobileClientEvent,
     MobileCompareSessionIndex,
@@ -34,11 +32,15 @@ from app.db.models import (
     UserProduct,
     UserUploadAsset,
 )
+from app.db.counters import CounterSpec, increment_counter, pending_counter_increments
+from app.db.keyset import NEXT_CURSOR_HEADER, InvalidCursorError, fetch_keyset_page
+from app.db.runtime_schema import ensure_runtime_schema
 from app.db.session import (
     SessionLocal,
     allow_phase_24_mobile_state_legacy_fallback,
     get_db,
 )
+from app.db.write_queue import run_serialized_write
 from app.platform.storage_backend import get_runtime_storage
 from app.platform.task_queue import get_runtime_task_queue
 from app.schemas import (
@@ -152,7 +154,17 @@ from app.routes.mobile_support import (
     _set_owner_cookie,
 )
 from app.services.doubao_pipeline_service import DoubaoPipelineService
+from app.services.ingredient_alias_map import IngredientAliasTarget, load_ingredient_alias_map
+from app.services.mobile_compare_library_cache import cached_compare_library_cards
 from app.services.mobile_location import reverse_mobile_location
+from app.services.mobile_wiki_snapshots import (
+    WikiProductSnapshot,
+    etag_matches,
+    load_mobile_wiki_product_snapshot,
+    mobile_wiki_snapshot_source_version,
+    record_mobile_wiki_snapshot_not_modified,
+    save_mobile_wiki_product_snapshot,
+)
 from app.services.parser import normalize_doc
 from app.services.storage import (
     copy_user_image_to_product,
@@ -161,6 +173,7 @@ from app.services.storage import (
     now_iso,
     preferred_image_rel_path,
     product_analysis_rel_path,
+    rel_path_fingerprint,
     remove_rel_dir,
     save_doubao_artifact,
     save_user_product_json,
@@ -176,7 +189,15 @@ MOBILE_COMPARE_VERSION = "2026-03-03.3"
 MOBILE_COMPARE_HEARTBEAT_SECONDS = 2
 MOBILE_COMPARE_STATUS_POLL_SECONDS = 0.2
 MOBILE_COMPARE_SESSION_STAGE = "mobile_compare_session"
+MOBILE_COMPARE_SESSION_TERMINAL_STATUSES = {"done", "failed"}
 MOBILE_COMPARE_RESULT_STAGE = "mobile_compare_result"
+MOBILE_COMPARE_USAGE_COUNTER = CounterSpec(
+    name="mobile_compare_usage",
+    table=MobileCompareUsageStat.__table__,
+    key_columns=("owner_type", "owner_id", "category", "product_id"),
+    count_column="usage_count",
+    touched_column="updated_at",
+)
 MOBILE_COMPARE_STAGE_META: dict[str, str] = {
     "prepare": "准备对比任务",
     "resolve_targets": "读取待对比产品",
@@ -383,54 +404,34 @@ def get_mobile_wiki_product_detail(
     unavailable_detail = _mobile_wiki_product_unavailable_detail(row=row, analysis=analysis)
     if unavailable_detail is not None:
         raise HTTPException(status_code=404, detail=unavailable_detail)
-    json_path = str(row.json_path or "").strip()
-
-    try:
-        raw_doc = get_runtime_storage().load_json(json_path)
-        preferred_image_rel = preferred_image_rel_path(str(row.image_path or "").strip())
-        normalized_doc = normalize_doc(
-            raw_doc,
-            image_rel_path=preferred_image_rel,
-            doubao_raw=str(raw_doc.get("evidence", {}).get("doubao_raw") or ""),
-        )
-        doc = ProductDoc.model_validate(normalized_doc)
-    except HTTPException:
-        raise
-    except Exception as exc:
-        raise HTTPException(status_code=500, detail=f"Invalid product doc for '{pid}': {exc}") from exc
-
     mapping = db.get(ProductRouteMappingIndex, pid)
     featured_by_slot = _featured_slot_by_slot_key(db=db, categories={str(row.category or "").strip().lower()})
-    item = _build_mobile_wiki_product_item(
+    snapshot = _mobile_wiki_product_detail_snapshot(
+        db=db,
         row=row,
         mapping=mapping,
         featured_by_slot=featured_by_slot,
     )
-    ingredient_refs = _resolve_mobile_wiki_ingredient_refs(
-        db=db,
-        category=str(row.category or "").strip().lower(),
-        ingredients=doc.ingredients,
-    )
+    if snapshot is None:
+        if owner_cookie_new:
+            _set_owner_cookie(response, owner_id, request)
+        return _build_mobile_wiki_product_detail_response(
+            db=db,
+            row=row,
+            mapping=mapping,
+            featured_by_slot=featured_by_slot,
+        )
+
+    # 直接返回 Response 时 FastAPI 不会合并注入的 response 上的头，cookie 要设在返回对象上。
+    headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+        record_mobile_wiki_snapshot_not_modified()
+        out = Response(status_code=304, headers=headers)
+    else:
+        out = Response(content=snapshot.body, media_type="application/json", headers=headers)
     if owner_cookie_new:
-        _set_owner_cookie(response, owner_id, request)
-    return MobileWikiProductDetailResponse(
-        status="ok",
-        item=MobileWikiProductDetailItem(
-            product=item.product,
-            doc=doc,
-            ingredient_refs=ingredient_refs,
-            category_label=item.category_label,
-            target_type_key=item.target_type_key,
-            target_type_title=item.target_type_title,
-            target_type_level=item.target_type_level,
-            mapping_ready=item.mapping_ready,
-            primary_confidence=item.primary_confidence,
-            secondary_type_key=item.secondary_type_key,
-            secondary_type_title=item.secondary_type_title,
-            secondary_confidence=item.secondary_confidence,
-            is_featured=item.is_featured,
-        ),
-    )
+        _set_owner_cookie(out, owner_id, request)
+    return out
 
 
 @router.get("/wiki/products/{product_id}/analysis", response_model=MobileWikiProductAnalysisResponse)
@@ -922,6 +923,7 @@ def list_mobile_compare_sessions(
     request: Request,
     response: Response,
     category: str | None = Query(None),
+    cursor: str | None = Query(None, description=f"opaque keyset cursor from the {NEXT_CURSOR_HEADER} header"),
     offset: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
     db: Session = Depends(get_db),
@@ -932,14 +934,17 @@ def list_mobile_compare_sessions(
         normalized_category = str(category or "").strip().lower()
         if normalized_category not in VALID_CATEGORIES:
             raise HTTPException(status_code=400, detail=f"Invalid category: {normalized_category}.")
-    records = _list_mobile_compare_sessions(
+    records, next_cursor = _list_mobile_compare_sessions(
         db=db,
         owner_type=owner_type,
         owner_id=owner_id,
         category=normalized_category,
+        cursor=cursor,
         offset=offset,
         limit=limit,
     )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     if owner_cookie_new:
         _set_owner_cookie(response, owner_id, request)
     return records
@@ -1227,8 +1232,8 @@ def _record_mobile_client_event(
         props_json=json.dumps(props, ensure_ascii=False, default=str),
         created_at=created_at,
     )
-    db.add(row)
-    db.commit()
+    # 事件是最密集的写入：SQLite 下经单写者队列合批提交。
+    run_serialized_write(db, lambda session: session.add(row))
 
     if legacy_artifact_kind:
         save_doubao_artifact(
@@ -2484,35 +2489,11 @@ def _extract_http_exception_detail_message(exc: HTTPException) -> str:
 
 
 def _ensure_mobile_user_product_tables(db: Session) -> None:
-    bind = db.get_bind()
-    UserUploadAsset.__table__.create(bind=bind, checkfirst=True)
-    UserProduct.__table__.create(bind=bind, checkfirst=True)
+    ensure_runtime_schema(db.get_bind())
 
 
 def _ensure_mobile_compare_index_tables(db: Session) -> None:
-    bind = db.get_bind()
-    MobileCompareSessionIndex.__table__.create(bind=bind, checkfirst=True)
-    MobileCompareUsageStat.__table__.create(bind=bind, checkfirst=True)
-    inspector = inspect(bind)
-    if "mobile_compare_session_index" not in inspector.get_table_names():
-        return
-    columns = {item["name"] for item in inspector.get_columns("mobile_compare_session_index")}
-    statements: list[str] = []
-    if "job_version" not in columns:
-        statements.append("ALTER TABLE mobile_compare_session_index ADD COLUMN job_version VARCHAR(32)")
-    if "execution_backend" not in columns:
-        statements.append("ALTER TABLE mobile_compare_session_index ADD COLUMN execution_backend VARCHAR(32)")
-    if "job_payload_json" not in columns:
-        statements.append("ALTER TABLE mobile_compare_session_index ADD COLUMN job_payload_json TEXT")
-    indexes = [
-        "CREATE INDEX IF NOT EXISTS ix_mobile_compare_session_execution_scope "
-        "ON mobile_compare_session_index (status, stage, updated_at)",
-    ]
-    with bind.begin() as conn:
-        for stmt in statements:
-            conn.execute(text(stmt))
-        for stmt in indexes:
-            conn.execute(text(stmt))
+    ensure_runtime_schema(db.get_bind())
 
 
 def _coerce_mobile_compare_session_index_payload(
@@ -3154,11 +3135,7 @@ def _upsert_mobile_compare_session(
     db: Session,
     patch: dict[str, Any],
 ) -> MobileCompareSessionResponse:
-    existing_payload: dict[str, Any] = {}
-    rel_path = _mobile_compare_session_rel_path(compare_id)
-    loaded = _safe_load_json_dict(rel_path)
-    if loaded is not None:
-        existing_payload = loaded
+    existing_payload = _load_mobile_compare_session_state(db=db, compare_id=compare_id)
 
     base_category = str(existing_payload.get("category") or category or "unknown").strip().lower() or "unknown"
     status_value = str(patch.get("status") or existing_payload.get("status") or "running").strip().lower()
@@ -3205,14 +3182,30 @@ def _upsert_mobile_compare_session(
     if patch.get("job_payload") is None and "job_payload" in patch:
         merged["job_payload"] = None
 
-    save_doubao_artifact(compare_id, MOBILE_COMPARE_SESSION_STAGE, merged)
     _upsert_mobile_compare_session_index(db=db, payload=merged)
+    if status_value in MOBILE_COMPARE_SESSION_TERMINAL_STATUSES:
+        # 进度只落 DB index（在线真相）；终态才写一次合并后的 session 产物，供 legacy 回退读与归档。
+        save_doubao_artifact(compare_id, MOBILE_COMPARE_SESSION_STAGE, merged)
     normalized = _normalize_mobile_compare_session_payload(merged)
     if normalized is None:  # pragma: no cover
         raise HTTPException(status_code=500, detail="Failed to persist mobile compare session.")
     return normalized
 
 
+def _load_mobile_compare_session_state(*, db: Session, compare_id: str) -> dict[str, Any]:
+    row = db.get(MobileCompareSessionIndex, compare_id)
+    if row is not None:
+        payload = _session_payload_from_index_row(row)
+        if "targets_snapshot" not in payload:
+            payload["targets_snapshot"] = []
+        return payload
+    if not _mobile_state_legacy_fallback_allowed():
+        return {}
+    # single_node 兼容：index 缺失时回退读取历史 session 产物。
+    loaded = _safe_load_json_dict(_mobile_compare_session_rel_path(compare_id))
+    return loaded if loaded is not None else {}
+
+
 def _normalize_mobile_compare_session_payload(payload: dict[str, Any]) -> MobileCompareSessionResponse | None:
     if not isinstance(payload, dict):
         return None
@@ -3622,6 +3615,142 @@ def _mobile_wiki_product_unavailable_detail(
     return None
 
 
+def _build_mobile_wiki_product_detail_response(
+    *,
+    db: Session,
+    row: ProductIndex,
+    mapping: ProductRouteMappingIndex | None,
+    featured_by_slot: dict[str, ProductFeaturedSlot],
+) -> MobileWikiProductDetailResponse:
+    pid = str(row.id or "").strip()
+    json_path = str(row.json_path or "").strip()
+    try:
+        raw_doc = get_runtime_storage().load_json(json_path)
+        preferred_image_rel = preferred_image_rel_path(str(row.image_path or "").strip())
+        normalized_doc = normalize_doc(
+            raw_doc,
+            image_rel_path=preferred_image_rel,
+            doubao_raw=str(raw_doc.get("evidence", {}).get("doubao_raw") or ""),
+        )
+        doc = ProductDoc.model_validate(normalized_doc)
+    except HTTPException:
+        raise
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"Invalid product doc for '{pid}': {exc}") from exc
+
+    item = _build_mobile_wiki_product_item(
+        row=row,
+        mapping=mapping,
+        featured_by_slot=featured_by_slot,
+    )
+    ingredient_refs = _resolve_mobile_wiki_ingredient_refs(
+        db=db,
+        category=str(row.category or "").strip().lower(),
+        ingredients=doc.ingredients,
+    )
+    return MobileWikiProductDetailResponse(
+        status="ok",
+        item=MobileWikiProductDetailItem(
+            product=item.product,
+            doc=doc,
+            ingredient_refs=ingredient_refs,
+            category_label=item.category_label,
+            target_type_key=item.target_type_key,
+            target_type_title=item.target_type_title,
+            target_type_level=item.target_type_level,
+            mapping_ready=item.mapping_ready,
+            primary_confidence=item.primary_confidence,
+            secondary_type_key=item.secondary_type_key,
+            secondary_type_title=item.secondary_type_title,
+            secondary_confidence=item.secondary_confidence,
+            is_featured=item.is_featured,
+        ),
+    )
+
+
+def _mobile_wiki_product_detail_source_version(
+    *,
+    db: Session,
+    row: ProductIndex,
+    mapping: ProductRouteMappingIndex | None,
+    featured_by_slot: dict[str, ProductFeaturedSlot],
+) -> str | None:
+    storage = get_runtime_storage()
+    json_path = str(row.json_path or "").strip()
+    doc_fingerprint = rel_path_fingerprint(json_path)
+    if not doc_fingerprint:
+        return None
+    preferred_image_rel = preferred_image_rel_path(str(row.image_path or "").strip())
+    if preferred_image_rel and storage.is_private_asset(preferred_image_rel) and bool(settings.asset_signed_url_enforced):
+        # 带过期时间的签名 URL 不能进快照。
+        return None
+    category = str(row.category or "").strip().lower()
+    mapping_stamp = None
+    if mapping is not None:
+        mapping_stamp = [
+            mapping.status,
+            mapping.fingerprint,
+            mapping.rules_version,
+            mapping.last_generated_at,
+            mapping.primary_route_key,
+            mapping.primary_route_title,
+            mapping.primary_confidence,
+            mapping.secondary_route_key,
+            mapping.secondary_route_title,
+            mapping.secondary_confidence,
+        ]
+    featured_stamp = sorted(
+        [key, str(slot.product_id or ""), str(slot.updated_at or "")] for key, slot in featured_by_slot.items()
+    )
+    return mobile_wiki_snapshot_source_version(
+        [
+            [row.id, category, row.brand, row.name, row.one_sentence, row.tags_json, row.image_path, json_path, row.created_at],
+            doc_fingerprint,
+            preferred_image_rel,
+            storage.public_url(preferred_image_rel) if preferred_image_rel else None,
+            mapping_stamp,
+            featured_stamp,
+            list(load_ingredient_alias_map(db, category).version),
+        ]
+    )
+
+
+def _mobile_wiki_product_detail_snapshot(
+    *,
+    db: Session,
+    row: ProductIndex,
+    mapping: ProductRouteMappingIndex | None,
+    featured_by_slot: dict[str, ProductFeaturedSlot],
+) -> WikiProductSnapshot | None:
+    if not bool(settings.mobile_wiki_snapshot_enabled):
+        return None
+    source_version = _mobile_wiki_product_detail_source_version(
+        db=db,
+        row=row,
+        mapping=mapping,
+        featured_by_slot=featured_by_slot,
+    )
+    if source_version is None:
+        return None
+    pid = str(row.id)
+    snapshot = load_mobile_wiki_product_snapshot(db, product_id=pid, source_version=source_version)
+    if snapshot is not None:
+        return snapshot
+    detail = _build_mobile_wiki_product_detail_response(
+        db=db,
+        row=row,
+        mapping=mapping,
+        featured_by_slot=featured_by_slot,
+    )
+    return save_mobile_wiki_product_snapshot(
+        db,
+        product_id=pid,
+        category=str(row.category or "").strip().lower(),
+        source_version=source_version,
+        body=detail.model_dump_json().encode("utf-8"),
+    )
+
+
 def _featured_slot_by_slot_key(
     *,
     db: Session,
@@ -3646,36 +3775,30 @@ def _featured_slot_by_slot_key(
     return out
 
 
-def _ensure_mobile_wiki_ingredient_tables(db: Session) -> None:
-    bind = db.get_bind()
-    IngredientLibraryAlias.__table__.create(bind=bind, checkfirst=True)
-    IngredientLibraryRedirect.__table__.create(bind=bind, checkfirst=True)
-    IngredientLibraryIndex.__table__.create(bind=bind, checkfirst=True)
+_MOBILE_WIKI_INGREDIENT_PUNCT_FOLD = str.maketrans(
+    {
+        "（": "(",
+        "）": ")",
+        "【": "[",
+        "】": "]",
+        "，": ",",
+        "、": ",",
+        "。": ".",
+        "；": ";",
+        "：": ":",
+        "／": "/",
+        "－": "-",
+        "—": "-",
+        "–": "-",
+        "·": " ",
+        "・": " ",
+    }
+)
 
 
 def _normalize_mobile_wiki_ingredient_text(value: str) -> str:
     normalized = str(value or "").strip().lower()
-    normalized = normalized.translate(
-        str.maketrans(
-            {
-                "（": "(",
-                "）": ")",
-                "【": "[",
-                "】": "]",
-                "，": ",",
-                "、": ",",
-                "。": ".",
-                "；": ";",
-                "：": ":",
-                "／": "/",
-                "－": "-",
-                "—": "-",
-                "–": "-",
-                "·": " ",
-                "・": " ",
-            }
-        )
-    )
+    normalized = normalized.translate(_MOBILE_WIKI_INGREDIENT_PUNCT_FOLD)
     normalized = " ".join(normalized.split())
     return normalized
 
@@ -3703,7 +3826,9 @@ def _extract_mobile_wiki_ingredient_en_from_parenthesis(value: str) -> str | Non
     return None
 
 
-def _build_mobile_wiki_alias_keys(name: str) -> list[str]:
+# 成分名在产品之间高度重复；别名键是纯函数结果，按名字缓存，解析整张成分表时只剩字典查找。
+@lru_cache(maxsize=8192)
+def _build_mobile_wiki_alias_keys(name: str) -> tuple[str, ...]:
     out: list[str] = []
     base_key = _normalize_mobile_wiki_ingredient_key(name)
     if base_key:
@@ -3723,32 +3848,7 @@ def _build_mobile_wiki_alias_keys(name: str) -> list[str]:
             continue
         seen.add(key)
         dedup.append(key)
-    return dedup
-
-
-def _resolve_mobile_wiki_redirect(
-    *,
-    db: Session,
-    category: str,
-    ingredient_id: str,
-) -> str:
-    current = str(ingredient_id or "").strip().lower()
-    normalized_category = str(category or "").strip().lower()
-    seen: set[str] = set()
-    for _ in range(4):
-        if not current or current in seen:
-            break
-        seen.add(current)
-        row = db.get(IngredientLibraryRedirect, current)
-        if row is None:
-            break
-        if str(row.category or "").strip().lower() != normalized_category:
-            break
-        target = str(row.new_ingredient_id or "").strip().lower()
-        if not target or target == current:
-            break
-        current = target
-    return current
+    return tuple(dedup)
 
 
 def _resolve_mobile_wiki_ingredient_refs(
@@ -3760,71 +3860,29 @@ def _resolve_mobile_wiki_ingredient_refs(
     normalized_category = str(category or "").strip().lower()
     if not normalized_category:
         return []
-    _ensure_mobile_wiki_ingredient_tables(db)
-
-    alias_keys_by_index: dict[int, list[str]] = {}
-    all_alias_keys: set[str] = set()
-    for idx, item in enumerate(ingredients, start=1):
-        name = str(getattr(item, "name", "") or "").strip()
-        keys = _build_mobile_wiki_alias_keys(name)
-        alias_keys_by_index[idx] = keys
-        all_alias_keys.update(keys)
-
-    alias_rows = db.execute(
-        select(IngredientLibraryAlias)
-        .where(IngredientLibraryAlias.category == normalized_category)
-        .where(IngredientLibraryAlias.alias_key.in_(sorted(all_alias_keys)))
-    ).scalars().all() if all_alias_keys else []
-    alias_by_key: dict[str, list[IngredientLibraryAlias]] = defaultdict(list)
-    for row in alias_rows:
-        alias_by_key[str(row.alias_key)].append(row)
-
-    candidate_ids = {
-        str(row.ingredient_id or "").strip().lower()
-        for row in alias_rows
-        if str(row.ingredient_id or "").strip()
-    }
-    ready_ids: set[str] = set()
-    if candidate_ids:
-        ready_rows = db.execute(
-            select(IngredientLibraryIndex)
-            .where(IngredientLibraryIndex.ingredient_id.in_(sorted(candidate_ids)))
-            .where(IngredientLibraryIndex.category == normalized_category)
-        ).scalars().all()
-        for row in ready_rows:
-            if str(row.status or "").strip().lower() == "ready":
-                ready_ids.add(str(row.ingredient_id).strip().lower())
+    alias_map = load_ingredient_alias_map(db, normalized_category)
 
     out: list[MobileWikiIngredientRef] = []
     for idx, item in enumerate(ingredients, start=1):
         name = str(getattr(item, "name", "") or "").strip()
-        keys = alias_keys_by_index.get(idx) or []
-        matched_rows: list[IngredientLibraryAlias] = []
-        for key in keys:
-            matched_rows.extend(alias_by_key.get(key) or [])
-
-        candidate_map: dict[str, IngredientLibraryAlias] = {}
-        for row in matched_rows:
-            ingredient_id = str(row.ingredient_id or "").strip().lower()
-            if ingredient_id not in ready_ids:
+        candidate_map: dict[str, IngredientAliasTarget] = {}
+        for key in _build_mobile_wiki_alias_keys(name):
+            target = alias_map.lookup(key)
+            if target is None or not alias_map.is_ready(target.ingredient_id):
                 continue
-            if ingredient_id not in candidate_map:
-                candidate_map[ingredient_id] = row
+            if target.ingredient_id not in candidate_map:
+                candidate_map[target.ingredient_id] = target
 
         resolved_ids = sorted(candidate_map.keys())
         if len(resolved_ids) == 1:
-            resolved_id = _resolve_mobile_wiki_redirect(
-                db=db,
-                category=normalized_category,
-                ingredient_id=resolved_ids[0],
-            )
+            resolved_id = alias_map.canonical_id(resolved_ids[0])
             out.append(
                 MobileWikiIngredientRef(
                     index=idx,
                     name=name,
                     ingredient_id=resolved_id,
                     status="resolved",
-                    matched_alias=str(candidate_map[resolved_ids[0]].alias_name or "").strip() or None,
+                    matched_alias=candidate_map[resolved_ids[0]].alias_name or None,
                     reason=None,
                 )
             )
@@ -3985,9 +4043,10 @@ def _list_mobile_compare_sessions(
     owner_type: str,
     owner_id: str,
     category: str | None,
+    cursor: str | None,
     offset: int,
     limit: int,
-) -> list[MobileCompareSessionResponse]:
+) -> tuple[list[MobileCompareSessionResponse], str | None]:
     stmt = (
         select(MobileCompareSessionIndex)
         .where(MobileCompareSessionIndex.owner_type == owner_type)
@@ -3995,26 +4054,27 @@ def _list_mobile_compare_sessions(
     )
     if category:
         stmt = stmt.where(MobileCompareSessionIndex.category == category)
-    rows = (
-        db.execute(
-            stmt.order_by(
-                MobileCompareSessionIndex.updated_at.desc(),
-                MobileCompareSessionIndex.created_at.desc(),
-                MobileCompareSessionIndex.compare_id.desc(),
-            )
-            .offset(offset)
-            .limit(limit)
+    try:
+        # 按最近活跃（updated_at）排序是产品语义：翻页途中被更新的会话会移到第一页，尚未翻到的这类会话本轮会漏掉，
+        # 刷新列表即可看到；不会出现重复
+        page = fetch_keyset_page(
+            db,
+            stmt,
+            columns=(MobileCompareSessionIndex.updated_at, MobileCompareSessionIndex.compare_id),
+            scope="compare_sessions",
+            cursor=cursor,
+            limit=limit,
+            offset=offset,
         )
-        .scalars()
-        .all()
-    )
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
     records: list[MobileCompareSessionResponse] = []
-    for row in rows:
+    for row in page.rows:
         normalized = _normalize_mobile_compare_session_payload(_session_payload_from_index_row(row))
         if normalized is not None:
             records.append(normalized)
-    return records
+    return records, page.next_cursor
 
 
 def _build_mobile_compare_cleanup_sample(
@@ -4088,28 +4148,13 @@ def _increase_product_usage_count(
     normalized_owner_id = str(owner_id or "").strip()
     if not pid or not cat or not normalized_owner_id:
         return
-    row = db.get(
-        MobileCompareUsageStat,
-        {
-            "owner_type": normalized_owner_type,
-            "owner_id": normalized_owner_id,
-            "category": cat,
-            "product_id": pid,
-        },
+    # 写后计数：请求路径只记增量，由计数器线程合批 upsert；调用方随后提交自己的行。
+    increment_counter(
+        db,
+        MOBILE_COMPARE_USAGE_COUNTER,
+        (normalized_owner_type, normalized_owner_id, cat, pid),
+        touched=now_iso(),
     )
-    if row is None:
-        row = MobileCompareUsageStat(
-            owner_type=normalized_owner_type,
-            owner_id=normalized_owner_id,
-            category=cat,
-            product_id=pid,
-            usage_count=0,
-            updated_at=now_iso(),
-        )
-    row.usage_count = int(row.usage_count or 0) + 1
-    row.updated_at = now_iso()
-    db.add(row)
-    db.commit()
 
 
 def _usage_count_by_product_id(
@@ -4147,17 +4192,19 @@ def _usage_count_by_product_id(
             count = 0
         if count > 0:
             out[str(row.product_id)] = count
+    pending = pending_counter_increments(
+        db.get_bind(),
+        MOBILE_COMPARE_USAGE_COUNTER,
+        owner_type=normalized_owner_type,
+        owner_id=normalized_owner_id,
+        category=cat,
+    )
+    for key, count in pending.items():
+        out[str(key[3])] = out.get(str(key[3]), 0) + int(count)
     return out
 
 
-def _build_mobile_compare_product_library(
-    *,
-    db: Session,
-    category: str,
-    owner_type: str,
-    owner_id: str,
-    recommendation_product_id: str | None,
-) -> MobileCompareProductLibrary:
+def _build_mobile_compare_library_cards(*, db: Session, category: str) -> list[ProductCard]:
     rows = (
         db.execute(
             select(ProductIndex)
@@ -4168,13 +4215,30 @@ def _build_mobile_compare_product_library(
         .scalars()
         .all()
     )
+    return [_row_to_product_card(row) for row in rows]
+
+
+def _build_mobile_compare_product_library(
+    *,
+    db: Session,
+    category: str,
+    owner_type: str,
+    owner_id: str,
+    recommendation_product_id: str | None,
+) -> MobileCompareProductLibrary:
+    # 与用户无关的有序卡片列表走品类缓存，按请求只叠加使用次数与推荐 / 常用标记。
+    cards = cached_compare_library_cards(
+        db,
+        category=category,
+        build=lambda: _build_mobile_compare_library_cards(db=db, category=category),
+    )
     usage = _usage_count_by_product_id(
         db=db,
         owner_type=owner_type,
         owner_id=owner_id,
         category=category,
     )
-    row_ids = {str(row.id) for row in rows}
+    row_ids = {str(card.id) for card in cards}
 
     most_used_product_id: str | None = None
     if usage:
@@ -4185,12 +4249,12 @@ def _build_mobile_compare_product_library(
 
     items = []
     row_order: dict[str, int] = {}
-    for idx, row in enumerate(rows):
-        row_order[str(row.id)] = idx
-    for row in rows:
-        pid = str(row.id)
+    for idx, card in enumerate(cards):
+        row_order[str(card.id)] = idx
+    for card in cards:
+        pid = str(card.id)
         item = MobileCompareLibraryProductItem(
-            product=_row_to_product_card(row),
+            product=card,
             is_recommendation=bool(recommendation_product_id and pid == recommendation_product_id),
             is_most_used=bool(most_used_product_id and pid == most_used_product_id),
             usage_count=int(usage.get(pid, 0)),
@@ -6,7 +6,7 @@ from uuid import uuid4
 from typing import Any, Callable
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
-from sqlalchemy import select
+from sqlalchemy import select, tuple_
 from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
 
@@ -19,6 +19,7 @@ from app.db.models import (
     ProductIndex,
     ProductRouteMappingIndex,
 )
+from app.db.keyset import NEXT_CURSOR_HEADER, InvalidCursorError, KeysetPage, decode_cursor, encode_cursor, row_key
 from app.db.session import get_db
 from app.domain.mobile.decision import load_mobile_decision_category_config
 from app.routes.mobile_support import (
@@ -225,6 +226,7 @@ def list_mobile_selection_sessions(
     request: Request,
     response: Response,
     category: str | None = Query(None),
+    cursor: str | None = Query(None, description=f"opaque keyset cursor from the {NEXT_CURSOR_HEADER} header"),
     offset: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
     db: Session = Depends(get_db),
@@ -241,12 +243,15 @@ def list_mobile_selection_sessions(
         if normalized not in VALID_CATEGORIES:
             raise HTTPException(status_code=400, detail=f"Invalid category: {normalized}.")
         stmt = stmt.where(MobileSelectionSession.category == normalized)
-    rows = db.execute(
-        stmt.order_by(*_selection_session_order_expr()).offset(offset).limit(limit)
-    ).scalars().all()
+    try:
+        page = _fetch_selection_history_page(db=db, stmt=stmt, cursor=cursor, offset=offset, limit=limit)
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
     if owner_cookie_new:
         _set_owner_cookie(response, owner_id, request)
-    return [_row_to_mobile_response(row) for row in rows]
+    return [_row_to_mobile_response(row) for row in page.rows]
 
 
 @selection_router.post("/selection/sessions/{session_id}/pin", response_model=MobileSelectionResolveResponse)
@@ -611,12 +616,69 @@ def _match_mobile_selection_cleanup_rows(
     )
 
 
+_SELECTION_HISTORY_KEY = (
+    MobileSelectionSession.is_pinned,
+    MobileSelectionSession.pinned_at,
+    MobileSelectionSession.created_at,
+    MobileSelectionSession.id,
+)
+
+
 def _selection_session_order_expr():
-    return (
-        MobileSelectionSession.is_pinned.desc(),
-        MobileSelectionSession.pinned_at.desc(),
-        MobileSelectionSession.created_at.desc(),
-    )
+    return tuple(column.desc() for column in _SELECTION_HISTORY_KEY)
+
+
+def _fetch_selection_history_page(*, db: Session, stmt: Any, cursor: str | None, offset: int, limit: int) -> KeysetPage:
+    """
+    历史列表 keyset 翻页：置顶段按 (pinned_at, created_at, id) 倒序，接着未置顶段按 (created_at, id) 倒序。
+    未置顶行的 pinned_at 恒为 NULL（取消置顶会清空），行值比较遇 NULL 不成立，所以两段分别 seek，
+    均落在 live_pinned 索引上；游标位于置顶段时，本段取不满一页就从未置顶段开头补齐。
+    """
+    values = decode_cursor(cursor, scope="selection_sessions", size=len(_SELECTION_HISTORY_KEY))
+    if values is not None and offset:
+        raise InvalidCursorError("cursor and offset cannot be combined.")
+    order = _selection_session_order_expr()
+    if values is None:
+        stmt = stmt.order_by(*order)
+        if offset:
+            stmt = stmt.offset(offset)
+        rows = list(db.execute(stmt.limit(limit + 1)).scalars().all())
+    else:
+        is_pinned, pinned_at, created_at, session_id = values
+        rows = []
+        if is_pinned:
+            rows = list(
+                db.execute(
+                    stmt.where(MobileSelectionSession.is_pinned.is_(True))
+                    .where(
+                        tuple_(
+                            MobileSelectionSession.pinned_at,
+                            MobileSelectionSession.created_at,
+                            MobileSelectionSession.id,
+                        )
+                        < tuple_(pinned_at, created_at, session_id)
+                    )
+                    .order_by(*order)
+                    .limit(limit + 1)
+                )
+                .scalars()
+                .all()
+            )
+        if len(rows) <= limit:
+            unpinned = stmt.where(MobileSelectionSession.is_pinned.is_(False)).where(
+                MobileSelectionSession.pinned_at.is_(None)
+            )
+            if not is_pinned:
+                unpinned = unpinned.where(
+                    tuple_(MobileSelectionSession.created_at, MobileSelectionSession.id) < tuple_(created_at, session_id)
+                )
+            rows.extend(db.execute(unpinned.order_by(*order).limit(limit + 1 - len(rows))).scalars().all())
+    if len(rows) <= limit:
+        return KeysetPage(rows=rows, next_cursor=None)
+    rows = rows[:limit]
+    last = row_key(rows[-1], _SELECTION_HISTORY_KEY)
+    last[0] = bool(last[0])
+    return KeysetPage(rows=rows, next_cursor=encode_cursor("selection_sessions", last))
 
 
 def _latest_selection_session(
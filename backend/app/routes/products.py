@@ -1,4 +1,5 @@
 import json
+import logging
 import queue
 import threading
 import hashlib
@@ -13,9 +14,9 @@ from pathlib import Path
 from collections import Counter, defaultdict
 from typing import Any, Callable
 
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, Query, HTTPException, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import inspect, select, func, text
+from sqlalchemy import select, func
 from sqlalchemy.exc import OperationalError
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import sessionmaker
@@ -29,6 +30,10 @@ from app.constants import (
     ROUTE_MAPPING_SUPPORTED_CATEGORIES,
 )
 from app.domain.mobile.decision import load_mobile_decision_category_config
+from app.db.counters import flush_write_behind_counters
+from app.db.event_partitions import load_archived_events, mobile_client_event_source
+from app.db.keyset import NEXT_CURSOR_HEADER, InvalidCursorError, KeysetPage, fetch_keyset_page
+from app.db.runtime_schema import ensure_runtime_schema
 from app.db.session import get_db, SessionLocal
 from app.db.models import (
     ProductIndex,
@@ -37,6 +42,9 @@ from app.db.models import (
     IngredientLibraryAlias,
     IngredientLibraryRedirect,
     IngredientLibraryBuildJob,
+    IngredientAggregate,
+    IngredientAggregateMember,
+    IngredientProductContribution,
     ProductWorkbenchJob,
     ProductRouteMappingIndex,
     ProductAnalysisIndex,
@@ -58,9 +66,9 @@ from app.services.storage import (
     save_ingredient_profile,
     ingredient_profile_rel_path,
     exists_rel_path,
+    rel_path_fingerprint,
     remove_rel_path,
     remove_rel_dir,
-    remove_product_images,
     image_variant_rel_paths,
     preferred_image_rel_path,
     cleanup_orphan_storage,
@@ -69,7 +77,18 @@ from app.services.storage import (
     save_product_analysis,
     product_analysis_rel_path,
 )
-from app.services.runtime_topology import should_inline_dispatch_product_workbench_job
+from app.services.ordered_pool import OrderedTaskPool, OrderedTaskResult
+from app.services.ingredient_alias_map import load_ingredient_alias_map, refresh_ingredient_alias_maps
+from app.services.mobile_wiki_snapshots import delete_mobile_wiki_product_snapshots
+from app.services.runtime_topology import (
+    should_inline_dispatch_product_workbench_job,
+    should_inline_reclaim_product_storage,
+)
+from app.services.storage_reclaim import (
+    enqueue_product_storage_reclaim,
+    product_storage_manifest,
+    reclaim_product_storage,
+)
 from app.services.mobile_selection_result_builder import (
     SelectionResultBuildCancelledError,
     build_mobile_selection_results,
@@ -164,9 +183,11 @@ from app.schemas import (
 )
 
 router = APIRouter(prefix="/api", tags=["products"])
+logger = logging.getLogger(__name__)
 
 INGREDIENT_SOURCE_SCHEMA_VERSION = "v2026-03-05.1"
 INGREDIENT_SOURCE_COOCCURRENCE_TOP_N = 15
+INGREDIENT_AGGREGATION_MODES = ("incremental", "full", "verify")
 INGREDIENT_BUILD_JOB_HEARTBEAT_SECONDS = 2
 INGREDIENT_BUILD_JOB_STALE_SECONDS = max(60 * 30, INGREDIENT_BUILD_JOB_HEARTBEAT_SECONDS * 300)
 INGREDIENT_BUILD_JOB_PROCESS_STARTED_AT = datetime.now(timezone.utc)
@@ -638,6 +659,46 @@ def _safe_event_props(value: str | None) -> dict[str, Any]:
         return {}
 
 
+_MOBILE_EVENT_FILTER_KEYS = ("category", "page", "stage", "error_code", "session_id", "compare_id", "owner_id")
+_MOBILE_EVENT_LOCATION_FILTER_KEYS = ("category", "session_id", "compare_id", "owner_id")
+
+
+def _mobile_event_equality_filters(filters: MobileAnalyticsFilterState, keys: tuple[str, ...]) -> dict[str, str]:
+    return {key: getattr(filters, key) for key in keys if getattr(filters, key)}
+
+
+def _select_mobile_client_events(
+    *,
+    db: Session,
+    start_iso: str,
+    end_iso: str,
+    equals: dict[str, str],
+    names: list[str] | None = None,
+    desc: bool = False,
+    row_limit: int | None = None,
+) -> list[MobileClientEvent]:
+    # 热表（SQLite 另加与区间相交的月分表）走 SQL；区间覆盖到已归档的月份时从归档读回再合并排序
+    source = mobile_client_event_source(db, start_iso=start_iso, end_iso=end_iso)
+    events = source.entity
+    stmt = select(events).where(events.created_at >= start_iso, events.created_at <= end_iso)
+    for key, value in equals.items():
+        stmt = stmt.where(getattr(events, key) == value)
+    if names:
+        stmt = stmt.where(events.name.in_(names))
+    stmt = stmt.order_by(events.created_at.desc() if desc else events.created_at.asc())
+    limited = row_limit is not None and row_limit > 0
+    if limited:
+        stmt = stmt.limit(row_limit)
+
+    rows = list(db.execute(stmt).scalars().all())
+    if source.archived:
+        rows.extend(load_archived_events(source.archived, start_iso=start_iso, end_iso=end_iso, equals=equals, names=names))
+        rows.sort(key=lambda row: row.created_at, reverse=desc)
+        if limited:
+            rows = rows[:row_limit]
+    return rows
+
+
 def _query_mobile_client_location_session_keys(
     *,
     db: Session,
@@ -645,20 +706,12 @@ def _query_mobile_client_location_session_keys(
     start_iso: str,
     end_iso: str,
 ) -> set[str]:
-    stmt = select(MobileClientEvent).where(
-        MobileClientEvent.created_at >= start_iso,
-        MobileClientEvent.created_at <= end_iso,
-    )
-    if filters.category:
-        stmt = stmt.where(MobileClientEvent.category == filters.category)
-    if filters.session_id:
-        stmt = stmt.where(MobileClientEvent.session_id == filters.session_id)
-    if filters.compare_id:
-        stmt = stmt.where(MobileClientEvent.compare_id == filters.compare_id)
-    if filters.owner_id:
-        stmt = stmt.where(MobileClientEvent.owner_id == filters.owner_id)
-
-    rows = db.execute(stmt).scalars().all()
+    rows = _select_mobile_client_events(
+        db=db,
+        start_iso=start_iso,
+        end_iso=end_iso,
+        equals=_mobile_event_equality_filters(filters, _MOBILE_EVENT_LOCATION_FILTER_KEYS),
+    )
     session_has_location: dict[str, bool] = {}
     session_time_zones: dict[str, set[str]] = defaultdict(set)
     session_regions: dict[str, set[str]] = defaultdict(set)
@@ -709,32 +762,15 @@ def _query_mobile_client_events(
         if not matched_session_keys:
             return []
 
-    stmt = select(MobileClientEvent).where(
-        MobileClientEvent.created_at >= start_iso,
-        MobileClientEvent.created_at <= end_iso,
-    )
-    if filters.category:
-        stmt = stmt.where(MobileClientEvent.category == filters.category)
-    if filters.page:
-        stmt = stmt.where(MobileClientEvent.page == filters.page)
-    if filters.stage:
-        stmt = stmt.where(MobileClientEvent.stage == filters.stage)
-    if filters.error_code:
-        stmt = stmt.where(MobileClientEvent.error_code == filters.error_code)
-    if filters.session_id:
-        stmt = stmt.where(MobileClientEvent.session_id == filters.session_id)
-    if filters.compare_id:
-        stmt = stmt.where(MobileClientEvent.compare_id == filters.compare_id)
-    if filters.owner_id:
-        stmt = stmt.where(MobileClientEvent.owner_id == filters.owner_id)
-    if names:
-        stmt = stmt.where(MobileClientEvent.name.in_(names))
-
-    stmt = stmt.order_by(MobileClientEvent.created_at.desc() if desc else MobileClientEvent.created_at.asc())
-    if row_limit is not None and row_limit > 0:
-        stmt = stmt.limit(row_limit)
-
-    rows = db.execute(stmt).scalars().all()
+    rows = _select_mobile_client_events(
+        db=db,
+        start_iso=start_iso,
+        end_iso=end_iso,
+        equals=_mobile_event_equality_filters(filters, _MOBILE_EVENT_FILTER_KEYS),
+        names=names,
+        desc=desc,
+        row_limit=row_limit,
+    )
     out: list[tuple[MobileClientEvent, dict[str, Any]]] = []
     for row in rows:
         props = _safe_event_props(row.props_json)
@@ -2661,7 +2697,9 @@ def create_product_dedup_job(payload: ProductDedupSuggestRequest, db: Session =
 
 @router.get("/products/dedup/jobs", response_model=list[ProductWorkbenchJobView])
 def list_product_dedup_jobs(
+    response: Response,
     status: str | None = Query(None),
+    cursor: str | None = Query(None),
     offset: int = Query(0, ge=0),
     limit: int = Query(30, ge=1, le=200),
     db: Session = Depends(get_db),
@@ -2672,6 +2710,8 @@ def list_product_dedup_jobs(
         status=status,
         offset=offset,
         limit=limit,
+        cursor=cursor,
+        response=response,
     )
 
 
@@ -2786,8 +2826,10 @@ def create_ingredient_library_build_job(
 
 @router.get("/products/ingredients/library/jobs", response_model=list[IngredientLibraryBuildJobView])
 def list_ingredient_library_build_jobs(
+    response: Response,
     status: str | None = Query(None),
     category: str | None = Query(None),
+    cursor: str | None = Query(None),
     offset: int = Query(0, ge=0),
     limit: int = Query(30, ge=1, le=200),
     db: Session = Depends(get_db),
@@ -2803,12 +2845,19 @@ def list_ingredient_library_build_jobs(
         stmt = stmt.where(IngredientLibraryBuildJob.status == normalized_status)
     if normalized_category:
         stmt = stmt.where(IngredientLibraryBuildJob.category == normalized_category)
-    rows = db.execute(
-        stmt.order_by(IngredientLibraryBuildJob.updated_at.desc()).offset(offset).limit(limit)
-    ).scalars().all()
+    page = _fetch_job_list_page(
+        db,
+        stmt,
+        columns=(IngredientLibraryBuildJob.created_at, IngredientLibraryBuildJob.job_id),
+        scope="ingredient_build_jobs",
+        cursor=cursor,
+        offset=offset,
+        limit=limit,
+        response=response,
+    )
     now_utc = datetime.now(timezone.utc)
     views: list[IngredientLibraryBuildJobView] = []
-    for row in rows:
+    for row in page.rows:
         _reconcile_ingredient_build_job_state(db=db, rec=row, now_utc=now_utc)
         if normalized_status and str(row.status or "").strip().lower() != normalized_status:
             continue
@@ -2975,6 +3024,7 @@ def _batch_delete_ingredient_library_impl(
         select(IngredientLibraryIndex).where(IngredientLibraryIndex.ingredient_id.in_(ingredient_ids))
     ).scalars().all()
     by_id = {str(row.ingredient_id): row for row in rows}
+    categories = {str(row.category or "") for row in rows}
 
     deleted_ids: list[str] = []
     missing_ids: list[str] = []
@@ -3070,6 +3120,9 @@ def _batch_delete_ingredient_library_impl(
                     }
                 )
 
+    if deleted_ids:
+        refresh_ingredient_alias_maps(db, categories)
+
     return IngredientLibraryBatchDeleteResponse(
         status="ok",
         deleted_ids=deleted_ids,
@@ -3098,7 +3151,9 @@ def create_ingredient_batch_delete_job(
 
 @router.get("/products/ingredients/library/batch-delete/jobs", response_model=list[ProductWorkbenchJobView])
 def list_ingredient_batch_delete_jobs(
+    response: Response,
     status: str | None = Query(None),
+    cursor: str | None = Query(None),
     offset: int = Query(0, ge=0),
     limit: int = Query(30, ge=1, le=100),
     db: Session = Depends(get_db),
@@ -3109,6 +3164,8 @@ def list_ingredient_batch_delete_jobs(
         status=status,
         offset=offset,
         limit=limit,
+        cursor=cursor,
+        response=response,
     )
 
 
@@ -3293,7 +3350,9 @@ def create_product_route_mapping_job(payload: ProductRouteMappingBuildRequest, d
 
 @router.get("/products/route-mapping/jobs", response_model=list[ProductWorkbenchJobView])
 def list_product_route_mapping_jobs(
+    response: Response,
     status: str | None = Query(None),
+    cursor: str | None = Query(None),
     offset: int = Query(0, ge=0),
     limit: int = Query(30, ge=1, le=200),
     db: Session = Depends(get_db),
@@ -3304,6 +3363,8 @@ def list_product_route_mapping_jobs(
         status=status,
         offset=offset,
         limit=limit,
+        cursor=cursor,
+        response=response,
     )
 
 
@@ -3425,7 +3486,9 @@ def create_product_analysis_job(payload: ProductAnalysisBuildRequest, db: Sessio
 
 @router.get("/products/analysis/jobs", response_model=list[ProductWorkbenchJobView])
 def list_product_analysis_jobs(
+    response: Response,
     status: str | None = Query(None),
+    cursor: str | None = Query(None),
     offset: int = Query(0, ge=0),
     limit: int = Query(30, ge=1, le=200),
     db: Session = Depends(get_db),
@@ -3436,6 +3499,8 @@ def list_product_analysis_jobs(
         status=status,
         offset=offset,
         limit=limit,
+        cursor=cursor,
+        response=response,
     )
 
 
@@ -3528,7 +3593,9 @@ def create_mobile_selection_result_job(
 
 @router.get("/products/selection-results/jobs", response_model=list[ProductWorkbenchJobView])
 def list_mobile_selection_result_jobs(
+    response: Response,
     status: str | None = Query(None),
+    cursor: str | None = Query(None),
     offset: int = Query(0, ge=0),
     limit: int = Query(30, ge=1, le=200),
     db: Session = Depends(get_db),
@@ -3539,6 +3606,8 @@ def list_mobile_selection_result_jobs(
         status=status,
         offset=offset,
         limit=limit,
+        cursor=cursor,
+        response=response,
     )
 
 
@@ -3734,39 +3803,20 @@ def update_product(product_id: str, payload: ProductUpdateRequest, db: Session =
 
 
 @router.delete("/products/{product_id}")
-def delete_product(product_id: str, db: Session = Depends(get_db)):
+def delete_product(product_id: str, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     rec = db.get(ProductIndex, product_id)
     if not rec:
         raise HTTPException(status_code=404, detail="Not found")
 
-    removed = 0
-    if remove_rel_path(rec.json_path):
-        removed += 1
-    image_removed, _ = remove_product_images(product_id=product_id, image_path=rec.image_path)
-    removed += image_removed
-    run_files, run_dirs = remove_rel_dir(f"doubao_runs/{product_id}")
-    removed += run_files + run_dirs
-    route_mapping_rec = db.get(ProductRouteMappingIndex, product_id)
-    if route_mapping_rec:
-        route_mapping_path = str(route_mapping_rec.storage_path or "").strip() or product_route_mapping_rel_path(
-            str(route_mapping_rec.category or ""),
-            product_id,
-        )
-        if route_mapping_path and remove_rel_path(route_mapping_path):
-            removed += 1
-        db.delete(route_mapping_rec)
-    try:
-        featured_slots = db.execute(
-            select(ProductFeaturedSlot).where(ProductFeaturedSlot.product_id == product_id)
-        ).scalars().all()
-    except OperationalError as exc:
-        raise _featured_slot_schema_http_error(exc) from exc
-    for slot in featured_slots:
-        db.delete(slot)
-
-    db.delete(rec)
+    queued_files, queued_dirs = _delete_product_batch_item(
+        db=db,
+        product_id=product_id,
+        rec=rec,
+        remove_doubao_artifacts=True,
+    )
     db.commit()
-    return {"id": product_id, "status": "deleted", "removed_files": removed}
+    _schedule_product_storage_reclaim(background_tasks, bind=db.get_bind(), product_ids=[product_id])
+    return {"id": product_id, "status": "deleted", "removed_files": queued_files + queued_dirs}
 
 
 def _delete_product_batch_item(
@@ -3776,35 +3826,21 @@ def _delete_product_batch_item(
     rec: ProductIndex,
     remove_doubao_artifacts: bool,
 ) -> tuple[int, int]:
-    removed_files = 0
-    removed_dirs = 0
-
-    if remove_rel_path(rec.json_path):
-        removed_files += 1
-    image_removed, _ = remove_product_images(product_id=product_id, image_path=rec.image_path)
-    removed_files += image_removed
-    if remove_doubao_artifacts:
-        f_count, d_count = remove_rel_dir(f"doubao_runs/{product_id}")
-        removed_files += f_count
-        removed_dirs += d_count
-
+    # 只删 DB 行并在同一事务里登记存储墓碑；文件由回收器异步删除，返回的是已排入回收的文件 / 目录数
+    extra_files: list[str] = []
     route_mapping_rec = db.get(ProductRouteMappingIndex, product_id)
     if route_mapping_rec:
-        route_mapping_path = str(route_mapping_rec.storage_path or "").strip() or product_route_mapping_rel_path(
-            str(route_mapping_rec.category or ""),
-            product_id,
+        extra_files.append(
+            str(route_mapping_rec.storage_path or "").strip()
+            or product_route_mapping_rel_path(str(route_mapping_rec.category or ""), product_id)
         )
-        if route_mapping_path and remove_rel_path(route_mapping_path):
-            removed_files += 1
         db.delete(route_mapping_rec)
     analysis_rec = db.get(ProductAnalysisIndex, product_id)
     if analysis_rec:
-        analysis_path = str(analysis_rec.storage_path or "").strip() or product_analysis_rel_path(
-            str(analysis_rec.category or ""),
-            product_id,
+        extra_files.append(
+            str(analysis_rec.storage_path or "").strip()
+            or product_analysis_rel_path(str(analysis_rec.category or ""), product_id)
         )
-        if analysis_path and remove_rel_path(analysis_path):
-            removed_files += 1
         db.delete(analysis_rec)
     try:
         featured_slots = db.execute(
@@ -3814,9 +3850,47 @@ def _delete_product_batch_item(
         raise _featured_slot_schema_http_error(exc) from exc
     for slot in featured_slots:
         db.delete(slot)
+    delete_mobile_wiki_product_snapshots(db, [product_id])
 
+    manifest = product_storage_manifest(
+        product_id=product_id,
+        json_path=rec.json_path,
+        image_path=rec.image_path,
+        extra_files=extra_files,
+        include_runs=remove_doubao_artifacts,
+    )
+    enqueue_product_storage_reclaim(db, product_id=product_id, category=rec.category, manifest=manifest)
     db.delete(rec)
-    return removed_files, removed_dirs
+    return len(manifest["files"]), len(manifest["dirs"])
+
+
+def _reclaim_product_storage_now(*, bind: Any, product_ids: list[str]) -> None:
+    local_db = sessionmaker(autocommit=False, autoflush=False, bind=bind)()
+    try:
+        report = reclaim_product_storage(local_db, product_ids=product_ids)
+        logger.info("product storage reclaimed: %s", report.as_dict())
+    except Exception as exc:
+        # 墓碑保持 pending，留给 worker / 维护脚本补扫；不影响已提交的删除
+        local_db.rollback()
+        logger.warning("product storage reclaim deferred: product_ids=%s error=%s", product_ids[:5], exc)
+    finally:
+        local_db.close()
+
+
+def _schedule_product_storage_reclaim(
+    background_tasks: BackgroundTasks | None,
+    *,
+    bind: Any,
+    product_ids: list[str],
+) -> None:
+    if not product_ids or not should_inline_reclaim_product_storage():
+        # split/multi profile: API 只写墓碑，专用 worker 轮询回收
+        return
+    if background_tasks is None:
+        # 已在后台任务里（批量删除 job）：直接回收
+        _reclaim_product_storage_now(bind=bind, product_ids=product_ids)
+        return
+    background_tasks.add_task(_reclaim_product_storage_now, bind=bind, product_ids=list(product_ids))
 
 
 def _batch_delete_products_impl(
@@ -3969,7 +4043,9 @@ def create_product_batch_delete_job(payload: ProductBatchDeleteRequest, db: Sess
 
 @router.get("/products/batch-delete/jobs", response_model=list[ProductWorkbenchJobView])
 def list_product_batch_delete_jobs(
+    response: Response,
     status: str | None = Query(None),
+    cursor: str | None = Query(None),
     offset: int = Query(0, ge=0),
     limit: int = Query(30, ge=1, le=100),
     db: Session = Depends(get_db),
@@ -3980,6 +4056,8 @@ def list_product_batch_delete_jobs(
         status=status,
         offset=offset,
         limit=limit,
+        cursor=cursor,
+        response=response,
     )
 
 
@@ -3999,8 +4077,14 @@ def retry_product_batch_delete_job(job_id: str, db: Session = Depends(get_db)):
 
 
 @router.post("/products/batch-delete", response_model=ProductBatchDeleteResponse)
-def batch_delete_products(payload: ProductBatchDeleteRequest, db: Session = Depends(get_db)):
-    return _batch_delete_products_impl(payload=payload, db=db)
+def batch_delete_products(
+    payload: ProductBatchDeleteRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+):
+    result = _batch_delete_products_impl(payload=payload, db=db)
+    _schedule_product_storage_reclaim(background_tasks, bind=db.get_bind(), product_ids=result.deleted_ids)
+    return result
 
 
 def _cleanup_mobile_invalid_product_refs(
@@ -4153,6 +4237,8 @@ def _cleanup_mobile_invalid_product_refs(
         text=f"购物袋完成：invalid={result['bag_items']['invalid']}，repaired={result['bag_items']['repaired']}。",
     )
 
+    # 先把写后计数器里的增量落库，否则清理后刷盘会把失效产品的统计行重新插回来。
+    flush_write_behind_counters(db.get_bind())
     usage_stmt = select(MobileCompareUsageStat)
     if targeted_mode and normalized_invalid_ids:
         usage_stmt = usage_stmt.where(MobileCompareUsageStat.product_id.in_(sorted(normalized_invalid_ids)))
@@ -4205,7 +4291,9 @@ def create_mobile_invalid_product_ref_cleanup_job(
 
 @router.get("/maintenance/mobile/product-refs/jobs", response_model=list[ProductWorkbenchJobView])
 def list_mobile_invalid_product_ref_cleanup_jobs(
+    response: Response,
     status: str | None = Query(None),
+    cursor: str | None = Query(None),
     offset: int = Query(0, ge=0),
     limit: int = Query(30, ge=1, le=100),
     db: Session = Depends(get_db),
@@ -4216,6 +4304,8 @@ def list_mobile_invalid_product_ref_cleanup_jobs(
         status=status,
         offset=offset,
         limit=limit,
+        cursor=cursor,
+        response=response,
     )
 
 
@@ -4326,7 +4416,9 @@ def create_orphan_storage_cleanup_job(payload: OrphanStorageCleanupRequest, db:
 
 @router.get("/maintenance/storage/orphans/jobs", response_model=list[ProductWorkbenchJobView])
 def list_orphan_storage_cleanup_jobs(
+    response: Response,
     status: str | None = Query(None),
+    cursor: str | None = Query(None),
     offset: int = Query(0, ge=0),
     limit: int = Query(30, ge=1, le=100),
     db: Session = Depends(get_db),
@@ -4337,6 +4429,8 @@ def list_orphan_storage_cleanup_jobs(
         status=status,
         offset=offset,
         limit=limit,
+        cursor=cursor,
+        response=response,
     )
 
 
@@ -4428,18 +4522,35 @@ def _build_ingredient_library_impl(
 
     _ensure_ingredient_index_table(db)
     _ensure_ingredient_alias_tables(db)
-    backfilled_from_storage = _backfill_ingredient_index_from_storage(db=db, category=category)
+    # 画像目录只列举一次：既用于历史回填，也作为后续“画像文件是否存在”的判断集合（不再逐条 stat）。
+    profile_rel_paths = _iter_ingredient_profile_rel_paths(category=category)
+    backfilled_from_storage = _backfill_ingredient_index_from_storage(db=db, category=category, rel_paths=profile_rel_paths)
+    existing_profile_paths = set(profile_rel_paths)
+    listed_prefix = f"ingredients/{category}/" if category else "ingredients/"
+
+    def profile_exists(rel_path: str) -> bool:
+        if not rel_path:
+            return False
+        if rel_path in existing_profile_paths:
+            return True
+        if rel_path.startswith(listed_prefix):
+            return False
+        return exists_rel_path(rel_path)
 
     stmt = select(ProductIndex).order_by(ProductIndex.created_at.desc())
     if category:
         stmt = stmt.where(ProductIndex.category == category)
 
     rows = db.execute(stmt).scalars().all()
-    grouped, aggregate_meta = _collect_category_ingredients(
+    grouped, aggregate_meta = _collect_category_ingredients_incremental(
+        db=db,
         rows=rows,
+        category=category,
         max_sources_per_ingredient=int(payload.max_sources_per_ingredient),
         normalization_packages=normalization_packages,
+        mode=payload.aggregation_mode,
     )
+    aggregation = aggregate_meta.get("aggregation") or {}
     grouped_items = sorted(grouped.values(), key=lambda item: (item["category"], item["ingredient_name"]))
     raw_unique = int(aggregate_meta.get("raw_unique_ingredients") or len(grouped_items))
     merged_delta = max(0, raw_unique - len(grouped_items))
@@ -4454,8 +4565,10 @@ def _build_ingredient_library_impl(
             "merged_delta": merged_delta,
             "normalization_packages": normalization_packages,
             "backfilled_from_storage": backfilled_from_storage,
+            "aggregation": aggregation,
             "text": (
-                f"开始生成成分库：产品 {len(rows)} 条，唯一成分 {len(grouped_items)} 条，"
+                f"开始生成成分库：产品 {len(rows)} 条（重新解析 {int(aggregation.get('reparsed_products') or 0)}），"
+                f"唯一成分 {len(grouped_items)} 条，"
                 f"原始唯一 {raw_unique}（归并 {merged_delta}），历史回填 {backfilled_from_storage} 条。"
             ),
         },
@@ -4464,203 +4577,39 @@ def _build_ingredient_library_impl(
     ingredient_ids = [str(item["ingredient_id"]) for item in grouped_items]
     index_map = _load_ingredient_index_map(db=db, ingredient_ids=ingredient_ids)
 
-    submitted_to_model = 0
-    created = 0
-    updated = 0
-    skipped = 0
-    failed = 0
+    counts = {"submitted_to_model": 0, "created": 0, "updated": 0, "skipped": 0, "failed": 0}
     failures: list[str] = []
     items: list[IngredientLibraryBuildItem] = []
     force_regenerate = bool(payload.force_regenerate)
-
     total = len(grouped_items)
-    for idx, item in enumerate(grouped_items, start=1):
-        if stop_checker is not None and stop_checker():
-            _emit_progress(
-                event_callback,
-                {
-                    "step": "ingredient_build_cancelled",
-                    "index": idx,
-                    "total": total,
-                    "text": f"任务取消：已处理到 {idx - 1}/{total}。",
-                },
-            )
-            raise IngredientLibraryBuildCancelledError("ingredient build cancelled by operator.")
-
-        ingredient_id = item["ingredient_id"]
-        ingredient_name = item["ingredient_name"]
-        ingredient_name_en = str(item.get("ingredient_name_en") or "").strip() or None
-        category_name = item["category"]
-        source_trace_ids = sorted(item["source_trace_ids"])
-        source_json = item["source_json"]
-        source_signature = str(item["source_signature"])
-        source_schema_version = str(item["source_schema_version"])
-        alias_names = _collect_item_alias_names(item=item)
-        source_count = _source_product_count_from_source_json(source_json=source_json, fallback=len(source_trace_ids))
-
-        storage_rel = ingredient_profile_rel_path(category_name, ingredient_id)
-        index_rec = _upsert_ingredient_index_from_scan(
-            existing=index_map.get(ingredient_id),
-            category=category_name,
-            ingredient_id=ingredient_id,
-            ingredient_name=ingredient_name,
-            ingredient_key=str(item["ingredient_key"]),
-            source_trace_ids=source_trace_ids,
-        )
-        index_map[ingredient_id] = index_rec
-        db.add(index_rec)
 
-        ready_storage_path = str(index_rec.storage_path or "").strip()
-        if ready_storage_path and not exists_rel_path(ready_storage_path) and exists_rel_path(storage_rel):
-            ready_storage_path = storage_rel
-        if not ready_storage_path:
-            ready_storage_path = storage_rel
-        is_ready = str(index_rec.status or "").strip().lower() == "ready"
-        existing_source_signature = ""
-        if is_ready and exists_rel_path(ready_storage_path):
-            existing_source_signature = _load_profile_source_signature(ready_storage_path)
-
-        if (
-            is_ready
-            and exists_rel_path(ready_storage_path)
-            and not force_regenerate
-            and existing_source_signature
-            and existing_source_signature == source_signature
-        ):
-            index_rec.storage_path = ready_storage_path
-            skipped += 1
+    def finish(result: OrderedTaskResult) -> None:
+        ctx = result.tag
+        idx = ctx["index"]
+        index_rec = ctx["index_rec"]
+        ingredient_id = ctx["ingredient_id"]
+        ingredient_name = ctx["ingredient_name"]
+        category_name = ctx["category"]
+        if result.error is None and result.value is None:
+            index_rec.storage_path = ctx["ready_storage_path"]
+            counts["skipped"] += 1
             _upsert_ingredient_aliases(
                 db=db,
                 category=category_name,
                 ingredient_id=ingredient_id,
-                alias_names=alias_names,
+                alias_names=ctx["alias_names"],
                 resolver="ingredient_build",
             )
-            build_item = IngredientLibraryBuildItem(
-                ingredient_id=ingredient_id,
-                category=category_name,
-                ingredient_name=ingredient_name,
-                ingredient_name_en=ingredient_name_en,
-                source_count=source_count,
-                source_trace_ids=source_trace_ids,
-                storage_path=ready_storage_path,
-                status="skipped",
-                model=index_rec.model,
-                error=None,
-            )
-            items.append(build_item)
-            _emit_progress(
-                event_callback,
-                {
-                    "step": "ingredient_skip",
-                    "ingredient_id": ingredient_id,
-                    "ingredient_name": ingredient_name,
-                    "category": category_name,
-                    "index": idx,
-                    "total": total,
-                    "skipped": skipped,
-                    "text": f"[{idx}/{total}] 跳过（统计签名未变化）：{category_name} / {ingredient_name}",
-                },
-            )
-            continue
-
-        submitted_to_model += 1
-        _emit_progress(
-            event_callback,
-            {
-                "step": "ingredient_start",
-                "ingredient_id": ingredient_id,
-                "ingredient_name": ingredient_name,
-                "category": category_name,
-                "index": idx,
-                "total": total,
-                "submitted_to_model": submitted_to_model,
-                "text": f"[{idx}/{total}] 生成成分：{category_name} / {ingredient_name}",
-            },
-        )
-        try:
-            ai_result = run_capability_now(
-                capability="doubao.ingredient_category_profile",
-                input_payload={
-                    "ingredient": ingredient_name,
-                    "category": category_name,
-                    "source_json": source_json,
-                    "source_samples": item["source_samples"],
-                },
-                trace_id=ingredient_id,
-                event_callback=lambda e, _iid=ingredient_id, _iname=ingredient_name, _cat=category_name: _forward_ingredient_model_event(
-                    event_callback=event_callback,
-                    ingredient_id=_iid,
-                    ingredient_name=_iname,
-                    category=_cat,
-                    payload=e,
-                ),
-            )
-            normalized_ingredient_name = str(ai_result.get("ingredient_name") or ingredient_name).strip() or ingredient_name
-            normalized_ingredient_name_en = str(ai_result.get("ingredient_name_en") or "").strip() or None
-            _upsert_ingredient_aliases(
-                db=db,
-                category=category_name,
-                ingredient_id=ingredient_id,
-                alias_names=[normalized_ingredient_name, normalized_ingredient_name_en, *alias_names],
-                resolver="ingredient_model",
-            )
-            profile_doc = {
-                "id": ingredient_id,
-                "category": category_name,
-                "ingredient_name": normalized_ingredient_name,
-                "ingredient_name_en": normalized_ingredient_name_en,
-                "ingredient_key": item["ingredient_key"],
-                "source_count": source_count,
-                "source_trace_ids": source_trace_ids,
-                "source_samples": item["source_samples"],
-                "source_json": source_json,
-                "generated_at": now_iso(),
-                "generator": {
-                    "capability": "doubao.ingredient_category_profile",
-                    "model": str(ai_result.get("model") or ""),
-                    "prompt_key": "doubao.ingredient_category_profile",
-                    "source_signature": source_signature,
-                    "source_schema_version": source_schema_version,
-                },
-                "profile": {
-                    "summary": str(ai_result.get("summary") or "").strip(),
-                    "benefits": _safe_str_list(ai_result.get("benefits")),
-                    "risks": _safe_str_list(ai_result.get("risks")),
-                    "usage_tips": _safe_str_list(ai_result.get("usage_tips")),
-                    "suitable_for": _safe_str_list(ai_result.get("suitable_for")),
-                    "avoid_for": _safe_str_list(ai_result.get("avoid_for")),
-                    "confidence": int(ai_result.get("confidence") or 0),
-                    "reason": str(ai_result.get("reason") or "").strip(),
-                    "analysis_text": str(ai_result.get("analysis_text") or "").strip(),
-                },
-            }
-            existed_before = exists_rel_path(storage_rel)
-            storage_path = save_ingredient_profile(category_name, ingredient_id, profile_doc)
-            status = "updated" if existed_before else "created"
-            if status == "updated":
-                updated += 1
-            else:
-                created += 1
-
-            index_rec.status = "ready"
-            index_rec.ingredient_name = normalized_ingredient_name
-            index_rec.storage_path = storage_path
-            index_rec.model = str(ai_result.get("model") or "").strip() or None
-            index_rec.last_generated_at = now_iso()
-            index_rec.last_error = None
-            db.add(index_rec)
-
             items.append(
                 IngredientLibraryBuildItem(
                     ingredient_id=ingredient_id,
                     category=category_name,
-                    ingredient_name=normalized_ingredient_name,
-                    ingredient_name_en=normalized_ingredient_name_en,
-                    source_count=source_count,
-                    source_trace_ids=source_trace_ids,
-                    storage_path=storage_path,
-                    status=status,
+                    ingredient_name=ingredient_name,
+                    ingredient_name_en=ctx["ingredient_name_en"],
+                    source_count=ctx["source_count"],
+                    source_trace_ids=ctx["source_trace_ids"],
+                    storage_path=ctx["ready_storage_path"],
+                    status="skipped",
                     model=index_rec.model,
                     error=None,
                 )
@@ -4668,22 +4617,22 @@ def _build_ingredient_library_impl(
             _emit_progress(
                 event_callback,
                 {
-                    "step": "ingredient_done",
+                    "step": "ingredient_skip",
                     "ingredient_id": ingredient_id,
-                    "ingredient_name": normalized_ingredient_name,
+                    "ingredient_name": ingredient_name,
                     "category": category_name,
                     "index": idx,
                     "total": total,
-                    "status": status,
-                    "created": created,
-                    "updated": updated,
-                    "text": f"[{idx}/{total}] 完成：{category_name} / {ingredient_name}（{status}）",
+                    "skipped": counts["skipped"],
+                    "text": f"[{idx}/{total}] 跳过（统计签名未变化）：{category_name} / {ingredient_name}",
                 },
             )
-        except Exception as e:
-            failed += 1
-            message = f"{ingredient_id} ({category_name}/{ingredient_name}): {e}"
-            failures.append(message)
+            return
+
+        if result.error is not None:
+            e = result.error
+            counts["failed"] += 1
+            failures.append(f"{ingredient_id} ({category_name}/{ingredient_name}): {e}")
             index_rec.status = "failed"
             index_rec.last_error = str(e)
             db.add(index_rec)
@@ -4693,8 +4642,8 @@ def _build_ingredient_library_impl(
                     category=category_name,
                     ingredient_name=ingredient_name,
                     ingredient_name_en=None,
-                    source_count=source_count,
-                    source_trace_ids=source_trace_ids,
+                    source_count=ctx["source_count"],
+                    source_trace_ids=ctx["source_trace_ids"],
                     storage_path=None,
                     status="failed",
                     model=None,
@@ -4710,13 +4659,189 @@ def _build_ingredient_library_impl(
                     "category": category_name,
                     "index": idx,
                     "total": total,
-                    "failed": failed,
+                    "failed": counts["failed"],
                     "text": f"[{idx}/{total}] 失败：{category_name} / {ingredient_name} | {e}",
                 },
             )
+            return
+
+        generated = result.value
+        profile_doc = generated["profile_doc"]
+        storage_path = generated["storage_path"]
+        normalized_ingredient_name = profile_doc["ingredient_name"]
+        normalized_ingredient_name_en = profile_doc["ingredient_name_en"]
+        _upsert_ingredient_aliases(
+            db=db,
+            category=category_name,
+            ingredient_id=ingredient_id,
+            alias_names=[normalized_ingredient_name, normalized_ingredient_name_en, *ctx["alias_names"]],
+            resolver="ingredient_model",
+        )
+        existing_profile_paths.add(storage_path)
+        status = "updated" if ctx["existed_before"] else "created"
+        counts[status] += 1
+
+        index_rec.status = "ready"
+        index_rec.ingredient_name = normalized_ingredient_name
+        index_rec.storage_path = storage_path
+        index_rec.source_signature = ctx["source_signature"]
+        index_rec.model = str(generated["model"] or "").strip() or None
+        index_rec.last_generated_at = now_iso()
+        index_rec.last_error = None
+        db.add(index_rec)
+
+        items.append(
+            IngredientLibraryBuildItem(
+                ingredient_id=ingredient_id,
+                category=category_name,
+                ingredient_name=normalized_ingredient_name,
+                ingredient_name_en=normalized_ingredient_name_en,
+                source_count=ctx["source_count"],
+                source_trace_ids=ctx["source_trace_ids"],
+                storage_path=storage_path,
+                status=status,
+                model=index_rec.model,
+                error=None,
+            )
+        )
+        _emit_progress(
+            event_callback,
+            {
+                "step": "ingredient_done",
+                "ingredient_id": ingredient_id,
+                "ingredient_name": normalized_ingredient_name,
+                "category": category_name,
+                "index": idx,
+                "total": total,
+                "status": status,
+                "created": counts["created"],
+                "updated": counts["updated"],
+                "text": f"[{idx}/{total}] 完成：{category_name} / {ingredient_name}（{status}）",
+            },
+        )
+
+    # 模型调用在有界线程池里并发；DB 写入与进度事件仍在当前线程、按 index 顺序产生。
+    with OrderedTaskPool(_ingredient_build_worker_count(), thread_name_prefix="ingredient-build") as pool:
+        for idx, item in enumerate(grouped_items, start=1):
+            for result in pool.ready():
+                finish(result)
+            while pool.full:
+                finish(pool.next_result())
+
+            if stop_checker is not None and stop_checker():
+                for result in pool.cancel_pending():
+                    finish(result)
+                processed = counts["skipped"] + counts["created"] + counts["updated"] + counts["failed"]
+                _emit_progress(
+                    event_callback,
+                    {
+                        "step": "ingredient_build_cancelled",
+                        "index": idx,
+                        "total": total,
+                        "text": f"任务取消：已处理到 {processed}/{total}。",
+                    },
+                )
+                raise IngredientLibraryBuildCancelledError("ingredient build cancelled by operator.")
+
+            ingredient_id = item["ingredient_id"]
+            ingredient_name = item["ingredient_name"]
+            category_name = item["category"]
+            source_trace_ids = sorted(item["source_trace_ids"])
+            source_json = item["source_json"]
+            source_signature = str(item["source_signature"])
+
+            storage_rel = ingredient_profile_rel_path(category_name, ingredient_id)
+            index_rec = _upsert_ingredient_index_from_scan(
+                existing=index_map.get(ingredient_id),
+                category=category_name,
+                ingredient_id=ingredient_id,
+                ingredient_name=ingredient_name,
+                ingredient_key=str(item["ingredient_key"]),
+                source_trace_ids=source_trace_ids,
+            )
+            index_map[ingredient_id] = index_rec
+            db.add(index_rec)
+
+            ready_storage_path = str(index_rec.storage_path or "").strip()
+            if ready_storage_path and not profile_exists(ready_storage_path) and profile_exists(storage_rel):
+                ready_storage_path = storage_rel
+            if not ready_storage_path:
+                ready_storage_path = storage_rel
+            is_ready = str(index_rec.status or "").strip().lower() == "ready" and profile_exists(ready_storage_path)
+            existing_source_signature = str(index_rec.source_signature or "").strip()
+            if is_ready and not existing_source_signature:
+                # 索引里还没有签名的旧记录：读一次画像 JSON 迁移进索引，之后只比较列。
+                existing_source_signature = _load_profile_source_signature(ready_storage_path)
+                index_rec.source_signature = existing_source_signature or None
+
+            ctx = {
+                "index": idx,
+                "index_rec": index_rec,
+                "ingredient_id": ingredient_id,
+                "ingredient_name": ingredient_name,
+                "ingredient_name_en": str(item.get("ingredient_name_en") or "").strip() or None,
+                "category": category_name,
+                "source_trace_ids": source_trace_ids,
+                "source_signature": source_signature,
+                "source_count": _source_product_count_from_source_json(
+                    source_json=source_json,
+                    fallback=len(source_trace_ids),
+                ),
+                "alias_names": _collect_item_alias_names(item=item),
+                "ready_storage_path": ready_storage_path,
+                "existed_before": profile_exists(storage_rel),
+            }
+            if (
+                is_ready
+                and not force_regenerate
+                and existing_source_signature
+                and existing_source_signature == source_signature
+            ):
+                pool.push_ready(ctx)
+                continue
+
+            counts["submitted_to_model"] += 1
+            _emit_progress(
+                event_callback,
+                {
+                    "step": "ingredient_start",
+                    "ingredient_id": ingredient_id,
+                    "ingredient_name": ingredient_name,
+                    "category": category_name,
+                    "index": idx,
+                    "total": total,
+                    "submitted_to_model": counts["submitted_to_model"],
+                    "text": f"[{idx}/{total}] 生成成分：{category_name} / {ingredient_name}",
+                },
+            )
+            pool.submit(
+                ctx,
+                _generate_ingredient_profile,
+                item=item,
+                source_trace_ids=source_trace_ids,
+                source_count=ctx["source_count"],
+                event_callback=pool.relay(
+                    lambda e, _iid=ingredient_id, _iname=ingredient_name, _cat=category_name: _forward_ingredient_model_event(
+                        event_callback=event_callback,
+                        ingredient_id=_iid,
+                        ingredient_name=_iname,
+                        category=_cat,
+                        payload=e,
+                    )
+                ),
+            )
+
+        for result in pool.drain():
+            finish(result)
 
     db.commit()
+    refresh_ingredient_alias_maps(db, {str(item["category"]) for item in grouped_items})
 
+    submitted_to_model = counts["submitted_to_model"]
+    created = counts["created"]
+    updated = counts["updated"]
+    skipped = counts["skipped"]
+    failed = counts["failed"]
     status = "ok" if failed == 0 else "partial_failed"
     _emit_progress(
         event_callback,
@@ -4741,6 +4866,9 @@ def _build_ingredient_library_impl(
         scanned_products=len(rows),
         unique_ingredients=len(grouped_items),
         backfilled_from_storage=backfilled_from_storage,
+        aggregation_mode=str(aggregation.get("mode") or payload.aggregation_mode),
+        reparsed_products=int(aggregation.get("reparsed_products") or 0),
+        affected_ingredients=int(aggregation.get("affected_ingredients") or 0),
         submitted_to_model=submitted_to_model,
         created=created,
         updated=updated,
@@ -4751,6 +4879,69 @@ def _build_ingredient_library_impl(
     )
 
 
+def _ingredient_build_worker_count() -> int:
+    return max(1, min(16, int(getattr(settings, "ingredient_build_model_concurrency", 4) or 1)))
+
+
+def _generate_ingredient_profile(
+    *,
+    item: dict[str, Any],
+    source_trace_ids: list[str],
+    source_count: int,
+    event_callback: Callable[[dict[str, Any]], None] | None,
+) -> dict[str, Any]:
+    # 在 worker 线程执行：只做模型调用 + 画像落盘，不碰 DB Session。
+    ingredient_id = item["ingredient_id"]
+    ingredient_name = item["ingredient_name"]
+    category_name = item["category"]
+    ai_result = run_capability_now(
+        capability="doubao.ingredient_category_profile",
+        input_payload={
+            "ingredient": ingredient_name,
+            "category": category_name,
+            "source_json": item["source_json"],
+            "source_samples": item["source_samples"],
+        },
+        trace_id=ingredient_id,
+        event_callback=event_callback,
+    )
+    normalized_ingredient_name = str(ai_result.get("ingredient_name") or ingredient_name).strip() or ingredient_name
+    normalized_ingredient_name_en = str(ai_result.get("ingredient_name_en") or "").strip() or None
+    model = str(ai_result.get("model") or "")
+    profile_doc = {
+        "id": ingredient_id,
+        "category": category_name,
+        "ingredient_name": normalized_ingredient_name,
+        "ingredient_name_en": normalized_ingredient_name_en,
+        "ingredient_key": item["ingredient_key"],
+        "source_count": source_count,
+        "source_trace_ids": source_trace_ids,
+        "source_samples": item["source_samples"],
+        "source_json": item["source_json"],
+        "generated_at": now_iso(),
+        "generator": {
+            "capability": "doubao.ingredient_category_profile",
+            "model": model,
+            "prompt_key": "doubao.ingredient_category_profile",
+            "source_signature": str(item["source_signature"]),
+            "source_schema_version": str(item["source_schema_version"]),
+        },
+        "profile": {
+            "summary": str(ai_result.get("summary") or "").strip(),
+            "benefits": _safe_str_list(ai_result.get("benefits")),
+            "risks": _safe_str_list(ai_result.get("risks")),
+            "usage_tips": _safe_str_list(ai_result.get("usage_tips")),
+            "suitable_for": _safe_str_list(ai_result.get("suitable_for")),
+            "avoid_for": _safe_str_list(ai_result.get("avoid_for")),
+            "confidence": int(ai_result.get("confidence") or 0),
+            "reason": str(ai_result.get("reason") or "").strip(),
+            "analysis_text": str(ai_result.get("analysis_text") or "").strip(),
+        },
+    }
+    storage_path = save_ingredient_profile(category_name, ingredient_id, profile_doc)
+    return {"profile_doc": profile_doc, "storage_path": storage_path, "model": model}
+
+
 def _ingredient_library_preflight(
     *,
     payload: IngredientLibraryPreflightRequest,
@@ -5681,17 +5872,7 @@ def _product_workbench_queue_message(*, action: str) -> str:
 
 
 def _ensure_product_workbench_job_table(db: Session) -> None:
-    bind = db.get_bind()
-    ProductWorkbenchJob.__table__.create(bind=bind, checkfirst=True)
-    inspector = inspect(bind)
-    columns = {item["name"] for item in inspector.get_columns("product_workbench_jobs")}
-    statements: list[str] = []
-    if "live_text_json" not in columns:
-        statements.append("ALTER TABLE product_workbench_jobs ADD COLUMN live_text_json TEXT")
-    if statements:
-        with bind.begin() as conn:
-            for stmt in statements:
-                conn.execute(text(stmt))
+    ensure_runtime_schema(db.get_bind())
 
 
 def _create_product_workbench_job(
@@ -5735,6 +5916,26 @@ def _create_product_workbench_job(
     return _to_product_workbench_job_view(rec)
 
 
+def _fetch_job_list_page(
+    db: Session,
+    stmt: Any,
+    *,
+    columns: tuple[Any, ...],
+    scope: str,
+    cursor: str | None,
+    offset: int,
+    limit: int,
+    response: Response | None,
+) -> KeysetPage:
+    try:
+        page = fetch_keyset_page(db, stmt, columns=columns, scope=scope, cursor=cursor, limit=limit, offset=offset)
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    if response is not None and page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page
+
+
 def _list_product_workbench_jobs(
     *,
     db: Session,
@@ -5742,6 +5943,8 @@ def _list_product_workbench_jobs(
     status: str | None,
     offset: int,
     limit: int,
+    cursor: str | None = None,
+    response: Response | None = None,
 ) -> list[ProductWorkbenchJobView]:
     _ensure_product_workbench_job_table(db)
     normalized_job_type = _validate_product_workbench_job_type(job_type)
@@ -5749,10 +5952,20 @@ def _list_product_workbench_jobs(
     stmt = select(ProductWorkbenchJob).where(ProductWorkbenchJob.job_type == normalized_job_type)
     if normalized_status:
         stmt = stmt.where(ProductWorkbenchJob.status == normalized_status)
-    rows = db.execute(stmt.order_by(ProductWorkbenchJob.updated_at.desc()).offset(offset).limit(limit)).scalars().all()
+    page = _fetch_job_list_page(
+        db,
+        stmt,
+        columns=(ProductWorkbenchJob.created_at, ProductWorkbenchJob.job_id),
+        # 作用域带上任务类型：不同任务列表的游标不能混用
+        scope=f"workbench_jobs:{normalized_job_type}",
+        cursor=cursor,
+        offset=offset,
+        limit=limit,
+        response=response,
+    )
     now_utc = datetime.now(timezone.utc)
     views: list[ProductWorkbenchJobView] = []
-    for row in rows:
+    for row in page.rows:
         _reconcile_product_workbench_job_state(db=db, rec=row, now_utc=now_utc)
         if normalized_status and str(row.status or "").strip().lower() != normalized_status:
             continue
@@ -6017,6 +6230,7 @@ def _run_product_workbench_job(*, job_id: str, db: Session) -> None:
                 ),
                 should_cancel=should_cancel,
             )
+            _schedule_product_storage_reclaim(None, bind=db.get_bind(), product_ids=result.deleted_ids)
         elif job_type == "ingredient_batch_delete":
             ingredient_delete_payload = IngredientLibraryBatchDeleteRequest.model_validate(params)
             result = _batch_delete_ingredient_library_impl(
@@ -6541,6 +6755,7 @@ def _product_workbench_stage_label(*, job_type: str, stage: str) -> str:
     if job_type == "route_mapping_build":
         mapping = {
             "route_mapping_build_start": "扫描产品",
+            "route_mapping_plan_done": "预检完成",
             "route_mapping_start": "映射中",
             "route_mapping_model_step": "模型执行",
             "route_mapping_model_delta": "模型输出",
@@ -6553,6 +6768,7 @@ def _product_workbench_stage_label(*, job_type: str, stage: str) -> str:
     if job_type == "product_analysis_build":
         mapping = {
             "product_analysis_build_start": "扫描产品",
+            "product_analysis_plan_done": "预检完成",
             "product_analysis_start": "分析中",
             "product_analysis_model_step": "模型执行",
             "product_analysis_model_delta": "模型输出",
@@ -6886,6 +7102,8 @@ def _product_workbench_progress_percent(
     if job_type == "route_mapping_build":
         if step == "route_mapping_build_start":
             return max(value, 5)
+        if step == "route_mapping_plan_done":
+            return max(value, 8)
         if step in {"route_mapping_start", "route_mapping_done", "route_mapping_skip", "route_mapping_error", "route_mapping_model_step", "route_mapping_model_delta"}:
             if index is not None and total is not None and total > 0:
                 computed = 10 + int((max(0, min(total, index)) / total) * 85)
@@ -6897,6 +7115,8 @@ def _product_workbench_progress_percent(
     if job_type == "product_analysis_build":
         if step == "product_analysis_build_start":
             return max(value, 5)
+        if step == "product_analysis_plan_done":
+            return max(value, 8)
         if step in {"product_analysis_start", "product_analysis_done", "product_analysis_skip", "product_analysis_error", "product_analysis_model_step", "product_analysis_model_delta"}:
             if index is not None and total is not None and total > 0:
                 computed = 10 + int((max(0, min(total, index)) / total) * 85)
@@ -6970,6 +7190,61 @@ def _product_workbench_progress_percent(
         return 100
     return value
 
+# 工作台批量构建预检阶段的取消检查间隔（条）；预检不调模型，逐条查库取消标记不划算。
+_WORKBENCH_PLAN_CANCEL_CHECK_EVERY = 50
+# 工作台批量构建的结果落库批量（条）：攒满一批提交一次，中途中断最多重跑一批。
+_WORKBENCH_COMMIT_EVERY = 50
+
+
+def _product_workbench_model_worker_count() -> int:
+    return max(1, min(16, int(getattr(settings, "product_workbench_model_concurrency", 4) or 1)))
+
+
+def _load_product_index_record_map(*, db: Session, model: Any, product_ids: list[str]) -> dict[str, Any]:
+    ids = [str(item or "").strip() for item in product_ids if str(item or "").strip()]
+    out: dict[str, Any] = {}
+    chunk_size = 500
+    for idx in range(0, len(ids), chunk_size):
+        chunk = ids[idx : idx + chunk_size]
+        for row in db.execute(select(model).where(model.product_id.in_(chunk))).scalars().all():
+            out[str(row.product_id)] = row
+    return out
+
+
+def _storage_json_presence_checker(rel_dirs: list[str]) -> Callable[[str | None], bool]:
+    """
+    一次列举若干存储目录（不递归）下的 JSON 文件，返回“文件是否存在”的判断函数。
+    父目录在列举范围内的路径直接查集合；其它路径回退到 exists_rel_path。
+    """
+    base = Path(settings.storage_dir).resolve()
+    listed_dirs: set[str] = set()
+    existing: set[str] = set()
+    for rel_dir in rel_dirs:
+        rel_dir = str(rel_dir or "").strip().strip("/")
+        if not rel_dir:
+            continue
+        target = (base / rel_dir).resolve()
+        if not str(target).startswith(str(base)):
+            continue
+        listed_dirs.add(rel_dir)
+        if not target.is_dir():
+            continue
+        for path in target.iterdir():
+            if path.suffix == ".json" and path.is_file():
+                existing.add(f"{rel_dir}/{path.name}")
+
+    def exists(rel_path: str | None) -> bool:
+        value = str(rel_path or "").strip().lstrip("/")
+        if not value:
+            return False
+        parent = value.rsplit("/", 1)[0] if "/" in value else ""
+        if parent in listed_dirs:
+            return value in existing
+        return exists_rel_path(value)
+
+    return exists
+
+
 def _build_product_route_mapping_impl(
     payload: ProductRouteMappingBuildRequest,
     db: Session,
@@ -7012,11 +7287,7 @@ def _build_product_route_mapping_impl(
         },
     )
 
-    submitted_to_model = 0
-    created = 0
-    updated = 0
-    skipped = 0
-    failed = 0
+    counts = {"submitted_to_model": 0, "created": 0, "updated": 0, "skipped": 0, "failed": 0}
     items: list[ProductRouteMappingBuildItem] = []
     failures: list[str] = []
 
@@ -7028,14 +7299,29 @@ def _build_product_route_mapping_impl(
         if should_cancel and should_cancel():
             raise ProductWorkbenchJobCancelledError("job cancelled by operator.")
 
+    # 预检：索引记录一次性批量加载、存储目录一次性列举，指纹全部在调模型前算好，据此决定跳过。
+    rec_map = _load_product_index_record_map(
+        db=db,
+        model=ProductRouteMappingIndex,
+        product_ids=[str(row.id) for row in rows],
+    )
+    mapping_exists = _storage_json_presence_checker(
+        [f"route_mappings/{cat}" for cat in target_categories]
+    )
+    product_json_exists = _storage_json_presence_checker(
+        ["products", *[f"products/{cat}" for cat in target_categories]]
+    )
+
+    plans: list[dict[str, Any]] = []
     for idx, row in enumerate(rows, start=1):
-        check_cancel()
+        if idx % _WORKBENCH_PLAN_CANCEL_CHECK_EVERY == 0:
+            check_cancel()
         product_id = str(row.id)
         row_category = str(row.category or "").strip().lower()
         if row_category not in ROUTE_MAPPING_SUPPORTED_CATEGORIES:
             continue
 
-        rec = db.get(ProductRouteMappingIndex, product_id)
+        rec = rec_map.get(product_id)
         storage_path_existing = ""
         if rec:
             storage_path_existing = str(rec.storage_path or "").strip()
@@ -7046,122 +7332,141 @@ def _build_product_route_mapping_impl(
             rec
             and str(rec.status or "").strip().lower() == "ready"
             and str(rec.rules_version or "").strip() == MOBILE_RULES_VERSION
-            and exists_rel_path(storage_path_existing)
+            and mapping_exists(storage_path_existing)
         )
+        plan: dict[str, Any] = {
+            "index": idx,
+            "product_id": product_id,
+            "category": row_category,
+            "rec": rec,
+            "storage_path_existing": storage_path_existing,
+            "action": "submit",
+        }
+        plans.append(plan)
 
-        if only_unmapped and is_ready_existing:
-            skipped += 1
-            items.append(
-                ProductRouteMappingBuildItem(
-                    product_id=product_id,
-                    category=row_category,
-                    status="skipped",
-                    primary_route=_score_or_none(
-                        route_key=str(rec.primary_route_key or ""),
-                        route_title=str(rec.primary_route_title or ""),
-                        confidence=int(rec.primary_confidence or 0),
-                        reason="",
-                    ),
-                    secondary_route=_score_or_none(
-                        route_key=str(rec.secondary_route_key or ""),
-                        route_title=str(rec.secondary_route_title or ""),
-                        confidence=int(rec.secondary_confidence or 0),
-                        reason="",
-                    ),
-                    route_scores=_safe_route_score_models(rec.scores_json),
-                    storage_path=storage_path_existing,
-                    model=rec.model,
-                    error=None,
-                )
-            )
-            _emit_progress(
-                event_callback,
-                {
-                    "step": "route_mapping_skip",
-                    "product_id": product_id,
-                    "category": row_category,
-                    "index": idx,
-                    "total": total,
-                    "text": f"[{idx}/{total}] 跳过（已有映射）：{row_category} / {product_id}",
-                },
+        def mark_skipped(reason: str) -> None:
+            # 跳过项在预检阶段（尚未 commit、记录未过期）直接生成结果，避免之后逐条刷新 ORM 对象。
+            plan["action"] = "skip"
+            plan["skip_reason"] = reason
+            plan["item"] = ProductRouteMappingBuildItem(
+                product_id=product_id,
+                category=row_category,
+                status="skipped",
+                primary_route=_score_or_none(
+                    route_key=str(rec.primary_route_key or ""),
+                    route_title=str(rec.primary_route_title or ""),
+                    confidence=int(rec.primary_confidence or 0),
+                    reason="",
+                ),
+                secondary_route=_score_or_none(
+                    route_key=str(rec.secondary_route_key or ""),
+                    route_title=str(rec.secondary_route_title or ""),
+                    confidence=int(rec.secondary_confidence or 0),
+                    reason="",
+                ),
+                route_scores=_safe_route_score_models(rec.scores_json),
+                storage_path=storage_path_existing,
+                model=rec.model,
+                error=None,
             )
+
+        if only_unmapped and is_ready_existing:
+            mark_skipped("已有映射")
             continue
 
         try:
-            check_cancel()
-            if not exists_rel_path(row.json_path):
+            if not product_json_exists(row.json_path):
                 raise ValueError(f"product json missing: {row.json_path}")
             doc = load_json(row.json_path)
             context = _build_route_mapping_product_context(row=row, doc=doc)
             fingerprint = _build_route_mapping_fingerprint(context)
-        except ProductWorkbenchJobCancelledError:
-            raise
         except Exception as e:
-            failed += 1
-            message = f"{product_id} ({row_category}): invalid product context | {e}"
-            failures.append(message)
-            now = now_iso()
-            rec = _ensure_route_mapping_record(rec=rec, product_id=product_id, category=row_category)
-            rec.rules_version = MOBILE_RULES_VERSION
-            rec.fingerprint = rec.fingerprint or _fallback_route_mapping_fingerprint(row_category, product_id)
-            rec.status = "failed"
-            rec.prompt_key = f"doubao.route_mapping_{row_category}"
-            rec.prompt_version = prompt_versions.get(row_category)
-            rec.last_error = str(e)
-            rec.last_generated_at = now
-            db.add(rec)
-            db.commit()
-            items.append(
-                ProductRouteMappingBuildItem(
-                    product_id=product_id,
-                    category=row_category,
-                    status="failed",
-                    primary_route=None,
-                    secondary_route=None,
-                    route_scores=[],
-                    storage_path=None,
-                    model=None,
-                    error=f"invalid product context: {e}",
-                )
-            )
-            _emit_progress(
-                event_callback,
-                {
-                    "step": "route_mapping_error",
-                    "product_id": product_id,
-                    "category": row_category,
-                    "index": idx,
-                    "total": total,
-                    "text": f"[{idx}/{total}] 失败：{row_category} / {product_id} | {e}",
-                },
-            )
+            plan["action"] = "invalid"
+            plan["error"] = e
             continue
 
         if is_ready_existing and not force_regenerate and str(rec.fingerprint or "").strip() == fingerprint:
-            skipped += 1
-            items.append(
-                ProductRouteMappingBuildItem(
-                    product_id=product_id,
-                    category=row_category,
-                    status="skipped",
-                    primary_route=_score_or_none(
-                        route_key=str(rec.primary_route_key or ""),
-                        route_title=str(rec.primary_route_title or ""),
-                        confidence=int(rec.primary_confidence or 0),
-                        reason="",
-                    ),
-                    secondary_route=_score_or_none(
-                        route_key=str(rec.secondary_route_key or ""),
-                        route_title=str(rec.secondary_route_title or ""),
-                        confidence=int(rec.secondary_confidence or 0),
-                        reason="",
-                    ),
-                    route_scores=_safe_route_score_models(rec.scores_json),
-                    storage_path=storage_path_existing,
-                    model=rec.model,
-                    error=None,
-                )
+            mark_skipped("指纹未变化")
+            continue
+
+        plan["context"] = context
+        plan["fingerprint"] = fingerprint
+
+    planned_model_calls = sum(1 for plan in plans if plan["action"] == "submit")
+    _emit_progress(
+        event_callback,
+        {
+            "step": "route_mapping_plan_done",
+            "planned_model_calls": planned_model_calls,
+            "total": total,
+            "text": f"预检完成：待调用模型 {planned_model_calls} 条，其余跳过或校验失败。",
+        },
+    )
+
+    uncommitted = 0
+
+    def stage_record(rec: Any) -> None:
+        nonlocal uncommitted
+        db.add(rec)
+        uncommitted += 1
+        if uncommitted >= _WORKBENCH_COMMIT_EVERY:
+            db.commit()
+            uncommitted = 0
+
+    def record_failure(plan: dict[str, Any], e: BaseException, *, fingerprint: str | None) -> None:
+        idx = plan["index"]
+        product_id = plan["product_id"]
+        row_category = plan["category"]
+        invalid_context = plan["action"] == "invalid"
+        counts["failed"] += 1
+        if invalid_context:
+            failures.append(f"{product_id} ({row_category}): invalid product context | {e}")
+        else:
+            failures.append(f"{product_id} ({row_category}): {e}")
+        rec = _ensure_route_mapping_record(rec=plan["rec"], product_id=product_id, category=row_category)
+        rec.rules_version = MOBILE_RULES_VERSION
+        rec.fingerprint = fingerprint or rec.fingerprint or _fallback_route_mapping_fingerprint(row_category, product_id)
+        rec.status = "failed"
+        rec.prompt_key = f"doubao.route_mapping_{row_category}"
+        rec.prompt_version = prompt_versions.get(row_category)
+        rec.last_error = str(e)
+        rec.last_generated_at = now_iso()
+        stage_record(rec)
+        items.append(
+            ProductRouteMappingBuildItem(
+                product_id=product_id,
+                category=row_category,
+                status="failed",
+                primary_route=None,
+                secondary_route=None,
+                route_scores=[],
+                storage_path=None,
+                model=None,
+                error=f"invalid product context: {e}" if invalid_context else str(e),
             )
+        )
+        _emit_progress(
+            event_callback,
+            {
+                "step": "route_mapping_error",
+                "product_id": product_id,
+                "category": row_category,
+                "index": idx,
+                "total": total,
+                "text": f"[{idx}/{total}] 失败：{row_category} / {product_id} | {e}",
+            },
+        )
+
+    def finish(result: OrderedTaskResult) -> None:
+        plan = result.tag
+        idx = plan["index"]
+        product_id = plan["product_id"]
+        row_category = plan["category"]
+        rec = plan["rec"]
+
+        if plan["action"] == "skip":
+            counts["skipped"] += 1
+            items.append(plan["item"])
             _emit_progress(
                 event_callback,
                 {
@@ -7170,157 +7475,141 @@ def _build_product_route_mapping_impl(
                     "category": row_category,
                     "index": idx,
                     "total": total,
-                    "text": f"[{idx}/{total}] 跳过（指纹未变化）：{row_category} / {product_id}",
+                    "text": f"[{idx}/{total}] 跳过（{plan['skip_reason']}）：{row_category} / {product_id}",
                 },
             )
-            continue
+            return
+
+        if plan["action"] == "invalid":
+            record_failure(plan, plan["error"], fingerprint=None)
+            return
+
+        if result.error is not None:
+            record_failure(plan, result.error, fingerprint=plan["fingerprint"])
+            return
+
+        result_item: ProductRouteMappingResult = result.value
+        storage_path = str(result_item.storage_path)
+        status = "updated" if rec is not None else "created"
+        counts[status] += 1
+
+        rec = _ensure_route_mapping_record(rec=rec, product_id=product_id, category=row_category)
+        rec.rules_version = result_item.rules_version
+        rec.fingerprint = result_item.fingerprint
+        rec.status = "ready"
+        rec.storage_path = storage_path
+        rec.primary_route_key = result_item.primary_route.route_key
+        rec.primary_route_title = result_item.primary_route.route_title
+        rec.primary_confidence = int(result_item.primary_route.confidence)
+        rec.secondary_route_key = result_item.secondary_route.route_key
+        rec.secondary_route_title = result_item.secondary_route.route_title
+        rec.secondary_confidence = int(result_item.secondary_route.confidence)
+        rec.scores_json = json.dumps([score.model_dump() for score in result_item.route_scores], ensure_ascii=False)
+        rec.needs_review = bool(result_item.needs_review)
+        rec.prompt_key = result_item.prompt_key
+        rec.prompt_version = result_item.prompt_version
+        rec.model = result_item.model
+        rec.last_generated_at = result_item.generated_at
+        rec.last_error = None
+        stage_record(rec)
 
-        submitted_to_model += 1
+        items.append(
+            ProductRouteMappingBuildItem(
+                product_id=product_id,
+                category=row_category,
+                status=status,
+                primary_route=result_item.primary_route,
+                secondary_route=result_item.secondary_route,
+                route_scores=result_item.route_scores,
+                storage_path=storage_path,
+                model=result_item.model,
+                error=None,
+            )
+        )
         _emit_progress(
             event_callback,
             {
-                "step": "route_mapping_start",
+                "step": "route_mapping_done",
                 "product_id": product_id,
                 "category": row_category,
                 "index": idx,
                 "total": total,
-                "text": f"[{idx}/{total}] 开始映射：{row_category} / {product_id}",
+                "status": status,
+                "text": f"[{idx}/{total}] 完成：{row_category} / {product_id}（{status}）",
             },
         )
 
-        capability = f"doubao.route_mapping_{row_category}"
-        prompt_key = capability
-        prompt_version = prompt_versions[row_category]
-        try:
-            check_cancel()
-            ai_result = run_capability_now(
-                capability=capability,
-                input_payload={"product_context_json": json.dumps(context, ensure_ascii=False)},
-                trace_id=product_id,
-                event_callback=lambda event, _pid=product_id, _cat=row_category: _forward_route_mapping_model_event(
-                    event_callback=event_callback,
-                    product_id=_pid,
-                    category=_cat,
-                    payload=event,
-                ),
-            )
+    # 模型调用在有界线程池里并发；DB 写入（按批 commit）与进度事件仍在当前线程、按 index 顺序产生。
+    with OrderedTaskPool(_product_workbench_model_worker_count(), thread_name_prefix="route-mapping") as pool:
+        for plan in plans:
+            for result in pool.ready():
+                finish(result)
+            while pool.full:
+                finish(pool.next_result())
+
+            if should_cancel and should_cancel():
+                for result in pool.cancel_pending():
+                    finish(result)
+                # 已完成的模型结果先落库，取消后重跑时可按指纹直接跳过。
+                db.commit()
+                raise ProductWorkbenchJobCancelledError(
+                    "job cancelled by operator.",
+                    result=ProductRouteMappingBuildResponse(
+                        status="cancelled",
+                        scanned_products=scanned_products,
+                        items=items,
+                        failures=failures[:200],
+                        **counts,
+                    ).model_dump(),
+                )
 
-            generated_at = now_iso()
-            profile_doc = {
-                "product_id": product_id,
-                "category": row_category,
-                "rules_version": str(ai_result.get("rules_version") or MOBILE_RULES_VERSION),
-                "fingerprint": fingerprint,
-                "generated_at": generated_at,
-                "prompt_key": prompt_key,
-                "prompt_version": prompt_version,
-                "model": str(ai_result.get("model") or "").strip(),
-                "primary_route": ai_result.get("primary_route") or {},
-                "secondary_route": ai_result.get("secondary_route") or {},
-                "route_scores": ai_result.get("route_scores") or [],
-                "evidence": ai_result.get("evidence") or {"positive": [], "counter": []},
-                "confidence_reason": str(ai_result.get("confidence_reason") or "").strip(),
-                "needs_review": bool(ai_result.get("needs_review")),
-                "analysis_text": str(ai_result.get("analysis_text") or "").strip(),
-            }
-            result_item = _to_product_route_mapping_result(doc=profile_doc, storage_path="")
-            storage_path = save_product_route_mapping(row_category, product_id, profile_doc)
-            result_item = result_item.model_copy(update={"storage_path": storage_path})
-
-            existed_before = rec is not None
-            status = "updated" if existed_before else "created"
-            if status == "updated":
-                updated += 1
-            else:
-                created += 1
-
-            rec = _ensure_route_mapping_record(rec=rec, product_id=product_id, category=row_category)
-            rec.rules_version = result_item.rules_version
-            rec.fingerprint = result_item.fingerprint
-            rec.status = "ready"
-            rec.storage_path = storage_path
-            rec.primary_route_key = result_item.primary_route.route_key
-            rec.primary_route_title = result_item.primary_route.route_title
-            rec.primary_confidence = int(result_item.primary_route.confidence)
-            rec.secondary_route_key = result_item.secondary_route.route_key
-            rec.secondary_route_title = result_item.secondary_route.route_title
-            rec.secondary_confidence = int(result_item.secondary_route.confidence)
-            rec.scores_json = json.dumps([score.model_dump() for score in result_item.route_scores], ensure_ascii=False)
-            rec.needs_review = bool(result_item.needs_review)
-            rec.prompt_key = result_item.prompt_key
-            rec.prompt_version = result_item.prompt_version
-            rec.model = result_item.model
-            rec.last_generated_at = result_item.generated_at
-            rec.last_error = None
-            db.add(rec)
-            db.commit()
+            if plan["action"] != "submit":
+                pool.push_ready(plan)
+                continue
 
-            items.append(
-                ProductRouteMappingBuildItem(
-                    product_id=product_id,
-                    category=row_category,
-                    status=status,
-                    primary_route=result_item.primary_route,
-                    secondary_route=result_item.secondary_route,
-                    route_scores=result_item.route_scores,
-                    storage_path=storage_path,
-                    model=result_item.model,
-                    error=None,
-                )
-            )
+            idx = plan["index"]
+            product_id = plan["product_id"]
+            row_category = plan["category"]
+            counts["submitted_to_model"] += 1
             _emit_progress(
                 event_callback,
                 {
-                    "step": "route_mapping_done",
+                    "step": "route_mapping_start",
                     "product_id": product_id,
                     "category": row_category,
                     "index": idx,
                     "total": total,
-                    "status": status,
-                    "text": f"[{idx}/{total}] 完成：{row_category} / {product_id}（{status}）",
+                    "text": f"[{idx}/{total}] 开始映射：{row_category} / {product_id}",
                 },
             )
-        except ProductWorkbenchJobCancelledError:
-            raise
-        except Exception as e:
-            failed += 1
-            message = f"{product_id} ({row_category}): {e}"
-            failures.append(message)
-            rec = _ensure_route_mapping_record(rec=rec, product_id=product_id, category=row_category)
-            rec.rules_version = MOBILE_RULES_VERSION
-            rec.fingerprint = fingerprint or _fallback_route_mapping_fingerprint(row_category, product_id)
-            rec.status = "failed"
-            rec.prompt_key = prompt_key
-            rec.prompt_version = prompt_version
-            rec.last_error = str(e)
-            rec.last_generated_at = now_iso()
-            db.add(rec)
-            db.commit()
-            items.append(
-                ProductRouteMappingBuildItem(
-                    product_id=product_id,
-                    category=row_category,
-                    status="failed",
-                    primary_route=None,
-                    secondary_route=None,
-                    route_scores=[],
-                    storage_path=None,
-                    model=None,
-                    error=str(e),
-                )
-            )
-            _emit_progress(
-                event_callback,
-                {
-                    "step": "route_mapping_error",
-                    "product_id": product_id,
-                    "category": row_category,
-                    "index": idx,
-                    "total": total,
-                    "text": f"[{idx}/{total}] 失败：{row_category} / {product_id} | {e}",
-                },
+            pool.submit(
+                plan,
+                _generate_product_route_mapping,
+                product_id=product_id,
+                category=row_category,
+                context=plan["context"],
+                fingerprint=plan["fingerprint"],
+                prompt_version=prompt_versions[row_category],
+                event_callback=pool.relay(
+                    lambda event, _pid=product_id, _cat=row_category: _forward_route_mapping_model_event(
+                        event_callback=event_callback,
+                        product_id=_pid,
+                        category=_cat,
+                        payload=event,
+                    )
+                ),
             )
 
+        for result in pool.drain():
+            finish(result)
+
+    db.commit()
+
+    submitted_to_model = counts["submitted_to_model"]
+    created = counts["created"]
+    updated = counts["updated"]
+    skipped = counts["skipped"]
+    failed = counts["failed"]
     status = "ok" if failed == 0 else "partial_failed"
     _emit_progress(
         event_callback,
@@ -7353,6 +7642,45 @@ def _build_product_route_mapping_impl(
     )
 
 
+def _generate_product_route_mapping(
+    *,
+    product_id: str,
+    category: str,
+    context: dict[str, Any],
+    fingerprint: str,
+    prompt_version: str | None,
+    event_callback: Callable[[dict[str, Any]], None] | None,
+) -> ProductRouteMappingResult:
+    # 在 worker 线程执行：只做模型调用 + 映射落盘，不碰 DB Session。
+    capability = f"doubao.route_mapping_{category}"
+    ai_result = run_capability_now(
+        capability=capability,
+        input_payload={"product_context_json": json.dumps(context, ensure_ascii=False)},
+        trace_id=product_id,
+        event_callback=event_callback,
+    )
+    profile_doc = {
+        "product_id": product_id,
+        "category": category,
+        "rules_version": str(ai_result.get("rules_version") or MOBILE_RULES_VERSION),
+        "fingerprint": fingerprint,
+        "generated_at": now_iso(),
+        "prompt_key": capability,
+        "prompt_version": prompt_version,
+        "model": str(ai_result.get("model") or "").strip(),
+        "primary_route": ai_result.get("primary_route") or {},
+        "secondary_route": ai_result.get("secondary_route") or {},
+        "route_scores": ai_result.get("route_scores") or [],
+        "evidence": ai_result.get("evidence") or {"positive": [], "counter": []},
+        "confidence_reason": str(ai_result.get("confidence_reason") or "").strip(),
+        "needs_review": bool(ai_result.get("needs_review")),
+        "analysis_text": str(ai_result.get("analysis_text") or "").strip(),
+    }
+    result_item = _to_product_route_mapping_result(doc=profile_doc, storage_path="")
+    storage_path = save_product_route_mapping(category, product_id, profile_doc)
+    return result_item.model_copy(update={"storage_path": storage_path})
+
+
 def _to_product_route_mapping_result(doc: dict[str, Any], storage_path: str) -> ProductRouteMappingResult:
     if not isinstance(doc, dict):
         raise ValueError("route mapping document is not an object.")
@@ -7612,11 +7940,7 @@ def _build_product_analysis_impl(
         },
     )
 
-    submitted_to_model = 0
-    created = 0
-    updated = 0
-    skipped = 0
-    failed = 0
+    counts = {"submitted_to_model": 0, "created": 0, "updated": 0, "skipped": 0, "failed": 0}
     items: list[ProductAnalysisBuildItem] = []
     failures: list[str] = []
 
@@ -7628,14 +7952,29 @@ def _build_product_analysis_impl(
         if should_cancel and should_cancel():
             raise ProductWorkbenchJobCancelledError("job cancelled by operator.")
 
+    # 预检：分析索引与类型映射索引一次性批量加载（后者进入 Session identity map，构建上下文时 db.get 不再查库），
+    # 存储目录一次性列举，成分画像在本次构建内按路径复用，指纹全部在调模型前算好。
+    product_ids = [str(row.id or "").strip() for row in rows]
+    rec_map = _load_product_index_record_map(db=db, model=ProductAnalysisIndex, product_ids=product_ids)
+    _load_product_index_record_map(db=db, model=ProductRouteMappingIndex, product_ids=product_ids)
+    analysis_exists = _storage_json_presence_checker(
+        [f"product_profiles/{cat}" for cat in target_categories]
+    )
+    product_json_exists = _storage_json_presence_checker(
+        ["products", *[f"products/{cat}" for cat in target_categories]]
+    )
+    ingredient_profile_cache: dict[str, IngredientLibraryDetailItem | None] = {}
+
+    plans: list[dict[str, Any]] = []
     for idx, row in enumerate(rows, start=1):
-        check_cancel()
+        if idx % _WORKBENCH_PLAN_CANCEL_CHECK_EVERY == 0:
+            check_cancel()
         product_id = str(row.id or "").strip()
         row_category = str(row.category or "").strip().lower()
         if row_category not in PRODUCT_PROFILE_SUPPORTED_CATEGORIES:
             continue
 
-        rec = db.get(ProductAnalysisIndex, product_id)
+        rec = rec_map.get(product_id)
         storage_path_existing = str(rec.storage_path or "").strip() if rec else ""
         if not storage_path_existing:
             storage_path_existing = product_analysis_rel_path(row_category, product_id)
@@ -7643,102 +7982,131 @@ def _build_product_analysis_impl(
             rec
             and str(rec.status or "").strip().lower() == "ready"
             and str(rec.rules_version or "").strip() == MOBILE_RULES_VERSION
-            and exists_rel_path(storage_path_existing)
+            and analysis_exists(storage_path_existing)
         )
+        plan: dict[str, Any] = {
+            "index": idx,
+            "product_id": product_id,
+            "category": row_category,
+            "rec": rec,
+            "action": "submit",
+        }
+        plans.append(plan)
 
-        if only_unanalyzed and is_ready_existing:
-            skipped += 1
-            items.append(
-                ProductAnalysisBuildItem(
-                    product_id=product_id,
-                    category=row_category,
-                    status="skipped",
-                    route_key=str(rec.route_key or "").strip() or None,
-                    route_title=str(rec.route_title or "").strip() or None,
-                    headline=str(rec.headline or "").strip() or None,
-                    subtype_fit_verdict=str(rec.subtype_fit_verdict or "").strip() or None,
-                    confidence=int(rec.confidence or 0),
-                    needs_review=bool(rec.needs_review),
-                    storage_path=storage_path_existing,
-                    model=rec.model,
-                    error=None,
-                )
-            )
-            _emit_progress(
-                event_callback,
-                {
-                    "step": "product_analysis_skip",
-                    "product_id": product_id,
-                    "category": row_category,
-                    "index": idx,
-                    "total": total,
-                    "text": f"[{idx}/{total}] 跳过（已有分析）：{row_category} / {product_id}",
-                },
+        def mark_skipped(reason: str) -> None:
+            plan["action"] = "skip"
+            plan["skip_reason"] = reason
+            plan["item"] = ProductAnalysisBuildItem(
+                product_id=product_id,
+                category=row_category,
+                status="skipped",
+                route_key=str(rec.route_key or "").strip() or None,
+                route_title=str(rec.route_title or "").strip() or None,
+                headline=str(rec.headline or "").strip() or None,
+                subtype_fit_verdict=str(rec.subtype_fit_verdict or "").strip() or None,
+                confidence=int(rec.confidence or 0),
+                needs_review=bool(rec.needs_review),
+                storage_path=storage_path_existing,
+                model=rec.model,
+                error=None,
             )
+
+        if only_unanalyzed and is_ready_existing:
+            mark_skipped("已有分析")
             continue
 
         try:
-            check_cancel()
-            if not exists_rel_path(row.json_path):
+            if not product_json_exists(row.json_path):
                 raise ValueError(f"product json missing: {row.json_path}")
             doc = load_json(row.json_path)
-            context = _build_product_analysis_context(db=db, row=row, doc=doc)
+            context = _build_product_analysis_context(
+                db=db,
+                row=row,
+                doc=doc,
+                ingredient_profile_cache=ingredient_profile_cache,
+            )
             fingerprint = _build_product_analysis_fingerprint(context)
-        except ProductWorkbenchJobCancelledError:
-            raise
         except Exception as e:
-            failed += 1
-            message = f"{product_id} ({row_category}): invalid product analysis context | {e}"
-            failures.append(message)
-            now = now_iso()
-            rec = _ensure_product_analysis_record(rec=rec, product_id=product_id, category=row_category)
-            rec.rules_version = MOBILE_RULES_VERSION
-            rec.fingerprint = rec.fingerprint or _fallback_product_analysis_fingerprint(row_category, product_id)
-            rec.status = "failed"
-            rec.prompt_key = f"doubao.product_profile_{row_category}"
-            rec.prompt_version = prompt_versions.get(row_category)
-            rec.last_error = str(e)
-            rec.last_generated_at = now
-            db.add(rec)
-            items.append(
-                ProductAnalysisBuildItem(
-                    product_id=product_id,
-                    category=row_category,
-                    status="failed",
-                    error=f"invalid product analysis context: {e}",
-                )
-            )
-            _emit_progress(
-                event_callback,
-                {
-                    "step": "product_analysis_error",
-                    "product_id": product_id,
-                    "category": row_category,
-                    "index": idx,
-                    "total": total,
-                    "text": f"[{idx}/{total}] 失败：{row_category} / {product_id} | {e}",
-                },
-            )
+            plan["action"] = "invalid"
+            plan["error"] = e
             continue
 
         if is_ready_existing and not force_regenerate and str(rec.fingerprint or "").strip() == fingerprint:
-            skipped += 1
-            items.append(
-                ProductAnalysisBuildItem(
-                    product_id=product_id,
-                    category=row_category,
-                    status="skipped",
-                    route_key=str(rec.route_key or "").strip() or None,
-                    route_title=str(rec.route_title or "").strip() or None,
-                    headline=str(rec.headline or "").strip() or None,
-                    subtype_fit_verdict=str(rec.subtype_fit_verdict or "").strip() or None,
-                    confidence=int(rec.confidence or 0),
-                    needs_review=bool(rec.needs_review),
-                    storage_path=storage_path_existing,
-                    model=rec.model,
-                    error=None,
-                )
+            mark_skipped("指纹未变化")
+            continue
+
+        plan["context"] = context
+        plan["fingerprint"] = fingerprint
+
+    planned_model_calls = sum(1 for plan in plans if plan["action"] == "submit")
+    _emit_progress(
+        event_callback,
+        {
+            "step": "product_analysis_plan_done",
+            "planned_model_calls": planned_model_calls,
+            "total": total,
+            "text": f"预检完成：待调用模型 {planned_model_calls} 条，其余跳过或校验失败。",
+        },
+    )
+
+    uncommitted = 0
+
+    def stage_record(rec: Any) -> None:
+        nonlocal uncommitted
+        db.add(rec)
+        uncommitted += 1
+        if uncommitted >= _WORKBENCH_COMMIT_EVERY:
+            db.commit()
+            uncommitted = 0
+
+    def record_failure(plan: dict[str, Any], e: BaseException, *, fingerprint: str | None) -> None:
+        idx = plan["index"]
+        product_id = plan["product_id"]
+        row_category = plan["category"]
+        invalid_context = plan["action"] == "invalid"
+        counts["failed"] += 1
+        if invalid_context:
+            failures.append(f"{product_id} ({row_category}): invalid product analysis context | {e}")
+        else:
+            failures.append(f"{product_id} ({row_category}): {e}")
+        rec = _ensure_product_analysis_record(rec=plan["rec"], product_id=product_id, category=row_category)
+        rec.rules_version = MOBILE_RULES_VERSION
+        rec.fingerprint = fingerprint or rec.fingerprint or _fallback_product_analysis_fingerprint(row_category, product_id)
+        rec.status = "failed"
+        rec.prompt_key = f"doubao.product_profile_{row_category}"
+        rec.prompt_version = prompt_versions.get(row_category)
+        rec.last_error = str(e)
+        rec.last_generated_at = now_iso()
+        stage_record(rec)
+        items.append(
+            ProductAnalysisBuildItem(
+                product_id=product_id,
+                category=row_category,
+                status="failed",
+                error=f"invalid product analysis context: {e}" if invalid_context else str(e),
             )
+        )
+        _emit_progress(
+            event_callback,
+            {
+                "step": "product_analysis_error",
+                "product_id": product_id,
+                "category": row_category,
+                "index": idx,
+                "total": total,
+                "text": f"[{idx}/{total}] 失败：{row_category} / {product_id} | {e}",
+            },
+        )
+
+    def finish(result: OrderedTaskResult) -> None:
+        plan = result.tag
+        idx = plan["index"]
+        product_id = plan["product_id"]
+        row_category = plan["category"]
+
+        if plan["action"] == "skip":
+            counts["skipped"] += 1
+            items.append(plan["item"])
             _emit_progress(
                 event_callback,
                 {
@@ -7747,153 +8115,143 @@ def _build_product_analysis_impl(
                     "category": row_category,
                     "index": idx,
                     "total": total,
-                    "text": f"[{idx}/{total}] 跳过（指纹未变化）：{row_category} / {product_id}",
+                    "text": f"[{idx}/{total}] 跳过（{plan['skip_reason']}）：{row_category} / {product_id}",
                 },
             )
-            continue
+            return
 
-        submitted_to_model += 1
+        if plan["action"] == "invalid":
+            record_failure(plan, plan["error"], fingerprint=None)
+            return
+
+        if result.error is not None:
+            record_failure(plan, result.error, fingerprint=plan["fingerprint"])
+            return
+
+        record: ProductAnalysisStoredResult = result.value
+        storage_path = str(record.storage_path)
+        status = "updated" if plan["rec"] is not None else "created"
+        counts[status] += 1
+
+        rec = _ensure_product_analysis_record(rec=plan["rec"], product_id=product_id, category=row_category)
+        rec.rules_version = record.rules_version
+        rec.fingerprint = record.fingerprint
+        rec.status = "ready"
+        rec.storage_path = storage_path
+        rec.route_key = record.profile.route_key
+        rec.route_title = record.profile.route_title
+        rec.headline = record.profile.headline
+        rec.subtype_fit_verdict = record.profile.subtype_fit_verdict
+        rec.confidence = int(record.profile.confidence)
+        rec.needs_review = bool(record.profile.needs_review)
+        rec.schema_version = record.profile.schema_version
+        rec.prompt_key = record.prompt_key
+        rec.prompt_version = record.prompt_version
+        rec.model = record.model
+        rec.last_generated_at = record.generated_at
+        rec.last_error = None
+        stage_record(rec)
+
+        items.append(
+            ProductAnalysisBuildItem(
+                product_id=product_id,
+                category=row_category,
+                status=status,
+                route_key=record.profile.route_key,
+                route_title=record.profile.route_title,
+                headline=record.profile.headline,
+                subtype_fit_verdict=record.profile.subtype_fit_verdict,
+                confidence=int(record.profile.confidence),
+                needs_review=bool(record.profile.needs_review),
+                storage_path=storage_path,
+                model=record.model,
+                error=None,
+            )
+        )
         _emit_progress(
             event_callback,
             {
-                "step": "product_analysis_start",
+                "step": "product_analysis_done",
                 "product_id": product_id,
                 "category": row_category,
                 "index": idx,
                 "total": total,
-                "text": f"[{idx}/{total}] 开始分析：{row_category} / {product_id}",
+                "status": status,
+                "text": f"[{idx}/{total}] 完成：{row_category} / {product_id}（{status}）",
             },
         )
 
-        capability = f"doubao.product_profile_{row_category}"
-        prompt_key = capability
-        prompt_version = prompt_versions[row_category]
-        try:
-            check_cancel()
-            ai_result = run_capability_now(
-                capability=capability,
-                input_payload={"product_analysis_context_json": json.dumps(context, ensure_ascii=False)},
-                trace_id=product_id,
-                event_callback=lambda event, _pid=product_id, _cat=row_category: _forward_product_analysis_model_event(
-                    event_callback=event_callback,
-                    product_id=_pid,
-                    category=_cat,
-                    payload=event,
-                ),
-            )
+    # 模型调用在有界线程池里并发；DB 写入（按批 commit）与进度事件仍在当前线程、按 index 顺序产生。
+    with OrderedTaskPool(_product_workbench_model_worker_count(), thread_name_prefix="product-analysis") as pool:
+        for plan in plans:
+            for result in pool.ready():
+                finish(result)
+            while pool.full:
+                finish(pool.next_result())
+
+            if should_cancel and should_cancel():
+                for result in pool.cancel_pending():
+                    finish(result)
+                # 已完成的模型结果先落库，取消后重跑时可按指纹直接跳过。
+                db.commit()
+                raise ProductWorkbenchJobCancelledError(
+                    "job cancelled by operator.",
+                    result=ProductAnalysisBuildResponse(
+                        status="cancelled",
+                        scanned_products=scanned_products,
+                        items=items,
+                        failures=failures[:200],
+                        **counts,
+                    ).model_dump(),
+                )
 
-            generated_at = now_iso()
-            profile_payload = {
-                key: value
-                for key, value in ai_result.items()
-                if key not in {"model", "artifact"}
-            }
-            profile_doc = {
-                "product_id": product_id,
-                "category": row_category,
-                "rules_version": MOBILE_RULES_VERSION,
-                "fingerprint": fingerprint,
-                "generated_at": generated_at,
-                "prompt_key": prompt_key,
-                "prompt_version": prompt_version,
-                "model": str(ai_result.get("model") or "").strip(),
-                "profile": profile_payload,
-            }
-            record = _to_product_analysis_record(doc=profile_doc, storage_path="")
-            storage_path = save_product_analysis(row_category, product_id, profile_doc)
-            record = record.model_copy(update={"storage_path": storage_path})
-
-            existed_before = rec is not None
-            status = "updated" if existed_before else "created"
-            if status == "updated":
-                updated += 1
-            else:
-                created += 1
-
-            rec = _ensure_product_analysis_record(rec=rec, product_id=product_id, category=row_category)
-            rec.rules_version = record.rules_version
-            rec.fingerprint = record.fingerprint
-            rec.status = "ready"
-            rec.storage_path = storage_path
-            rec.route_key = record.profile.route_key
-            rec.route_title = record.profile.route_title
-            rec.headline = record.profile.headline
-            rec.subtype_fit_verdict = record.profile.subtype_fit_verdict
-            rec.confidence = int(record.profile.confidence)
-            rec.needs_review = bool(record.profile.needs_review)
-            rec.schema_version = record.profile.schema_version
-            rec.prompt_key = record.prompt_key
-            rec.prompt_version = record.prompt_version
-            rec.model = record.model
-            rec.last_generated_at = record.generated_at
-            rec.last_error = None
-            db.add(rec)
+            if plan["action"] != "submit":
+                pool.push_ready(plan)
+                continue
 
-            items.append(
-                ProductAnalysisBuildItem(
-                    product_id=product_id,
-                    category=row_category,
-                    status=status,
-                    route_key=record.profile.route_key,
-                    route_title=record.profile.route_title,
-                    headline=record.profile.headline,
-                    subtype_fit_verdict=record.profile.subtype_fit_verdict,
-                    confidence=int(record.profile.confidence),
-                    needs_review=bool(record.profile.needs_review),
-                    storage_path=storage_path,
-                    model=record.model,
-                    error=None,
-                )
-            )
+            idx = plan["index"]
+            product_id = plan["product_id"]
+            row_category = plan["category"]
+            counts["submitted_to_model"] += 1
             _emit_progress(
                 event_callback,
                 {
-                    "step": "product_analysis_done",
+                    "step": "product_analysis_start",
                     "product_id": product_id,
                     "category": row_category,
                     "index": idx,
                     "total": total,
-                    "status": status,
-                    "text": f"[{idx}/{total}] 完成：{row_category} / {product_id}（{status}）",
+                    "text": f"[{idx}/{total}] 开始分析：{row_category} / {product_id}",
                 },
             )
-        except ProductWorkbenchJobCancelledError:
-            raise
-        except Exception as e:
-            failed += 1
-            message = f"{product_id} ({row_category}): {e}"
-            failures.append(message)
-            rec = _ensure_product_analysis_record(rec=rec, product_id=product_id, category=row_category)
-            rec.rules_version = MOBILE_RULES_VERSION
-            rec.fingerprint = fingerprint or _fallback_product_analysis_fingerprint(row_category, product_id)
-            rec.status = "failed"
-            rec.prompt_key = prompt_key
-            rec.prompt_version = prompt_version
-            rec.last_error = str(e)
-            rec.last_generated_at = now_iso()
-            db.add(rec)
-            items.append(
-                ProductAnalysisBuildItem(
-                    product_id=product_id,
-                    category=row_category,
-                    status="failed",
-                    error=str(e),
-                )
-            )
-            _emit_progress(
-                event_callback,
-                {
-                    "step": "product_analysis_error",
-                    "product_id": product_id,
-                    "category": row_category,
-                    "index": idx,
-                    "total": total,
-                    "text": f"[{idx}/{total}] 失败：{row_category} / {product_id} | {e}",
-                },
+            pool.submit(
+                plan,
+                _generate_product_analysis,
+                product_id=product_id,
+                category=row_category,
+                context=plan["context"],
+                fingerprint=plan["fingerprint"],
+                prompt_version=prompt_versions[row_category],
+                event_callback=pool.relay(
+                    lambda event, _pid=product_id, _cat=row_category: _forward_product_analysis_model_event(
+                        event_callback=event_callback,
+                        product_id=_pid,
+                        category=_cat,
+                        payload=event,
+                    )
+                ),
             )
 
+        for result in pool.drain():
+            finish(result)
+
     db.commit()
 
+    submitted_to_model = counts["submitted_to_model"]
+    created = counts["created"]
+    updated = counts["updated"]
+    skipped = counts["skipped"]
+    failed = counts["failed"]
     status = "ok" if failed == 0 else "partial_failed"
     _emit_progress(
         event_callback,
@@ -7947,6 +8305,39 @@ def _build_mobile_selection_results_impl(
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
+def _generate_product_analysis(
+    *,
+    product_id: str,
+    category: str,
+    context: dict[str, Any],
+    fingerprint: str,
+    prompt_version: str | None,
+    event_callback: Callable[[dict[str, Any]], None] | None,
+) -> ProductAnalysisStoredResult:
+    # 在 worker 线程执行：只做模型调用 + 分析落盘，不碰 DB Session。
+    capability = f"doubao.product_profile_{category}"
+    ai_result = run_capability_now(
+        capability=capability,
+        input_payload={"product_analysis_context_json": json.dumps(context, ensure_ascii=False)},
+        trace_id=product_id,
+        event_callback=event_callback,
+    )
+    profile_doc = {
+        "product_id": product_id,
+        "category": category,
+        "rules_version": MOBILE_RULES_VERSION,
+        "fingerprint": fingerprint,
+        "generated_at": now_iso(),
+        "prompt_key": capability,
+        "prompt_version": prompt_version,
+        "model": str(ai_result.get("model") or "").strip(),
+        "profile": {key: value for key, value in ai_result.items() if key not in {"model", "artifact"}},
+    }
+    record = _to_product_analysis_record(doc=profile_doc, storage_path="")
+    storage_path = save_product_analysis(category, product_id, profile_doc)
+    return record.model_copy(update={"storage_path": storage_path})
+
+
 def _to_product_analysis_record(doc: dict[str, Any], storage_path: str) -> ProductAnalysisStoredResult:
     if not isinstance(doc, dict):
         raise ValueError("product analysis document is not an object.")
@@ -8036,7 +8427,13 @@ def _fallback_product_analysis_fingerprint(category: str, product_id: str) -> st
     return hashlib.sha1(raw.encode("utf-8")).hexdigest()
 
 
-def _build_product_analysis_context(*, db: Session, row: ProductIndex, doc: dict[str, Any]) -> dict[str, Any]:
+def _build_product_analysis_context(
+    *,
+    db: Session,
+    row: ProductIndex,
+    doc: dict[str, Any],
+    ingredient_profile_cache: dict[str, IngredientLibraryDetailItem | None] | None = None,
+) -> dict[str, Any]:
     product_context = _build_route_mapping_product_context(row=row, doc=doc)
     category = str(product_context.get("category") or "").strip().lower()
     if category not in PRODUCT_PROFILE_SUPPORTED_CATEGORIES:
@@ -8047,7 +8444,12 @@ def _build_product_analysis_context(*, db: Session, row: ProductIndex, doc: dict
     if not isinstance(ingredients, list):
         raise ValueError("product analysis ingredients missing.")
 
-    matched_profiles = _match_ingredient_profiles_for_analysis(db=db, category=category, ingredients=ingredients)
+    matched_profiles = _match_ingredient_profiles_for_analysis(
+        db=db,
+        category=category,
+        ingredients=ingredients,
+        profile_cache=ingredient_profile_cache,
+    )
     context = {
         "product": {
             "product_id": str(row.id),
@@ -8123,6 +8525,7 @@ def _match_ingredient_profiles_for_analysis(
     db: Session,
     category: str,
     ingredients: list[dict[str, Any]],
+    profile_cache: dict[str, IngredientLibraryDetailItem | None] | None = None,
 ) -> dict[int, IngredientLibraryDetailItem]:
     alias_keys_by_rank: dict[int, list[str]] = {}
     alias_key_set: set[str] = set()
@@ -8152,45 +8555,40 @@ def _match_ingredient_profiles_for_analysis(
     if not alias_key_set:
         return {}
 
-    alias_rows = db.execute(
-        select(IngredientLibraryAlias)
-        .where(IngredientLibraryAlias.category == category)
-        .where(IngredientLibraryAlias.alias_key.in_(sorted(alias_key_set)))
-    ).scalars().all()
-    alias_map = {str(row.alias_key): str(row.ingredient_id or "").strip().lower() for row in alias_rows}
-
-    target_ids: list[str] = []
-    for keys in alias_keys_by_rank.values():
+    alias_map = load_ingredient_alias_map(db, category)
+    resolved_by_rank: dict[int, str] = {}
+    for rank, keys in alias_keys_by_rank.items():
         for key in keys:
-            ingredient_id = alias_map.get(key)
-            if ingredient_id:
-                target_ids.append(_resolve_ingredient_id_redirect(db=db, category=category, ingredient_id=ingredient_id))
+            target = alias_map.lookup(key)
+            if target is not None:
+                resolved_by_rank[rank] = alias_map.canonical_id(target.ingredient_id)
                 break
-    if not target_ids:
+    if not resolved_by_rank:
         return {}
 
-    index_map = _load_ingredient_index_map(db, target_ids)
+    index_map = _load_ingredient_index_map(db, sorted(set(resolved_by_rank.values())))
     out: dict[int, IngredientLibraryDetailItem] = {}
-    for rank, keys in alias_keys_by_rank.items():
-        resolved_id = ""
-        for key in keys:
-            ingredient_id = alias_map.get(key)
-            if ingredient_id:
-                resolved_id = _resolve_ingredient_id_redirect(db=db, category=category, ingredient_id=ingredient_id)
-                break
-        if not resolved_id:
-            continue
+    for rank, resolved_id in resolved_by_rank.items():
         rec = index_map.get(resolved_id)
         if rec is None:
             continue
         rel_path = str(rec.storage_path or "").strip() or ingredient_profile_rel_path(category, resolved_id)
-        if not exists_rel_path(rel_path):
-            continue
-        try:
-            doc = _load_ingredient_profile_doc(rel_path=rel_path)
-            out[rank] = _to_ingredient_library_detail_item(doc=doc, rel_path=rel_path)
-        except Exception:
+        if profile_cache is not None and rel_path in profile_cache:
+            cached = profile_cache[rel_path]
+            if cached is not None:
+                out[rank] = cached
             continue
+        detail: IngredientLibraryDetailItem | None = None
+        if exists_rel_path(rel_path):
+            try:
+                doc = _load_ingredient_profile_doc(rel_path=rel_path)
+                detail = _to_ingredient_library_detail_item(doc=doc, rel_path=rel_path)
+            except Exception:
+                detail = None
+        if profile_cache is not None:
+            profile_cache[rel_path] = detail
+        if detail is not None:
+            out[rank] = detail
     return out
 
 
@@ -9207,6 +9605,278 @@ def _collect_category_ingredient_records(
     return records
 
 
+def _collect_category_ingredients_incremental(
+    *,
+    db: Session,
+    rows: list[ProductIndex],
+    category: str,
+    max_sources_per_ingredient: int,
+    normalization_packages: list[str] | None = None,
+    mode: str = "incremental",
+) -> tuple[dict[str, dict[str, Any]], dict[str, Any]]:
+    """
+    增量聚合：产品成分条目持久化在 ingredient_product_contributions，只重新解析 JSON 指纹变化的产品；
+    聚合结果按“受影响成分”局部重算（变化产品新旧条目涉及的成分），其余成分读 ingredient_aggregates 上一次的结果。
+    聚合状态与贡献表在调用方的同一事务里更新（不提交）。
+    mode=full 忽略已有状态全量重算并整体覆盖；mode=verify 在增量结果之外再做一次全量重算并要求完全一致。
+    """
+    if mode not in INGREDIENT_AGGREGATION_MODES:
+        raise HTTPException(status_code=400, detail=f"Invalid aggregation_mode: {mode}.")
+    selected_packages = _normalize_ingredient_normalization_packages(normalization_packages)
+    max_sources = max(1, min(30, int(max_sources_per_ingredient)))
+    records, contribution_stats = _load_ingredient_contribution_records(
+        db=db,
+        rows=rows,
+        category=category,
+        force_reparse=mode == "full",
+    )
+    scope_key = f"{category or '*'}|{','.join(selected_packages)}|{max_sources}"
+    members = {
+        str(rec.product_id): rec
+        for rec in db.execute(
+            select(IngredientAggregateMember).where(IngredientAggregateMember.scope_key == scope_key)
+        ).scalars()
+    }
+    stored = {
+        str(rec.ingredient_key): rec
+        for rec in db.execute(select(IngredientAggregate).where(IngredientAggregate.scope_key == scope_key)).scalars()
+    }
+
+    tokens = {str(record["product_id"]): str(record.pop("_token")) for record in records}
+    record_keys: dict[str, tuple[frozenset[str], frozenset[str]]] = {}
+    affected: set[str] = set()
+    if mode != "full":
+        for product_id, member in members.items():
+            if tokens.get(product_id) == member.token:
+                record_keys[product_id] = (
+                    frozenset(json.loads(member.raw_keys_json or "[]")),
+                    frozenset(json.loads(member.group_keys_json or "[]")),
+                )
+            else:
+                affected |= set(json.loads(member.group_keys_json or "[]"))
+    for record in records:
+        product_id = str(record["product_id"])
+        if product_id not in record_keys:
+            record_keys[product_id] = _ingredient_record_keys(record, selected_packages)
+            affected |= record_keys[product_id][1]
+    if mode == "full":
+        affected |= set(stored)
+
+    grouped = {key: _load_ingredient_aggregate(rec.aggregate_json) for key, rec in stored.items() if key not in affected}
+    if affected:
+        subset = [record for record in records if record_keys[str(record["product_id"])][1] & affected]
+        partial, _ = _aggregate_category_ingredients(
+            records=subset,
+            max_sources_per_ingredient=max_sources,
+            normalization_packages=selected_packages,
+        )
+        for key in affected:
+            if key in partial:
+                grouped[key] = partial[key]
+    _persist_ingredient_aggregate_delta(
+        db=db,
+        scope_key=scope_key,
+        grouped=grouped,
+        affected=affected,
+        stored=stored,
+        members=members,
+        tokens=tokens,
+        record_keys=record_keys,
+    )
+
+    raw_keys: set[str] = set()
+    for keys in record_keys.values():
+        raw_keys |= keys[0]
+    meta = {
+        "scanned_products": len(records),
+        "total_mentions": sum(len(record["items"]) for record in records),
+        "raw_unique_ingredients": len(raw_keys),
+        "unique_ingredients": len(grouped),
+        "normalization_packages": selected_packages,
+    }
+
+    if mode == "verify":
+        full_grouped, full_meta = _aggregate_category_ingredients(
+            records=_collect_category_ingredient_records(rows=rows),
+            max_sources_per_ingredient=max_sources,
+            normalization_packages=selected_packages,
+        )
+        _assert_same_ingredient_aggregate(grouped=grouped, meta=meta, expected=full_grouped, expected_meta=full_meta)
+
+    return grouped, {
+        **meta,
+        "aggregation": {
+            "mode": mode,
+            **contribution_stats,
+            "affected_ingredients": len(affected),
+            "verified": mode == "verify",
+        },
+    }
+
+
+def _persist_ingredient_aggregate_delta(
+    *,
+    db: Session,
+    scope_key: str,
+    grouped: dict[str, dict[str, Any]],
+    affected: set[str],
+    stored: dict[str, IngredientAggregate],
+    members: dict[str, IngredientAggregateMember],
+    tokens: dict[str, str],
+    record_keys: dict[str, tuple[frozenset[str], frozenset[str]]],
+) -> None:
+    updated_at = now_iso()
+    for key in affected:
+        rec = stored.get(key)
+        if key not in grouped:
+            if rec is not None:
+                db.delete(rec)
+            continue
+        if rec is None:
+            rec = IngredientAggregate(scope_key=scope_key, ingredient_key=key)
+        rec.aggregate_json = _dump_ingredient_aggregate(grouped[key])
+        rec.updated_at = updated_at
+        db.add(rec)
+    for product_id, member in members.items():
+        if product_id not in tokens:
+            db.delete(member)
+    for product_id, token in tokens.items():
+        member = members.get(product_id)
+        if member is not None and member.token == token:
+            continue
+        if member is None:
+            member = IngredientAggregateMember(scope_key=scope_key, product_id=product_id)
+        raw_keys, group_keys = record_keys[product_id]
+        member.token = token
+        member.raw_keys_json = json.dumps(sorted(raw_keys), ensure_ascii=False)
+        member.group_keys_json = json.dumps(sorted(group_keys), ensure_ascii=False)
+        member.updated_at = updated_at
+        db.add(member)
+
+
+def _dump_ingredient_aggregate(item: dict[str, Any]) -> str:
+    payload = {**item, "source_trace_ids": sorted(item.get("source_trace_ids") or [])}
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+
+
+def _load_ingredient_aggregate(raw: str) -> dict[str, Any]:
+    # 每次都从 JSON 解出新对象：调用方可以随意修改，不会污染已持久化的状态
+    item = json.loads(raw)
+    item["source_trace_ids"] = set(item.get("source_trace_ids") or [])
+    return item
+
+
+def _load_ingredient_contribution_records(
+    *,
+    db: Session,
+    rows: list[ProductIndex],
+    category: str,
+    force_reparse: bool,
+) -> tuple[list[dict[str, Any]], dict[str, int]]:
+    stmt = select(IngredientProductContribution)
+    if category:
+        stmt = stmt.where(IngredientProductContribution.category == category)
+    existing = {str(rec.product_id): rec for rec in db.execute(stmt).scalars().all()}
+
+    records: list[dict[str, Any]] = []
+    reparsed = 0
+    reused = 0
+    seen: set[str] = set()
+    for row in rows:
+        product_id = str(row.id or "").strip()
+        json_path = str(row.json_path or "").strip()
+        seen.add(product_id)
+        fingerprint = rel_path_fingerprint(json_path)
+        contribution = existing.get(product_id)
+        if (
+            not force_reparse
+            and contribution is not None
+            and fingerprint
+            and contribution.doc_fingerprint == fingerprint
+            and contribution.json_path == json_path
+        ):
+            record_category = str(contribution.category)
+            items = json.loads(contribution.items_json or "[]")
+            reused += 1
+        else:
+            parsed = _collect_category_ingredient_records(rows=[row])[0]
+            record_category = str(parsed["category"])
+            items = parsed["items"]
+            if contribution is None:
+                contribution = db.get(IngredientProductContribution, product_id) or IngredientProductContribution(
+                    product_id=product_id
+                )
+            contribution.category = record_category
+            contribution.json_path = json_path
+            contribution.doc_fingerprint = fingerprint
+            contribution.items_json = json.dumps(items, ensure_ascii=False, separators=(",", ":"))
+            contribution.updated_at = now_iso()
+            db.add(contribution)
+            reparsed += 1
+        brand = str(row.brand or "").strip()
+        name = str(row.name or "").strip()
+        one_sentence = str(row.one_sentence or "").strip()
+        records.append(
+            {
+                "product_id": product_id,
+                "category": record_category,
+                "brand": brand,
+                "name": name,
+                "one_sentence": one_sentence,
+                "items": items,
+                # 样本顺序取决于 created_at，样本内容取决于品牌/名称：任一变化都视为该产品贡献变化。
+                "_token": "|".join([fingerprint, json_path, str(row.created_at or ""), brand, name, one_sentence]),
+            }
+        )
+
+    removed = 0
+    for product_id, contribution in existing.items():
+        if product_id not in seen:
+            db.delete(contribution)
+            removed += 1
+    return records, {"reparsed_products": reparsed, "reused_products": reused, "removed_products": removed}
+
+
+def _ingredient_record_keys(record: dict[str, Any], normalization_packages: list[str]) -> tuple[frozenset[str], frozenset[str]]:
+    category = str(record["category"])
+    raw_keys: set[str] = set()
+    group_keys: set[str] = set()
+    for parsed in record["items"]:
+        ingredient_key_base = str(parsed["ingredient_key_base"])
+        raw_keys.add(f"{category}::{ingredient_key_base}")
+        ingredient_key = _resolve_ingredient_key(
+            ingredient_key_base=ingredient_key_base,
+            ingredient_name_en_key_field=str(parsed.get("ingredient_name_en_key_field") or ""),
+            ingredient_name_en_key_paren=str(parsed.get("ingredient_name_en_key_paren") or ""),
+            normalization_packages=normalization_packages,
+        )
+        group_keys.add(f"{category}::{ingredient_key}")
+    return frozenset(raw_keys), frozenset(group_keys)
+
+
+def _assert_same_ingredient_aggregate(
+    *,
+    grouped: dict[str, dict[str, Any]],
+    meta: dict[str, Any],
+    expected: dict[str, dict[str, Any]],
+    expected_meta: dict[str, Any],
+) -> None:
+    mismatched = sorted(
+        key for key in set(grouped) | set(expected) if grouped.get(key) != expected.get(key)
+    )
+    meta_fields = ("scanned_products", "total_mentions", "raw_unique_ingredients", "unique_ingredients")
+    meta_mismatch = [field for field in meta_fields if meta.get(field) != expected_meta.get(field)]
+    if mismatched or meta_mismatch:
+        preview = ", ".join(mismatched[:10])
+        raise HTTPException(
+            status_code=500,
+            detail=(
+                "[stage=ingredient_aggregate_verify] incremental aggregate differs from full recompute: "
+                f"ingredients={len(mismatched)} [{preview}] meta={meta_mismatch}"
+            ),
+        )
+
+
 def _aggregate_category_ingredients(
     *,
     records: list[dict[str, Any]],
@@ -10204,40 +10874,23 @@ def _resolve_ingredient_id_redirect(
 
 
 def _ensure_ingredient_index_table(db: Session) -> None:
-    bind = db.get_bind()
-    IngredientLibraryIndex.__table__.create(bind=bind, checkfirst=True)
+    ensure_runtime_schema(db.get_bind())
 
 
 def _ensure_ingredient_alias_tables(db: Session) -> None:
-    bind = db.get_bind()
-    IngredientLibraryAlias.__table__.create(bind=bind, checkfirst=True)
-    IngredientLibraryRedirect.__table__.create(bind=bind, checkfirst=True)
+    ensure_runtime_schema(db.get_bind())
 
 
 def _ensure_ingredient_build_job_table(db: Session) -> None:
-    bind = db.get_bind()
-    IngredientLibraryBuildJob.__table__.create(bind=bind, checkfirst=True)
-    inspector = inspect(bind)
-    columns = {item["name"] for item in inspector.get_columns("ingredient_library_build_jobs")}
-    statements: list[str] = []
-    if "normalization_packages_json" not in columns:
-        statements.append("ALTER TABLE ingredient_library_build_jobs ADD COLUMN normalization_packages_json TEXT NOT NULL DEFAULT '[]'")
-    if "live_text_json" not in columns:
-        statements.append("ALTER TABLE ingredient_library_build_jobs ADD COLUMN live_text_json TEXT")
-    if statements:
-        with bind.begin() as conn:
-            for stmt in statements:
-                conn.execute(text(stmt))
+    ensure_runtime_schema(db.get_bind())
 
 
 def _ensure_product_route_mapping_index_table(db: Session) -> None:
-    bind = db.get_bind()
-    ProductRouteMappingIndex.__table__.create(bind=bind, checkfirst=True)
+    ensure_runtime_schema(db.get_bind())
 
 
 def _ensure_product_analysis_index_table(db: Session) -> None:
-    bind = db.get_bind()
-    ProductAnalysisIndex.__table__.create(bind=bind, checkfirst=True)
+    ensure_runtime_schema(db.get_bind())
 
 
 def _load_ingredient_index_map(db: Session, ingredient_ids: list[str]) -> dict[str, IngredientLibraryIndex]:
@@ -10300,8 +10953,35 @@ def _upsert_ingredient_index_from_scan(
     return rec
 
 
-def _backfill_ingredient_index_from_storage(db: Session, category: str | None) -> int:
-    rel_paths = _iter_ingredient_profile_rel_paths(category=category)
+def _unindexed_ingredient_profile_rel_paths(db: Session, rel_paths: list[str]) -> list[str]:
+    if not rel_paths:
+        return []
+    indexed: set[str] = set()
+    chunk_size = 500
+    for idx in range(0, len(rel_paths), chunk_size):
+        chunk = rel_paths[idx : idx + chunk_size]
+        indexed.update(
+            str(path)
+            for path in db.execute(
+                select(IngredientLibraryIndex.storage_path).where(
+                    IngredientLibraryIndex.storage_path.in_(chunk),
+                    IngredientLibraryIndex.status == "ready",
+                    IngredientLibraryIndex.source_signature.is_not(None),
+                )
+            ).scalars()
+        )
+    return [rel_path for rel_path in rel_paths if rel_path not in indexed]
+
+
+def _backfill_ingredient_index_from_storage(
+    db: Session,
+    category: str | None,
+    rel_paths: list[str] | None = None,
+) -> int:
+    if rel_paths is None:
+        rel_paths = _iter_ingredient_profile_rel_paths(category=category)
+    # 已由构建写入索引（ready + 签名齐全 + 路径一致）的画像无需再读 JSON 回填。
+    rel_paths = _unindexed_ingredient_profile_rel_paths(db=db, rel_paths=rel_paths)
     if not rel_paths:
         return 0
 
@@ -10345,6 +11025,7 @@ def _backfill_ingredient_index_from_storage(db: Session, category: str | None) -
         )
         rec.status = "ready"
         rec.storage_path = rel_path
+        rec.source_signature = str(generator.get("source_signature") or "").strip() or None
         rec.model = model
         rec.last_generated_at = generated_at
         rec.last_error = None
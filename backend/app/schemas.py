@@ -228,6 +228,8 @@ class IngredientLibraryBuildRequest(BaseModel):
     force_regenerate: bool = False
     max_sources_per_ingredient: int = Field(default=8, ge=1, le=30)
     normalization_packages: List[str] = []
+    # incremental：只重新解析变化的产品；full：全量重算；verify：增量结果需与全量重算完全一致
+    aggregation_mode: Literal["incremental", "full", "verify"] = "incremental"
 
 
 class IngredientLibraryNormalizationPackage(BaseModel):
@@ -305,6 +307,9 @@ class IngredientLibraryBuildResponse(BaseModel):
     scanned_products: int = 0
     unique_ingredients: int = 0
     backfilled_from_storage: int = 0
+    aggregation_mode: str = "incremental"
+    reparsed_products: int = 0
+    affected_ingredients: int = 0
     submitted_to_model: int = 0
     created: int = 0
     updated: int = 0
@@ -1000,15 +1005,36 @@ class AIRunView(BaseModel):
     prompt_key: Optional[str] = None
     prompt_version: Optional[str] = None
     model: Optional[str] = None
-    request: dict[str, Any]
+    # 列表默认不带载荷（include_payloads=true 或 GET /api/ai/runs/{run_id} 时才返回）
+    request: Optional[dict[str, Any]] = None
     response: Optional[dict[str, Any]] = None
     latency_ms: Optional[int] = None
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+    cached_tokens: Optional[int] = None
+    estimated_cost: Optional[float] = None
     error_code: Optional[str] = None
     error_http_status: Optional[int] = None
     error_message: Optional[str] = None
     created_at: str
 
 
+class AIMetricsBreakdownItem(BaseModel):
+    key: Optional[str] = None
+    total_runs: int
+    succeeded_runs: int
+    failed_runs: int
+    avg_latency_ms: Optional[float] = None
+    p95_latency_ms: Optional[int] = None
+    total_estimated_cost: float
+    avg_task_cost: Optional[float] = None
+    priced_runs: int
+    cost_coverage_rate: float
+    total_input_tokens: int = 0
+    total_output_tokens: int = 0
+    total_cached_tokens: int = 0
+
+
 class AIMetricsSummaryView(BaseModel):
     capability: Optional[str] = None
     since_hours: int
@@ -1035,6 +1061,13 @@ class AIMetricsSummaryView(BaseModel):
     priced_runs: int
     cost_coverage_rate: float
 
+    total_input_tokens: int = 0
+    total_output_tokens: int = 0
+    total_cached_tokens: int = 0
+
+    breakdown_by: Optional[Literal["capability", "model"]] = None
+    breakdown: list[AIMetricsBreakdownItem] = Field(default_factory=list)
+
 
 class MobileSelectionResolveRequest(BaseModel):
     category: str
@@ -0,0 +1,80 @@
+import argparse
+import json
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from app.ai.orchestrator import _apply_run_usage
+from app.ai.run_payloads import load_run_payload_texts
+from app.db.init_db import init_db
+from app.db.models import AIRun
+from app.db.session import SessionLocal
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Backfill ai_runs typed usage/cost columns from response_json for runs written before they existed."
+    )
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows per commit batch.")
+    parser.add_argument("--limit", type=int, default=0, help="Maximum rows to backfill (0 = no limit).")
+    parser.add_argument("--dry-run", action="store_true", help="Scan and report without writing DB.")
+    return parser.parse_args()
+
+
+def backfill_ai_run_usage(db: Session, *, batch_size: int = 500, limit: int = 0, dry_run: bool = False) -> dict[str, int]:
+    batch_size = max(1, int(batch_size))
+    limit = max(0, int(limit))
+    scanned = 0
+    updated = 0
+    priced = 0
+    last_id = ""
+    while not limit or scanned < limit:
+        size = batch_size if not limit else min(batch_size, limit - scanned)
+        runs = list(
+            db.execute(
+                select(AIRun)
+                .where(
+                    AIRun.id > last_id,
+                    AIRun.status == "succeeded",
+                    or_(AIRun.response_json.is_not(None), AIRun.response_digest.is_not(None)),
+                    AIRun.input_tokens.is_(None),
+                    AIRun.estimated_cost.is_(None),
+                )
+                .order_by(AIRun.id.asc())
+                .limit(size)
+            ).scalars().all()
+        )
+        if not runs:
+            break
+        # 行外存储的响应（response_digest）内联列是空串：整批一次从 blob 表取回正文
+        payloads = load_run_payload_texts(db, runs)
+        for run in runs:
+            scanned += 1
+            last_id = run.id
+            try:
+                payload = json.loads(payloads[run.id][1] or "")
+            except json.JSONDecodeError:
+                payload = None
+            _apply_run_usage(run, payload)
+            if run.input_tokens is None and run.estimated_cost is None:
+                continue
+            updated += 1
+            if run.estimated_cost is not None:
+                priced += 1
+        if dry_run:
+            db.rollback()
+        else:
+            db.commit()
+    return {"scanned": scanned, "updated": updated, "priced": priced}
+
+
+def main() -> None:
+    args = parse_args()
+    init_db()
+    with SessionLocal() as db:
+        report = backfill_ai_run_usage(db, batch_size=args.batch_size, limit=args.limit, dry_run=args.dry_run)
+    print(json.dumps({"status": "ok", "dry_run": bool(args.dry_run), **report}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import argparse
+import json
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.ai.orchestrator import (
+    AIOrchestrator,
+    _estimate_run_cost,
+    _is_timeout_failure,
+    _load_model_costs,
+    _load_model_token_pricing,
+)
+from app.ai.run_payloads import load_run_payload_texts
+from app.db.models import AIJob, AIRun, Base
+from app.settings import settings
+
+CAPABILITIES = ("doubao.ingredient_enrich", "doubao.mobile_compare_summary", "doubao.route_mapping_shampoo", "doubao.stage2_struct")
+MODELS = ("doubao-seed-2-0-mini-260215", "doubao-seed-2-0-pro-260215")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmark /api/ai/metrics/summary: legacy load-all Python aggregation vs SQL aggregation."
+    )
+    parser.add_argument("--runs", type=int, default=200_000, help="AI runs (and jobs) inside the window.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed repetitions per variant.")
+    parser.add_argument("--skip-legacy", action="store_true", help="Skip the legacy path (slow at 1M rows).")
+    return parser.parse_args()
+
+
+def _legacy_summary(db, window_start: str) -> dict[str, Any]:
+    # 旧实现：窗口内 job/run 全量加载为 ORM 对象，再逐条反序列化 response_json 估算成本。
+    jobs = list(db.execute(select(AIJob).where(AIJob.created_at >= window_start)).scalars().all())
+    runs = list(db.execute(select(AIRun).where(AIRun.created_at >= window_start)).scalars().all())
+    timeout_failures = sum(1 for j in jobs if _is_timeout_failure(j.error_code, j.error_message))
+    latencies = sorted(int(r.latency_ms) for r in runs if isinstance(r.latency_ms, int))
+    pricing = _load_model_token_pricing()
+    costs = _load_model_costs()
+    payloads = load_run_payload_texts(db, runs)
+    estimated = [
+        _estimate_run_cost(r, model_token_pricing=pricing, model_costs=costs, response_text=payloads[r.id][1]) for r in runs
+    ]
+    return {
+        "total_jobs": len(jobs),
+        "timeout_failures": timeout_failures,
+        "p95_latency_ms": latencies[max(0, (len(latencies) * 95 + 99) // 100 - 1)] if latencies else None,
+        "priced_runs": sum(1 for value in estimated if value is not None),
+    }
+
+
+def _seed(engine, n: int) -> None:
+    rng = random.Random(20261019)
+    base = datetime.utcnow() - timedelta(hours=1)
+    pricing = {"input": 3.2, "output": 16.0, "cache_hit": 0.64}
+    batch_jobs: list[dict[str, Any]] = []
+    batch_runs: list[dict[str, Any]] = []
+    with engine.begin() as conn:
+        for i in range(n):
+            created_at = (base - timedelta(seconds=i % 3600)).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+            capability = CAPABILITIES[i % len(CAPABILITIES)]
+            model = MODELS[i % len(MODELS)]
+            failed = rng.random() < 0.05
+            input_tokens, output_tokens, cached_tokens = rng.randint(500, 8000), rng.randint(50, 1500), rng.randint(0, 400)
+            cost = (
+                (input_tokens - cached_tokens) / 1e6 * pricing["input"]
+                + output_tokens / 1e6 * pricing["output"]
+                + cached_tokens / 1e6 * pricing["cache_hit"]
+            )
+            job_id = f"job-{i:08d}"
+            batch_jobs.append(
+                {
+                    "id": job_id,
+                    "capability": capability,
+                    "status": "failed" if failed else "succeeded",
+                    "input_json": "{}",
+                    "error_message": "Doubao API timeout." if failed else None,
+                    "created_at": created_at,
+                }
+            )
+            batch_runs.append(
+                {
+                    "id": f"run-{i:08d}",
+                    "job_id": job_id,
+                    "capability": capability,
+                    "status": "failed" if failed else "succeeded",
+                    "model": None if failed else model,
+                    "request_json": "{}",
+                    "response_json": None
+                    if failed
+                    else json.dumps(
+                        {
+                            "output_text": "ok",
+                            "usage": {
+                                "input_tokens": input_tokens,
+                                "output_tokens": output_tokens,
+                                "input_tokens_details": {"cached_tokens": cached_tokens},
+                            },
+                        }
+                    ),
+                    "latency_ms": int(rng.lognormvariate(7.0, 0.6)),
+                    "input_tokens": None if failed else input_tokens,
+                    "output_tokens": None if failed else output_tokens,
+                    "cached_tokens": None if failed else cached_tokens,
+                    "estimated_cost": None if failed else cost,
+                    "created_at": created_at,
+                }
+            )
+            if len(batch_runs) >= 20_000:
+                conn.execute(insert(AIJob), batch_jobs)
+                conn.execute(insert(AIRun), batch_runs)
+                batch_jobs, batch_runs = [], []
+        if batch_runs:
+            conn.execute(insert(AIJob), batch_jobs)
+            conn.execute(insert(AIRun), batch_runs)
+
+
+def _time(fn, repeat: int) -> tuple[float, Any]:
+    best = float("inf")
+    result = None
+    for _ in range(max(1, repeat)):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, (time.perf_counter() - started) * 1000)
+    return round(best, 2), result
+
+
+def main() -> None:
+    args = parse_args()
+    n = max(1, int(args.runs))
+    settings.ai_model_pricing_per_mtoken_json = json.dumps(
+        {model: {"input": 3.2, "output": 16, "cache_hit": 0.64} for model in MODELS}
+    )
+    with tempfile.TemporaryDirectory(prefix="bench-ai-metrics-") as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        Base.metadata.create_all(bind=engine)
+        seed_started = time.perf_counter()
+        _seed(engine, n)
+        seed_ms = (time.perf_counter() - seed_started) * 1000
+        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        report: dict[str, Any] = {"runs": n, "seed_ms": round(seed_ms, 1), "variants": {}}
+        with SessionLocal() as db:
+            orchestrator = AIOrchestrator(db)
+            sql_ms, summary = _time(lambda: orchestrator.metrics_summary(since_hours=24), args.repeat)
+            report["variants"]["sql_summary"] = {
+                "best_ms": sql_ms,
+                "total_runs": summary["total_runs"],
+                "p95_latency_ms": summary["p95_latency_ms"],
+                "priced_runs": summary["priced_runs"],
+            }
+            by_model_ms, by_model = _time(
+                lambda: orchestrator.metrics_summary(since_hours=24, breakdown="model"), args.repeat
+            )
+            report["variants"]["sql_breakdown_by_model"] = {"best_ms": by_model_ms, "groups": len(by_model["breakdown"])}
+            by_cap_ms, by_cap = _time(
+                lambda: orchestrator.metrics_summary(since_hours=24, breakdown="capability"), args.repeat
+            )
+            report["variants"]["sql_breakdown_by_capability"] = {"best_ms": by_cap_ms, "groups": len(by_cap["breakdown"])}
+            if not args.skip_legacy:
+                window_start = summary["window_start"]
+                legacy_ms, legacy = _time(lambda: _legacy_summary(db, window_start), 1)
+                db.expunge_all()
+                report["variants"]["legacy_python"] = {"best_ms": legacy_ms, **legacy}
+                report["p95_matches_legacy"] = legacy["p95_latency_ms"] == summary["p95_latency_ms"]
+                report["speedup"] = round(legacy_ms / sql_ms, 1) if sql_ms else None
+    print(json.dumps({"status": "ok", **report}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
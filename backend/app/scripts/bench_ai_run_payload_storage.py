@@ -0,0 +1,197 @@
+import argparse
+import json
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.ai.orchestrator import AIOrchestrator
+from app.ai.run_payloads import describe_run_payload_storage, put_run_payload
+from app.db.models import AIJob, AIRun, Base
+from app.routes.ai import _to_run_view
+from app.settings import settings
+
+CAPABILITIES = ("doubao.route_mapping_shampoo", "doubao.product_profile_shampoo", "doubao.mobile_compare_summary")
+INGREDIENTS = ("水", "甘油", "烟酰胺", "椰油酰胺丙基甜菜碱", "月桂醇聚醚硫酸酯钠", "泛醇", "透明质酸钠", "生育酚乙酸酯")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Compare ai_runs size and listing latency: inline request/response JSON vs compressed blob store."
+    )
+    parser.add_argument("--runs", type=int, default=20_000)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.3, help="Share of runs re-sending an earlier input.")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed repetitions per measurement.")
+    return parser.parse_args()
+
+
+def _product_context(rng: random.Random, idx: int) -> str:
+    ingredients = [
+        {"rank": rank + 1, "name": rng.choice(INGREDIENTS), "note": "来源于包装成分表" * rng.randint(1, 4)}
+        for rank in range(rng.randint(15, 35))
+    ]
+    doc = {"product": {"id": f"product-{idx:06d}", "brand": "bench", "name": f"基准产品{idx}"}, "ingredients": ingredients}
+    return json.dumps(doc, ensure_ascii=False)
+
+
+def _response_payload(rng: random.Random, idx: int) -> str:
+    output = {
+        "primary_route": {"route_key": "deep-clean", "confidence": rng.randint(50, 95)},
+        "evidence": {"positive": [f"证据{idx}-{i}：成分组合支持该路线" for i in range(rng.randint(4, 12))]},
+        "confidence_reason": "综合前排成分与功效宣称判断" * rng.randint(3, 10),
+    }
+    return json.dumps(
+        {
+            "id": f"resp-{idx}",
+            "output_text": json.dumps(output, ensure_ascii=False),
+            "usage": {"input_tokens": rng.randint(2000, 9000), "output_tokens": rng.randint(200, 1500)},
+        },
+        ensure_ascii=False,
+    )
+
+
+def _seed(SessionLocal, n: int, duplicate_ratio: float) -> float:
+    rng = random.Random(20261019)
+    base = datetime.utcnow() - timedelta(hours=1)
+    inputs: list[str] = []
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        for i in range(n):
+            if inputs and rng.random() < duplicate_ratio:
+                request_text = rng.choice(inputs)
+            else:
+                request_text = json.dumps({"product_context_json": _product_context(rng, i)}, ensure_ascii=False)
+                inputs.append(request_text)
+            created_at = (base - timedelta(seconds=i % 3600)).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+            job_id = f"job-{i:08d}"
+            db.add(
+                AIJob(
+                    id=job_id,
+                    capability=CAPABILITIES[i % len(CAPABILITIES)],
+                    status="succeeded",
+                    input_json="{}",
+                    created_at=created_at,
+                )
+            )
+            stored_request = put_run_payload(db, request_text)
+            stored_response = put_run_payload(db, _response_payload(rng, i))
+            db.add(
+                AIRun(
+                    id=f"run-{i:08d}",
+                    job_id=job_id,
+                    capability=CAPABILITIES[i % len(CAPABILITIES)],
+                    status="succeeded",
+                    model="doubao-seed-2-0-pro-260215",
+                    request_json=stored_request.inline,
+                    request_digest=stored_request.digest,
+                    response_json=stored_response.inline,
+                    response_digest=stored_response.digest,
+                    latency_ms=rng.randint(800, 9000),
+                    input_tokens=rng.randint(2000, 9000),
+                    output_tokens=rng.randint(200, 1500),
+                    cached_tokens=0,
+                    estimated_cost=0.01,
+                    created_at=created_at,
+                )
+            )
+            if i % 2000 == 1999:
+                db.commit()
+        db.commit()
+    return (time.perf_counter() - started) * 1000
+
+
+def _table_bytes(engine, table: str) -> int:
+    with engine.connect() as conn:
+        stmt = text("SELECT COALESCE(SUM(pgsize), 0) FROM dbstat WHERE name = :name")
+        return int(conn.execute(stmt, {"name": table}).scalar() or 0)
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        started = time.perf_counter()
+        fn()
+        best = min(best, (time.perf_counter() - started) * 1000)
+    return round(best, 2)
+
+
+def _run_variant(tmp: Path, name: str, *, inline_max_bytes: int, n: int, duplicate_ratio: float, repeat: int) -> dict[str, Any]:
+    settings.ai_run_payload_inline_max_bytes = inline_max_bytes
+    db_path = tmp / f"{name}.db"
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    seed_ms = _seed(SessionLocal, n, duplicate_ratio)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM"))
+
+    with SessionLocal() as db:
+        orchestrator = AIOrchestrator(db)
+
+        def list_pages() -> None:
+            for page in range(10):
+                runs = orchestrator.list_runs(limit=100, offset=page * 100)
+                [_to_run_view(run) for run in runs]
+            db.expunge_all()
+
+        def list_pages_with_payloads() -> None:
+            # 旧接口行为：每页都带完整请求 / 响应体。
+            for page in range(10):
+                runs = orchestrator.list_runs(limit=100, offset=page * 100, include_payloads=True)
+                payloads = orchestrator.load_run_payloads(runs)
+                [_to_run_view(run, payloads=payloads[run.id]) for run in runs]
+            db.expunge_all()
+
+        report = {
+            "seed_ms": round(seed_ms, 1),
+            "seed_runs_per_s": round(n / max(seed_ms / 1000, 1e-9), 1),
+            "ai_runs_bytes": _table_bytes(engine, "ai_runs"),
+            "ai_payload_blobs_bytes": _table_bytes(engine, "ai_payload_blobs"),
+            "db_file_bytes": db_path.stat().st_size,
+            "blob_store": describe_run_payload_storage(db),
+            "list_10_pages_ms": _time(list_pages, repeat),
+            "list_10_pages_with_payloads_ms": _time(list_pages_with_payloads, repeat),
+            "metrics_summary_ms": _time(lambda: orchestrator.metrics_summary(since_hours=24), repeat),
+        }
+    engine.dispose()
+    return report
+
+
+def main() -> None:
+    args = parse_args()
+    n = max(1, int(args.runs))
+    duplicate_ratio = min(max(float(args.duplicate_ratio), 0.0), 0.95)
+    with tempfile.TemporaryDirectory(prefix="bench-ai-payloads-") as tmp:
+        inline = _run_variant(
+            Path(tmp), "inline", inline_max_bytes=1 << 30, n=n, duplicate_ratio=duplicate_ratio, repeat=args.repeat
+        )
+        offloaded = _run_variant(
+            Path(tmp),
+            "blob_store",
+            inline_max_bytes=1024,
+            n=n,
+            duplicate_ratio=duplicate_ratio,
+            repeat=args.repeat,
+        )
+    report = {
+        "runs": n,
+        "duplicate_ratio": duplicate_ratio,
+        "inline": inline,
+        "blob_store": offloaded,
+        "ai_runs_size_ratio": round(offloaded["ai_runs_bytes"] / max(1, inline["ai_runs_bytes"]), 4),
+        "db_file_size_ratio": round(offloaded["db_file_bytes"] / max(1, inline["db_file_bytes"]), 4),
+        # 旧列表（内联 + 每行带载荷）→ 新列表（默认只取元数据）
+        "list_speedup_vs_legacy": round(
+            inline["list_10_pages_with_payloads_ms"] / max(0.01, offloaded["list_10_pages_ms"]), 1
+        ),
+    }
+    print(json.dumps({"status": "ok", **report}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
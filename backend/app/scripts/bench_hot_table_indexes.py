@@ -0,0 +1,184 @@
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from sqlalchemy import create_engine, inspect, text, update
+from sqlalchemy.orm import sessionmaker
+
+from app.db import runtime_schema
+from app.db.models import AIJob, AIRun, MobileSelectionSession, ProductWorkbenchJob, UploadIngestJob
+from app.db.query_plans import explain_query_plan
+from app.db.session import _engine_kwargs_for, install_sqlite_performance_mode
+
+# 重建前就有的复合索引（已被 live_* 部分索引取代）
+_LEGACY_COMPOSITES = (
+    "CREATE INDEX ix_mobile_selection_sessions_owner_scope ON mobile_selection_sessions (owner_type, owner_id, created_at)",
+    "CREATE INDEX ix_mobile_selection_sessions_owner_pinned_scope "
+    "ON mobile_selection_sessions (owner_type, owner_id, is_pinned, pinned_at, created_at)",
+)
+# 本次按查询形状新增的索引：旧索引集合里没有
+_ADDED_INDEXES = (
+    "ix_mobile_selection_sessions_live_category",
+    "ix_mobile_selection_sessions_live_pinned",
+    "ix_mobile_selection_sessions_live_created",
+    "ix_ai_jobs_status_created_at",
+    "ix_ai_runs_job_created_at",
+    "ix_product_workbench_jobs_type_updated",
+    "ix_product_workbench_jobs_status_updated",
+)
+_PLAN_PROBES = {
+    "selection_history": (
+        "SELECT id FROM mobile_selection_sessions WHERE owner_type = ? AND owner_id = ? AND deleted_at IS NULL "
+        "ORDER BY is_pinned DESC, pinned_at DESC, created_at DESC LIMIT 20",
+        ("device", "bench-owner-1"),
+    ),
+    "ai_jobs_by_status": (
+        "SELECT id FROM ai_jobs WHERE status = ? ORDER BY created_at DESC LIMIT 20",
+        ("failed",),
+    ),
+    "ai_runs_by_job": (
+        "SELECT id FROM ai_runs WHERE job_id = ? ORDER BY created_at DESC LIMIT 20",
+        ("bench-job-1",),
+    ),
+    "workbench_poll": (
+        "SELECT job_id FROM product_workbench_jobs WHERE status = ? ORDER BY updated_at ASC LIMIT 1",
+        ("queued",),
+    ),
+}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Insert / status-update throughput on hot tables: legacy per-column indexes vs query-shape composites."
+    )
+    parser.add_argument("--rows", type=int, default=2000, help="Rows inserted per table (one commit per row).")
+    parser.add_argument("--updates", type=int, default=2000, help="Status updates per job table (one commit each).")
+    return parser.parse_args()
+
+
+def _ts(seq: int) -> str:
+    return f"2026-01-01T00:{(seq // 60) % 60:02d}:{seq % 60:02d}.{seq:06d}Z"
+
+
+def _selection_row(seq: int) -> MobileSelectionSession:
+    return MobileSelectionSession(
+        id=f"bench-sel-{seq}",
+        owner_type="device",
+        owner_id=f"bench-owner-{seq % 50}",
+        category=("shampoo", "bodywash", "lotion")[seq % 3],
+        rules_version="v1",
+        answers_hash=f"{seq * 2654435761 % 2**32:08x}",
+        route_key=f"route-{seq % 7}",
+        route_title="bench",
+        product_id=f"bench-product-{seq % 40}",
+        answers_json="{}",
+        result_json="{}",
+        created_at=_ts(seq),
+    )
+
+
+def _job_rows(seq: int) -> list[Any]:
+    ts = _ts(seq)
+    return [
+        AIJob(id=f"bench-job-{seq}", capability=f"cap.{seq % 5}", status="queued", input_json="{}", trace_id=f"t-{seq}", created_at=ts),
+        AIRun(id=f"bench-run-{seq}", job_id=f"bench-job-{seq // 3}", capability=f"cap.{seq % 5}", status="succeeded", request_json="{}", created_at=ts),
+        UploadIngestJob(job_id=f"bench-ingest-{seq}", status="queued", stage="uploaded", created_at=ts, updated_at=ts),
+        ProductWorkbenchJob(
+            job_id=f"bench-wb-{seq}", job_type="route_mapping_build", status="queued", stage="queued", created_at=ts, updated_at=ts
+        ),
+    ]
+
+
+def _apply_legacy_indexes(engine) -> None:
+    with engine.begin() as conn:
+        for name in _ADDED_INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        for table, names in runtime_schema.REDUNDANT_INDEXES.items():
+            for name in names:
+                column = name[len(f"ix_{table}_") :]
+                if name.startswith(f"ix_{table}_") and column in {col["name"] for col in inspect(conn).get_columns(table)}:
+                    conn.execute(text(f"CREATE INDEX {name} ON {table} ({column})"))
+        for stmt in _LEGACY_COMPOSITES:
+            conn.execute(text(stmt))
+
+
+def _timed(fn: Callable[[int], None], count: int) -> float:
+    started = time.perf_counter()
+    for seq in range(count):
+        fn(seq)
+    return time.perf_counter() - started
+
+
+def _run_variant(tmp: Path, name: str, *, legacy: bool, args: argparse.Namespace) -> dict[str, Any]:
+    url = f"sqlite:///{tmp / f'{name}.db'}"
+    engine = create_engine(url, **_engine_kwargs_for(url))
+    install_sqlite_performance_mode(engine)
+    runtime_schema.apply_runtime_schema(engine)
+    if legacy:
+        _apply_legacy_indexes(engine)
+    SessionMaker = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    rows = max(1, int(args.rows))
+    updates = max(0, int(args.updates))
+
+    def insert_selection(seq: int) -> None:
+        with SessionMaker() as db:
+            db.add(_selection_row(seq))
+            db.commit()
+
+    def insert_jobs(seq: int) -> None:
+        with SessionMaker() as db:
+            db.add_all(_job_rows(seq))
+            db.commit()
+
+    def update_jobs(seq: int) -> None:
+        # 任务推进：状态 / 阶段 / updated_at 每步都改，单列索引各自要维护一次
+        target = seq % rows
+        ts = _ts(rows + seq)
+        status = ("running", "running", "done")[seq % 3]
+        with SessionMaker() as db:
+            db.execute(update(UploadIngestJob).where(UploadIngestJob.job_id == f"bench-ingest-{target}").values(status=status, stage=f"s{seq % 4}", updated_at=ts))
+            db.execute(update(ProductWorkbenchJob).where(ProductWorkbenchJob.job_id == f"bench-wb-{target}").values(status=status, stage=f"s{seq % 4}", updated_at=ts))
+            db.execute(update(AIJob).where(AIJob.id == f"bench-job-{target}").values(status=status, started_at=ts))
+            db.commit()
+
+    selection_seconds = _timed(insert_selection, rows)
+    job_seconds = _timed(insert_jobs, rows)
+    update_seconds = _timed(update_jobs, updates)
+
+    inspector = inspect(engine)
+    index_counts = {table: len(inspector.get_indexes(table)) for table in runtime_schema.REDUNDANT_INDEXES}
+    plans = {key: list(explain_query_plan(engine, sql, params).lines) for key, (sql, params) in _PLAN_PROBES.items()}
+    engine.dispose()
+    return {
+        "indexes": index_counts,
+        "selection_inserts_per_s": round(rows / max(1e-9, selection_seconds), 1),
+        # 每次提交插入 ai_jobs / ai_runs / upload_ingest_jobs / product_workbench_jobs 各一行
+        "job_batches_per_s": round(rows / max(1e-9, job_seconds), 1),
+        "status_updates_per_s": round(updates / max(1e-9, update_seconds), 1) if updates else None,
+        "db_bytes": (tmp / f"{name}.db").stat().st_size,
+        "plans": plans,
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    with tempfile.TemporaryDirectory(prefix="bench-indexes-") as tmp:
+        before = _run_variant(Path(tmp), "legacy_indexes", legacy=True, args=args)
+        after = _run_variant(Path(tmp), "query_shape_indexes", legacy=False, args=args)
+    report = {
+        "rows": int(args.rows),
+        "updates": int(args.updates),
+        "variants": {"legacy_indexes": before, "query_shape_indexes": after},
+        "selection_insert_gain": round(after["selection_inserts_per_s"] / max(0.1, before["selection_inserts_per_s"]), 2),
+        "job_insert_gain": round(after["job_batches_per_s"] / max(0.1, before["job_batches_per_s"]), 2),
+    }
+    if before["status_updates_per_s"] and after["status_updates_per_s"]:
+        report["status_update_gain"] = round(after["status_updates_per_s"] / before["status_updates_per_s"], 2)
+    print(json.dumps({"status": "ok", **report}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
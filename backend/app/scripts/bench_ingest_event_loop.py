@@ -0,0 +1,182 @@
+import argparse
+import asyncio
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from fastapi import FastAPI, File, UploadFile
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models import Base
+from app.db.session import get_db
+from app.routes import ingest as ingest_routes
+from app.settings import settings
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Load test: /healthz latency while concurrent uploads hit /api/upload/stage1 (in-process ASGI)."
+    )
+    parser.add_argument("--uploads", type=int, default=16, help="Total upload requests per scenario.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent upload requests.")
+    parser.add_argument("--model-latency-ms", type=float, default=300.0, help="Simulated blocking model call latency.")
+    parser.add_argument("--image-bytes", type=int, default=2 * 1024 * 1024, help="Upload payload size.")
+    parser.add_argument("--probe-interval-ms", type=float, default=10.0, help="Interval between /healthz probes.")
+    return parser.parse_args()
+
+
+def _percentile(values: list[float], pct: int) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, (len(ordered) * pct + 99) // 100 - 1)]
+
+
+def _build_app(tmp: Path, *, model_latency_s: float) -> FastAPI:
+    settings.storage_dir = str(tmp / "storage")
+    settings.user_storage_dir = str(tmp / "user_storage")
+    engine = create_engine(f"sqlite:///{tmp / 'bench.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def fake_save_image(product_id: str, filename: str, content: bytes, content_type: str | None = None, subdir=None) -> str:
+        rel = f"images/webp/{product_id}.webp"
+        abs_path = Path(settings.storage_dir) / rel
+        abs_path.parent.mkdir(parents=True, exist_ok=True)
+        abs_path.write_bytes(content)
+        return rel
+
+    def stage1_result() -> dict[str, Any]:
+        return {
+            "vision_text": "【品牌】压测品牌\n【产品名】压测产品\n【成分表原文】水、甘油",
+            "model": "bench-vision",
+            "artifact": None,
+        }
+
+    def fake_stage1(image_rel: str, trace_id: str) -> dict[str, Any]:
+        # 模拟同步 SDK 调用：阻塞当前线程 model_latency_s。
+        time.sleep(model_latency_s)
+        return stage1_result()
+
+    async def fake_stage1_async(image_rel: str, trace_id: str) -> dict[str, Any]:
+        # /upload/stage1 走异步客户端：等待期间让出事件循环，不占线程。
+        await asyncio.sleep(model_latency_s)
+        return stage1_result()
+
+    ingest_routes.save_image = fake_save_image
+    ingest_routes._analyze_with_doubao_stage1 = fake_stage1
+    ingest_routes._analyze_with_doubao_stage1_async = fake_stage1_async
+
+    app = FastAPI()
+    app.include_router(ingest_routes.router)
+
+    def override_get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+
+    @app.get("/healthz")
+    async def healthz():
+        return {"status": "ok"}
+
+    @app.post("/bench/blocking-stage1")
+    async def blocking_stage1(image: UploadFile = File(...)):
+        # 旧写法基线：整包读入 + 在事件循环线程内直接跑同步落盘与模型调用。
+        content = await image.read()
+        trace_id = ingest_routes.new_id()
+        image_rel = fake_save_image(trace_id, image.filename or "upload.jpg", content)
+        return fake_stage1(image_rel, trace_id)
+
+    return app
+
+
+async def _run_scenario(app: FastAPI, *, path: str, args: argparse.Namespace, payload: bytes) -> dict[str, Any]:
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    probe_latencies_ms: list[float] = []
+    upload_latencies_ms: list[float] = []
+    statuses: dict[int, int] = {}
+    semaphore = asyncio.Semaphore(max(1, int(args.concurrency)))
+    stop = asyncio.Event()
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+
+        async def one_upload() -> None:
+            async with semaphore:
+                started = time.perf_counter()
+                resp = await client.post(path, files={"image": ("bench.png", payload, "image/png")})
+                upload_latencies_ms.append((time.perf_counter() - started) * 1000)
+                statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+
+        async def probe() -> None:
+            # 从计划发出时刻计延迟：事件循环被阻塞时，被耽误的那一拍会如实记入（避免协同遗漏）。
+            interval_s = max(0.001, float(args.probe_interval_ms) / 1000)
+            scheduled = time.perf_counter()
+            while not stop.is_set():
+                await client.get("/healthz")
+                now = time.perf_counter()
+                probe_latencies_ms.append((now - scheduled) * 1000)
+                scheduled = max(scheduled + interval_s, now)
+                await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+
+        idle_started = time.perf_counter()
+        for _ in range(20):
+            await client.get("/healthz")
+        idle_ms = (time.perf_counter() - idle_started) * 1000 / 20
+
+        probe_task = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(one_upload() for _ in range(max(1, int(args.uploads)))))
+        wall_ms = (time.perf_counter() - started) * 1000
+        stop.set()
+        await probe_task
+
+    return {
+        "path": path,
+        "statuses": statuses,
+        "wall_ms": round(wall_ms, 2),
+        "upload_p50_ms": round(_percentile(upload_latencies_ms, 50), 2),
+        "healthz_idle_mean_ms": round(idle_ms, 3),
+        "healthz_under_load": {
+            "samples": len(probe_latencies_ms),
+            "mean_ms": round(statistics.fmean(probe_latencies_ms), 3) if probe_latencies_ms else 0.0,
+            "p50_ms": round(_percentile(probe_latencies_ms, 50), 3),
+            "p99_ms": round(_percentile(probe_latencies_ms, 99), 3),
+            "max_ms": round(max(probe_latencies_ms), 3) if probe_latencies_ms else 0.0,
+        },
+    }
+
+
+async def _run(args: argparse.Namespace) -> dict[str, Any]:
+    payload = b"\x89PNG" + b"0" * max(0, int(args.image_bytes) - 4)
+    with tempfile.TemporaryDirectory(prefix="bench-ingest-loop-") as tmp:
+        app = _build_app(Path(tmp), model_latency_s=max(0.0, float(args.model_latency_ms)) / 1000)
+        return {
+            "uploads": int(args.uploads),
+            "concurrency": int(args.concurrency),
+            "model_latency_ms": float(args.model_latency_ms),
+            "image_bytes": len(payload),
+            "scenarios": {
+                "blocking_baseline": await _run_scenario(app, path="/bench/blocking-stage1", args=args, payload=payload),
+                "offloaded_stage1": await _run_scenario(app, path="/api/upload/stage1", args=args, payload=payload),
+            },
+        }
+
+
+def main() -> None:
+    args = parse_args()
+    report = asyncio.run(_run(args))
+    print(json.dumps({"status": "ok", **report}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
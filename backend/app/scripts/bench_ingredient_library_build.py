@@ -0,0 +1,193 @@
+import argparse
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models import Base, ProductIndex
+from app.routes import products as products_routes
+from app.schemas import IngredientLibraryBuildRequest
+from app.services.storage import load_json, now_iso, save_product_json
+from app.settings import settings
+
+CATEGORY = "shampoo"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Benchmark ingredient library builds: cold build (serial vs pooled), no-op rebuild "
+            "(incremental vs full aggregation), partial rebuild, verify mode."
+        )
+    )
+    parser.add_argument("--products", type=int, default=300, help="Seeded products.")
+    parser.add_argument("--vocabulary", type=int, default=400, help="Distinct ingredient names.")
+    parser.add_argument("--ingredients-per-product", type=int, default=12)
+    parser.add_argument("--changed-products", type=int, default=10, help="Products edited before the partial rebuild.")
+    parser.add_argument("--model-latency-ms", type=float, default=20.0, help="Simulated model call latency.")
+    parser.add_argument("--concurrency", type=int, default=8, help="ingredient_build_model_concurrency for pooled runs.")
+    return parser.parse_args()
+
+
+def _product_doc(rng: random.Random, names: list[str], per_product: int, idx: int) -> dict[str, Any]:
+    picked = rng.sample(names, k=min(per_product, len(names)))
+    return {
+        "product": {"category": CATEGORY, "brand": f"Brand{idx % 17}", "name": f"Bench Product {idx}"},
+        "summary": {"one_sentence": "bench", "pros": [], "cons": [], "who_for": [], "who_not_for": []},
+        "ingredients": [
+            {
+                "name": name,
+                "type": "活性成分",
+                "functions": ["清洁"],
+                "risk": "low",
+                "notes": "",
+                "rank": rank,
+                "abundance_level": "major" if rank <= 3 else "trace",
+                "order_confidence": 90,
+            }
+            for rank, name in enumerate(picked, start=1)
+        ],
+        "evidence": {"doubao_raw": ""},
+    }
+
+
+def _seed(SessionLocal, args: argparse.Namespace, rng: random.Random) -> list[tuple[str, dict[str, Any]]]:
+    names = [f"成分{i:04d}" for i in range(max(1, int(args.vocabulary)))]
+    seeded: list[tuple[str, dict[str, Any]]] = []
+    with SessionLocal() as db:
+        for idx in range(max(1, int(args.products))):
+            product_id = f"bench-{idx:05d}"
+            doc = _product_doc(rng, names, int(args.ingredients_per_product), idx)
+            json_path = save_product_json(product_id, doc, category=CATEGORY)
+            db.add(
+                ProductIndex(
+                    id=product_id,
+                    category=CATEGORY,
+                    brand=doc["product"]["brand"],
+                    name=doc["product"]["name"],
+                    one_sentence="bench",
+                    tags_json="[]",
+                    image_path=None,
+                    json_path=json_path,
+                    created_at=now_iso(),
+                )
+            )
+            seeded.append((product_id, doc))
+        db.commit()
+    return seeded
+
+
+def _run_build(
+    SessionLocal,
+    counters: dict[str, int],
+    concurrency: int,
+    aggregation_mode: str = "incremental",
+) -> dict[str, Any]:
+    settings.ingredient_build_model_concurrency = concurrency
+    for key in counters:
+        counters[key] = 0
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        result = products_routes._build_ingredient_library_impl(
+            IngredientLibraryBuildRequest(category=CATEGORY, aggregation_mode=aggregation_mode),
+            db,
+            event_callback=None,
+        )
+    return {
+        "wall_ms": round((time.perf_counter() - started) * 1000, 1),
+        "concurrency": concurrency,
+        "aggregation_mode": aggregation_mode,
+        "unique_ingredients": result.unique_ingredients,
+        "reparsed_products": result.reparsed_products,
+        "affected_ingredients": result.affected_ingredients,
+        "submitted_to_model": result.submitted_to_model,
+        "skipped": result.skipped,
+        "failed": result.failed,
+        "model_calls": counters["model_calls"],
+        "profile_signature_reads": counters["signature_reads"],
+        "profile_json_reads": counters["profile_reads"],
+    }
+
+
+def _fresh_env(tmp: Path, name: str):
+    root = tmp / name
+    settings.storage_dir = str(root / "storage")
+    settings.user_storage_dir = str(root / "user_storage")
+    engine = create_engine(f"sqlite:///{root / 'bench.db'}", connect_args={"check_same_thread": False})
+    (root / "storage").mkdir(parents=True, exist_ok=True)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def main() -> None:
+    args = parse_args()
+    latency_s = max(0.0, float(args.model_latency_ms)) / 1000
+    counters = {"model_calls": 0, "signature_reads": 0, "profile_reads": 0}
+
+    def fake_run_capability_now(capability: str, input_payload: dict, trace_id: str | None = None, event_callback=None):
+        counters["model_calls"] += 1
+        time.sleep(latency_s)
+        return {
+            "ingredient_name": input_payload["ingredient"],
+            "summary": "bench",
+            "confidence": 80,
+            "model": "bench-model",
+        }
+
+    original_signature_reader = products_routes._load_profile_source_signature
+
+    def counting_signature_reader(rel_path: str) -> str:
+        counters["signature_reads"] += 1
+        return original_signature_reader(rel_path)
+
+    def counting_load_json(rel_path: str):
+        if str(rel_path).startswith("ingredients/"):
+            counters["profile_reads"] += 1
+        return load_json(rel_path)
+
+    products_routes.run_capability_now = fake_run_capability_now
+    products_routes._load_profile_source_signature = counting_signature_reader
+    products_routes.load_json = counting_load_json
+
+    report: dict[str, Any] = {
+        "products": int(args.products),
+        "model_latency_ms": float(args.model_latency_ms),
+        "scenarios": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="bench-ingredient-build-") as tmp_dir:
+        tmp = Path(tmp_dir)
+
+        SessionLocal = _fresh_env(tmp, "serial")
+        _seed(SessionLocal, args, random.Random(7))
+        report["scenarios"]["cold_build_serial"] = _run_build(SessionLocal, counters, 1)
+
+        SessionLocal = _fresh_env(tmp, "pooled")
+        seeded = _seed(SessionLocal, args, random.Random(7))
+        concurrency = max(1, int(args.concurrency))
+        report["scenarios"]["cold_build_pooled"] = _run_build(SessionLocal, counters, concurrency)
+        report["scenarios"]["noop_rebuild"] = _run_build(SessionLocal, counters, concurrency)
+        report["scenarios"]["noop_rebuild_full_aggregation"] = _run_build(SessionLocal, counters, concurrency, "full")
+
+        rng = random.Random(11)
+        changed = rng.sample(seeded, k=min(max(0, int(args.changed_products)), len(seeded)))
+        for product_id, doc in changed:
+            doc["ingredients"].append({**doc["ingredients"][-1], "name": f"新成分-{product_id}", "rank": len(doc["ingredients"]) + 1})
+            save_product_json(product_id, doc, category=CATEGORY)
+        partial = _run_build(SessionLocal, counters, concurrency)
+        partial["changed_products"] = len(changed)
+        report["scenarios"]["partial_rebuild"] = partial
+        report["scenarios"]["verify_rebuild"] = _run_build(SessionLocal, counters, concurrency, "verify")
+
+    serial_ms = report["scenarios"]["cold_build_serial"]["wall_ms"]
+    pooled_ms = report["scenarios"]["cold_build_pooled"]["wall_ms"]
+    report["cold_build_speedup"] = round(serial_ms / pooled_ms, 2) if pooled_ms else None
+    print(json.dumps({"status": "ok", **report}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
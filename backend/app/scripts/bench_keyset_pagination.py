@@ -0,0 +1,196 @@
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.db import runtime_schema
+from app.db.keyset import encode_cursor, fetch_keyset_page, row_key
+from app.db.models import UploadIngestJob
+from app.db.session import _engine_kwargs_for, install_sqlite_performance_mode
+
+_KEY = (UploadIngestJob.created_at, UploadIngestJob.job_id)
+_STATUSES = ("done", "done", "done", "failed", "cancelled")
+_BASE_TIME = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Page-N latency on upload_ingest_jobs: OFFSET/LIMIT vs keyset cursor, plus skip/duplicate counts under inserts."
+    )
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Seeded job rows.")
+    parser.add_argument("--limit", type=int, default=30, help="Page size.")
+    parser.add_argument("--pages", default="1,10,100,1000,10000,30000", help="Comma-separated page numbers to time.")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed repetitions per page (median reported).")
+    parser.add_argument("--walk-pages", type=int, default=20, help="Pages walked while inserting one new row per page.")
+    return parser.parse_args()
+
+
+def _ts(seq: int) -> str:
+    # 每 4 行共用一个时间戳：模拟同一时刻的批量入队，排序靠 job_id 兜底
+    return (_BASE_TIME + timedelta(seconds=seq // 4)).strftime("%Y-%m-%dT%H:%M:%S.000000Z")
+
+
+def _seed(engine: Any, rows: int) -> float:
+    started = time.perf_counter()
+    chunk = 50_000
+    with engine.begin() as conn:
+        for base in range(0, rows, chunk):
+            conn.execute(
+                insert(UploadIngestJob),
+                [
+                    {
+                        "job_id": f"bench-{seq:08d}",
+                        "status": _STATUSES[seq % len(_STATUSES)],
+                        "created_at": _ts(seq),
+                        "updated_at": _ts(seq),
+                    }
+                    for seq in range(base, min(rows, base + chunk))
+                ],
+            )
+    return time.perf_counter() - started
+
+
+def _median_ms(fn: Callable[[], Any], repeat: int) -> float:
+    samples = []
+    for _ in range(max(1, repeat)):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000.0)
+    return round(statistics.median(samples), 3)
+
+
+def _base_stmt(status: str | None):
+    stmt = select(UploadIngestJob)
+    return stmt.where(UploadIngestJob.status == status) if status else stmt
+
+
+def _offset_page(db: Session, status: str | None, offset: int, limit: int) -> list[Any]:
+    # 旧实现：只按时间列倒序 + OFFSET
+    stmt = _base_stmt(status).order_by(UploadIngestJob.created_at.desc()).offset(offset).limit(limit)
+    return list(db.execute(stmt).scalars().all())
+
+
+def _cursor_before(db: Session, status: str | None, offset: int) -> str | None:
+    # 定位第 N 页的游标（= 前一页最后一行的键），不计时
+    if offset <= 0:
+        return None
+    stmt = _base_stmt(status).order_by(*(column.desc() for column in _KEY)).offset(offset - 1).limit(1)
+    row = db.execute(stmt).scalars().first()
+    return encode_cursor("upload_jobs", row_key(row, _KEY)) if row is not None else None
+
+
+def _time_pages(SessionLocal, *, status: str | None, pages: list[int], limit: int, repeat: int, total: int) -> list[dict[str, Any]]:
+    out: list[dict[str, Any]] = []
+    with SessionLocal() as db:
+        for page_no in pages:
+            offset = (page_no - 1) * limit
+            if offset >= total:
+                continue
+            cursor = _cursor_before(db, status, offset)
+            offset_ms = _median_ms(lambda: _offset_page(db, status, offset, limit), repeat)
+            keyset_ms = _median_ms(
+                lambda: fetch_keyset_page(db, _base_stmt(status), columns=_KEY, scope="upload_jobs", cursor=cursor, limit=limit),
+                repeat,
+            )
+            out.append(
+                {
+                    "page": page_no,
+                    "offset_rows_skipped": offset,
+                    "offset_ms": offset_ms,
+                    "keyset_ms": keyset_ms,
+                    "speedup": round(offset_ms / keyset_ms, 1) if keyset_ms > 0 else None,
+                }
+            )
+    return out
+
+
+def _walk_with_inserts(SessionLocal, *, pages: int, limit: int, mode: str) -> dict[str, int]:
+    # 每翻一页前插入一条更新的任务（模拟并发入队），并刷新一条尚未翻到的任务的 updated_at（模拟进度更新），
+    # 统计相对翻页开始时快照的重复 / 遗漏
+    with SessionLocal() as db:
+        snapshot = [
+            row.job_id
+            for row in db.execute(
+                _base_stmt(None).order_by(*(column.desc() for column in _KEY)).limit((pages + 1) * limit)
+            ).scalars()
+            if not str(row.job_id).startswith("bench-new-")
+        ]
+    seen: list[str] = []
+    cursor: str | None = None
+    for page_no in range(pages):
+        with SessionLocal() as db:
+            db.add(
+                UploadIngestJob(
+                    job_id=f"bench-new-{mode}-{page_no:04d}",
+                    status="queued",
+                    created_at=f"2099-01-01T00:00:{page_no % 60:02d}.{page_no:06d}Z",
+                    updated_at=f"2099-01-01T00:00:{page_no % 60:02d}.{page_no:06d}Z",
+                )
+            )
+            ahead = db.get(UploadIngestJob, snapshot[min(len(snapshot) - 1, (page_no + 1) * limit + limit // 2)])
+            ahead.updated_at = f"2099-01-02T00:00:{page_no % 60:02d}.{page_no:06d}Z"
+            db.commit()
+            if mode == "offset":
+                rows = list(
+                    db.execute(
+                        _base_stmt(None)
+                        .order_by(*(column.desc() for column in _KEY))
+                        .offset(page_no * limit)
+                        .limit(limit)
+                    ).scalars()
+                )
+            else:
+                page = fetch_keyset_page(db, _base_stmt(None), columns=_KEY, scope="upload_jobs", cursor=cursor, limit=limit)
+                # 首页在插入后取：新行属于“翻页开始前”已显示的部分，此后不再出现
+                rows, cursor = page.rows, page.next_cursor
+            seen.extend(str(row.job_id) for row in rows)
+    old_seen = [job_id for job_id in seen if not job_id.startswith("bench-new-")]
+    seen_set = set(old_seen)
+    rank = {job_id: idx for idx, job_id in enumerate(snapshot)}
+    deepest = max((rank[job_id] for job_id in seen_set if job_id in rank), default=-1)
+    return {
+        "rows_returned": len(seen),
+        "duplicates": len(old_seen) - len(seen_set),
+        "skipped": sum(1 for job_id in snapshot[: deepest + 1] if job_id not in seen_set),
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    pages = sorted({int(item) for item in str(args.pages).split(",") if item.strip()})
+    with tempfile.TemporaryDirectory(prefix="bench-keyset-") as tmp:
+        url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        engine = create_engine(url, **_engine_kwargs_for(url))
+        install_sqlite_performance_mode(engine)
+        runtime_schema.apply_runtime_schema(engine)
+        seed_seconds = _seed(engine, args.rows)
+        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        done_total = sum(1 for seq in range(args.rows) if _STATUSES[seq % len(_STATUSES)] == "done")
+        report = {
+            "rows": args.rows,
+            "limit": args.limit,
+            "seed_seconds": round(seed_seconds, 2),
+            "all_jobs": _time_pages(
+                SessionLocal, status=None, pages=pages, limit=args.limit, repeat=args.repeat, total=args.rows
+            ),
+            "status_done": _time_pages(
+                SessionLocal, status="done", pages=pages, limit=args.limit, repeat=args.repeat, total=done_total
+            ),
+            "walk_with_inserts": {
+                "offset": _walk_with_inserts(SessionLocal, pages=args.walk_pages, limit=args.limit, mode="offset"),
+                "keyset": _walk_with_inserts(SessionLocal, pages=args.walk_pages, limit=args.limit, mode="keyset"),
+            },
+        }
+        engine.dispose()
+    print(json.dumps({"status": "ok", **report}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
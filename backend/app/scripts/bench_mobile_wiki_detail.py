@@ -0,0 +1,273 @@
+import argparse
+import hashlib
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from starlette.requests import Request
+
+from app.db.models import (
+    Base,
+    IngredientLibraryAlias,
+    IngredientLibraryIndex,
+    ProductAnalysisIndex,
+    ProductIndex,
+    ProductRouteMappingIndex,
+)
+from app.db.session import get_db
+from app.routes import mobile as mobile_routes
+from app.services.mobile_wiki_snapshots import describe_mobile_wiki_snapshots, reset_mobile_wiki_snapshot_memory
+from app.services.storage import ensure_dirs, now_iso, save_product_analysis, save_product_json
+from app.settings import settings
+
+INGREDIENTS = ("水", "甘油", "烟酰胺", "椰油酰胺丙基甜菜碱", "月桂醇聚醚硫酸酯钠", "泛醇", "透明质酸钠", "生育酚乙酸酯", "水杨酸", "薄荷醇")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Mobile wiki product detail latency: live build vs materialized snapshot vs If-None-Match 304."
+    )
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--ingredients-per-product", type=int, default=30)
+    parser.add_argument("--requests", type=int, default=2000)
+    return parser.parse_args()
+
+
+def _ingredient_id(name: str) -> str:
+    return "ing-" + hashlib.sha1(f"shampoo::{name}".encode("utf-8")).hexdigest()[:20]
+
+
+def _seed(SessionLocal, *, products: int, ingredients_per_product: int) -> list[str]:
+    rng = random.Random(20261019)
+    now = now_iso()
+    product_ids: list[str] = []
+    with SessionLocal() as db:
+        for name in INGREDIENTS:
+            ingredient_id = _ingredient_id(name)
+            db.add(
+                IngredientLibraryIndex(
+                    ingredient_id=ingredient_id,
+                    category="shampoo",
+                    ingredient_name=name,
+                    ingredient_key=name,
+                    status="ready",
+                    first_seen_at=now,
+                    last_seen_at=now,
+                    last_generated_at=now,
+                )
+            )
+            db.add(
+                IngredientLibraryAlias(
+                    alias_id=hashlib.sha1(f"alias::{name}".encode("utf-8")).hexdigest()[:32],
+                    category="shampoo",
+                    alias_key=mobile_routes._normalize_mobile_wiki_ingredient_key(name),
+                    alias_name=name,
+                    ingredient_id=ingredient_id,
+                    created_at=now,
+                    updated_at=now,
+                )
+            )
+        for idx in range(products):
+            product_id = f"bench-{idx:06d}"
+            doc = {
+                "product": {"category": "shampoo", "brand": "bench", "name": f"基准洗发水{idx}"},
+                "summary": {"one_sentence": "基准产品", "pros": ["温和清洁"], "cons": [], "who_for": ["油性头皮"], "who_not_for": []},
+                "ingredients": [
+                    {
+                        "name": rng.choice(INGREDIENTS),
+                        "type": "功能成分",
+                        "functions": ["清洁", "保湿"],
+                        "risk": "low",
+                        "notes": "来源于包装成分表",
+                        "rank": rank + 1,
+                    }
+                    for rank in range(ingredients_per_product)
+                ],
+                "evidence": {"doubao_raw": ""},
+            }
+            json_path = save_product_json(product_id, doc, category="shampoo")
+            analysis_path = save_product_analysis("shampoo", product_id, {"product_id": product_id, "profile": {}})
+            db.add(
+                ProductIndex(
+                    id=product_id,
+                    category="shampoo",
+                    brand="bench",
+                    name=f"基准洗发水{idx}",
+                    one_sentence="基准产品",
+                    tags_json="[]",
+                    image_path=None,
+                    json_path=json_path,
+                    created_at=now,
+                )
+            )
+            db.add(
+                ProductRouteMappingIndex(
+                    product_id=product_id,
+                    category="shampoo",
+                    rules_version="bench",
+                    fingerprint=product_id,
+                    status="ready",
+                    primary_route_key="deep-oil-control",
+                    primary_route_title="深层控油型",
+                    primary_confidence=90,
+                    last_generated_at=now,
+                )
+            )
+            db.add(
+                ProductAnalysisIndex(
+                    product_id=product_id,
+                    category="shampoo",
+                    rules_version="bench",
+                    fingerprint=product_id,
+                    status="ready",
+                    storage_path=analysis_path,
+                    route_key="deep-oil-control",
+                    route_title="深层控油型",
+                    headline="bench",
+                    last_generated_at=now,
+                )
+            )
+            product_ids.append(product_id)
+        db.commit()
+    return product_ids
+
+
+def _summary(latencies: list[float], requests: int) -> dict[str, Any]:
+    latencies.sort()
+    return {
+        "requests": requests,
+        "mean_ms": round(sum(latencies) / len(latencies), 3),
+        "p50_ms": round(latencies[len(latencies) // 2], 3),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], 3),
+        "req_per_s": round(requests / (sum(latencies) / 1000), 1),
+    }
+
+
+def _measure(client: TestClient, product_ids: list[str], requests: int, *, etags: dict[str, str] | None = None) -> dict[str, Any]:
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+    bytes_out = 0
+    for i in range(requests):
+        product_id = product_ids[i % len(product_ids)]
+        headers = {"If-None-Match": etags[product_id]} if etags and product_id in etags else {}
+        started = time.perf_counter()
+        resp = client.get(f"/api/mobile/wiki/products/{product_id}", headers=headers)
+        latencies.append((time.perf_counter() - started) * 1000)
+        statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+        bytes_out += len(resp.content)
+    return {**_summary(latencies, requests), "statuses": statuses, "response_bytes": bytes_out}
+
+
+def _handler_request(if_none_match: str | None) -> Request:
+    headers = [(b"cookie", b"mx_device_id=bench-device")]
+    if if_none_match:
+        headers.append((b"if-none-match", if_none_match.encode("latin-1")))
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "scheme": "http",
+            "path": "/api/mobile/wiki/products",
+            "query_string": b"",
+            "headers": headers,
+            "client": ("127.0.0.1", 0),
+            "server": ("bench", 80),
+        }
+    )
+
+
+def _measure_handler(SessionLocal, product_ids: list[str], requests: int, *, etags: dict[str, str] | None = None) -> dict[str, Any]:
+    # 直接调用路由函数（含 JSON 编码），排除 TestClient 线程桥接的固定开销，只看服务端处理耗时。
+    latencies: list[float] = []
+    for i in range(requests):
+        product_id = product_ids[i % len(product_ids)]
+        request = _handler_request(etags.get(product_id) if etags else None)
+        started = time.perf_counter()
+        with SessionLocal() as db:
+            out = mobile_routes.get_mobile_wiki_product_detail(product_id, request, Response(), db)
+            if not isinstance(out, Response):
+                out.model_dump_json()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return _summary(latencies, requests)
+
+
+def main() -> None:
+    args = parse_args()
+    with tempfile.TemporaryDirectory(prefix="bench-wiki-detail-") as tmp:
+        settings.storage_dir = str(Path(tmp) / "storage")
+        settings.user_storage_dir = str(Path(tmp) / "user_storage")
+        ensure_dirs()
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'bench.db'}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        product_ids = _seed(
+            SessionLocal,
+            products=max(1, int(args.products)),
+            ingredients_per_product=max(1, int(args.ingredients_per_product)),
+        )
+
+        app = FastAPI()
+        app.include_router(mobile_routes.router)
+
+        def override_get_db():
+            db = SessionLocal()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        requests = max(1, int(args.requests))
+        with TestClient(app) as client:
+            client.get("/api/mobile/wiki/products/" + product_ids[0])  # 预热 schema / 导入
+
+            settings.mobile_wiki_snapshot_enabled = False
+            live = _measure(client, product_ids, requests)
+
+            settings.mobile_wiki_snapshot_enabled = True
+            reset_mobile_wiki_snapshot_memory()
+            cold = _measure(client, product_ids, len(product_ids))
+            warm = _measure(client, product_ids, requests)
+            etags = {
+                product_id: client.get(f"/api/mobile/wiki/products/{product_id}").headers["etag"] for product_id in product_ids
+            }
+            not_modified = _measure(client, product_ids, requests, etags=etags)
+            snapshot_stats = describe_mobile_wiki_snapshots()
+
+        settings.mobile_wiki_snapshot_enabled = False
+        handler_live = _measure_handler(SessionLocal, product_ids, requests)
+        settings.mobile_wiki_snapshot_enabled = True
+        handler_warm = _measure_handler(SessionLocal, product_ids, requests)
+        handler_304 = _measure_handler(SessionLocal, product_ids, requests, etags=etags)
+        engine.dispose()
+
+    report = {
+        "products": len(product_ids),
+        "ingredients_per_product": int(args.ingredients_per_product),
+        "live_build": live,
+        "snapshot_first_build": cold,
+        "snapshot_warm": warm,
+        "snapshot_304": not_modified,
+        "snapshot_stats": snapshot_stats,
+        "warm_speedup": round(live["mean_ms"] / max(0.001, warm["mean_ms"]), 2),
+        "not_modified_speedup": round(live["mean_ms"] / max(0.001, not_modified["mean_ms"]), 2),
+        "handler_only": {
+            "live_build": handler_live,
+            "snapshot_warm": handler_warm,
+            "snapshot_304": handler_304,
+            "warm_speedup": round(handler_live["mean_ms"] / max(0.001, handler_warm["mean_ms"]), 2),
+            "not_modified_speedup": round(handler_live["mean_ms"] / max(0.001, handler_304["mean_ms"]), 2),
+        },
+    }
+    print(json.dumps({"status": "ok", **report}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.db import runtime_schema
+from app.db.models import ProductIndex
+from app.db.session import _engine_kwargs_for, install_sqlite_performance_mode
+from app.settings import settings
+
+_CATEGORIES = ("shampoo", "bodywash", "cleanser", "lotion", "conditioner")
+_IMAGE_BYTES = b"\x00" * 2048
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Batch product delete latency vs catalog size: inline rglob cleanup (old) vs tombstone + background reclaim."
+    )
+    parser.add_argument("--catalogs", default="1000,10000", help="Comma-separated catalog sizes (products on disk).")
+    parser.add_argument("--delete", type=int, default=100, help="Products deleted per run.")
+    return parser.parse_args()
+
+
+def _product_id(idx: int) -> str:
+    return f"bench-product-{idx:07d}"
+
+
+def _seed(storage_dir: Path, engine: Any, catalog: int) -> None:
+    rows = []
+    for idx in range(catalog):
+        product_id = _product_id(idx)
+        category = _CATEGORIES[idx % len(_CATEGORIES)]
+        files = {
+            f"products/{category}/{product_id}.json": b'{"product":{}}',
+            f"images/webp/{category}/{product_id}.webp": _IMAGE_BYTES,
+            f"images/jpg/{category}/{product_id}.jpg": _IMAGE_BYTES,
+            f"doubao_runs/{product_id}/stage2_struct.json": b'{"ok":true}',
+        }
+        for rel, payload in files.items():
+            path = storage_dir / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(payload)
+        rows.append(
+            {
+                "id": product_id,
+                "category": category,
+                "brand": "bench",
+                "name": product_id,
+                "tags_json": "[]",
+                "image_path": f"images/webp/{category}/{product_id}.webp",
+                "json_path": f"products/{category}/{product_id}.json",
+                "created_at": "2026-10-01T00:00:00.000000Z",
+            }
+        )
+    with engine.begin() as conn:
+        for base in range(0, len(rows), 5000):
+            conn.execute(insert(ProductIndex), rows[base : base + 5000])
+
+
+def _legacy_remove_product_images(product_id: str, image_path: str | None) -> int:
+    # 旧实现：每删一个产品都 rglob 一遍 images/ 全树找同名变体
+    from app.services.storage import _resolve_rel_path, remove_rel_path
+
+    removed = 1 if image_path and remove_rel_path(image_path) else 0
+    prefix = f"{product_id}."
+    for path in _resolve_rel_path("images").rglob("*"):
+        if path.is_file() and path.name.startswith(prefix):
+            path.unlink()
+            removed += 1
+    return removed
+
+
+def _run(catalog: int, delete: int, mode: str) -> dict[str, Any]:
+    from app.routes.products import _batch_delete_products_impl
+    from app.schemas import ProductBatchDeleteRequest
+    from app.services.storage import remove_rel_dir
+    from app.services.storage_reclaim import reclaim_product_storage
+
+    with tempfile.TemporaryDirectory(prefix="bench-product-delete-") as tmp:
+        storage_dir = Path(tmp) / "storage"
+        settings.storage_dir = str(storage_dir)
+        settings.user_storage_dir = str(Path(tmp) / "user_storage")
+        url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        engine = create_engine(url, **_engine_kwargs_for(url))
+        install_sqlite_performance_mode(engine)
+        runtime_schema.apply_runtime_schema(engine)
+        _seed(storage_dir, engine, catalog)
+        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        # 从目录中间均匀取样，避免只删“最早写入”的文件
+        step = max(1, catalog // max(1, delete))
+        ids = [_product_id(idx) for idx in range(0, catalog, step)][:delete]
+        image_paths: dict[str, str | None] = {}
+        with SessionLocal() as db:
+            for product_id in ids:
+                rec = db.get(ProductIndex, product_id)
+                image_paths[product_id] = rec.image_path if rec else None
+
+        report: dict[str, Any] = {"catalog": catalog, "deleted": len(ids)}
+        with SessionLocal() as db:
+            started = time.perf_counter()
+            payload = ProductBatchDeleteRequest(ids=ids, remove_doubao_artifacts=True)
+            _batch_delete_products_impl(payload=payload, db=db)
+            if mode == "inline_rglob":
+                for product_id in ids:
+                    _legacy_remove_product_images(product_id, image_paths[product_id])
+                    remove_rel_dir(f"doubao_runs/{product_id}")
+            report["request_ms"] = round((time.perf_counter() - started) * 1000.0, 1)
+        if mode == "tombstone":
+            with SessionLocal() as db:
+                started = time.perf_counter()
+                reclaimed = reclaim_product_storage(db)
+                report["reclaim_ms"] = round((time.perf_counter() - started) * 1000.0, 1)
+                report["reclaim"] = reclaimed.as_dict()
+        leftovers = sum(1 for product_id in ids for _ in (storage_dir / "images").glob(f"*/*/{product_id}.*"))
+        report["leftover_image_files"] = leftovers
+        engine.dispose()
+    return report
+
+
+def main() -> None:
+    args = parse_args()
+    catalogs = sorted({int(item) for item in str(args.catalogs).split(",") if item.strip()})
+    results: dict[str, list[dict[str, Any]]] = {"inline_rglob": [], "tombstone": []}
+    for catalog in catalogs:
+        for mode in results:
+            results[mode].append(_run(catalog, min(args.delete, catalog), mode))
+    print(json.dumps({"status": "ok", "delete": args.delete, **results}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
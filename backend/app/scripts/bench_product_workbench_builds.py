@@ -0,0 +1,217 @@
+import argparse
+import json
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models import Base, ProductIndex
+from app.routes import products as products_routes
+from app.schemas import ProductAnalysisBuildRequest, ProductRouteMappingBuildRequest
+from app.services.storage import now_iso, save_product_json
+from app.settings import settings
+
+CATEGORY = "shampoo"
+
+ROUTE_MAPPING_RESULT: dict[str, Any] = {
+    "category": CATEGORY,
+    "primary_route": {"route_key": "deep-oil-control", "route_title": "深层控油型", "confidence": 92, "reason": "bench"},
+    "secondary_route": {"route_key": "moisture-balance", "route_title": "水油平衡型", "confidence": 70, "reason": "bench"},
+    "route_scores": [
+        {"route_key": "deep-oil-control", "route_title": "深层控油型", "confidence": 92, "reason": "bench"},
+        {"route_key": "moisture-balance", "route_title": "水油平衡型", "confidence": 70, "reason": "bench"},
+        {"route_key": "gentle-soothing", "route_title": "温和舒缓型", "confidence": 54, "reason": "bench"},
+        {"route_key": "anti-hair-loss", "route_title": "防脱强韧型", "confidence": 30, "reason": "bench"},
+        {"route_key": "anti-dandruff-itch", "route_title": "去屑止痒型", "confidence": 20, "reason": "bench"},
+    ],
+    "evidence": {"positive": [], "counter": []},
+    "confidence_reason": "bench",
+    "needs_review": False,
+    "analysis_text": "{}",
+    "model": "bench-model",
+}
+
+PRODUCT_PROFILE_RESULT: dict[str, Any] = {
+    "schema_version": "product_profile_shampoo.v1",
+    "category": CATEGORY,
+    "route_key": "deep-oil-control",
+    "route_title": "深层控油型",
+    "headline": "基准测试用洗发水",
+    "positioning_summary": "这是一款用于基准测试的洗发水，定位与控油清洁一致。",
+    "subtype_fit_verdict": "strong_fit",
+    "subtype_fit_reason": "基准测试数据，route 证据集中在前位清洁相关成分。",
+    "best_for": ["头皮偏油人群", "夏季易出油头皮", "想要清爽洗感用户"],
+    "not_ideal_for": ["极干头皮", "重度受损发丝", "高敏脆弱头皮"],
+    "usage_tips": ["搭配护发素平衡发尾", "可在夏季高频使用", "重点按摩头皮区域"],
+    "watchouts": ["干性头皮注意频率", "染烫发尾注意后续保湿", "不主打强修护"],
+    "key_ingredients": [
+        {"ingredient_name_cn": "甘油", "ingredient_name_en": "Glycerin", "rank": 1, "role": "保湿", "impact": "基准。"}
+    ],
+    "evidence": {"positive": [], "counter": [], "missing_codes": []},
+    "diagnostics": {
+        key: {"score": 3, "reason": "基准测试。"}
+        for key in (
+            "cleanse_intensity",
+            "oil_control_support",
+            "dandruff_itch_support",
+            "scalp_soothing_support",
+            "hair_strengthening_support",
+            "moisture_balance_support",
+            "daily_use_friendliness",
+            "residue_weight",
+        )
+    },
+    "confidence": 80,
+    "confidence_reason": "基准测试。",
+    "needs_review": False,
+    "model": "bench-model",
+}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Benchmark route-mapping and product-analysis builds: cold build (serial vs pooled model calls) "
+            "and no-op rebuild (fingerprint skips, bulk preload)."
+        )
+    )
+    parser.add_argument("--products", type=int, default=200, help="Seeded products.")
+    parser.add_argument("--model-latency-ms", type=float, default=50.0, help="Simulated model call latency.")
+    parser.add_argument("--concurrency", type=int, default=8, help="product_workbench_model_concurrency for pooled runs.")
+    return parser.parse_args()
+
+
+def _product_doc(idx: int) -> dict[str, Any]:
+    return {
+        "product": {"category": CATEGORY, "brand": f"Brand{idx % 17}", "name": f"Bench Product {idx}"},
+        "summary": {"one_sentence": "bench", "pros": ["温和"], "cons": [], "who_for": [], "who_not_for": []},
+        "ingredients": [
+            {
+                "name": name,
+                "type": "活性成分",
+                "functions": ["清洁"],
+                "risk": "low",
+                "notes": "",
+                "rank": rank,
+                "abundance_level": "major" if rank <= 2 else "trace",
+                "order_confidence": 90,
+            }
+            for rank, name in enumerate(["甘油 (Glycerin)", f"成分{idx % 50:03d}", "水 (Aqua)"], start=1)
+        ],
+        "evidence": {"doubao_raw": ""},
+    }
+
+
+def _fresh_env(tmp: Path, name: str, products: int):
+    root = tmp / name
+    settings.storage_dir = str(root / "storage")
+    settings.user_storage_dir = str(root / "user_storage")
+    (root / "storage").mkdir(parents=True, exist_ok=True)
+    engine = create_engine(f"sqlite:///{root / 'bench.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with SessionLocal() as db:
+        for idx in range(max(1, products)):
+            product_id = f"bench-{idx:05d}"
+            doc = _product_doc(idx)
+            db.add(
+                ProductIndex(
+                    id=product_id,
+                    category=CATEGORY,
+                    brand=doc["product"]["brand"],
+                    name=doc["product"]["name"],
+                    one_sentence="bench",
+                    tags_json="[]",
+                    image_path=None,
+                    json_path=save_product_json(product_id, doc, category=CATEGORY),
+                    created_at=now_iso(),
+                )
+            )
+        db.commit()
+    return SessionLocal
+
+
+def _run(SessionLocal, counters: dict[str, int], kind: str, concurrency: int) -> dict[str, Any]:
+    settings.product_workbench_model_concurrency = concurrency
+    for key in counters:
+        counters[key] = 0
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        if kind == "route_mapping":
+            result = products_routes._build_product_route_mapping_impl(
+                ProductRouteMappingBuildRequest(category=CATEGORY), db, event_callback=None
+            )
+        else:
+            result = products_routes._build_product_analysis_impl(
+                ProductAnalysisBuildRequest(category=CATEGORY), db, event_callback=None
+            )
+    return {
+        "wall_ms": round((time.perf_counter() - started) * 1000, 1),
+        "concurrency": concurrency,
+        "submitted_to_model": result.submitted_to_model,
+        "created": result.created,
+        "skipped": result.skipped,
+        "failed": result.failed,
+        "model_calls": counters["model_calls"],
+        "exists_rel_path_calls": counters["exists_calls"],
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    latency_s = max(0.0, float(args.model_latency_ms)) / 1000
+    counters = {"model_calls": 0, "exists_calls": 0}
+    counter_lock = threading.Lock()
+    original_exists = products_routes.exists_rel_path
+
+    def fake_run_capability_now(capability: str, input_payload: dict, trace_id: str | None = None, event_callback=None):
+        with counter_lock:
+            counters["model_calls"] += 1
+        time.sleep(latency_s)
+        if capability.startswith("doubao.route_mapping_"):
+            return {**ROUTE_MAPPING_RESULT, "rules_version": products_routes.MOBILE_RULES_VERSION}
+        return dict(PRODUCT_PROFILE_RESULT)
+
+    def counting_exists(rel_path):
+        counters["exists_calls"] += 1
+        return original_exists(rel_path)
+
+    products_routes.run_capability_now = fake_run_capability_now
+    products_routes.exists_rel_path = counting_exists
+
+    products = max(1, int(args.products))
+    concurrency = max(1, int(args.concurrency))
+    report: dict[str, Any] = {
+        "products": products,
+        "model_latency_ms": float(args.model_latency_ms),
+        "scenarios": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="bench-product-workbench-") as tmp_dir:
+        tmp = Path(tmp_dir)
+
+        SessionLocal = _fresh_env(tmp, "serial", products)
+        report["scenarios"]["route_mapping_cold_serial"] = _run(SessionLocal, counters, "route_mapping", 1)
+        report["scenarios"]["product_analysis_cold_serial"] = _run(SessionLocal, counters, "product_analysis", 1)
+
+        SessionLocal = _fresh_env(tmp, "pooled", products)
+        report["scenarios"]["route_mapping_cold_pooled"] = _run(SessionLocal, counters, "route_mapping", concurrency)
+        report["scenarios"]["route_mapping_noop_rebuild"] = _run(SessionLocal, counters, "route_mapping", concurrency)
+        report["scenarios"]["product_analysis_cold_pooled"] = _run(SessionLocal, counters, "product_analysis", concurrency)
+        report["scenarios"]["product_analysis_noop_rebuild"] = _run(
+            SessionLocal, counters, "product_analysis", concurrency
+        )
+
+    scenarios = report["scenarios"]
+    for kind in ("route_mapping", "product_analysis"):
+        serial_ms = scenarios[f"{kind}_cold_serial"]["wall_ms"]
+        pooled_ms = scenarios[f"{kind}_cold_pooled"]["wall_ms"]
+        report[f"{kind}_cold_speedup"] = round(serial_ms / pooled_ms, 2) if pooled_ms else None
+    print(json.dumps({"status": "ok", **report}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
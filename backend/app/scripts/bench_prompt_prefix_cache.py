@@ -0,0 +1,109 @@
+import argparse
+import json
+import time
+from typing import Any
+
+from app.ai import orchestrator
+from app.ai.capabilities import _load_route_mapping_decision_table, execute_capability
+from app.services import doubao_openai_client
+from app.services.fake_responses_provider import FakeResponsesProvider
+from app.settings import settings
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Offline token/cost comparison for batch route mapping: full prompt vs reused prompt prefix."
+    )
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--category", default="shampoo")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated upstream latency per request.")
+    return parser.parse_args()
+
+
+def _responder(category: str):
+    decision_table = _load_route_mapping_decision_table(category)
+    scores = [
+        {"route_key": item["route_key"], "confidence": max(0, 80 - idx * 8), "reason": "bench"}
+        for idx, item in enumerate(decision_table["route_candidates"])
+    ]
+    text = json.dumps(
+        {
+            "category": category,
+            "rules_version": str(decision_table.get("rules_version") or ""),
+            "primary_route": scores[0],
+            "secondary_route": scores[1],
+            "route_scores": scores,
+            "evidence": {"positive": [], "counter": []},
+            "confidence_reason": "bench",
+            "needs_review": False,
+        },
+        ensure_ascii=False,
+    )
+    return lambda _prompt: text
+
+
+def _run_scenario(*, calls: int, category: str, latency_seconds: float, prefix_cache: bool) -> dict[str, Any]:
+    provider = FakeResponsesProvider(_responder(category), latency_seconds=latency_seconds)
+    doubao_openai_client.OpenAI = lambda **_kwargs: provider
+    doubao_openai_client.reset_prefix_response_cache()
+    settings.doubao_prompt_prefix_cache_enabled = prefix_cache
+
+    pricing = orchestrator._load_model_token_pricing()
+    model = settings.doubao_pro_model
+    cost = 0.0
+    statuses: dict[str, int] = {}
+    started = time.perf_counter()
+    for idx in range(calls):
+        context = {"product": {"product_id": f"bench-{idx}", "brand": "bench", "name": f"产品{idx}"}, "ingredients": ["水", f"成分{idx}"]}
+        result = execute_capability(
+            f"doubao.route_mapping_{category}",
+            {"product_context_json": json.dumps(context, ensure_ascii=False)},
+        )
+        status = str(result.request_payload.get("prompt_prefix_cache") or "disabled")
+        statuses[status] = statuses.get(status, 0) + 1
+        usage = orchestrator._extract_usage(result.response_payload)
+        cost += orchestrator._estimate_cost(model, usage, model_token_pricing=pricing, model_costs={}) or 0.0
+    elapsed = time.perf_counter() - started
+
+    stats = dict(provider.stats)
+    return {
+        "requests": stats["requests"],
+        "prefix_requests": stats["prefix_requests"],
+        "prefix_tokens": stats["prefix_tokens"],
+        "input_tokens": stats["input_tokens"],
+        "cached_tokens": stats["cached_tokens"],
+        "uncached_input_tokens": stats["input_tokens"] - stats["cached_tokens"],
+        "prefix_status": statuses,
+        "estimated_cost": round(cost, 6),
+        "elapsed_ms": round(elapsed * 1000, 1),
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    calls = max(1, int(args.calls))
+    category = str(args.category).strip().lower()
+    latency_seconds = max(0.0, float(args.latency_ms)) / 1000.0
+
+    settings.doubao_mode = "real"
+    settings.doubao_api_key = settings.doubao_api_key or "bench-key"
+    settings.doubao_max_retries = 0
+
+    full = _run_scenario(calls=calls, category=category, latency_seconds=latency_seconds, prefix_cache=False)
+    prefixed = _run_scenario(calls=calls, category=category, latency_seconds=latency_seconds, prefix_cache=True)
+    report = {
+        "calls": calls,
+        "category": category,
+        "token_note": "fake provider counts 1 char = 1 token",
+        "full_prompt": full,
+        "prefix_reuse": prefixed,
+        "uncached_input_reduction": round(
+            1 - prefixed["uncached_input_tokens"] / max(1, full["uncached_input_tokens"]), 4
+        ),
+        "cost_reduction": round(1 - prefixed["estimated_cost"] / max(1e-12, full["estimated_cost"]), 4),
+    }
+    print(json.dumps({"status": "ok", **report}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import argparse
+import json
+import re
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from app.ai import capabilities
+from app.ai.prompts import (
+    DEFAULT_PROMPT_VERSIONS,
+    PROMPTS_ROOT,
+    load_prompt,
+    prompt_registry_stats,
+    render_prompt,
+    reset_prompt_registry,
+)
+from app.constants import MOBILE_RULES_VERSION
+
+_PLACEHOLDER = re.compile(r"\{\{\s*([a-zA-Z0-9_]+)\s*\}\}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Microbenchmark per-call prompt overhead: legacy read+regex vs compiled prompt registry."
+    )
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--category", default="shampoo", help="Route mapping category used for the decision-table scenario.")
+    return parser.parse_args()
+
+
+def _legacy_load_prompt(prompt_key: str) -> str:
+    version = DEFAULT_PROMPT_VERSIONS[prompt_key]
+    key_path = Path(*prompt_key.split("."))
+    md_path = PROMPTS_ROOT / key_path / f"{version}.md"
+    txt_path = PROMPTS_ROOT / key_path / f"{version}.txt"
+    path = md_path if md_path.exists() else txt_path
+    if not path.exists():
+        raise FileNotFoundError(path)
+    return path.read_text(encoding="utf-8").strip()
+
+
+def _legacy_render(template: str, context: dict[str, Any]) -> str:
+    rendered = _PLACEHOLDER.sub(lambda m: str(context[m.group(1)]), template)
+    if _PLACEHOLDER.findall(rendered):
+        raise ValueError("unresolved")
+    return rendered
+
+
+def _legacy_decision_table_json(category: str) -> str:
+    path = Path(capabilities.__file__).resolve().parent / "decision_tables" / category / f"v{MOBILE_RULES_VERSION}.json"
+    if not path.exists():
+        raise FileNotFoundError(path)
+    return json.dumps(json.loads(path.read_text(encoding="utf-8")), ensure_ascii=False)
+
+
+def _measure(iterations: int, fn: Callable[[], str]) -> dict[str, Any]:
+    fn()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        out = fn()
+    elapsed = time.perf_counter() - started
+    return {"per_call_us": round(elapsed / iterations * 1e6, 2), "rendered_chars": len(out)}
+
+
+def main() -> None:
+    args = parse_args()
+    iterations = max(1, int(args.iterations))
+    category = str(args.category).strip().lower()
+    route_key = f"doubao.route_mapping_{category}"
+    product_context_json = json.dumps({"product": {"brand": "bench", "name": "bench"}, "ingredients": []}, ensure_ascii=False)
+
+    reset_prompt_registry()
+    compiled_keys = [key for key in sorted(DEFAULT_PROMPT_VERSIONS) if load_prompt(key).text]
+
+    def legacy_stage2() -> str:
+        return _legacy_render(_legacy_load_prompt("doubao.stage2_struct"), {"vision_text": "bench"})
+
+    def registry_stage2() -> str:
+        return render_prompt(load_prompt("doubao.stage2_struct"), {"vision_text": "bench"})
+
+    def legacy_route_mapping() -> str:
+        return _legacy_render(
+            _legacy_load_prompt(route_key),
+            {"decision_table_json": _legacy_decision_table_json(category), "product_context_json": product_context_json},
+        )
+
+    def registry_route_mapping() -> str:
+        return render_prompt(
+            load_prompt(route_key),
+            {
+                "decision_table_json": capabilities._load_route_mapping_decision_table_json(category),
+                "product_context_json": product_context_json,
+            },
+        )
+
+    scenarios = {
+        "stage2_struct_legacy": _measure(iterations, legacy_stage2),
+        "stage2_struct_registry": _measure(iterations, registry_stage2),
+        "route_mapping_legacy": _measure(iterations, legacy_route_mapping),
+        "route_mapping_registry": _measure(iterations, registry_route_mapping),
+    }
+    assert legacy_route_mapping() == registry_route_mapping()
+    report = {
+        "iterations": iterations,
+        "compiled_prompts": len(compiled_keys),
+        "prefix_hash": {route_key: load_prompt(route_key).prefix_hash},
+        "scenarios": scenarios,
+        "registry_stats": prompt_registry_stats(),
+        "stage2_speedup": round(
+            scenarios["stage2_struct_legacy"]["per_call_us"] / max(0.01, scenarios["stage2_struct_registry"]["per_call_us"]), 1
+        ),
+        "route_mapping_speedup": round(
+            scenarios["route_mapping_legacy"]["per_call_us"] / max(0.01, scenarios["route_mapping_registry"]["per_call_us"]), 1
+        ),
+    }
+    print(json.dumps({"status": "ok", **report}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+import argparse
+import asyncio
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from fastapi import FastAPI
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models import Base, ProductIndex
+from app.db.session import _engine_kwargs_for, get_db, install_sqlite_performance_mode
+from app.platform import request_metrics
+from app.routes import products as products_routes
+from app.services.storage import save_product_json
+from app.settings import settings
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Per-request overhead of Server-Timing / Prometheus instrumentation on real product routes."
+    )
+    parser.add_argument("--products", type=int, default=200, help="Seeded products.")
+    parser.add_argument("--requests", type=int, default=300, help="Requests per route per round.")
+    parser.add_argument("--rounds", type=int, default=7, help="Rounds; each alternates plain / instrumented blocks.")
+    parser.add_argument("--block", type=int, default=25, help="Requests per alternating block.")
+    return parser.parse_args()
+
+
+class _ElapsedProbe:
+    """记录内层 ASGI app 的耗时；夹在埋点中间件内外两侧，差值即中间件自身开销。"""
+
+    def __init__(self, app: Any, *, sink: list[float]) -> None:
+        self.app = app
+        self.sink = sink
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        started = time.perf_counter()
+        await self.app(scope, receive, send)
+        self.sink.append(time.perf_counter() - started)
+
+
+def _build_app(SessionLocal, *, instrumented: bool, probes: tuple[list[float], list[float]] | None = None) -> FastAPI:
+    app = FastAPI()
+    if probes is not None:
+        app.add_middleware(_ElapsedProbe, sink=probes[0])
+    if instrumented:
+        request_metrics.install_request_metrics(app)
+    if probes is not None:
+        app.add_middleware(_ElapsedProbe, sink=probes[1])
+    app.include_router(products_routes.router)
+
+    def override_get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    return app
+
+
+def _seed(SessionLocal, count: int) -> list[str]:
+    ids: list[str] = []
+    with SessionLocal() as db:
+        for seq in range(count):
+            product_id = f"bench-product-{seq:05d}"
+            category = ("shampoo", "bodywash", "lotion")[seq % 3]
+            doc = {
+                "product": {"category": category, "brand": f"brand-{seq % 17}", "name": f"bench {seq}"},
+                "summary": {"one_sentence": "bench"},
+                "ingredients": [{"name": f"ingredient-{i}", "rank": i} for i in range(20)],
+                "evidence": {},
+            }
+            rel = save_product_json(product_id, doc, category=category)
+            db.add(
+                ProductIndex(
+                    id=product_id,
+                    category=category,
+                    brand=doc["product"]["brand"],
+                    name=doc["product"]["name"],
+                    one_sentence="bench",
+                    tags_json="[]",
+                    json_path=rel,
+                    created_at=f"2026-01-01T00:00:{seq % 60:02d}.{seq:06d}Z",
+                )
+            )
+            ids.append(product_id)
+        db.commit()
+    return ids
+
+
+async def _call(app: FastAPI, path: str, query: str = "") -> int:
+    status = 0
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1),
+        "server": ("bench", 80),
+    }
+
+    async def receive() -> dict[str, Any]:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict[str, Any]) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = int(message["status"])
+
+    await app(scope, receive, send)
+    return status
+
+
+_CASES = {
+    "list_products": lambda ids, seq: ("/api/products", f"limit=50&offset={seq % 4 * 50}"),
+    "get_product": lambda ids, seq: (f"/api/products/{ids[seq % len(ids)]}", ""),
+}
+
+
+async def _timed_block(app: FastAPI, calls: list[tuple[str, str]], *, instrumented: bool) -> list[float]:
+    # 关闭埋点的一侧连 Engine 监听器一起卸掉；切换后先打一发不计时的请求，避免把监听器重建算进样本
+    if instrumented:
+        request_metrics.install_engine_listeners()
+    else:
+        request_metrics.remove_engine_listeners()
+    await _call(app, *calls[0])
+    samples: list[float] = []
+    for path, query in calls:
+        started = time.perf_counter()
+        status = await _call(app, path, query)
+        samples.append(time.perf_counter() - started)
+        if status != 200:
+            raise RuntimeError(f"unexpected status {status} for {path}")
+    return samples
+
+
+async def _round(
+    plain_app: FastAPI, instrumented_app: FastAPI, ids: list[str], requests: int, block: int
+) -> dict[str, tuple[float, float]]:
+    """小块交替两个 app（先后顺序也交替），抵消 CPU 频率 / 缓存漂移；返回 (plain, instrumented) 中位数。"""
+    out: dict[str, tuple[float, float]] = {}
+    for name, make in _CASES.items():
+        plain: list[float] = []
+        instrumented: list[float] = []
+        for start in range(0, requests, block):
+            calls = [make(ids, seq) for seq in range(start, min(requests, start + block))]
+            order = (False, True) if (start // block) % 2 == 0 else (True, False)
+            for flag in order:
+                samples = await _timed_block(instrumented_app if flag else plain_app, calls, instrumented=flag)
+                (instrumented if flag else plain).extend(samples)
+        out[name] = (statistics.median(plain), statistics.median(instrumented))
+    return out
+
+
+async def _bench(args: argparse.Namespace, tmp: Path) -> dict[str, Any]:
+    settings.storage_dir = str(tmp / "storage")
+    url = f"sqlite:///{tmp / 'bench.db'}"
+    engine = create_engine(url, **_engine_kwargs_for(url))
+    install_sqlite_performance_mode(engine)
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    ids = _seed(SessionLocal, max(1, int(args.products)))
+    requests = max(1, int(args.requests))
+    block = max(1, int(args.block))
+
+    plain_app = _build_app(SessionLocal, instrumented=False)
+    instrumented_app = _build_app(SessionLocal, instrumented=True)
+    # 预热：路由编译、连接池、页缓存
+    await _round(plain_app, instrumented_app, ids, max(20, requests // 5), block)
+
+    plain: dict[str, list[float]] = {}
+    instrumented: dict[str, list[float]] = {}
+    for _ in range(max(1, int(args.rounds))):
+        for name, (base, with_metrics) in (await _round(plain_app, instrumented_app, ids, requests, block)).items():
+            plain.setdefault(name, []).append(base)
+            instrumented.setdefault(name, []).append(with_metrics)
+
+    # 同进程内夹层计时：不受两组样本之间抖动的影响
+    inner: list[float] = []
+    outer: list[float] = []
+    probe_app = _build_app(SessionLocal, instrumented=True, probes=(inner, outer))
+    request_metrics.install_engine_listeners()
+    self_us: dict[str, float] = {}
+    for name, make in _CASES.items():
+        inner.clear()
+        outer.clear()
+        for seq in range(requests):
+            await _call(probe_app, *make(ids, seq))
+        self_us[name] = statistics.median(o - i for o, i in zip(outer, inner)) * 1e6
+    engine.dispose()
+
+    routes: dict[str, Any] = {}
+    for name in plain:
+        base = statistics.median(plain[name])
+        with_metrics = statistics.median(instrumented[name])
+        routes[name] = {
+            "plain_median_ms": round(base * 1000, 3),
+            "instrumented_median_ms": round(with_metrics * 1000, 3),
+            "overhead_us": round((with_metrics - base) * 1e6, 1),
+            "middleware_self_us": round(self_us[name], 1),
+            "middleware_self_pct": round(self_us[name] / 1e6 / base * 100, 2),
+            "overhead_pct": round((with_metrics - base) / base * 100, 2),
+        }
+    exported = request_metrics.render_request_metrics()
+    return {
+        "products": len(ids),
+        "requests_per_round": requests,
+        "rounds": int(args.rounds),
+        "routes": routes,
+        "max_overhead_pct": max(item["overhead_pct"] for item in routes.values()),
+        "max_middleware_self_pct": max(item["middleware_self_pct"] for item in routes.values()),
+        "exported_series": sum(1 for line in exported.splitlines() if line and not line.startswith("#")),
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    with tempfile.TemporaryDirectory(prefix="bench-request-metrics-") as tmp:
+        report = asyncio.run(_bench(args, Path(tmp)))
+    print(json.dumps({"status": "ok", **report}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import argparse
+import json
+import tempfile
+from pathlib import Path
+from typing import Any, Callable
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.db import runtime_schema
+from app.db.models import Base
+from app.db.session import get_db
+from app.routes.ingest import router as ingest_router
+from app.routes.mobile import router as mobile_router
+from app.routes.products import router as products_router
+from app.settings import settings
+
+# (method, path, 旧实现中该请求会执行的补丁组 / 仅 checkfirst 的表)
+SCENARIOS: tuple[tuple[str, str, tuple[str, ...], tuple[str, ...]], ...] = (
+    ("GET", "/api/upload/jobs", ("upload_ingest_jobs",), ()),
+    ("GET", "/api/products/ingredients/library/jobs", ("ingredient_library_build_jobs",), ()),
+    ("GET", "/api/products/ingredients/library?category=shampoo", (), ("ingredient_library_index",)),
+    ("GET", "/api/mobile/user-products", (), ("user_upload_assets", "user_products")),
+)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Count SQL statements per request: legacy per-request schema checks vs memoized runtime schema."
+    )
+    parser.add_argument("--requests", type=int, default=20, help="Requests per scenario.")
+    return parser.parse_args()
+
+
+def _legacy_table_checks(engine, table_names: tuple[str, ...]) -> None:
+    # 旧实现里不带补列的 _ensure_*_table：每次请求都对相关表做 checkfirst。
+    for name in table_names:
+        Base.metadata.tables[name].create(bind=engine, checkfirst=True)
+
+
+def _measure(client: TestClient, counter: dict[str, int], method: str, path: str, before: Callable[[], None], n: int) -> dict[str, Any]:
+    counts: list[int] = []
+    status = None
+    for _ in range(n):
+        counter["n"] = 0
+        before()
+        resp = client.request(method, path)
+        status = resp.status_code
+        counts.append(counter["n"])
+    return {"status": status, "queries_per_request": round(sum(counts) / len(counts), 2), "first": counts[0]}
+
+
+def main() -> None:
+    args = parse_args()
+    n = max(1, int(args.requests))
+    report: dict[str, Any] = {"requests": n, "schema_version": runtime_schema.RUNTIME_SCHEMA_VERSION, "scenarios": {}}
+
+    with tempfile.TemporaryDirectory(prefix="bench-query-count-") as tmp:
+        settings.storage_dir = str(Path(tmp) / "storage")
+        settings.user_storage_dir = str(Path(tmp) / "user_storage")
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'bench.db'}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        runtime_schema.apply_runtime_schema(engine)
+        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        counter = {"n": 0}
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _count(*_args, **_kwargs):
+            counter["n"] += 1
+
+        app = FastAPI()
+        app.include_router(ingest_router)
+        app.include_router(products_router)
+        app.include_router(mobile_router)
+
+        def override_get_db():
+            db = SessionLocal()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+
+        with TestClient(app) as client:
+            for method, path, groups, tables in SCENARIOS:
+
+                def legacy_before(groups: tuple[str, ...] = groups, tables: tuple[str, ...] = tables) -> None:
+                    runtime_schema.reset_runtime_schema_memo()
+                    for group in groups:
+                        runtime_schema.RUNTIME_SCHEMA_PATCHERS[group](engine)
+                    _legacy_table_checks(engine, tables)
+                    # 旧实现没有版本戳：直接标记已校验，只统计补丁本身的目录查询。
+                    runtime_schema._VERIFIED_ENGINES[engine] = runtime_schema.RUNTIME_SCHEMA_VERSION
+
+                legacy = _measure(client, counter, method, path, legacy_before, n)
+                runtime_schema.reset_runtime_schema_memo()
+                memoized = _measure(client, counter, method, path, lambda: None, n)
+                report["scenarios"][f"{method} {path}"] = {
+                    "legacy_per_request_checks": legacy,
+                    "memoized_runtime_schema": memoized,
+                    "queries_saved_per_request": round(
+                        legacy["queries_per_request"] - memoized["queries_per_request"], 2
+                    ),
+                }
+        engine.dispose()
+
+    print(json.dumps({"status": "ok", **report}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
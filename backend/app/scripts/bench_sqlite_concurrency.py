@@ -0,0 +1,174 @@
+import argparse
+import json
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models import Base, MobileClientEvent
+from app.db.session import _engine_kwargs_for, describe_sqlite_connection_pragmas, install_sqlite_performance_mode
+from app.db.write_queue import describe_sqlite_write_queue, run_serialized_write
+from app.settings import settings
+
+VARIANTS = (
+    # name, performance_mode, single_writer
+    ("default", False, False),
+    ("tuned_pragmas", True, False),
+    ("tuned_pragmas_single_writer", True, True),
+)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Concurrent SQLite read/write benchmark: default journal vs WAL pragmas vs WAL + single-writer queue."
+    )
+    parser.add_argument("--writers", type=int, default=8, help="Threads committing one event per transaction.")
+    parser.add_argument("--readers", type=int, default=4, help="Threads running owner-scope event queries.")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Run time per variant.")
+    parser.add_argument("--seed-rows", type=int, default=20_000)
+    parser.add_argument("--busy-timeout-ms", type=int, default=5000)
+    return parser.parse_args()
+
+
+def _percentile(values: list[float], pct: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return round(ordered[idx], 2)
+
+
+def _event(owner_idx: int, seq: int) -> MobileClientEvent:
+    return MobileClientEvent(
+        event_id=str(uuid.uuid4()),
+        owner_type="device",
+        owner_id=f"bench-device-{owner_idx % 200:04d}",
+        session_id=f"bench-session-{owner_idx % 500:04d}",
+        name="page_view" if seq % 3 else "compare_progress",
+        page="/m/compare",
+        props_json=json.dumps({"seq": seq, "dwell_ms": seq % 9000}, ensure_ascii=False),
+        created_at=time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime()) + f".{seq % 1000000:06d}Z",
+    )
+
+
+def _run_variant(tmp: Path, name: str, *, performance_mode: bool, single_writer: bool, args: argparse.Namespace) -> dict[str, Any]:
+    settings.db_sqlite_performance_mode = performance_mode
+    settings.db_sqlite_single_writer = single_writer
+    settings.db_sqlite_busy_timeout_ms = int(args.busy_timeout_ms)
+    url = f"sqlite:///{tmp / f'{name}.db'}"
+    engine = create_engine(url, **_engine_kwargs_for(url))
+    install_sqlite_performance_mode(engine)
+    Base.metadata.create_all(bind=engine)
+    SessionMaker = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with SessionMaker() as db:
+        db.add_all(_event(i, i) for i in range(max(0, int(args.seed_rows))))
+        db.commit()
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    write_latencies: list[float] = []
+    read_latencies: list[float] = []
+    errors = {"write_locked": 0, "read_locked": 0}
+
+    def writer(idx: int) -> None:
+        seq = 0
+        local: list[float] = []
+        while not stop.is_set():
+            seq += 1
+            row = _event(idx * 100_000 + seq, seq)
+            started = time.perf_counter()
+            db = SessionMaker()
+            try:
+                run_serialized_write(db, lambda session, row=row: session.add(row))
+                local.append((time.perf_counter() - started) * 1000)
+            except OperationalError:
+                db.rollback()
+                with lock:
+                    errors["write_locked"] += 1
+            finally:
+                db.close()
+        with lock:
+            write_latencies.extend(local)
+
+    def reader(idx: int) -> None:
+        local: list[float] = []
+        n = 0
+        while not stop.is_set():
+            n += 1
+            owner_id = f"bench-device-{(idx * 7 + n) % 200:04d}"
+            started = time.perf_counter()
+            db = SessionMaker()
+            try:
+                db.execute(
+                    select(MobileClientEvent.event_id, MobileClientEvent.name, MobileClientEvent.created_at)
+                    .where(MobileClientEvent.owner_type == "device", MobileClientEvent.owner_id == owner_id)
+                    .order_by(MobileClientEvent.created_at.desc())
+                    .limit(50)
+                ).all()
+                db.execute(select(func.count()).select_from(MobileClientEvent).where(MobileClientEvent.name == "page_view")).scalar()
+                local.append((time.perf_counter() - started) * 1000)
+            except OperationalError:
+                with lock:
+                    errors["read_locked"] += 1
+            finally:
+                db.close()
+        with lock:
+            read_latencies.extend(local)
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(max(0, int(args.writers)))]
+    threads += [threading.Thread(target=reader, args=(i,)) for i in range(max(0, int(args.readers)))]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(max(0.1, float(args.seconds)))
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    report = {
+        "pragmas": describe_sqlite_connection_pragmas(engine),
+        "writes": len(write_latencies),
+        "writes_per_s": round(len(write_latencies) / elapsed, 1),
+        "write_p50_ms": _percentile(write_latencies, 50),
+        "write_p99_ms": _percentile(write_latencies, 99),
+        "write_max_ms": _percentile(write_latencies, 100),
+        "reads": len(read_latencies),
+        "reads_per_s": round(len(read_latencies) / elapsed, 1),
+        "read_p50_ms": _percentile(read_latencies, 50),
+        "read_p99_ms": _percentile(read_latencies, 99),
+        **errors,
+        "single_writer_queue": describe_sqlite_write_queue(engine),
+    }
+    engine.dispose()
+    return report
+
+
+def main() -> None:
+    args = parse_args()
+    with tempfile.TemporaryDirectory(prefix="bench-sqlite-") as tmp:
+        variants = {
+            name: _run_variant(Path(tmp), name, performance_mode=perf, single_writer=single, args=args)
+            for name, perf, single in VARIANTS
+        }
+    baseline = variants["default"]
+    best = variants["tuned_pragmas_single_writer"]
+    report = {
+        "writers": int(args.writers),
+        "readers": int(args.readers),
+        "seconds": float(args.seconds),
+        "variants": variants,
+        "write_throughput_gain": round(best["writes_per_s"] / max(0.1, baseline["writes_per_s"]), 2),
+        "read_throughput_gain": round(best["reads_per_s"] / max(0.1, baseline["reads_per_s"]), 2),
+    }
+    print(json.dumps({"status": "ok", **report}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+# 每个角色在全新子进程里导入入口模块并构建 ASGI app；worker_eager 复现旧行为（worker 也先导入全部路由 + OpenAI SDK）
+TARGETS: dict[str, dict[str, Any]] = {
+    "api": {"module": "app.entrypoints.api", "preload": []},
+    "worker": {"module": "app.entrypoints.worker", "preload": []},
+    "worker_eager": {
+        "module": "app.entrypoints.worker",
+        "preload": ["openai", "app.routes.ingest", "app.routes.products", "app.routes.ai", "app.routes.mobile"],
+    },
+}
+
+HEAVY_MODULES = (
+    "openai",
+    "PIL",
+    "pillow_heif",
+    "app.schemas",
+    "app.ai.capabilities",
+    "app.routes.products",
+    "app.routes.mobile",
+    "app.routes.mobile_selection",
+    "app.routes.ingest",
+)
+
+_CHILD = """
+import importlib, json, resource, sys, time
+started = time.perf_counter()
+for name in {preload!r}:
+    importlib.import_module(name)
+app = importlib.import_module({module!r}).app
+elapsed = time.perf_counter() - started
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{
+    "startup_ms": elapsed * 1000.0,
+    "max_rss_kb": rss / 1024 if sys.platform == "darwin" else rss,
+    "modules": len(sys.modules),
+    "routes": len(app.routes),
+    "heavy_loaded": [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Cold start time / peak RSS per runtime role, each round in a fresh interpreter.")
+    parser.add_argument("--rounds", type=int, default=5, help="Fresh subprocesses per role.")
+    parser.add_argument("--roles", default=",".join(TARGETS), help=f"Comma-separated subset of: {', '.join(TARGETS)}.")
+    return parser.parse_args()
+
+
+def _child_env(storage_root: Path) -> dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(BACKEND_DIR), env.get("PYTHONPATH", "")]))
+    # api 入口会创建静态目录；指到临时目录，避免基准污染真实 storage
+    env["STORAGE_DIR"] = str(storage_root / "storage")
+    env["USER_STORAGE_DIR"] = str(storage_root / "user_storage")
+    env.pop("RUNTIME_ROLE", None)
+    return env
+
+
+def measure_startup(role: str, *, env: dict[str, str]) -> dict[str, Any]:
+    target = TARGETS[role]
+    code = _CHILD.format(preload=list(target["preload"]), module=target["module"], heavy=HEAVY_MODULES)
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=False
+    )
+    wall_ms = (time.perf_counter() - started) * 1000.0
+    if proc.returncode != 0:
+        raise RuntimeError(f"{role} startup failed: {proc.stderr.strip()[-2000:]}")
+    sample = json.loads(proc.stdout.strip().splitlines()[-1])
+    sample["process_wall_ms"] = wall_ms
+    return sample
+
+
+def _bench(args: argparse.Namespace, storage_root: Path) -> dict[str, Any]:
+    roles = [item.strip() for item in str(args.roles).split(",") if item.strip()]
+    unknown = [role for role in roles if role not in TARGETS]
+    if unknown:
+        raise SystemExit(f"unknown roles: {', '.join(unknown)}")
+    env = _child_env(storage_root)
+    samples: dict[str, list[dict[str, Any]]] = {role: [] for role in roles}
+    # 角色交替跑，磁盘缓存 / CPU 频率的漂移均摊到每个角色
+    for _ in range(max(1, int(args.rounds))):
+        for role in roles:
+            samples[role].append(measure_startup(role, env=env))
+
+    results: dict[str, Any] = {}
+    for role, rows in samples.items():
+        results[role] = {
+            "entrypoint": TARGETS[role]["module"],
+            "startup_ms_median": round(statistics.median(row["startup_ms"] for row in rows), 1),
+            "startup_ms_min": round(min(row["startup_ms"] for row in rows), 1),
+            "process_wall_ms_median": round(statistics.median(row["process_wall_ms"] for row in rows), 1),
+            "max_rss_mb_median": round(statistics.median(row["max_rss_kb"] for row in rows) / 1024.0, 1),
+            "modules": rows[-1]["modules"],
+            "routes": rows[-1]["routes"],
+            "heavy_loaded": rows[-1]["heavy_loaded"],
+        }
+    if "worker" in results and "worker_eager" in results:
+        lean, eager = results["worker"], results["worker_eager"]
+        results["worker_vs_eager"] = {
+            "startup_saved_ms": round(eager["startup_ms_median"] - lean["startup_ms_median"], 1),
+            "rss_saved_mb": round(eager["max_rss_mb_median"] - lean["max_rss_mb_median"], 1),
+        }
+    return {"rounds": max(1, int(args.rounds)), "python": sys.version.split()[0], "roles": results}
+
+
+def main() -> None:
+    args = parse_args()
+    with tempfile.TemporaryDirectory(prefix="bench-startup-") as tmp:
+        report = _bench(args, Path(tmp))
+    print(json.dumps({"status": "ok", **report}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
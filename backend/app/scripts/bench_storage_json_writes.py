@@ -0,0 +1,125 @@
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from app.services import storage
+from app.settings import BACKEND_DIR, settings
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark JSON artifact writes (bytes + latency per artifact kind).")
+    parser.add_argument("--iterations", type=int, default=200, help="Writes per artifact kind and writer mode.")
+    parser.add_argument(
+        "--codecs",
+        default="none,zstd,msgpack_zstd",
+        help="Comma separated binary codecs to measure besides legacy indent=2 writes.",
+    )
+    return parser.parse_args()
+
+
+def _sample_docs() -> dict[str, dict[str, Any]]:
+    product_doc = json.loads((BACKEND_DIR / "sample_data" / "product_sample.json").read_text(encoding="utf-8"))
+    stage2_artifact = {
+        "trace_id": "bench-trace",
+        "stage": "stage2_struct",
+        "model": settings.doubao_struct_model,
+        "struct_text": json.dumps(product_doc, ensure_ascii=False),
+        "doc": product_doc,
+        "usage": {"input_tokens": 5210, "output_tokens": 1830},
+    }
+    compare_session = {
+        "compare_id": "bench-compare",
+        "owner_type": "device",
+        "owner_id": "bench-device",
+        "category": "shampoo",
+        "status": "running",
+        "stage": "pair_compare",
+        "stage_label": "逐对比较中",
+        "message": "正在分析第 2 / 3 对",
+        "percent": 48,
+        "pair_index": 2,
+        "pair_total": 3,
+        "targets_snapshot": [
+            {"source": "history_product", "product_id": f"product-{idx}", "brand": "多芬", "name": "洗发露"}
+            for idx in range(3)
+        ],
+        "result": None,
+        "error": None,
+    }
+    return {
+        "products": product_doc,
+        "doubao_runs": stage2_artifact,
+        "doubao_runs_compare_session": compare_session,
+        "route_mappings": {
+            "product_id": "bench-product",
+            "scores": [{"route_key": f"route-{idx}", "confidence": 50 + idx, "reason": "配方匹配" * 12} for idx in range(8)],
+        },
+    }
+
+
+def _legacy_write(abs_path: Path, doc: dict[str, Any]) -> int:
+    abs_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(abs_path, "w", encoding="utf-8") as f:
+        json.dump(doc, f, ensure_ascii=False, indent=2)
+    return abs_path.stat().st_size
+
+
+def _measure(writer, iterations: int) -> dict[str, Any]:
+    latencies_us: list[float] = []
+    size = 0
+    for idx in range(iterations):
+        started = time.perf_counter()
+        size = writer(idx)
+        latencies_us.append((time.perf_counter() - started) * 1_000_000)
+    latencies_us.sort()
+    return {
+        "bytes_written": size,
+        "mean_us": round(statistics.fmean(latencies_us), 2),
+        "p50_us": round(latencies_us[len(latencies_us) // 2], 2),
+        "p95_us": round(latencies_us[max(0, (len(latencies_us) * 95 + 99) // 100 - 1)], 2),
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    iterations = max(1, int(args.iterations))
+    codecs = [item.strip() for item in str(args.codecs).split(",") if item.strip()]
+    report: dict[str, Any] = {"iterations": iterations, "kinds": {}}
+
+    with tempfile.TemporaryDirectory(prefix="bench-json-writes-") as tmp:
+        root = Path(tmp)
+        for kind, doc in _sample_docs().items():
+            folder = kind.split("_compare_session", 1)[0]
+            results: dict[str, Any] = {
+                "legacy_indent2": _measure(
+                    lambda idx: _legacy_write(root / "legacy" / folder / f"{idx % 4}.json", doc),
+                    iterations,
+                )
+            }
+            for codec in codecs:
+                if codec not in storage.JSON_BINARY_CODECS:
+                    continue
+
+                def _atomic_write(idx: int, codec: str = codec) -> int:
+                    payload = storage.encode_json_artifact(doc, codec=codec)
+                    storage.write_bytes_atomic(root / codec / folder / f"{idx % 4}.json", payload)
+                    return len(payload)
+
+                results[f"atomic_{codec}"] = _measure(_atomic_write, iterations)
+                sample = storage.encode_json_artifact(doc, codec=codec)
+                results[f"atomic_{codec}"]["binary"] = sample.startswith(storage.JSON_BINARY_MAGIC)
+
+            legacy_bytes = results["legacy_indent2"]["bytes_written"] or 1
+            for name, item in results.items():
+                item["size_ratio_vs_legacy"] = round(item["bytes_written"] / legacy_bytes, 3)
+            report["kinds"][kind] = results
+
+    print(json.dumps({"status": "ok", **report}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import argparse
+import json
+import tempfile
+from pathlib import Path
+
+from app.benchmarks.harness import BenchParams, compare_results, run_suite
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Reproducible benchmark suite: deterministic synthetic data + fake model endpoint, JSON results."
+    )
+    defaults = BenchParams()
+    parser.add_argument("--products", type=int, default=defaults.products, help="Synthetic products (1k-100k).")
+    parser.add_argument("--events", type=int, default=defaults.events, help="Synthetic mobile client events.")
+    parser.add_argument("--sessions", type=int, default=defaults.sessions, help="Synthetic selection sessions.")
+    parser.add_argument("--images", type=int, default=defaults.images, help="Distinct synthetic images for save_image.")
+    parser.add_argument("--image-size", type=int, default=defaults.image_size, help="Synthetic image edge in px.")
+    parser.add_argument("--model-latency-ms", type=float, default=defaults.model_latency_ms, help="Fake model base latency.")
+    parser.add_argument(
+        "--model-latency-jitter-ms", type=float, default=defaults.model_latency_jitter_ms, help="Seeded uniform jitter on top."
+    )
+    parser.add_argument("--seed", type=int, default=defaults.seed, help="Seed for every generator.")
+    parser.add_argument("--rounds", type=int, default=None, help="Override per-scenario rounds.")
+    parser.add_argument("--only", default="", help="Comma separated scenario names.")
+    parser.add_argument("--output", default="", help="Write the result JSON to this path.")
+    parser.add_argument("--compare", default="", help="Baseline result JSON from an earlier run.")
+    parser.add_argument("--max-regression-pct", type=float, default=10.0, help="Median slowdown treated as regression.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    params = BenchParams(
+        products=max(1, args.products),
+        events=max(0, args.events),
+        sessions=max(0, args.sessions),
+        images=max(1, args.images),
+        image_size=max(16, args.image_size),
+        model_latency_ms=args.model_latency_ms,
+        model_latency_jitter_ms=args.model_latency_jitter_ms,
+        seed=args.seed,
+        rounds=args.rounds,
+    )
+    names = [item.strip() for item in str(args.only or "").split(",") if item.strip()] or None
+    with tempfile.TemporaryDirectory(prefix="bench-suite-") as tmp:
+        result = run_suite(params, Path(tmp), names)
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    status = "ok"
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        result["comparison"] = compare_results(baseline, result, max_regression_pct=args.max_regression_pct)
+        if result["comparison"]["regressions"]:
+            status = "regressed"
+    if any(item.get("error") for item in result["benchmarks"]):
+        status = "error" if status == "ok" else status
+    print(json.dumps({"status": status, **result}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
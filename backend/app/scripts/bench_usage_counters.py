@@ -0,0 +1,156 @@
+import argparse
+import json
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.db.counters import describe_write_behind_counters, flush_write_behind_counters, increment_counter
+from app.db.models import Base, MobileCompareUsageStat
+from app.db.session import _engine_kwargs_for, install_sqlite_performance_mode
+from app.routes import mobile as mobile_routes
+from app.services.storage import now_iso
+from app.settings import settings
+
+VARIANTS = (
+    # name, write_behind
+    ("read_modify_write", False),
+    ("write_behind", True),
+)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Hot counter contention: per-request get+increment+commit vs write-behind batched upserts."
+    )
+    parser.add_argument("--threads", type=int, default=8, help="Concurrent workers incrementing counters.")
+    parser.add_argument("--increments", type=int, default=500, help="Increments per worker.")
+    parser.add_argument("--owners", type=int, default=2, help="Distinct owners (fewer = hotter rows).")
+    parser.add_argument("--products", type=int, default=5, help="Distinct products per owner.")
+    parser.add_argument("--flush-seconds", type=float, default=1.0)
+    return parser.parse_args()
+
+
+def _percentile(values: list[float], pct: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return round(ordered[idx], 3)
+
+
+def _legacy_increment(db, key: tuple[str, str, str, str]) -> None:
+    # 原实现：db.get → +1 → commit，每次自增一个同步事务。
+    owner_type, owner_id, category, product_id = key
+    row = db.get(
+        MobileCompareUsageStat,
+        {"owner_type": owner_type, "owner_id": owner_id, "category": category, "product_id": product_id},
+    )
+    if row is None:
+        row = MobileCompareUsageStat(
+            owner_type=owner_type, owner_id=owner_id, category=category, product_id=product_id, usage_count=0, updated_at=now_iso()
+        )
+    row.usage_count = int(row.usage_count or 0) + 1
+    row.updated_at = now_iso()
+    db.add(row)
+    db.commit()
+
+
+def _run_variant(tmp: Path, name: str, *, write_behind: bool, args: argparse.Namespace) -> dict[str, Any]:
+    settings.db_write_behind_counters = write_behind
+    settings.db_write_behind_flush_seconds = float(args.flush_seconds)
+    url = f"sqlite:///{tmp / f'{name}.db'}"
+    engine = create_engine(url, **_engine_kwargs_for(url))
+    install_sqlite_performance_mode(engine)
+    Base.metadata.create_all(bind=engine)
+    SessionMaker = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    spec = mobile_routes.MOBILE_COMPARE_USAGE_COUNTER
+    owners = max(1, int(args.owners))
+    products = max(1, int(args.products))
+
+    lock = threading.Lock()
+    latencies: list[float] = []
+    errors = {"locked": 0, "integrity": 0}
+
+    def worker(idx: int) -> None:
+        local: list[float] = []
+        local_errors = {"locked": 0, "integrity": 0}
+        for seq in range(max(1, int(args.increments))):
+            key = ("device", f"bench-owner-{(idx + seq) % owners}", "shampoo", f"bench-product-{seq % products}")
+            started = time.perf_counter()
+            db = SessionMaker()
+            try:
+                if write_behind:
+                    increment_counter(db, spec, key, touched=now_iso())
+                else:
+                    _legacy_increment(db, key)
+                local.append((time.perf_counter() - started) * 1000)
+            except OperationalError:
+                db.rollback()
+                local_errors["locked"] += 1
+            except Exception:
+                # 并发首次插入同一主键（读改写竞态的另一种失败形式）
+                db.rollback()
+                local_errors["integrity"] += 1
+            finally:
+                db.close()
+        with lock:
+            latencies.extend(local)
+            for key_name, value in local_errors.items():
+                errors[key_name] += value
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(max(1, int(args.threads)))]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    request_path_seconds = time.perf_counter() - started
+    flush_write_behind_counters(engine)
+    total_seconds = time.perf_counter() - started
+
+    with SessionMaker() as db:
+        persisted = int(db.execute(select(func.coalesce(func.sum(MobileCompareUsageStat.usage_count), 0))).scalar() or 0)
+        rows = int(db.execute(select(func.count()).select_from(MobileCompareUsageStat)).scalar() or 0)
+    attempted = max(1, int(args.threads)) * max(1, int(args.increments))
+    report = {
+        "attempted_increments": attempted,
+        "persisted_total": persisted,
+        # 读改写在并发下会覆盖彼此的 +1，差值即丢失的计数
+        "lost_increments": attempted - errors["locked"] - errors["integrity"] - persisted,
+        **errors,
+        "rows": rows,
+        "request_p50_ms": _percentile(latencies, 50),
+        "request_p99_ms": _percentile(latencies, 99),
+        "request_max_ms": _percentile(latencies, 100),
+        "increments_per_s": round(len(latencies) / max(1e-9, request_path_seconds), 1),
+        "seconds_including_final_flush": round(total_seconds, 3),
+        "counters": describe_write_behind_counters(engine),
+    }
+    engine.dispose()
+    return report
+
+
+def main() -> None:
+    args = parse_args()
+    with tempfile.TemporaryDirectory(prefix="bench-counters-") as tmp:
+        variants = {name: _run_variant(Path(tmp), name, write_behind=wb, args=args) for name, wb in VARIANTS}
+    baseline = variants["read_modify_write"]
+    best = variants["write_behind"]
+    report = {
+        "threads": int(args.threads),
+        "increments_per_thread": int(args.increments),
+        "hot_keys": max(1, int(args.owners)) * max(1, int(args.products)),
+        "variants": variants,
+        "throughput_gain": round(best["increments_per_s"] / max(0.1, baseline["increments_per_s"]), 2),
+    }
+    print(json.dumps({"status": "ok", **report}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import argparse
+import json
+from datetime import datetime, timezone
+
+from app.db.event_partitions import describe_mobile_client_event_partitions, maintain_mobile_client_event_partitions
+from app.db.init_db import init_db
+from app.db.session import SessionLocal, engine
+from app.settings import settings
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Roll closed months of mobile_client_events into monthly partitions / shards and archive expired months."
+    )
+    parser.add_argument(
+        "--retention-months",
+        type=int,
+        default=None,
+        help=f"Months kept in tables before archiving (default settings: {settings.mobile_event_retention_months}; 0 = never).",
+    )
+    parser.add_argument("--now", default="", help="Override the current time (ISO date), e.g. 2026-10-01.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    init_db()
+    now = datetime.fromisoformat(args.now).replace(tzinfo=timezone.utc) if args.now else None
+    report = maintain_mobile_client_event_partitions(engine, now=now, retention_months=args.retention_months)
+    with SessionLocal() as db:
+        partitions = describe_mobile_client_event_partitions(db)
+    print(json.dumps({"status": "ok", **report.as_dict(), "partitions": partitions}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
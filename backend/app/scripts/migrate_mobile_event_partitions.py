@@ -0,0 +1,44 @@
+import argparse
+import json
+
+from app.db.event_partitions import describe_mobile_client_event_partitions, migrate_events_to_partitioned
+from app.db.init_db import init_db
+from app.db.session import SessionLocal, engine
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "One-off PostgreSQL migration: convert the plain mobile_client_events table into a monthly "
+            "RANGE-partitioned parent (rename + copy rows + rebuild indexes, single transaction). "
+            "Run in a maintenance window; no-op on SQLite or when already partitioned."
+        )
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Print the DDL without executing it.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    init_db()
+    statements = migrate_events_to_partitioned(engine, dry_run=args.dry_run)
+    with SessionLocal() as db:
+        partitions = describe_mobile_client_event_partitions(db)
+    print(
+        json.dumps(
+            {
+                "status": "ok",
+                "dialect": engine.dialect.name,
+                "dry_run": bool(args.dry_run),
+                "migrated": bool(statements) and not args.dry_run,
+                "statements": statements,
+                "partitions": partitions,
+            },
+            ensure_ascii=False,
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import argparse
+import json
+
+from sqlalchemy import or_, select, text
+
+from app.ai.run_payloads import describe_run_payload_storage, put_run_payload
+from app.db.init_db import init_db
+from app.db.models import AIRun
+from app.db.session import SessionLocal, engine
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Move large inline ai_runs request/response payloads into the compressed ai_payload_blobs store."
+    )
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows per commit batch.")
+    parser.add_argument("--limit", type=int, default=0, help="Maximum rows to scan (0 = no limit).")
+    parser.add_argument("--dry-run", action="store_true", help="Scan and report without writing DB.")
+    parser.add_argument("--vacuum", action="store_true", help="SQLite only: VACUUM afterwards to return freed pages.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    init_db()
+    batch_size = max(1, int(args.batch_size))
+    limit = max(0, int(args.limit))
+    scanned = 0
+    moved_payloads = 0
+    moved_bytes = 0
+    last_id = ""
+    with SessionLocal() as db:
+        while not limit or scanned < limit:
+            size = batch_size if not limit else min(batch_size, limit - scanned)
+            runs = list(
+                db.execute(
+                    select(AIRun)
+                    .where(
+                        AIRun.id > last_id,
+                        or_(
+                            AIRun.request_digest.is_(None),
+                            (AIRun.response_digest.is_(None) & AIRun.response_json.is_not(None)),
+                        ),
+                    )
+                    .order_by(AIRun.id.asc())
+                    .limit(size)
+                ).scalars().all()
+            )
+            if not runs:
+                break
+            for run in runs:
+                scanned += 1
+                last_id = run.id
+                if run.request_digest is None and run.request_json:
+                    stored = put_run_payload(db, run.request_json)
+                    if stored.digest:
+                        moved_payloads += 1
+                        moved_bytes += len(run.request_json.encode("utf-8"))
+                        run.request_json = stored.inline
+                        run.request_digest = stored.digest
+                if run.response_digest is None and run.response_json:
+                    stored = put_run_payload(db, run.response_json)
+                    if stored.digest:
+                        moved_payloads += 1
+                        moved_bytes += len(run.response_json.encode("utf-8"))
+                        run.response_json = stored.inline
+                        run.response_digest = stored.digest
+            if args.dry_run:
+                db.rollback()
+            else:
+                db.commit()
+        storage = describe_run_payload_storage(db)
+
+    vacuumed = False
+    if args.vacuum and not args.dry_run and engine.dialect.name == "sqlite":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("VACUUM"))
+        vacuumed = True
+    print(
+        json.dumps(
+            {
+                "status": "ok",
+                "dry_run": bool(args.dry_run),
+                "scanned": scanned,
+                "moved_payloads": moved_payloads,
+                "moved_bytes": moved_bytes,
+                "blob_store": storage,
+                "vacuumed": vacuumed,
+            },
+            ensure_ascii=False,
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import argparse
+import json
+
+from sqlalchemy import func, select
+
+from app.db.init_db import init_db
+from app.db.models import ProductStorageTombstone
+from app.db.session import SessionLocal
+from app.services.storage_reclaim import RECLAIM_BATCH_SIZE, reclaim_product_storage, retry_failed_storage_reclaim
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Reclaim files of deleted products from pending storage tombstones and report bytes freed."
+    )
+    parser.add_argument("--batch-size", type=int, default=RECLAIM_BATCH_SIZE, help="Tombstones per batch (one commit each).")
+    parser.add_argument("--max-batches", type=int, default=0, help="Stop after N batches (0 = drain the backlog).")
+    parser.add_argument("--retry-failed", action="store_true", help="Re-queue tombstones that failed before.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    init_db()
+    with SessionLocal() as db:
+        requeued = retry_failed_storage_reclaim(db) if args.retry_failed else 0
+        report = reclaim_product_storage(
+            db,
+            batch_size=args.batch_size,
+            max_batches=args.max_batches if args.max_batches > 0 else None,
+        )
+        by_status = dict(
+            db.execute(
+                select(ProductStorageTombstone.status, func.count()).group_by(ProductStorageTombstone.status)
+            ).all()
+        )
+    print(json.dumps({"status": "ok", "requeued": requeued, **report.as_dict(), "tombstones_by_status": by_status}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,7 @@ from sqlalchemy.orm import Session
 from app.db.init_db import init_db
 from app.db.models import ProductIndex
 from app.db.session import SessionLocal
+from app.services.storage import decode_json_artifact
 from app.settings import settings
 
 
@@ -69,7 +70,8 @@ def _guess_image_path(json_file: Path) -> Optional[str]:
 
 
 def upsert_one(db: Session, json_file: Path) -> None:
-    data: Dict[str, Any] = json.loads(json_file.read_text(encoding="utf-8"))
+    # 与 load_json 同一解码入口：产品 JSON 可能按配置落成 zstd / msgpack 二进制封装
+    data: Dict[str, Any] = decode_json_artifact(json_file.read_bytes())
 
     # basic fields with flexible key mapping
     product = data.get("product") if isinstance(data.get("product"), dict) else {}
@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from functools import lru_cache
+from typing import Any, AsyncIterator, Iterator
+
+from openai import APIConnectionError, APIStatusError, APITimeoutError
+
+from app.settings import settings
+
+# 豆包调用治理（进程级，同步/异步客户端共用同一份预算）：
+# 1) 熔断：按模型统计连续上游故障，打开后直接快速失败，冷却期结束放行一个探测请求（half-open）
+# 2) 令牌桶：按模型限速（rps + burst），预约制排队，等待时间可精确计算
+# 3) 全局在途上限：限制同时打到上游的请求数
+DEFAULT_RATE_LIMIT_KEY = "*"
+UPSTREAM_FAILURE_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+class DoubaoCircuitOpenError(RuntimeError):
+    def __init__(self, model: str, retry_after_seconds: float):
+        self.model = model
+        self.retry_after_seconds = max(0.0, float(retry_after_seconds))
+        super().__init__(
+            f"Doubao upstream circuit open for model '{model}'; retry after {self.retry_after_seconds:.1f}s."
+        )
+
+
+class DoubaoGovernorTimeoutError(RuntimeError):
+    pass
+
+
+def is_upstream_failure(error: BaseException) -> bool:
+    if isinstance(error, (APITimeoutError, APIConnectionError)):
+        return True
+    if isinstance(error, APIStatusError):
+        return int(getattr(error, "status_code", 0) or 0) in UPSTREAM_FAILURE_STATUSES
+    return False
+
+
+class TokenBucket:
+    def __init__(self, rate_per_second: float, burst: int):
+        self.rate = max(0.001, float(rate_per_second))
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+
+    def reserve(self, now: float) -> float:
+        """
+        预约一个令牌并返回需要等待的秒数（0 表示立即可用）。令牌可以透支为负数，
+        后续调用者按透支量顺延，从而保持先到先得且无需轮询。
+        """
+        elapsed = max(0.0, now - self._updated_at)
+        self._tokens = min(float(self.burst), self._tokens + elapsed * self.rate)
+        self._updated_at = now
+        self._tokens -= 1.0
+        if self._tokens >= 0:
+            return 0.0
+        return -self._tokens / self.rate
+
+    def snapshot(self) -> dict[str, Any]:
+        return {"rps": self.rate, "burst": self.burst, "tokens": round(self._tokens, 3)}
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, open_seconds: float):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.open_seconds = max(0.1, float(open_seconds))
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.half_open_probe_inflight = False
+        self.rejected = 0
+
+    def before_call(self, now: float) -> float | None:
+        """返回 None 表示放行；否则返回建议的重试等待秒数。"""
+        if self.state == "closed":
+            return None
+        if self.state == "open":
+            remaining = self.opened_at + self.open_seconds - now
+            if remaining > 0:
+                self.rejected += 1
+                return remaining
+            self.state = "half_open"
+            self.half_open_probe_inflight = False
+        if self.half_open_probe_inflight:
+            self.rejected += 1
+            return self.open_seconds
+        self.half_open_probe_inflight = True
+        return None
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.half_open_probe_inflight = False
+
+    def record_failure(self, now: float) -> None:
+        self.consecutive_failures += 1
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            self.state = "open"
+            self.opened_at = now
+        self.half_open_probe_inflight = False
+
+    def release_probe(self) -> None:
+        # 探测请求因非上游原因（参数错误等）结束：不改变熔断判断，只释放探测名额。
+        self.half_open_probe_inflight = False
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "rejected": self.rejected,
+        }
+
+
+class _AsyncSlotWaiter:
+    __slots__ = ("loop", "future", "granted")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, future: asyncio.Future[None]):
+        self.loop = loop
+        self.future = future
+        self.granted = False
+
+
+def _grant_async_waiter(future: asyncio.Future[None]) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class DoubaoCallGovernor:
+    def __init__(
+        self,
+        *,
+        max_inflight: int,
+        rate_limits: dict[str, dict[str, float]] | None = None,
+        failure_threshold: int = 5,
+        open_seconds: float = 30.0,
+        acquire_timeout_seconds: float = 60.0,
+    ):
+        self.max_inflight = max(1, int(max_inflight))
+        self.rate_limits = dict(rate_limits or {})
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.open_seconds = max(0.1, float(open_seconds))
+        self.acquire_timeout_seconds = max(0.1, float(acquire_timeout_seconds))
+        self._lock = threading.Lock()
+        self._slot_released = threading.Condition(self._lock)
+        self._async_waiters: deque[_AsyncSlotWaiter] = deque()
+        self._inflight = 0
+        self._peak_inflight = 0
+        self._buckets: dict[str, TokenBucket | None] = {}
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    # ---- 同步路径 ----
+    @contextmanager
+    def slot(self, model: str) -> Iterator[None]:
+        key = str(model or "").strip() or DEFAULT_RATE_LIMIT_KEY
+        wait = self._admit(key)
+        if wait > 0:
+            time.sleep(wait)
+        deadline = time.monotonic() + self.acquire_timeout_seconds
+        with self._slot_released:
+            while self._inflight >= self.max_inflight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._release_probe(key)
+                    raise DoubaoGovernorTimeoutError(
+                        f"Doubao call slot wait exceeded {self.acquire_timeout_seconds:.1f}s (max_inflight={self.max_inflight})."
+                    )
+                self._slot_released.wait(timeout=remaining)
+            self._take_slot_locked()
+        try:
+            yield
+        except BaseException as e:
+            self._finish(key, error=e)
+            raise
+        self._finish(key, error=None)
+
+    # ---- 异步路径 ----
+    @asynccontextmanager
+    async def async_slot(self, model: str) -> AsyncIterator[None]:
+        key = str(model or "").strip() or DEFAULT_RATE_LIMIT_KEY
+        wait = self._admit(key)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        waiter: _AsyncSlotWaiter | None = None
+        with self._lock:
+            if self._inflight < self.max_inflight and not self._async_waiters:
+                self._take_slot_locked()
+            else:
+                loop = asyncio.get_running_loop()
+                waiter = _AsyncSlotWaiter(loop, loop.create_future())
+                self._async_waiters.append(waiter)
+        if waiter is not None:
+            # 排队等待由 _release_slot_locked 直接移交名额并唤醒（跨线程用 call_soon_threadsafe），不轮询
+            try:
+                await asyncio.wait_for(waiter.future, timeout=self.acquire_timeout_seconds)
+            except BaseException as e:
+                with self._lock:
+                    granted = waiter.granted
+                    if not granted:
+                        self._async_waiters.remove(waiter)
+                if granted:
+                    # 超时 / 取消与移交撞在一起：名额已记在自己名下，原样还回去
+                    self._release_slot()
+                self._release_probe(key)
+                if isinstance(e, asyncio.TimeoutError):
+                    raise DoubaoGovernorTimeoutError(
+                        f"Doubao call slot wait exceeded {self.acquire_timeout_seconds:.1f}s (max_inflight={self.max_inflight})."
+                    ) from None
+                raise
+        try:
+            yield
+        except BaseException as e:
+            self._finish(key, error=e)
+            raise
+        self._finish(key, error=None)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "max_inflight": self.max_inflight,
+                "inflight": self._inflight,
+                "peak_inflight": self._peak_inflight,
+                "rate_limits": {key: bucket.snapshot() for key, bucket in self._buckets.items() if bucket is not None},
+                "circuits": {key: breaker.snapshot() for key, breaker in self._breakers.items()},
+            }
+
+    def _admit(self, key: str) -> float:
+        now = time.monotonic()
+        with self._lock:
+            breaker = self._breaker_locked(key)
+            retry_after = breaker.before_call(now)
+            if retry_after is not None:
+                raise DoubaoCircuitOpenError(key, retry_after)
+            bucket = self._bucket_locked(key)
+            return bucket.reserve(now) if bucket is not None else 0.0
+
+    def _take_slot_locked(self) -> None:
+        self._inflight += 1
+        self._peak_inflight = max(self._peak_inflight, self._inflight)
+
+    def _release_slot(self) -> None:
+        with self._slot_released:
+            self._release_slot_locked()
+
+    def _release_slot_locked(self) -> None:
+        self._inflight = max(0, self._inflight - 1)
+        # 异步等待者按 FIFO 直接拿走空出的名额；事件循环已关闭的等待者跳过
+        while self._async_waiters and self._inflight < self.max_inflight:
+            waiter = self._async_waiters.popleft()
+            try:
+                waiter.loop.call_soon_threadsafe(_grant_async_waiter, waiter.future)
+            except RuntimeError:
+                continue
+            waiter.granted = True
+            self._take_slot_locked()
+        self._slot_released.notify()
+
+    def _finish(self, key: str, *, error: BaseException | None) -> None:
+        with self._slot_released:
+            self._release_slot_locked()
+            breaker = self._breaker_locked(key)
+            if error is None:
+                breaker.record_success()
+            elif is_upstream_failure(error):
+                breaker.record_failure(time.monotonic())
+            else:
+                breaker.release_probe()
+
+    def _release_probe(self, key: str) -> None:
+        with self._lock:
+            self._breaker_locked(key).release_probe()
+
+    def _breaker_locked(self, key: str) -> CircuitBreaker:
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(self.failure_threshold, self.open_seconds)
+            self._breakers[key] = breaker
+        return breaker
+
+    def _bucket_locked(self, key: str) -> TokenBucket | None:
+        if key in self._buckets:
+            return self._buckets[key]
+        spec = self.rate_limits.get(key) or self.rate_limits.get(DEFAULT_RATE_LIMIT_KEY)
+        bucket: TokenBucket | None = None
+        if isinstance(spec, dict):
+            rps = float(spec.get("rps") or 0)
+            if rps > 0:
+                bucket = TokenBucket(rps, int(spec.get("burst") or max(1, round(rps))))
+        self._buckets[key] = bucket
+        return bucket
+
+
+def _parse_rate_limits(raw: str) -> dict[str, dict[str, float]]:
+    text = str(raw or "").strip()
+    if not text:
+        return {}
+    try:
+        parsed = json.loads(text)
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(parsed, dict):
+        return {}
+    return {str(key): value for key, value in parsed.items() if isinstance(value, dict)}
+
+
+@lru_cache
+def get_doubao_governor() -> DoubaoCallGovernor:
+    return DoubaoCallGovernor(
+        max_inflight=int(getattr(settings, "doubao_max_inflight", 32) or 32),
+        rate_limits=_parse_rate_limits(getattr(settings, "doubao_rate_limits_json", "")),
+        failure_threshold=int(getattr(settings, "doubao_circuit_failure_threshold", 5) or 5),
+        open_seconds=float(getattr(settings, "doubao_circuit_open_seconds", 30.0) or 30.0),
+        acquire_timeout_seconds=float(getattr(settings, "doubao_governor_acquire_timeout_seconds", 60.0) or 60.0),
+    )
@@ -1,10 +1,65 @@
+import asyncio
 import json
 import random
+import threading
 import time
-from collections.abc import Iterable
+from collections.abc import AsyncIterable, Iterable
 from typing import Any, Callable
 
-from openai import APIConnectionError, APIStatusError, APITimeoutError, OpenAI
+from openai import APIConnectionError, APIStatusError, APITimeoutError, AsyncOpenAI, OpenAI
+
+from app.services.doubao_governor import DoubaoCallGovernor, get_doubao_governor
+
+
+# 稳定前缀的服务端上下文缓存（Responses API：前缀请求 store + caching.prefix，后续请求带 previous_response_id）：
+# - 进程级共享，键 = (endpoint, model, prefix_key)，值 = 前缀 response id 与本地过期时间（比服务端 expire_at 提前一点失效）
+# - 前缀创建被拒（非瞬时 4xx）时记一条空值，_PREFIX_NEGATIVE_TTL_SECONDS 内直接走完整提示词；
+#   限流 / 超时等可重试状态只让本次调用回退，不记缓存，下次调用重新尝试创建前缀
+_PREFIX_EXPIRY_MARGIN_SECONDS = 30
+_PREFIX_NEGATIVE_TTL_SECONDS = 300
+
+
+class _PrefixResponseCache:
+    def __init__(self) -> None:
+        self._entries: dict[tuple[str, str, str], tuple[str | None, float]] = {}
+        self._key_locks: dict[tuple[str, str, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def key_lock(self, key: tuple[str, str, str]) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def get(self, key: tuple[str, str, str]) -> tuple[bool, str | None]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        response_id, expires_at = entry
+        if time.monotonic() >= expires_at:
+            with self._lock:
+                if self._entries.get(key) == entry:
+                    self._entries.pop(key, None)
+            return False, None
+        return True, response_id
+
+    def put(self, key: tuple[str, str, str], response_id: str | None, ttl_seconds: float) -> None:
+        with self._lock:
+            self._entries[key] = (response_id, time.monotonic() + max(1.0, float(ttl_seconds)))
+
+    def forget(self, key: tuple[str, str, str]) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._key_locks.clear()
+
+
+_PREFIX_RESPONSES = _PrefixResponseCache()
+
+
+def reset_prefix_response_cache() -> None:
+    _PREFIX_RESPONSES.clear()
 
 
 class DoubaoOpenAIClient:
@@ -16,6 +71,8 @@ class DoubaoOpenAIClient:
         timeout: int = 60,
         max_retries: int = 0,
         retry_backoff_seconds: float = 1.0,
+        governor: DoubaoCallGovernor | None = None,
+        prefix_cache_ttl_seconds: int = 3600,
     ):
         self.api_key = api_key
         self.endpoint = endpoint.rstrip("/")
@@ -23,6 +80,8 @@ class DoubaoOpenAIClient:
         self.timeout = timeout
         self.max_retries = max(0, int(max_retries))
         self.retry_backoff_seconds = max(0.1, float(retry_backoff_seconds))
+        self.governor = governor or get_doubao_governor()
+        self.prefix_cache_ttl_seconds = max(60, int(prefix_cache_ttl_seconds))
         self.client = OpenAI(
             base_url=self.endpoint,
             api_key=self.api_key,
@@ -40,18 +99,7 @@ class DoubaoOpenAIClient:
         on_text_delta: Callable[[str], None] | None = None,
         on_stream_event: Callable[[dict[str, Any]], None] | None = None,
     ) -> dict[str, Any]:
-        body = {
-            "model": model or self.model,
-            "input": [
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "input_image", "image_url": image_url},
-                        {"type": "input_text", "text": prompt},
-                    ],
-                }
-            ],
-        }
+        body = _image_request_body(model or self.model, [image_url], prompt)
         return self._responses(
             body,
             stream=stream,
@@ -68,20 +116,7 @@ class DoubaoOpenAIClient:
         on_text_delta: Callable[[str], None] | None = None,
         on_stream_event: Callable[[dict[str, Any]], None] | None = None,
     ) -> dict[str, Any]:
-        urls = [str(item or "").strip() for item in image_urls if str(item or "").strip()]
-        if not urls:
-            raise RuntimeError("chat_with_images requires at least one image.")
-        content: list[dict[str, str]] = [{"type": "input_image", "image_url": item} for item in urls]
-        content.append({"type": "input_text", "text": prompt})
-        body = {
-            "model": model or self.model,
-            "input": [
-                {
-                    "role": "user",
-                    "content": content,
-                }
-            ],
-        }
+        body = _image_request_body(model or self.model, _clean_image_urls(image_urls), prompt)
         return self._responses(
             body,
             stream=stream,
@@ -97,15 +132,7 @@ class DoubaoOpenAIClient:
         on_text_delta: Callable[[str], None] | None = None,
         on_stream_event: Callable[[dict[str, Any]], None] | None = None,
     ) -> dict[str, Any]:
-        body = {
-            "model": model or self.model,
-            "input": [
-                {
-                    "role": "user",
-                    "content": [{"type": "input_text", "text": prompt}],
-                }
-            ],
-        }
+        body = _text_request_body(model or self.model, prompt)
         return self._responses(
             body,
             stream=stream,
@@ -113,6 +140,65 @@ class DoubaoOpenAIClient:
             on_stream_event=on_stream_event,
         )
 
+    def chat_with_prefix(
+        self,
+        prefix: str,
+        suffix: str,
+        *,
+        prefix_key: str,
+        fallback_prompt: str | None = None,
+        model: str | None = None,
+        stream: bool = False,
+        on_text_delta: Callable[[str], None] | None = None,
+        on_stream_event: Callable[[dict[str, Any]], None] | None = None,
+    ) -> tuple[dict[str, Any], str]:
+        """
+        稳定前缀走服务端上下文缓存（previous_response_id），本次只发送变量后缀。
+        返回 (payload, prefix_status)，prefix_status 为 reused / created / fallback：
+        前缀创建被拒或上游已不认识缓存的前缀时，改发完整提示词（fallback_prompt，缺省为前缀 + 后缀）。
+        """
+        selected_model = model or self.model
+        full_prompt = fallback_prompt if fallback_prompt is not None else f"{prefix}\n\n{suffix}"
+        handlers = {"stream": stream, "on_text_delta": on_text_delta, "on_stream_event": on_stream_event}
+        cache_key = (self.endpoint, selected_model, prefix_key)
+        response_id, status = self._ensure_prefix_response(cache_key, prefix=prefix, model=selected_model)
+        if response_id is None:
+            return self.chat_with_text(full_prompt, model=selected_model, **handlers), "fallback"
+        try:
+            return self._responses(_prefixed_text_request_body(selected_model, suffix, response_id), **handlers), status
+        except RuntimeError as e:
+            if not _is_stale_prefix_error(e.__cause__):
+                raise
+        _PREFIX_RESPONSES.forget(cache_key)
+        return self.chat_with_text(full_prompt, model=selected_model, **handlers), "fallback"
+
+    def _ensure_prefix_response(self, cache_key: tuple[str, str, str], *, prefix: str, model: str) -> tuple[str | None, str]:
+        found, response_id = _PREFIX_RESPONSES.get(cache_key)
+        if found:
+            return response_id, "reused" if response_id else "fallback"
+        # 同一前缀只由一个调用方创建，并发的其余调用等它完成后直接复用。
+        with _PREFIX_RESPONSES.key_lock(cache_key):
+            found, response_id = _PREFIX_RESPONSES.get(cache_key)
+            if found:
+                return response_id, "reused" if response_id else "fallback"
+            expire_at = int(time.time()) + self.prefix_cache_ttl_seconds
+            try:
+                payload = self._responses(_prefix_request_body(model, prefix, expire_at))
+            except RuntimeError as e:
+                cause = e.__cause__
+                if not (isinstance(cause, APIStatusError) and 400 <= int(cause.status_code) < 500):
+                    raise
+                if _is_retryable_status(int(cause.status_code)):
+                    # 瞬时错误（重试已用尽）：本次发完整提示词，不把前缀标记为不支持。
+                    return None, "fallback"
+                # 模型 / 账号不支持前缀缓存：一段时间内直接发完整提示词，不反复尝试。
+                _PREFIX_RESPONSES.put(cache_key, None, _PREFIX_NEGATIVE_TTL_SECONDS)
+                return None, "fallback"
+            response_id = str(payload.get("id") or "").strip() or None
+            ttl = self.prefix_cache_ttl_seconds - _PREFIX_EXPIRY_MARGIN_SECONDS if response_id else _PREFIX_NEGATIVE_TTL_SECONDS
+            _PREFIX_RESPONSES.put(cache_key, response_id, ttl)
+            return response_id, "created" if response_id else "fallback"
+
     def _responses(
         self,
         body: dict[str, Any],
@@ -121,14 +207,17 @@ class DoubaoOpenAIClient:
         on_stream_event: Callable[[dict[str, Any]], None] | None = None,
     ) -> dict[str, Any]:
         attempts = self.max_retries + 1
+        model = str(body.get("model") or self.model)
         for attempt in range(1, attempts + 1):
             try:
-                response = self._call_response_api(
-                    body,
-                    stream=stream,
-                    on_text_delta=on_text_delta,
-                    on_stream_event=on_stream_event,
-                )
+                # 熔断打开时 slot() 直接抛 DoubaoCircuitOpenError，不进入重试。
+                with self.governor.slot(model):
+                    response = self._call_response_api(
+                        body,
+                        stream=stream,
+                        on_text_delta=on_text_delta,
+                        on_stream_event=on_stream_event,
+                    )
                 break
             except APITimeoutError as e:
                 if attempt >= attempts:
@@ -151,10 +240,7 @@ class DoubaoOpenAIClient:
         return response
 
     def _sleep_backoff(self, attempt: int) -> None:
-        # 指数退避 + 抖动，减少瞬时重试风暴
-        delay = self.retry_backoff_seconds * (2 ** max(attempt - 1, 0))
-        jitter = random.uniform(0, min(1.0, delay * 0.2))
-        time.sleep(delay + jitter)
+        time.sleep(_backoff_delay(self.retry_backoff_seconds, attempt))
 
     def _call_response_api(
         self,
@@ -239,6 +325,220 @@ class DoubaoOpenAIClient:
             )
 
 
+class AsyncDoubaoOpenAIClient:
+    """
+    AsyncOpenAI 版本：重试 / 退避 / 流事件语义与 DoubaoOpenAIClient 一致，
+    与同步客户端共享进程级 governor（在途上限、按模型限速、熔断）。
+    等待上游期间不占用线程，少量线程即可承载大量在途调用。
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        endpoint: str,
+        model: str,
+        timeout: int = 60,
+        max_retries: int = 0,
+        retry_backoff_seconds: float = 1.0,
+        governor: DoubaoCallGovernor | None = None,
+    ):
+        self.api_key = api_key
+        self.endpoint = endpoint.rstrip("/")
+        self.model = model
+        self.timeout = timeout
+        self.max_retries = max(0, int(max_retries))
+        self.retry_backoff_seconds = max(0.1, float(retry_backoff_seconds))
+        self.governor = governor or get_doubao_governor()
+        self.client = AsyncOpenAI(
+            base_url=self.endpoint,
+            api_key=self.api_key,
+            timeout=self.timeout,
+            max_retries=0,
+        )
+
+    async def chat_with_image(
+        self,
+        image_url: str,
+        prompt: str,
+        model: str | None = None,
+        stream: bool = False,
+        on_text_delta: Callable[[str], None] | None = None,
+        on_stream_event: Callable[[dict[str, Any]], None] | None = None,
+    ) -> dict[str, Any]:
+        body = _image_request_body(model or self.model, [image_url], prompt)
+        return await self._responses(body, stream=stream, on_text_delta=on_text_delta, on_stream_event=on_stream_event)
+
+    async def chat_with_images(
+        self,
+        image_urls: list[str],
+        prompt: str,
+        model: str | None = None,
+        stream: bool = False,
+        on_text_delta: Callable[[str], None] | None = None,
+        on_stream_event: Callable[[dict[str, Any]], None] | None = None,
+    ) -> dict[str, Any]:
+        body = _image_request_body(model or self.model, _clean_image_urls(image_urls), prompt)
+        return await self._responses(body, stream=stream, on_text_delta=on_text_delta, on_stream_event=on_stream_event)
+
+    async def chat_with_text(
+        self,
+        prompt: str,
+        model: str | None = None,
+        stream: bool = False,
+        on_text_delta: Callable[[str], None] | None = None,
+        on_stream_event: Callable[[dict[str, Any]], None] | None = None,
+    ) -> dict[str, Any]:
+        body = _text_request_body(model or self.model, prompt)
+        return await self._responses(body, stream=stream, on_text_delta=on_text_delta, on_stream_event=on_stream_event)
+
+    async def close(self) -> None:
+        close = getattr(self.client, "close", None)
+        if callable(close):
+            await _maybe_await(close())
+
+    async def _responses(
+        self,
+        body: dict[str, Any],
+        stream: bool = False,
+        on_text_delta: Callable[[str], None] | None = None,
+        on_stream_event: Callable[[dict[str, Any]], None] | None = None,
+    ) -> dict[str, Any]:
+        attempts = self.max_retries + 1
+        model = str(body.get("model") or self.model)
+        for attempt in range(1, attempts + 1):
+            try:
+                async with self.governor.async_slot(model):
+                    response = await self._call_response_api(
+                        body,
+                        stream=stream,
+                        on_text_delta=on_text_delta,
+                        on_stream_event=on_stream_event,
+                    )
+                break
+            except APITimeoutError as e:
+                if attempt >= attempts:
+                    raise RuntimeError(f"Doubao API timeout after {attempt} attempts.") from e
+                await asyncio.sleep(_backoff_delay(self.retry_backoff_seconds, attempt))
+                continue
+            except APIConnectionError as e:
+                reason = str(getattr(e, "message", "") or str(e) or "unknown")
+                if attempt >= attempts:
+                    raise RuntimeError(f"Doubao API network error after {attempt} attempts: {reason}") from e
+                await asyncio.sleep(_backoff_delay(self.retry_backoff_seconds, attempt))
+                continue
+            except APIStatusError as e:
+                detail = _extract_status_error_detail(e)
+                if attempt < attempts and _is_retryable_status(e.status_code):
+                    await asyncio.sleep(_backoff_delay(self.retry_backoff_seconds, attempt))
+                    continue
+                raise RuntimeError(f"Doubao API HTTP {e.status_code}: {detail}") from e
+
+        return response
+
+    async def _call_response_api(
+        self,
+        body: dict[str, Any],
+        stream: bool,
+        on_text_delta: Callable[[str], None] | None,
+        on_stream_event: Callable[[dict[str, Any]], None] | None,
+    ) -> dict[str, Any]:
+        if not stream:
+            response = await self.client.responses.create(**body)
+            return _serialize_response(response)
+
+        try:
+            stream_payload = await self._stream_with_create(
+                body=body,
+                on_text_delta=on_text_delta,
+                on_stream_event=on_stream_event,
+            )
+            if stream_payload is not None:
+                return stream_payload
+            response = await self.client.responses.create(**body)
+            payload = _serialize_response(response)
+            _emit_final_text_if_needed(payload, on_text_delta=on_text_delta)
+            return payload
+        except (APITimeoutError, APIConnectionError, APIStatusError):
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Doubao stream request failed: {type(e).__name__}: {str(e)}") from e
+
+    async def _stream_with_create(
+        self,
+        body: dict[str, Any],
+        on_text_delta: Callable[[str], None] | None,
+        on_stream_event: Callable[[dict[str, Any]], None] | None,
+    ) -> dict[str, Any] | None:
+        create_api = getattr(self.client.responses, "create", None)
+        if not callable(create_api):
+            return None
+
+        try:
+            stream_obj = await _maybe_await(create_api(**body, stream=True))
+        except TypeError:
+            return None
+
+        if not isinstance(stream_obj, AsyncIterable):
+            if _is_iterable(stream_obj):
+                return _consume_stream(
+                    stream_obj=stream_obj,
+                    on_text_delta=on_text_delta,
+                    on_stream_event=on_stream_event,
+                    close_when_done=True,
+                )
+            payload = _serialize_response(stream_obj)
+            _emit_final_text_if_needed(payload, on_text_delta=on_text_delta)
+            return payload
+
+        return await _consume_stream_async(
+            stream_obj=stream_obj,
+            on_text_delta=on_text_delta,
+            on_stream_event=on_stream_event,
+            close_when_done=True,
+        )
+
+
+def _clean_image_urls(image_urls: list[str]) -> list[str]:
+    urls = [str(item or "").strip() for item in image_urls if str(item or "").strip()]
+    if not urls:
+        raise RuntimeError("chat_with_images requires at least one image.")
+    return urls
+
+
+def _image_request_body(model: str, image_urls: list[str], prompt: str) -> dict[str, Any]:
+    content: list[dict[str, str]] = [{"type": "input_image", "image_url": item} for item in image_urls]
+    content.append({"type": "input_text", "text": prompt})
+    return {"model": model, "input": [{"role": "user", "content": content}]}
+
+
+def _text_request_body(model: str, prompt: str) -> dict[str, Any]:
+    return {"model": model, "input": [{"role": "user", "content": [{"type": "input_text", "text": prompt}]}]}
+
+
+def _prefix_request_body(model: str, prefix: str, expire_at: int) -> dict[str, Any]:
+    return {
+        "model": model,
+        "input": [{"role": "system", "content": [{"type": "input_text", "text": prefix}]}],
+        "store": True,
+        "extra_body": {"caching": {"type": "enabled", "prefix": True}, "expire_at": expire_at},
+    }
+
+
+def _prefixed_text_request_body(model: str, suffix: str, previous_response_id: str) -> dict[str, Any]:
+    body = _text_request_body(model, suffix)
+    body["previous_response_id"] = previous_response_id
+    body["extra_body"] = {"caching": {"type": "enabled"}}
+    return body
+
+
+def _is_stale_prefix_error(error: BaseException | None) -> bool:
+    if not isinstance(error, APIStatusError):
+        return False
+    if int(error.status_code) == 404:
+        return True
+    return int(error.status_code) == 400 and "previous_response" in _extract_status_error_detail(error).lower()
+
+
 def _extract_status_error_detail(error: APIStatusError) -> str:
     body_text = ""
     resp = getattr(error, "response", None)
@@ -250,6 +550,13 @@ def _extract_status_error_detail(error: APIStatusError) -> str:
     return detail
 
 
+def _backoff_delay(base_seconds: float, attempt: int) -> float:
+    # 指数退避 + 抖动，减少瞬时重试风暴
+    delay = base_seconds * (2 ** max(attempt - 1, 0))
+    jitter = random.uniform(0, min(1.0, delay * 0.2))
+    return delay + jitter
+
+
 def _is_retryable_status(status: int) -> bool:
     return status in {408, 409, 425, 429, 500, 502, 503, 504}
 
@@ -294,35 +601,61 @@ def _extract_delta_text(event: Any) -> str:
     return ""
 
 
+class _StreamAccumulator:
+    """同步 / 异步流共用的事件处理，保证两条路径的增量与结束语义一致。"""
+
+    def __init__(
+        self,
+        on_text_delta: Callable[[str], None] | None,
+        on_stream_event: Callable[[dict[str, Any]], None] | None,
+    ):
+        self.on_text_delta = on_text_delta
+        self.on_stream_event = on_stream_event
+        self.emitted_any_delta = False
+        self.collected: list[str] = []
+        self.final_payload: dict[str, Any] | None = None
+
+    def feed(self, event: Any) -> None:
+        _emit_stream_event_if_needed(_event_to_dict(event), on_stream_event=self.on_stream_event)
+        delta = _extract_delta_text(event)
+        if delta:
+            self.emitted_any_delta = True
+            self.collected.append(delta)
+            if self.on_text_delta:
+                self.on_text_delta(delta)
+
+        maybe_response = _extract_response_payload_from_event(event)
+        if maybe_response is not None:
+            self.final_payload = _serialize_response(maybe_response)
+
+    def finish(self) -> dict[str, Any]:
+        final_payload = self.final_payload
+        if final_payload is None:
+            final_payload = {"output_text": "".join(self.collected)}
+
+        if not self.emitted_any_delta:
+            _emit_final_text_if_needed(final_payload, on_text_delta=self.on_text_delta)
+
+        return final_payload
+
+
 def _consume_stream(
     stream_obj: Any,
     on_text_delta: Callable[[str], None] | None,
     on_stream_event: Callable[[dict[str, Any]], None] | None,
     close_when_done: bool,
 ) -> dict[str, Any]:
-    emitted_any_delta = False
-    collected: list[str] = []
-    final_payload: dict[str, Any] | None = None
+    acc = _StreamAccumulator(on_text_delta=on_text_delta, on_stream_event=on_stream_event)
 
     try:
         # Prefer raw stream events: `text_deltas` helper may coalesce chunks.
         for event in stream_obj:
-            _emit_stream_event_if_needed(_event_to_dict(event), on_stream_event=on_stream_event)
-            delta = _extract_delta_text(event)
-            if delta:
-                emitted_any_delta = True
-                collected.append(delta)
-                if on_text_delta:
-                    on_text_delta(delta)
-
-            maybe_response = _extract_response_payload_from_event(event)
-            if maybe_response is not None:
-                final_payload = _serialize_response(maybe_response)
+            acc.feed(event)
 
         get_final_response = getattr(stream_obj, "get_final_response", None)
         if callable(get_final_response):
             try:
-                final_payload = _serialize_response(get_final_response())
+                acc.final_payload = _serialize_response(get_final_response())
             except Exception:
                 pass
     finally:
@@ -331,13 +664,40 @@ def _consume_stream(
             if callable(close):
                 close()
 
-    if final_payload is None:
-        final_payload = {"output_text": "".join(collected)}
+    return acc.finish()
+
+
+async def _consume_stream_async(
+    stream_obj: Any,
+    on_text_delta: Callable[[str], None] | None,
+    on_stream_event: Callable[[dict[str, Any]], None] | None,
+    close_when_done: bool,
+) -> dict[str, Any]:
+    acc = _StreamAccumulator(on_text_delta=on_text_delta, on_stream_event=on_stream_event)
+
+    try:
+        async for event in stream_obj:
+            acc.feed(event)
+
+        get_final_response = getattr(stream_obj, "get_final_response", None)
+        if callable(get_final_response):
+            try:
+                acc.final_payload = _serialize_response(await _maybe_await(get_final_response()))
+            except Exception:
+                pass
+    finally:
+        if close_when_done:
+            close = getattr(stream_obj, "close", None)
+            if callable(close):
+                await _maybe_await(close())
+
+    return acc.finish()
 
-    if not emitted_any_delta:
-        _emit_final_text_if_needed(final_payload, on_text_delta=on_text_delta)
 
-    return final_payload
+async def _maybe_await(value: Any) -> Any:
+    if asyncio.iscoroutine(value) or isinstance(value, asyncio.Future):
+        return await value
+    return value
 
 
 def _extract_response_payload_from_event(event: Any) -> Any | None:
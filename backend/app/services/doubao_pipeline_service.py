@@ -1,13 +1,14 @@
 from typing import Any
 from typing import Callable
 
-from app.ai.orchestrator import run_capability_now
+from app.ai.orchestrator import run_capability_now, run_capability_now_async
 
 
 class DoubaoPipelineService:
     """
     Backward-compatible facade.
     Internally delegates to the new AI capability layer.
+    *_async 变体走 AsyncDoubaoOpenAIClient，供 async 路由直接 await。
     """
 
     def analyze_stage1(
@@ -18,21 +19,24 @@ class DoubaoPipelineService:
         model_tier: str | None = None,
         event_callback: Callable[[dict[str, Any]], None] | None = None,
     ) -> dict[str, Any]:
-        paths = [str(item or "").strip() for item in (image_paths or []) if str(item or "").strip()]
-        input_payload: dict[str, Any] = {}
-        if paths:
-            input_payload["image_paths"] = paths
-            input_payload["image_path"] = paths[0]
-        else:
-            single = str(image_path or "").strip()
-            if not single:
-                raise ValueError("analyze_stage1 requires image_path or image_paths.")
-            input_payload["image_path"] = single
-        if model_tier:
-            input_payload["model_tier"] = model_tier
         return run_capability_now(
             capability="doubao.stage1_vision",
-            input_payload=input_payload,
+            input_payload=_stage1_input(image_path, image_paths, model_tier),
+            trace_id=trace_id,
+            event_callback=event_callback,
+        )
+
+    async def analyze_stage1_async(
+        self,
+        image_path: str | None = None,
+        image_paths: list[str] | None = None,
+        trace_id: str | None = None,
+        model_tier: str | None = None,
+        event_callback: Callable[[dict[str, Any]], None] | None = None,
+    ) -> dict[str, Any]:
+        return await run_capability_now_async(
+            capability="doubao.stage1_vision",
+            input_payload=_stage1_input(image_path, image_paths, model_tier),
             trace_id=trace_id,
             event_callback=event_callback,
         )
@@ -44,12 +48,23 @@ class DoubaoPipelineService:
         model_tier: str | None = None,
         event_callback: Callable[[dict[str, Any]], None] | None = None,
     ) -> dict[str, Any]:
-        input_payload: dict[str, Any] = {"vision_text": vision_text}
-        if model_tier:
-            input_payload["model_tier"] = model_tier
         return run_capability_now(
             capability="doubao.stage2_struct",
-            input_payload=input_payload,
+            input_payload=_stage2_input(vision_text, model_tier),
+            trace_id=trace_id,
+            event_callback=event_callback,
+        )
+
+    async def analyze_stage2_async(
+        self,
+        vision_text: str,
+        trace_id: str | None = None,
+        model_tier: str | None = None,
+        event_callback: Callable[[dict[str, Any]], None] | None = None,
+    ) -> dict[str, Any]:
+        return await run_capability_now_async(
+            capability="doubao.stage2_struct",
+            input_payload=_stage2_input(vision_text, model_tier),
             trace_id=trace_id,
             event_callback=event_callback,
         )
@@ -62,14 +77,56 @@ class DoubaoPipelineService:
         stage2_model_tier: str | None = None,
         event_callback: Callable[[dict[str, Any]], None] | None = None,
     ) -> dict[str, Any]:
-        input_payload: dict[str, Any] = {"image_path": image_path}
-        if stage1_model_tier:
-            input_payload["stage1_model_tier"] = stage1_model_tier
-        if stage2_model_tier:
-            input_payload["stage2_model_tier"] = stage2_model_tier
         return run_capability_now(
             capability="doubao.two_stage_parse",
-            input_payload=input_payload,
+            input_payload=_two_stage_input(image_path, stage1_model_tier, stage2_model_tier),
+            trace_id=trace_id,
+            event_callback=event_callback,
+        )
+
+    async def analyze_async(
+        self,
+        image_path: str,
+        trace_id: str | None = None,
+        stage1_model_tier: str | None = None,
+        stage2_model_tier: str | None = None,
+        event_callback: Callable[[dict[str, Any]], None] | None = None,
+    ) -> dict[str, Any]:
+        return await run_capability_now_async(
+            capability="doubao.two_stage_parse",
+            input_payload=_two_stage_input(image_path, stage1_model_tier, stage2_model_tier),
             trace_id=trace_id,
             event_callback=event_callback,
         )
+
+
+def _stage1_input(image_path: str | None, image_paths: list[str] | None, model_tier: str | None) -> dict[str, Any]:
+    paths = [str(item or "").strip() for item in (image_paths or []) if str(item or "").strip()]
+    input_payload: dict[str, Any] = {}
+    if paths:
+        input_payload["image_paths"] = paths
+        input_payload["image_path"] = paths[0]
+    else:
+        single = str(image_path or "").strip()
+        if not single:
+            raise ValueError("analyze_stage1 requires image_path or image_paths.")
+        input_payload["image_path"] = single
+    if model_tier:
+        input_payload["model_tier"] = model_tier
+    return input_payload
+
+
+def _stage2_input(vision_text: str, model_tier: str | None) -> dict[str, Any]:
+    input_payload: dict[str, Any] = {"vision_text": vision_text}
+    if model_tier:
+        input_payload["model_tier"] = model_tier
+    return input_payload
+
+
+def _two_stage_input(image_path: str, stage1_model_tier: str | None, stage2_model_tier: str | None) -> dict[str, Any]:
+    input_payload: dict[str, Any] = {"image_path": image_path}
+    if stage1_model_tier:
+        input_payload["stage1_model_tier"] = stage1_model_tier
+    if stage2_model_tier:
+        input_payload["stage2_model_tier"] = stage2_model_tier
+    return input_payload
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import itertools
+import random
+import threading
+import time
+from typing import Any, Callable
+
+import httpx
+from openai import APIStatusError, BadRequestError, NotFoundError
+
+# 本地假 Responses API（不联网），可直接替换 DoubaoOpenAIClient.client：
+# - 按字符数近似计 token（1 字符 = 1 token），只用于比较不同请求形态的相对开销
+# - 支持前缀缓存协议：caching.prefix=true 的请求只存前缀并返回 id；带 previous_response_id 的请求
+#   把前缀计入 input_tokens，同时记为 input_tokens_details.cached_tokens（与方舟的 usage 字段一致）
+# - responder(prompt_text) 决定输出文本，latency_seconds 模拟上游耗时；latency_jitter_seconds 在其上叠加
+#   [0, jitter) 的随机抖动，seed 固定时抖动序列可复现（基准测试跨提交对比用）
+# - fail_next_prefix_requests(status) 让接下来的前缀创建请求返回指定状态码（模拟限流 / 超时等瞬时错误）
+_FAKE_ENDPOINT = "http://fake-responses.local/responses"
+
+
+class FakeResponsesProvider:
+    def __init__(
+        self,
+        responder: Callable[[str], str] | None = None,
+        *,
+        latency_seconds: float = 0.0,
+        latency_jitter_seconds: float = 0.0,
+        seed: int | None = None,
+        supports_prefix_cache: bool = True,
+    ):
+        self.responder = responder or (lambda _prompt: "{}")
+        self.latency_seconds = max(0.0, float(latency_seconds))
+        self.latency_jitter_seconds = max(0.0, float(latency_jitter_seconds))
+        self._latency_rng = random.Random(seed)
+        self.supports_prefix_cache = supports_prefix_cache
+        self.responses = _FakeResponsesAPI(self)
+        self._stored_prefixes: dict[str, str] = {}
+        self._prefix_failures: list[int] = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.stats = {
+            "requests": 0,
+            "prefix_requests": 0,
+            "prefix_tokens": 0,
+            "input_tokens": 0,
+            "cached_tokens": 0,
+            "output_tokens": 0,
+        }
+
+    def forget_prefixes(self) -> None:
+        """模拟服务端缓存过期 / 被清理。"""
+        with self._lock:
+            self._stored_prefixes.clear()
+
+    def fail_next_prefix_requests(self, status_code: int, *, times: int = 1) -> None:
+        with self._lock:
+            self._prefix_failures.extend([int(status_code)] * max(0, int(times)))
+
+    def _next_latency(self) -> float:
+        if not self.latency_jitter_seconds:
+            return self.latency_seconds
+        with self._lock:
+            return self.latency_seconds + self._latency_rng.random() * self.latency_jitter_seconds
+
+    def create(self, **body: Any) -> dict[str, Any]:
+        latency = self._next_latency()
+        if latency:
+            time.sleep(latency)
+        extra = body.get("extra_body") or {}
+        caching = extra.get("caching") if isinstance(extra, dict) else None
+        text = _input_text(body.get("input"))
+        with self._lock:
+            response_id = f"resp_fake_{next(self._ids)}"
+            self.stats["requests"] += 1
+            if isinstance(caching, dict) and caching.get("prefix"):
+                if not self.supports_prefix_cache:
+                    raise BadRequestError(
+                        "prefix caching is not supported for this model",
+                        response=_http_response(400),
+                        body=None,
+                    )
+                if self._prefix_failures:
+                    status_code = self._prefix_failures.pop(0)
+                    raise APIStatusError(
+                        f"prefix request failed with status {status_code}",
+                        response=_http_response(status_code),
+                        body=None,
+                    )
+                self._stored_prefixes[response_id] = text
+                self.stats["prefix_requests"] += 1
+                self.stats["prefix_tokens"] += len(text)
+                return _response_payload(response_id, output_text="", input_tokens=len(text), cached_tokens=0)
+
+            cached_text = ""
+            previous_id = body.get("previous_response_id")
+            if previous_id:
+                if previous_id not in self._stored_prefixes:
+                    raise NotFoundError(
+                        f"previous_response_id {previous_id} not found",
+                        response=_http_response(404),
+                        body=None,
+                    )
+                cached_text = self._stored_prefixes[previous_id]
+
+        prompt = f"{cached_text}\n\n{text}" if cached_text else text
+        output_text = self.responder(prompt)
+        input_tokens = len(cached_text) + len(text)
+        with self._lock:
+            self.stats["input_tokens"] += input_tokens
+            self.stats["cached_tokens"] += len(cached_text)
+            self.stats["output_tokens"] += len(output_text)
+        return _response_payload(
+            response_id,
+            output_text=output_text,
+            input_tokens=input_tokens,
+            cached_tokens=len(cached_text),
+        )
+
+
+class _FakeResponsesAPI:
+    def __init__(self, provider: FakeResponsesProvider):
+        self._provider = provider
+
+    def create(self, **body: Any) -> dict[str, Any]:
+        # 流式请求也直接返回完整响应（调用方会按“非迭代结果”处理并补发一次全文增量）。
+        body.pop("stream", None)
+        return self._provider.create(**body)
+
+
+def _input_text(items: Any) -> str:
+    parts: list[str] = []
+    for item in items or []:
+        for content in (item or {}).get("content") or []:
+            if isinstance(content, dict) and content.get("type") == "input_text":
+                parts.append(str(content.get("text") or ""))
+    return "\n\n".join(parts)
+
+
+def _response_payload(response_id: str, *, output_text: str, input_tokens: int, cached_tokens: int) -> dict[str, Any]:
+    return {
+        "id": response_id,
+        "object": "response",
+        "status": "completed",
+        "output_text": output_text,
+        "usage": {
+            "input_tokens": input_tokens,
+            "output_tokens": len(output_text),
+            "total_tokens": input_tokens + len(output_text),
+            "input_tokens_details": {"cached_tokens": cached_tokens},
+        },
+    }
+
+
+def _http_response(status_code: int) -> httpx.Response:
+    return httpx.Response(status_code, request=httpx.Request("POST", _FAKE_ENDPOINT))
@@ -0,0 +1,145 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.db.models import ProductIndex
+from app.schemas import ProductCard
+from app.settings import settings
+
+# 对比页产品库缓存（与用户无关的部分）：
+# - 按品类缓存“最新产品卡片”的有序列表；使用次数、推荐 / 常用标记与排序仍按请求现算
+# - ORM 会话提交时若有 ProductIndex 新增 / 修改 / 删除，按受影响品类递增代数并丢弃缓存；
+#   只在 after_commit 失效，避免未提交的写入被并发读者以新代数缓存成旧数据
+# - 其他进程的写入靠 TTL 兜底（mobile_compare_library_cache_ttl_seconds）
+# 缓存中的 ProductCard 在请求间共享，使用方只读不改。
+_DIRTY_CATEGORIES_KEY = "mobile_compare_library_dirty_categories"
+_ALL_CATEGORIES = "*"
+
+
+@dataclass(frozen=True)
+class CompareLibraryCards:
+    generation: tuple[int, int]
+    built_at: float
+    cards: tuple[ProductCard, ...]
+
+
+class _CompareLibraryCache:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: dict[tuple[str, str], CompareLibraryCards] = {}
+        self._generations: dict[str, int] = {}
+        # 整体失效（品类未知）时递增，与品类代数一起组成缓存代数。
+        self._epoch = 0
+        self.stats = {"hits": 0, "builds": 0, "invalidations": 0}
+
+    def get_or_build(self, *, bind_key: str, category: str, build: Callable[[], list[ProductCard]]) -> tuple[ProductCard, ...]:
+        ttl = int(settings.mobile_compare_library_cache_ttl_seconds or 0)
+        if ttl <= 0:
+            return tuple(build())
+        key = (bind_key, category)
+        with self._lock:
+            generation = (self._epoch, self._generations.get(category, 0))
+            entry = self._entries.get(key)
+            if entry is not None and entry.generation == generation and time.monotonic() - entry.built_at < ttl:
+                self.stats["hits"] += 1
+                return entry.cards
+        cards = tuple(build())
+        with self._lock:
+            self.stats["builds"] += 1
+            # 构建期间有提交失效了该品类：本次结果照常返回，但不写入缓存。
+            if (self._epoch, self._generations.get(category, 0)) == generation:
+                self._entries[key] = CompareLibraryCards(generation=generation, built_at=time.monotonic(), cards=cards)
+        return cards
+
+    def invalidate(self, categories: Iterable[str]) -> None:
+        with self._lock:
+            targets = set(categories)
+            if _ALL_CATEGORIES in targets:
+                self._epoch += 1
+                self._entries.clear()
+                self.stats["invalidations"] += 1
+                return
+            for category in sorted(targets):
+                self._generations[category] = self._generations.get(category, 0) + 1
+                for key in [key for key in self._entries if key[1] == category]:
+                    self._entries.pop(key, None)
+                self.stats["invalidations"] += 1
+
+    def describe(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                "entries": len(self._entries),
+                "ttl_seconds": int(settings.mobile_compare_library_cache_ttl_seconds or 0),
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.stats = {key: 0 for key in self.stats}
+
+
+_LIBRARY_CACHE = _CompareLibraryCache()
+
+
+def cached_compare_library_cards(
+    db: Session,
+    *,
+    category: str,
+    build: Callable[[], list[ProductCard]],
+) -> tuple[ProductCard, ...]:
+    """取品类产品库卡片（有序）；未命中时调用 build 现建并缓存。"""
+    bind_key = str(getattr(db.get_bind(), "url", ""))
+    return _LIBRARY_CACHE.get_or_build(bind_key=bind_key, category=str(category or "").strip().lower(), build=build)
+
+
+def invalidate_compare_library_cache(categories: Iterable[str]) -> None:
+    normalized = {str(item or "").strip().lower() for item in categories if str(item or "").strip()}
+    if normalized:
+        _LIBRARY_CACHE.invalidate(sorted(normalized))
+
+
+def describe_compare_library_cache() -> dict[str, Any]:
+    return _LIBRARY_CACHE.describe()
+
+
+def reset_compare_library_cache() -> None:
+    _LIBRARY_CACHE.clear()
+
+
+def _product_categories(obj: ProductIndex) -> set[str]:
+    # 只读已加载的属性，不在 flush 钩子里触发懒加载；取不到品类时整体失效。
+    state = inspect(obj)
+    category = state.dict.get("category")
+    if category is None:
+        return {_ALL_CATEGORIES}
+    categories = {str(category)}
+    # 改品类时新旧两个品类都要失效。
+    categories.update(str(item or "") for item in state.attrs.category.history.deleted)
+    return categories
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_dirty_product_categories(session: Session, flush_context: Any) -> None:
+    dirty: set[str] = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, ProductIndex):
+            dirty.update(_product_categories(obj))
+    if dirty:
+        session.info.setdefault(_DIRTY_CATEGORIES_KEY, set()).update(dirty)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_product_categories(session: Session) -> None:
+    dirty = session.info.pop(_DIRTY_CATEGORIES_KEY, None)
+    if dirty:
+        invalidate_compare_library_cache(dirty)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_product_categories(session: Session) -> None:
+    session.info.pop(_DIRTY_CATEGORIES_KEY, None)
@@ -1,15 +1,23 @@
 import json
+import os
+import sqlite3
 import threading
-from typing import Any
+import time
+from collections import OrderedDict
+from typing import Any, Callable
 from urllib.error import HTTPError, URLError
 from urllib.parse import urlencode
 from urllib.request import Request, urlopen
 
 from app.settings import settings
 
-_LOCATION_CACHE_LOCK = threading.Lock()
-_LOCATION_CACHE: dict[str, dict[str, Any]] = {}
-_LOCATION_CACHE_MAX_SIZE = 1024
+# 逆解析缓存分三层，键都是 provider + geohash 网格（默认 7 位 ≈ 150m）：
+# - 进程内 LRU（带 TTL，失败结果只做短期负缓存）
+# - 本地持久网格缓存（SQLite 文件，重启不丢；同机多个副本挂同一 storage 时共享）
+# - 同一网格的并发请求合并成一次上游调用，其余请求等待首个请求的结果
+# 上游只用网格中心坐标查询，保证同一网格在任何副本上拿到的都是同一份结果。
+_GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_LOCATION_STORE_FILENAME = "mobile_reverse_geocode.sqlite3"
 
 
 def _normalize_text(value: Any) -> str | None:
@@ -20,38 +28,336 @@ def _normalize_text(value: Any) -> str | None:
     return text or None
 
 
+def geohash_encode(latitude: float, longitude: float, precision: int) -> str:
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars: list[str] = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        rng, value = (lon_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_GEOHASH_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+
+def geohash_center(cell: str) -> tuple[float, float]:
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+    for char in cell:
+        index = _GEOHASH_BASE32.index(char)
+        for shift in range(4, -1, -1):
+            rng = lon_range if even else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if (index >> shift) & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+    return (lat_range[0] + lat_range[1]) / 2, (lon_range[0] + lon_range[1]) / 2
+
+
+def _grid_precision() -> int:
+    return min(max(int(settings.mobile_reverse_geocode_grid_precision or 7), 1), 12)
+
+
 def _location_cache_key(provider: str, latitude: float, longitude: float) -> str:
-    return f"{provider}:{latitude:.3f},{longitude:.3f}"
+    return f"{provider}:{geohash_encode(latitude, longitude, _grid_precision())}"
 
 
-def _cache_get(key: str) -> dict[str, Any] | None:
-    with _LOCATION_CACHE_LOCK:
-        cached = _LOCATION_CACHE.get(key)
-        return dict(cached) if isinstance(cached, dict) else None
+class _LocationGridStore:
+    """本地持久网格缓存：只存成功结果，过期行读时忽略、写时覆盖。任何存储异常都只降级为未命中。"""
 
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._conn_path: str | None = None
 
-def _cache_set(key: str, value: dict[str, Any]) -> None:
-    with _LOCATION_CACHE_LOCK:
-        if len(_LOCATION_CACHE) >= _LOCATION_CACHE_MAX_SIZE:
-            _LOCATION_CACHE.clear()
-        _LOCATION_CACHE[key] = dict(value)
+    def _resolve_path(self) -> str | None:
+        raw = str(settings.mobile_reverse_geocode_store_path or "").strip()
+        if raw.lower() == "none":
+            return None
+        if raw:
+            return raw
+        return os.path.join(settings.storage_dir, "cache", _LOCATION_STORE_FILENAME)
 
+    def _connection(self) -> sqlite3.Connection | None:
+        path = self._resolve_path()
+        if path is None:
+            self._close()
+            return None
+        if self._conn is not None and self._conn_path == path:
+            return self._conn
+        self._close()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = sqlite3.connect(path, timeout=1.0, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS location_cells ("
+            "cell_key TEXT PRIMARY KEY, payload TEXT NOT NULL, expires_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn = conn
+        self._conn_path = path
+        return conn
 
-def _amap_reverse_geocode(latitude: float, longitude: float) -> dict[str, Any]:
-    provider = "amap"
-    api_key = str(settings.mobile_reverse_geocode_key or "").strip()
-    if not api_key:
+    def _close(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+        self._conn = None
+        self._conn_path = None
+
+    def get(self, key: str, *, now: float) -> tuple[dict[str, Any], float] | None:
+        with self._lock:
+            try:
+                conn = self._connection()
+                if conn is None:
+                    return None
+                row = conn.execute(
+                    "SELECT payload, expires_at FROM location_cells WHERE cell_key = ? AND expires_at > ?",
+                    (key, now),
+                ).fetchone()
+            except Exception:
+                return None
+        if row is None:
+            return None
+        try:
+            payload = json.loads(row[0])
+        except Exception:
+            return None
+        return (payload, float(row[1])) if isinstance(payload, dict) else None
+
+    def put(self, key: str, value: dict[str, Any], *, expires_at: float, now: float) -> None:
+        with self._lock:
+            try:
+                conn = self._connection()
+                if conn is None:
+                    return
+                conn.execute(
+                    "INSERT INTO location_cells (cell_key, payload, expires_at, updated_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(cell_key) DO UPDATE SET payload = excluded.payload, "
+                    "expires_at = excluded.expires_at, updated_at = excluded.updated_at",
+                    (key, json.dumps(value, ensure_ascii=False), expires_at, now),
+                )
+            except Exception:
+                return
+
+    def describe(self) -> dict[str, Any]:
+        with self._lock:
+            path = self._resolve_path()
+            try:
+                conn = self._connection()
+                rows = int(conn.execute("SELECT COUNT(*) FROM location_cells").fetchone()[0]) if conn else 0
+            except Exception:
+                rows = None
+        # 不回显文件路径：统计会汇总到 /metrics
+        return {"enabled": path is not None, "rows": rows}
+
+    def clear(self) -> None:
+        with self._lock:
+            try:
+                conn = self._connection()
+                if conn is not None:
+                    conn.execute("DELETE FROM location_cells")
+            except Exception:
+                pass
+            self._close()
+
+
+class _InFlightLookup:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: dict[str, Any] | None = None
+
+
+class _LocationCache:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple[float, dict[str, Any]]]" = OrderedDict()
+        self._inflight: dict[str, _InFlightLookup] = {}
+        self.store = _LocationGridStore()
+        self._stats = self._empty_stats()
+
+    @staticmethod
+    def _empty_stats() -> dict[str, int]:
         return {
-            "status": "unconfigured",
-            "provider": provider,
-            "error": "mobile_reverse_geocode_key_missing",
+            "requests": 0,
+            "memory_hits": 0,
+            "store_hits": 0,
+            "coalesced": 0,
+            "upstream_calls": 0,
+            "upstream_failures": 0,
+            "evictions": 0,
         }
-    endpoint = str(settings.mobile_reverse_geocode_endpoint or "").strip() or "https://restapi.amap.com/v3/geocode/regeo"
-    cache_key = _location_cache_key(provider, latitude, longitude)
-    cached = _cache_get(cache_key)
-    if cached is not None:
-        return cached
 
+    def _memory_get(self, key: str, now: float) -> dict[str, Any] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= now:
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _memory_set(self, key: str, value: dict[str, Any], expires_at: float) -> None:
+        self._entries[key] = (expires_at, dict(value))
+        self._entries.move_to_end(key)
+        max_entries = max(1, int(settings.mobile_reverse_geocode_cache_max_entries or 1))
+        while len(self._entries) > max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def resolve(self, key: str, fetch: Callable[[], dict[str, Any]]) -> dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            self._stats["requests"] += 1
+            cached = self._memory_get(key, now)
+            if cached is not None:
+                self._stats["memory_hits"] += 1
+                return dict(cached)
+            waiter = self._inflight.get(key)
+            leader = waiter is None
+            if leader:
+                waiter = _InFlightLookup()
+                self._inflight[key] = waiter
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            timeout = float(settings.mobile_reverse_geocode_timeout_seconds or 3.0) + 5.0
+            if waiter.done.wait(timeout) and waiter.result is not None:
+                return dict(waiter.result)
+            # 首个请求超时未返回：退化为自己查一次，不无限等待。
+            return self._fetch_and_remember(key, fetch)
+
+        try:
+            result = self._lookup_as_leader(key, fetch, now)
+            waiter.result = result
+            return dict(result)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            waiter.done.set()
+
+    def _lookup_as_leader(self, key: str, fetch: Callable[[], dict[str, Any]], now: float) -> dict[str, Any]:
+        stored = self.store.get(key, now=now)
+        if stored is not None:
+            value, expires_at = stored
+            with self._lock:
+                self._stats["store_hits"] += 1
+                self._memory_set(key, value, expires_at)
+            return value
+        return self._fetch_and_remember(key, fetch)
+
+    def _fetch_and_remember(self, key: str, fetch: Callable[[], dict[str, Any]]) -> dict[str, Any]:
+        with self._lock:
+            self._stats["upstream_calls"] += 1
+        result = fetch()
+        now = time.time()
+        if result.get("status") == "resolved":
+            expires_at = now + max(1, int(settings.mobile_reverse_geocode_cache_ttl_seconds or 1))
+            self.store.put(key, result, expires_at=expires_at, now=now)
+            with self._lock:
+                self._memory_set(key, result, expires_at)
+        else:
+            failure_ttl = max(0, int(settings.mobile_reverse_geocode_failure_ttl_seconds or 0))
+            with self._lock:
+                self._stats["upstream_failures"] += 1
+                if failure_ttl:
+                    self._memory_set(key, result, now + failure_ttl)
+        return result
+
+    def describe(self) -> dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            entries = len(self._entries)
+            inflight = len(self._inflight)
+        requests = stats["requests"]
+        served_without_upstream = stats["memory_hits"] + stats["store_hits"] + stats["coalesced"]
+        return {
+            **stats,
+            "hit_ratio": round(served_without_upstream / requests, 4) if requests else None,
+            "memory_entries": entries,
+            "memory_max_entries": max(1, int(settings.mobile_reverse_geocode_cache_max_entries or 1)),
+            "inflight": inflight,
+            "grid_precision": _grid_precision(),
+            "store": self.store.describe(),
+        }
+
+    def reset(self, *, clear_store: bool = False) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._stats = self._empty_stats()
+        if clear_store:
+            self.store.clear()
+
+
+_LOCATION_CACHE = _LocationCache()
+
+
+def describe_mobile_location_cache() -> dict[str, Any]:
+    return _LOCATION_CACHE.describe()
+
+
+_METRIC_PREFIX = "backend_mobile_location_cache"
+_COUNTER_HELP = {
+    "requests": "Reverse geocode lookups.",
+    "memory_hits": "Lookups served from the in-process LRU.",
+    "store_hits": "Lookups served from the persistent grid store.",
+    "coalesced": "Lookups that waited on an in-flight upstream call for the same grid cell.",
+    "upstream_calls": "Calls made to the map provider.",
+    "upstream_failures": "Failed calls to the map provider.",
+    "evictions": "LRU evictions.",
+}
+
+
+def render_mobile_location_cache_metrics() -> str:
+    """逆解析缓存统计（Prometheus 文本格式），由 /metrics 追加输出；命中率 = 1 - upstream_calls / requests。"""
+    stats = describe_mobile_location_cache()
+    lines: list[str] = []
+    for key, help_text in _COUNTER_HELP.items():
+        lines.append(f"# HELP {_METRIC_PREFIX}_{key}_total {help_text}")
+        lines.append(f"# TYPE {_METRIC_PREFIX}_{key}_total counter")
+        lines.append(f"{_METRIC_PREFIX}_{key}_total {int(stats.get(key) or 0)}")
+    gauges = {
+        "memory_entries": ("Entries in the in-process LRU.", stats["memory_entries"]),
+        "inflight": ("Grid cells with an upstream call in flight.", stats["inflight"]),
+        "store_rows": ("Rows in the persistent grid store.", (stats.get("store") or {}).get("rows")),
+    }
+    for key, (help_text, value) in gauges.items():
+        if value is None:
+            continue
+        lines.append(f"# HELP {_METRIC_PREFIX}_{key} {help_text}")
+        lines.append(f"# TYPE {_METRIC_PREFIX}_{key} gauge")
+        lines.append(f"{_METRIC_PREFIX}_{key} {int(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def reset_mobile_location_cache(*, clear_store: bool = False) -> None:
+    _LOCATION_CACHE.reset(clear_store=clear_store)
+
+
+def _amap_reverse_geocode(latitude: float, longitude: float, *, api_key: str) -> dict[str, Any]:
+    provider = "amap"
+    endpoint = str(settings.mobile_reverse_geocode_endpoint or "").strip() or "https://restapi.amap.com/v3/geocode/regeo"
     query = urlencode(
         {
             "key": api_key,
@@ -128,7 +434,6 @@ def _amap_reverse_geocode(latitude: float, longitude: float) -> dict[str, Any]:
         "location_adcode": _normalize_text(address_component.get("adcode")),
         "location_city_code": _normalize_text(address_component.get("citycode")),
     }
-    _cache_set(cache_key, result)
     return result
 
 
@@ -141,7 +446,19 @@ def reverse_mobile_location(latitude: float, longitude: float) -> dict[str, Any]
             "error": "mobile_reverse_geocode_provider_missing",
         }
     if provider == "amap":
-        return _amap_reverse_geocode(latitude=latitude, longitude=longitude)
+        api_key = str(settings.mobile_reverse_geocode_key or "").strip()
+        if not api_key:
+            return {
+                "status": "unconfigured",
+                "provider": provider,
+                "error": "mobile_reverse_geocode_key_missing",
+            }
+        cache_key = _location_cache_key(provider, latitude, longitude)
+        center_latitude, center_longitude = geohash_center(cache_key.split(":", 1)[1])
+        return _LOCATION_CACHE.resolve(
+            cache_key,
+            lambda: _amap_reverse_geocode(center_latitude, center_longitude, api_key=api_key),
+        )
     return {
         "status": "failed",
         "provider": provider,
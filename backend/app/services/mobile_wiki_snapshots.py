@@ -0,0 +1,183 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.db.models import MobileWikiProductSnapshot
+from app.db.runtime_schema import ensure_runtime_schema
+from app.services.storage import now_iso
+from app.settings import settings
+
+# 移动端百科产品详情快照：
+# - source_version = sha256(快照格式版本 + 所有输入的廉价指纹)，由路由层拼装（产品行、文档 stat 指纹、图片 URL、
+#   类型映射、精选位、成分库版本戳）；任一输入变化版本戳就变，下次读取时重建，不依赖各写入点主动失效
+# - body 是预序列化的响应 JSON，ETag = sha256(body)（强校验），命中时直接回字节或 304
+# - 两层：进程内 LRU（热）+ mobile_wiki_product_snapshots 表（重启 / 多副本共享）
+# 调整详情响应结构或组装逻辑时必须递增 MOBILE_WIKI_SNAPSHOT_FORMAT，旧快照随之全部失效。
+MOBILE_WIKI_SNAPSHOT_FORMAT = "2026-10-19.1"
+
+
+@dataclass(frozen=True)
+class WikiProductSnapshot:
+    source_version: str
+    etag: str
+    body: bytes
+
+
+class _SnapshotMemory:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, WikiProductSnapshot]" = OrderedDict()
+        self.stats = {"memory_hits": 0, "store_hits": 0, "builds": 0, "not_modified": 0}
+
+    def get(self, product_id: str, source_version: str) -> WikiProductSnapshot | None:
+        with self._lock:
+            snapshot = self._entries.get(product_id)
+            if snapshot is None or snapshot.source_version != source_version:
+                return None
+            self._entries.move_to_end(product_id)
+            self.stats["memory_hits"] += 1
+            return snapshot
+
+    def put(self, product_id: str, snapshot: WikiProductSnapshot) -> None:
+        with self._lock:
+            self._entries[product_id] = snapshot
+            self._entries.move_to_end(product_id)
+            max_entries = max(1, int(settings.mobile_wiki_snapshot_memory_max_entries or 1))
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+
+    def forget(self, product_ids: Iterable[str]) -> None:
+        with self._lock:
+            for product_id in product_ids:
+                self._entries.pop(product_id, None)
+
+    def count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def describe(self) -> dict[str, Any]:
+        with self._lock:
+            return {**self.stats, "memory_entries": len(self._entries)}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.stats = {key: 0 for key in self.stats}
+
+
+_SNAPSHOTS = _SnapshotMemory()
+
+
+def mobile_wiki_snapshot_source_version(parts: Iterable[Any]) -> str:
+    raw = json.dumps([MOBILE_WIKI_SNAPSHOT_FORMAT, *parts], ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def mobile_wiki_snapshot_etag(body: bytes) -> str:
+    return f'"{hashlib.sha256(body).hexdigest()[:40]}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    # If-None-Match 按弱比较：忽略 W/ 前缀；支持逗号分隔的多个值与 "*"。
+    raw = str(if_none_match or "").strip()
+    if not raw:
+        return False
+    if raw == "*":
+        return True
+    for candidate in raw.split(","):
+        value = candidate.strip()
+        if value.startswith("W/"):
+            value = value[2:]
+        if value == etag:
+            return True
+    return False
+
+
+def load_mobile_wiki_product_snapshot(
+    db: Session,
+    *,
+    product_id: str,
+    source_version: str,
+) -> WikiProductSnapshot | None:
+    snapshot = _SNAPSHOTS.get(product_id, source_version)
+    if snapshot is not None:
+        return snapshot
+    ensure_runtime_schema(db.get_bind())
+    row = db.execute(
+        select(
+            MobileWikiProductSnapshot.source_version,
+            MobileWikiProductSnapshot.etag,
+            MobileWikiProductSnapshot.body,
+        ).where(MobileWikiProductSnapshot.product_id == product_id)
+    ).first()
+    if row is None or str(row.source_version) != source_version:
+        return None
+    snapshot = WikiProductSnapshot(source_version=source_version, etag=str(row.etag), body=bytes(row.body))
+    _SNAPSHOTS.count("store_hits")
+    _SNAPSHOTS.put(product_id, snapshot)
+    return snapshot
+
+
+def save_mobile_wiki_product_snapshot(
+    db: Session,
+    *,
+    product_id: str,
+    category: str,
+    source_version: str,
+    body: bytes,
+) -> WikiProductSnapshot:
+    snapshot = WikiProductSnapshot(source_version=source_version, etag=mobile_wiki_snapshot_etag(body), body=body)
+    _SNAPSHOTS.count("builds")
+    _SNAPSHOTS.put(product_id, snapshot)
+    ensure_runtime_schema(db.get_bind())
+    values = {
+        "product_id": product_id,
+        "category": category,
+        "source_version": source_version,
+        "etag": snapshot.etag,
+        "body": body,
+        "body_bytes": len(body),
+        "built_at": now_iso(),
+    }
+    try:
+        rec = db.get(MobileWikiProductSnapshot, product_id)
+        if rec is None:
+            db.add(MobileWikiProductSnapshot(**values))
+        else:
+            for key, value in values.items():
+                setattr(rec, key, value)
+        db.commit()
+    except IntegrityError:
+        # 并发首次构建同一产品：另一请求已写入，内容由同一版本戳决定，直接沿用。
+        db.rollback()
+    return snapshot
+
+
+def delete_mobile_wiki_product_snapshots(db: Session, product_ids: Iterable[str]) -> int:
+    """删除产品时一并清掉快照（调用方负责提交）。"""
+    ids = sorted({str(item).strip() for item in product_ids if str(item).strip()})
+    if not ids:
+        return 0
+    _SNAPSHOTS.forget(ids)
+    ensure_runtime_schema(db.get_bind())
+    result = db.execute(delete(MobileWikiProductSnapshot).where(MobileWikiProductSnapshot.product_id.in_(ids)))
+    return int(result.rowcount or 0)
+
+
+def record_mobile_wiki_snapshot_not_modified() -> None:
+    _SNAPSHOTS.count("not_modified")
+
+
+def describe_mobile_wiki_snapshots() -> dict[str, Any]:
+    return _SNAPSHOTS.describe()
+
+
+def reset_mobile_wiki_snapshot_memory() -> None:
+    _SNAPSHOTS.clear()
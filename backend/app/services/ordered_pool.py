@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import queue
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator
+
+# 有界并发 + 按提交顺序出结果的小线程池，给“逐条调模型”的批量构建用：
+# - 模型调用放到 worker 线程；DB 写入、进度回调始终留在调用方线程（Session 不跨线程）
+# - worker 内产生的流式事件经 relay() 排队，由调用方线程在等待结果时回放
+# - 不需要调模型的条目（跳过）也走同一个顺序队列，保证进度事件严格按 index 递增
+_POLL_SECONDS = 0.05
+
+
+@dataclass
+class OrderedTaskResult:
+    tag: Any
+    value: Any = None
+    error: BaseException | None = None
+
+
+class OrderedTaskPool:
+    def __init__(self, max_workers: int, *, thread_name_prefix: str):
+        self.max_workers = max(1, int(max_workers))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=thread_name_prefix)
+        self._pending: deque[tuple[Any, Future | None, Any]] = deque()
+        self._events: queue.SimpleQueue[Callable[[], None]] = queue.SimpleQueue()
+        self._inflight = 0
+
+    def __enter__(self) -> "OrderedTaskPool":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.shutdown(cancel=exc_type is not None)
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    @property
+    def full(self) -> bool:
+        return self._inflight >= self.max_workers
+
+    def relay(self, callback: Callable[..., None] | None) -> Callable[..., None] | None:
+        """把 worker 线程里的回调包装成“排队，稍后在调用方线程执行”。"""
+        if callback is None:
+            return None
+
+        def _queued(*args: Any, **kwargs: Any) -> None:
+            self._events.put(lambda: callback(*args, **kwargs))
+
+        return _queued
+
+    def submit(self, tag: Any, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
+        future = self._executor.submit(fn, *args, **kwargs)
+        self._inflight += 1
+        self._pending.append((tag, future, None))
+
+    def push_ready(self, tag: Any, value: Any = None) -> None:
+        self._pending.append((tag, None, value))
+
+    def ready(self) -> Iterator[OrderedTaskResult]:
+        """非阻塞：按顺序吐出队首已完成的结果。"""
+        self.pump_events()
+        while self._pending:
+            tag, future, value = self._pending[0]
+            if future is not None and not future.done():
+                return
+            self._pending.popleft()
+            yield self._to_result(tag, future, value)
+
+    def next_result(self) -> OrderedTaskResult | None:
+        """阻塞等待队首结果（等待期间持续回放 worker 事件）。"""
+        if not self._pending:
+            self.pump_events()
+            return None
+        tag, future, value = self._pending[0]
+        if future is not None:
+            while not future.done():
+                self.pump_events()
+                wait([future], timeout=_POLL_SECONDS)
+        self.pump_events()
+        self._pending.popleft()
+        return self._to_result(tag, future, value)
+
+    def drain(self) -> Iterator[OrderedTaskResult]:
+        while self._pending:
+            result = self.next_result()
+            if result is not None:
+                yield result
+
+    def cancel_pending(self) -> list[OrderedTaskResult]:
+        """取消尚未开始的任务，等待已在执行的任务收尾，返回所有已完成（含跳过）的结果。"""
+        for _, future, _ in self._pending:
+            if future is not None:
+                future.cancel()
+        finished: list[OrderedTaskResult] = []
+        while self._pending:
+            tag, future, value = self._pending[0]
+            if future is not None and future.cancelled():
+                self._pending.popleft()
+                self._inflight -= 1
+                continue
+            result = self.next_result()
+            if result is not None:
+                finished.append(result)
+        return finished
+
+    def pump_events(self) -> None:
+        while True:
+            try:
+                event = self._events.get_nowait()
+            except queue.Empty:
+                return
+            event()
+
+    def shutdown(self, *, cancel: bool = False) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=cancel)
+        self.pump_events()
+
+    def _to_result(self, tag: Any, future: Future | None, value: Any) -> OrderedTaskResult:
+        if future is None:
+            return OrderedTaskResult(tag=tag, value=value)
+        self._inflight -= 1
+        error = future.exception()
+        if error is not None:
+            return OrderedTaskResult(tag=tag, error=error)
+        return OrderedTaskResult(tag=tag, value=future.result())
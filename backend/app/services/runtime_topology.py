@@ -66,3 +66,18 @@ def product_workbench_dispatch_mode() -> str:
 
 def should_inline_dispatch_product_workbench_job() -> bool:
     return product_workbench_dispatch_mode() == "inline_local_queue"
+
+
+def storage_reclaim_dispatch_mode() -> str:
+    # 删除产品后的文件回收：单机 API 进程在响应发出后就地执行；split/multi 由 worker 轮询墓碑表
+    profile = normalize_deploy_profile()
+    role = normalize_runtime_role()
+    if role == "worker":
+        return "worker_poller"
+    if profile in {"split_runtime", "multi_node"}:
+        return "worker_poller"
+    return "inline_after_response"
+
+
+def should_inline_reclaim_product_storage() -> bool:
+    return storage_reclaim_dispatch_mode() == "inline_after_response"
@@ -4,21 +4,22 @@ import logging
 import threading
 from typing import Any, Callable
 
-from sqlalchemy import select
+from sqlalchemy import or_, select
 
-from app.db.models import UploadIngestJob
+from app.db.models import MobileCompareSessionIndex, ProductStorageTombstone, ProductWorkbenchJob, UploadIngestJob
+from app.db.runtime_schema import ensure_runtime_schema
 from app.db.session import SessionLocal
-from app.routes.mobile import run_mobile_compare_worker_once
-from app.routes.ingest import _ensure_upload_ingest_job_table, _run_upload_ingest_job
-from app.routes.products import run_product_workbench_worker_once
 from app.settings import settings
-from app.services.runtime_topology import is_worker_runtime
+from app.services.runtime_topology import is_worker_runtime, should_inline_reclaim_product_storage
+from app.services.storage import now_iso
 
 logger = logging.getLogger(__name__)
 
 _worker_lock = threading.Lock()
 _worker_thread: threading.Thread | None = None
 _worker_stop: threading.Event | None = None
+_sweeper_thread: threading.Thread | None = None
+_sweeper_stop: threading.Event | None = None
 
 
 def _worker_poll_interval_seconds() -> float:
@@ -29,10 +30,23 @@ def _worker_poll_interval_seconds() -> float:
     return max(0.2, interval)
 
 
+# 轮询只依赖模型层做一次廉价探测；真正有任务时才导入对应路由模块（连带 schemas / 豆包 pipeline / OpenAI SDK），
+# 空闲 worker 的冷启动与常驻内存不为业务路由付费。
+
+
+def _has_queued_job(statement: Any) -> bool:
+    db = SessionLocal()
+    try:
+        ensure_runtime_schema(db.get_bind())
+        return db.execute(statement.limit(1)).first() is not None
+    finally:
+        db.close()
+
+
 def run_upload_ingest_worker_once() -> bool:
     db = SessionLocal()
     try:
-        _ensure_upload_ingest_job_table(db)
+        ensure_runtime_schema(db.get_bind())
         rec = (
             db.execute(
                 select(UploadIngestJob)
@@ -45,12 +59,61 @@ def run_upload_ingest_worker_once() -> bool:
         )
         if rec is None:
             return False
+        from app.routes.ingest import _run_upload_ingest_job
+
         _run_upload_ingest_job(job_id=str(rec.job_id), db=db, resume=bool(getattr(rec, "resume_requested", False)))
         return True
     finally:
         db.close()
 
 
+def run_mobile_compare_worker_once() -> bool:
+    queued = (
+        select(MobileCompareSessionIndex.compare_id)
+        .where(MobileCompareSessionIndex.status == "running")
+        .where(MobileCompareSessionIndex.stage == "queued")
+    )
+    if not _has_queued_job(queued):
+        return False
+    from app.routes.mobile import run_mobile_compare_worker_once as run_once
+
+    return run_once()
+
+
+def run_product_workbench_worker_once() -> bool:
+    if not _has_queued_job(select(ProductWorkbenchJob.job_id).where(ProductWorkbenchJob.status == "queued")):
+        return False
+    from app.routes.products import run_product_workbench_worker_once as run_once
+
+    return run_once()
+
+
+def _reclaimable_tombstones() -> Any:
+    # 与 storage_reclaim 的选取条件一致：pending，或退避已到期的 failed
+    failed_due = (ProductStorageTombstone.status == "failed") & or_(
+        ProductStorageTombstone.next_attempt_at.is_(None), ProductStorageTombstone.next_attempt_at <= now_iso()
+    )
+    return select(ProductStorageTombstone.product_id).where(
+        or_(ProductStorageTombstone.status == "pending", failed_due)
+    )
+
+
+def run_product_storage_reclaim_worker_once(*, max_batches: int | None = 1) -> bool:
+    if not _has_queued_job(_reclaimable_tombstones()):
+        return False
+    from app.services.storage_reclaim import reclaim_product_storage
+
+    db = SessionLocal()
+    try:
+        # worker 每轮最多一批，避免大量积压时饿死其它轮询；单机补扫一次扫完
+        report = reclaim_product_storage(db, max_batches=max_batches, include_failed=True)
+    finally:
+        db.close()
+    if report.tombstones or report.failed:
+        logger.info("runtime worker reclaimed product storage: %s", report.as_dict())
+    return bool(report.tombstones or report.failed)
+
+
 def _run_worker_poller_once(label: str, poller: Callable[[], bool]) -> bool:
     try:
         return bool(poller())
@@ -65,7 +128,8 @@ def _worker_loop(stop_event: threading.Event) -> None:
         processed_upload = _run_worker_poller_once("upload_ingest", run_upload_ingest_worker_once)
         processed_compare = _run_worker_poller_once("mobile_compare", run_mobile_compare_worker_once)
         processed_workbench = _run_worker_poller_once("product_workbench", run_product_workbench_worker_once)
-        processed = bool(processed_upload or processed_compare or processed_workbench)
+        processed_reclaim = _run_worker_poller_once("storage_reclaim", run_product_storage_reclaim_worker_once)
+        processed = bool(processed_upload or processed_compare or processed_workbench or processed_reclaim)
         wait_seconds = 0.1 if processed else poll_interval
         stop_event.wait(wait_seconds)
 
@@ -105,12 +169,73 @@ def stop_runtime_worker_daemon(timeout_seconds: float = 1.0) -> bool:
         return not alive
 
 
+def _storage_reclaim_sweep_interval_seconds() -> float:
+    try:
+        return max(0.0, float(getattr(settings, "storage_reclaim_sweep_interval_seconds", 300.0)))
+    except Exception:
+        return 300.0
+
+
+def _storage_reclaim_sweep_loop(stop_event: threading.Event) -> None:
+    # 启动时先扫一轮：上次进程退出前没来得及回收的 pending 墓碑不必等一个间隔
+    interval = _storage_reclaim_sweep_interval_seconds()
+    while not stop_event.is_set():
+        _run_worker_poller_once("storage_reclaim_sweep", lambda: run_product_storage_reclaim_worker_once(max_batches=None))
+        stop_event.wait(interval)
+
+
+def start_storage_reclaim_sweeper() -> bool:
+    """
+    单机部署（回收在 API 进程内就地执行）时启动墓碑补扫线程：
+    响应后回收失败 / 进程中途退出留下的 pending 墓碑，以及退避到期的 failed 墓碑，都靠它收尾。
+    """
+    if is_worker_runtime() or not should_inline_reclaim_product_storage():
+        return False
+    if _storage_reclaim_sweep_interval_seconds() <= 0:
+        return False
+    global _sweeper_thread, _sweeper_stop
+    with _worker_lock:
+        if _sweeper_thread is not None and _sweeper_thread.is_alive():
+            return True
+        stop_event = threading.Event()
+        thread = threading.Thread(
+            target=_storage_reclaim_sweep_loop,
+            args=(stop_event,),
+            daemon=True,
+            name="runtime-storage-reclaim-sweeper",
+        )
+        thread.start()
+        _sweeper_stop = stop_event
+        _sweeper_thread = thread
+        return True
+
+
+def stop_storage_reclaim_sweeper(timeout_seconds: float = 1.0) -> bool:
+    global _sweeper_thread, _sweeper_stop
+    with _worker_lock:
+        if _sweeper_thread is None:
+            return True
+        if _sweeper_stop is not None:
+            _sweeper_stop.set()
+        _sweeper_thread.join(max(0.1, timeout_seconds))
+        alive = _sweeper_thread.is_alive()
+        if not alive:
+            _sweeper_thread = None
+            _sweeper_stop = None
+        return not alive
+
+
 def describe_runtime_worker_state() -> dict[str, Any]:
     with _worker_lock:
         running = bool(_worker_thread is not None and _worker_thread.is_alive())
+        sweeping = bool(_sweeper_thread is not None and _sweeper_thread.is_alive())
     return {
         "enabled": is_worker_runtime(),
         "running": running,
         "poll_interval_seconds": _worker_poll_interval_seconds(),
-        "capabilities": ["upload_ingest", "mobile_compare", "product_workbench"],
+        "capabilities": ["upload_ingest", "mobile_compare", "product_workbench", "storage_reclaim"],
+        "storage_reclaim_sweeper": {
+            "running": sweeping,
+            "interval_seconds": _storage_reclaim_sweep_interval_seconds(),
+        },
     }
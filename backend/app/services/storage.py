@@ -2,11 +2,19 @@ import io
 import hashlib
 import os, json
 import shutil
+import stat
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, BinaryIO
 from uuid import uuid4
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from app.settings import settings
-from app.constants import ALLOWED_IMAGE_EXTS
+from app.constants import ALLOWED_IMAGE_EXTS, VALID_CATEGORIES
+from app.platform.request_metrics import record_storage_io
 
 CONTENT_TYPE_TO_EXT = {
     "image/jpeg": ".jpg",
@@ -18,6 +26,8 @@ CONTENT_TYPE_TO_EXT = {
     "image/heif": ".heif",
 }
 
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
 USER_STORAGE_PREFIX_MAP = {
     "user-images/": "images/",
     "user-uploads/": "uploads/",
@@ -114,7 +124,7 @@ def save_image(
             raise ValueError(
                 f"Unsupported image extension '{ext or '(empty)'}' and content_type '{content_type or '(empty)'}'."
             )
-    variants = _normalize_image_variants_for_storage(ext=ext, content=content)
+    variants = _encode_image_variants(ext=ext, content=content)
     rel_suffix = _normalize_image_rel_suffix(subdir)
     webp_rel = f"images/webp{rel_suffix}/{product_id}.webp"
     jpg_rel = f"images/jpg{rel_suffix}/{product_id}.jpg"
@@ -123,10 +133,7 @@ def save_image(
         (webp_rel, variants["webp"]),
         (jpg_rel, variants["jpg"]),
     ]:
-        abs_path = _resolve_rel_path(rel_path)
-        abs_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(abs_path, "wb") as f:
-            f.write(payload)
+        _write_file_bytes(_resolve_rel_path(rel_path), payload)
 
     # 默认主链路返回 webp，用于前端优先加载；jpg 作为并存回退资源。
     return webp_rel
@@ -164,17 +171,13 @@ def save_user_upload_bundle(
     webp_rel = f"user-images/webp/uploads/{owner_scope}/{safe_category}/{safe_upload_id}.webp"
     jpg_rel = f"user-images/jpg/uploads/{owner_scope}/{safe_category}/{safe_upload_id}.jpg"
 
-    original_abs = _resolve_any_rel_path(original_rel)
-    original_abs.parent.mkdir(parents=True, exist_ok=True)
-    original_abs.write_bytes(content)
+    _write_file_bytes(_resolve_any_rel_path(original_rel), content)
 
     for rel_path, payload in [
         (webp_rel, variants["webp"]),
         (jpg_rel, variants["jpg"]),
     ]:
-        abs_path = _resolve_any_rel_path(rel_path)
-        abs_path.parent.mkdir(parents=True, exist_ok=True)
-        abs_path.write_bytes(payload)
+        _write_file_bytes(_resolve_any_rel_path(rel_path), payload)
 
     return {
         "asset_dir": asset_dir_rel,
@@ -198,10 +201,7 @@ def save_user_product_json(
     safe_user_product_id = _safe_storage_segment(user_product_id, fallback=new_id())
     owner_scope = _user_owner_scope(owner_type, owner_id)
     rel = f"user-products/{owner_scope}/{safe_category}/{safe_user_product_id}.json"
-    abs_path = _resolve_any_rel_path(rel)
-    abs_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(abs_path, "w", encoding="utf-8") as f:
-        json.dump(doc, f, ensure_ascii=False, indent=2)
+    _write_json_abs(_resolve_any_rel_path(rel), doc, kind=_artifact_kind(rel))
     return rel
 
 
@@ -257,15 +257,17 @@ def copy_user_image_to_product(
     return rel
 
 
-def save_temp_upload_image(
+class UploadTooLargeError(ValueError):
+    pass
+
+
+def _temp_upload_rel_path(
     upload_id: str,
     filename: str,
-    content: bytes,
     *,
     content_type: str | None = None,
     suffix: str | None = None,
 ) -> str:
-    ensure_dirs()
     safe_id = _safe_storage_segment(upload_id, fallback=new_id())
     safe_suffix = _safe_storage_segment(suffix or "", fallback="")
     ext = os.path.splitext(filename or "")[1].lower().strip()
@@ -273,11 +275,79 @@ def save_temp_upload_image(
         ext = CONTENT_TYPE_TO_EXT.get(str(content_type or "").lower().strip(), ".img")
     ext = ext if ext.startswith(".") else f".{ext}"
     rel_name = f"{safe_id}{('-' + safe_suffix) if safe_suffix else ''}{ext}"
-    rel_path = f"tmp_uploads/{rel_name}"
+    return f"tmp_uploads/{rel_name}"
+
+
+def save_temp_upload_image(
+    upload_id: str,
+    filename: str,
+    content: bytes,
+    *,
+    content_type: str | None = None,
+    suffix: str | None = None,
+) -> str:
+    ensure_dirs()
+    rel_path = _temp_upload_rel_path(upload_id, filename, content_type=content_type, suffix=suffix)
+    _write_file_bytes(_resolve_rel_path(rel_path), content)
+    return rel_path
+
+
+def read_stream_limited(source: BinaryIO, *, max_bytes: int, chunk_size: int = UPLOAD_CHUNK_BYTES) -> bytes:
+    """
+    分块读取上传流；超过 max_bytes 立即中止，不会把超大文件整个读进内存。
+    """
+    chunks: list[bytes] = []
+    total = 0
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+        total += len(chunk)
+        if total > max_bytes:
+            raise UploadTooLargeError(f"Upload exceeds {max_bytes} bytes.")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def save_temp_upload_stream(
+    upload_id: str,
+    filename: str,
+    source: BinaryIO,
+    *,
+    max_bytes: int,
+    content_type: str | None = None,
+    suffix: str | None = None,
+    chunk_size: int = UPLOAD_CHUNK_BYTES,
+) -> str:
+    """
+    上传流分块直写 tmp_uploads（同目录临时文件 + os.replace），超限时删除半成品并抛 UploadTooLargeError。
+    """
+    ensure_dirs()
+    rel_path = _temp_upload_rel_path(upload_id, filename, content_type=content_type, suffix=suffix)
     abs_path = _resolve_rel_path(rel_path)
     abs_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(abs_path, "wb") as f:
-        f.write(content)
+    fd, tmp_name = tempfile.mkstemp(dir=str(abs_path.parent), prefix=f".{abs_path.name}.", suffix=".part")
+    started = time.perf_counter()
+    try:
+        total = 0
+        with os.fdopen(fd, "wb") as f:
+            while True:
+                chunk = source.read(chunk_size)
+                if not chunk:
+                    break
+                total += len(chunk)
+                if total > max_bytes:
+                    raise UploadTooLargeError(f"Upload exceeds {max_bytes} bytes.")
+                f.write(chunk)
+            os.fchmod(f.fileno(), _replacement_file_mode(abs_path))
+        os.replace(tmp_name, abs_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
+    record_storage_io("write", total, time.perf_counter() - started)
     return rel_path
 
 
@@ -315,7 +385,7 @@ def convert_temp_upload_to_storage_image(
         normalized = _decode_image_any_for_storage(content=source_bytes, source_ext=".jpg")
         webp_out = io.BytesIO()
         normalized.save(webp_out, format="WEBP", quality=82, method=6)
-        webp_abs.write_bytes(webp_out.getvalue())
+        _write_file_bytes(webp_abs, webp_out.getvalue())
         return webp_rel
 
     source_bytes = temp_abs.read_bytes()
@@ -324,8 +394,8 @@ def convert_temp_upload_to_storage_image(
     normalized.save(jpg_out, format="JPEG", quality=88, optimize=True)
     webp_out = io.BytesIO()
     normalized.save(webp_out, format="WEBP", quality=82, method=6)
-    jpg_abs.write_bytes(jpg_out.getvalue())
-    webp_abs.write_bytes(webp_out.getvalue())
+    _write_file_bytes(jpg_abs, jpg_out.getvalue())
+    _write_file_bytes(webp_abs, webp_out.getvalue())
     if delete_source:
         temp_abs.unlink(missing_ok=True)
     return webp_rel
@@ -342,6 +412,54 @@ def _normalize_image_rel_suffix(subdir: str | None) -> str:
     return f"/{clean_subdir}"
 
 
+# === 图片编码进程池 ===
+# Pillow 解码 + JPEG/WEBP 双编码是纯 CPU 工作；image_encode_process_workers > 0 时下放到独立进程，
+# 避免在 API 进程内和事件循环/其它线程争抢 GIL。0 表示在调用线程内直接编码（默认，兼容旧行为）。
+_IMAGE_ENCODE_POOL: ProcessPoolExecutor | None = None
+_IMAGE_ENCODE_POOL_LOCK = threading.Lock()
+
+
+def _image_encode_workers() -> int:
+    return max(0, min(8, int(getattr(settings, "image_encode_process_workers", 0) or 0)))
+
+
+def _get_image_encode_pool() -> ProcessPoolExecutor | None:
+    global _IMAGE_ENCODE_POOL
+    workers = _image_encode_workers()
+    if workers <= 0:
+        return None
+    with _IMAGE_ENCODE_POOL_LOCK:
+        if _IMAGE_ENCODE_POOL is None:
+            import multiprocessing
+
+            _IMAGE_ENCODE_POOL = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _IMAGE_ENCODE_POOL
+
+
+def shutdown_image_encode_pool() -> None:
+    global _IMAGE_ENCODE_POOL
+    with _IMAGE_ENCODE_POOL_LOCK:
+        pool = _IMAGE_ENCODE_POOL
+        _IMAGE_ENCODE_POOL = None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _encode_image_variants(ext: str, content: bytes) -> dict[str, bytes]:
+    pool = _get_image_encode_pool()
+    if pool is None:
+        return _normalize_image_variants_for_storage(ext=ext, content=content)
+    try:
+        return pool.submit(_normalize_image_variants_for_storage, ext, content).result()
+    except BrokenProcessPool:
+        # 子进程异常退出（OOM 等）：丢弃坏池，本次就地编码，下次调用重建。
+        shutdown_image_encode_pool()
+        return _normalize_image_variants_for_storage(ext=ext, content=content)
+
+
 def _normalize_image_variants_for_storage(ext: str, content: bytes) -> dict[str, bytes]:
     source_ext = str(ext or "").lower().strip()
     if source_ext not in ALLOWED_IMAGE_EXTS:
@@ -433,6 +551,166 @@ def _decode_image_for_storage(content: bytes, source_ext: str):
     except Exception as e:
         raise ValueError(f"Failed to normalize source image ({source_ext}) for storage: {e}") from e
 
+# === JSON 落盘层 ===
+# 所有 JSON 产物统一走 _write_json_abs：
+# - 同目录临时文件 + os.replace 原子替换，读侧不会看到写了一半的文件
+# - 紧凑分隔符（无缩进），体积约为 indent=2 的 70%
+# - 可选二进制编码（zstd / msgpack+zstd），仅对配置的大产物生效，load_json 透明识别
+JSON_BINARY_MAGIC = b"CSJB"
+JSON_BINARY_CODEC_JSON_ZSTD = b"j"
+JSON_BINARY_CODEC_MSGPACK_ZSTD = b"m"
+JSON_BINARY_CODECS = {"none", "zstd", "msgpack_zstd"}
+
+try:  # pragma: no cover - optional fast path depends on runtime image.
+    import orjson as _orjson  # type: ignore
+except Exception:  # pragma: no cover
+    _orjson = None
+
+
+def _artifact_kind(rel_path: str) -> str:
+    value = str(rel_path or "").strip().lstrip("/")
+    for prefix, mapped_prefix in USER_STORAGE_PREFIX_MAP.items():
+        if value.startswith(prefix):
+            value = mapped_prefix + value[len(prefix) :]
+            break
+    head = value.split("/", 1)[0]
+    return head or "unknown"
+
+
+def _json_binary_codec() -> str:
+    codec = str(getattr(settings, "storage_json_binary_codec", "none") or "none").strip().lower()
+    return codec if codec in JSON_BINARY_CODECS else "none"
+
+
+def _json_binary_kinds() -> set[str]:
+    raw = str(getattr(settings, "storage_json_binary_kinds_csv", "") or "")
+    return {item.strip() for item in raw.split(",") if item.strip()}
+
+
+def _load_zstd():
+    try:
+        import zstandard  # type: ignore
+    except Exception:
+        return None
+    return zstandard
+
+
+def _load_msgpack():
+    try:
+        import msgpack  # type: ignore
+    except Exception:
+        return None
+    return msgpack
+
+
+def _encode_compact_json(doc: Any) -> bytes:
+    if _orjson is not None:
+        try:
+            return _orjson.dumps(doc)
+        except TypeError:
+            # orjson 不支持非 str key / 超 64 位整数等，回退标准库保持兼容。
+            pass
+    return json.dumps(doc, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def encode_json_artifact(doc: Any, *, kind: str | None = None, codec: str | None = None) -> bytes:
+    """
+    按落盘策略编码 JSON 产物。二进制编码仅在 codec 启用、kind 命中且体积超过阈值时生效；
+    依赖缺失时退回紧凑 JSON（保证仍可读）。
+    """
+    compact = _encode_compact_json(doc)
+    selected = str(codec or _json_binary_codec()).strip().lower()
+    if selected not in JSON_BINARY_CODECS or selected == "none":
+        return compact
+    if codec is None:
+        if kind not in _json_binary_kinds():
+            return compact
+        min_bytes = max(0, int(getattr(settings, "storage_json_binary_min_bytes", 0) or 0))
+        if len(compact) < min_bytes:
+            return compact
+    zstd = _load_zstd()
+    if zstd is None:
+        return compact
+    level = int(getattr(settings, "storage_json_zstd_level", 3) or 3)
+    compressor = zstd.ZstdCompressor(level=level)
+    if selected == "msgpack_zstd":
+        msgpack = _load_msgpack()
+        if msgpack is not None:
+            try:
+                body = msgpack.packb(doc, use_bin_type=True)
+            except Exception:
+                body = None
+            if body is not None:
+                return JSON_BINARY_MAGIC + JSON_BINARY_CODEC_MSGPACK_ZSTD + compressor.compress(body)
+    return JSON_BINARY_MAGIC + JSON_BINARY_CODEC_JSON_ZSTD + compressor.compress(compact)
+
+
+def decode_json_artifact(raw: bytes) -> Any:
+    if not raw.startswith(JSON_BINARY_MAGIC):
+        return json.loads(raw)
+    codec = raw[len(JSON_BINARY_MAGIC) : len(JSON_BINARY_MAGIC) + 1]
+    body = raw[len(JSON_BINARY_MAGIC) + 1 :]
+    zstd = _load_zstd()
+    if zstd is None:
+        raise ValueError("Binary JSON artifact requires zstandard package.")
+    decoded = zstd.ZstdDecompressor().decompressobj().decompress(body)
+    if codec == JSON_BINARY_CODEC_JSON_ZSTD:
+        return json.loads(decoded)
+    if codec == JSON_BINARY_CODEC_MSGPACK_ZSTD:
+        msgpack = _load_msgpack()
+        if msgpack is None:
+            raise ValueError("Binary JSON artifact requires msgpack package.")
+        return msgpack.unpackb(decoded, raw=False, strict_map_key=False)
+    raise ValueError(f"Unsupported binary JSON artifact codec: {codec!r}.")
+
+
+# mkstemp 建出的临时文件固定 0600；进程 umask 只在导入时读一次（os.umask 读写一体，运行期调用有线程竞争）。
+_PROCESS_UMASK = os.umask(0o022)
+os.umask(_PROCESS_UMASK)
+
+
+def _replacement_file_mode(abs_path: Path) -> int:
+    """原子替换后的文件权限：覆盖时沿用原文件的权限，新建时取 umask 下的默认值（0666 & ~umask）。"""
+    try:
+        return stat.S_IMODE(os.stat(abs_path).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_PROCESS_UMASK
+
+
+def _write_file_bytes(abs_path: Path, payload: bytes) -> None:
+    started = time.perf_counter()
+    abs_path.parent.mkdir(parents=True, exist_ok=True)
+    abs_path.write_bytes(payload)
+    record_storage_io("write", len(payload), time.perf_counter() - started)
+
+
+def write_bytes_atomic(abs_path: Path, payload: bytes) -> None:
+    started = time.perf_counter()
+    abs_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=str(abs_path.parent), prefix=f".{abs_path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+            if bool(getattr(settings, "storage_atomic_fsync", False)):
+                f.flush()
+                os.fsync(f.fileno())
+            os.fchmod(f.fileno(), _replacement_file_mode(abs_path))
+        os.replace(tmp_name, abs_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
+    record_storage_io("write", len(payload), time.perf_counter() - started)
+
+
+def _write_json_abs(abs_path: Path, doc: Any, *, kind: str) -> int:
+    payload = encode_json_artifact(doc, kind=kind)
+    write_bytes_atomic(abs_path, payload)
+    return len(payload)
+
+
 def save_product_json(product_id: str, doc: dict, category: str | None = None) -> str:
     ensure_dirs()
     safe_category = _safe_storage_segment(category or "", fallback="")
@@ -440,20 +718,14 @@ def save_product_json(product_id: str, doc: dict, category: str | None = None) -
         rel = f"products/{safe_category}/{product_id}.json"
     else:
         rel = f"products/{product_id}.json"
-    abs_path = _resolve_rel_path(rel)
-    abs_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(abs_path, "w", encoding="utf-8") as f:
-        json.dump(doc, f, ensure_ascii=False, indent=2)
+    _write_json_abs(_resolve_rel_path(rel), doc, kind=_artifact_kind(rel))
     return rel
 
 def save_doubao_artifact(product_id: str, stage: str, payload: dict) -> str:
     ensure_dirs()
     safe_stage = "".join(ch for ch in stage if ch.isalnum() or ch in {"-", "_"}).strip("_") or "stage"
     rel = f"doubao_runs/{product_id}/{safe_stage}.json"
-    abs_path = _resolve_rel_path(rel)
-    abs_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(abs_path, "w", encoding="utf-8") as f:
-        json.dump(payload, f, ensure_ascii=False, indent=2)
+    _write_json_abs(_resolve_rel_path(rel), payload, kind=_artifact_kind(rel))
     return rel
 
 
@@ -465,10 +737,7 @@ def save_ingredient_profile(category: str, ingredient_id: str, payload: dict) ->
     safe_category = _safe_storage_segment(category, fallback="unknown")
     safe_ingredient_id = _safe_storage_segment(ingredient_id, fallback=new_id())
     rel = f"ingredients/{safe_category}/{safe_ingredient_id}.json"
-    abs_path = _resolve_rel_path(rel)
-    abs_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(abs_path, "w", encoding="utf-8") as f:
-        json.dump(payload, f, ensure_ascii=False, indent=2)
+    _write_json_abs(_resolve_rel_path(rel), payload, kind=_artifact_kind(rel))
     return rel
 
 
@@ -480,10 +749,7 @@ def save_product_route_mapping(category: str, product_id: str, payload: dict) ->
     safe_category = _safe_storage_segment(category, fallback="unknown")
     safe_product_id = _safe_storage_segment(product_id, fallback=new_id())
     rel = f"route_mappings/{safe_category}/{safe_product_id}.json"
-    abs_path = _resolve_rel_path(rel)
-    abs_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(abs_path, "w", encoding="utf-8") as f:
-        json.dump(payload, f, ensure_ascii=False, indent=2)
+    _write_json_abs(_resolve_rel_path(rel), payload, kind=_artifact_kind(rel))
     return rel
 
 
@@ -495,10 +761,7 @@ def save_product_analysis(category: str, product_id: str, payload: dict) -> str:
     safe_category = _safe_storage_segment(category, fallback="unknown")
     safe_product_id = _safe_storage_segment(product_id, fallback=new_id())
     rel = f"product_profiles/{safe_category}/{safe_product_id}.json"
-    abs_path = _resolve_rel_path(rel)
-    abs_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(abs_path, "w", encoding="utf-8") as f:
-        json.dump(payload, f, ensure_ascii=False, indent=2)
+    _write_json_abs(_resolve_rel_path(rel), payload, kind=_artifact_kind(rel))
     return rel
 
 
@@ -520,6 +783,11 @@ def ingredient_profile_rel_path(category: str, ingredient_id: str) -> str:
     return f"ingredients/{safe_category}/{safe_ingredient_id}.json"
 
 
+def mobile_event_archive_rel_path(month: str) -> str:
+    safe_month = _safe_storage_segment(month, fallback="unknown")
+    return f"archives/mobile_client_events/{safe_month}.jsonl.gz"
+
+
 def selection_result_published_rel_path(category: str, rules_version: str, answers_hash: str) -> str:
     safe_category = _safe_storage_segment(category, fallback="unknown")
     safe_rules_version = _safe_storage_segment(rules_version, fallback="v0")
@@ -562,20 +830,21 @@ def _safe_storage_segment(value: str, fallback: str) -> str:
     return out or fallback
 
 def load_json(rel_path: str) -> dict:
-    abs_path = _resolve_any_rel_path(rel_path)
-    with open(abs_path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return decode_json_artifact(read_rel_bytes(rel_path))
 
 def read_rel_bytes(rel_path: str) -> bytes:
     abs_path = _resolve_any_rel_path(rel_path)
+    started = time.perf_counter()
     with open(abs_path, "rb") as f:
-        return f.read()
+        raw = f.read()
+    record_storage_io("read", len(raw), time.perf_counter() - started)
+    return raw
+
+def write_rel_bytes(rel_path: str, payload: bytes) -> None:
+    write_bytes_atomic(_resolve_any_rel_path(rel_path), payload)
 
 def save_json_at(rel_path: str, doc: dict) -> None:
-    abs_path = _resolve_any_rel_path(rel_path)
-    abs_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(abs_path, "w", encoding="utf-8") as f:
-        json.dump(doc, f, ensure_ascii=False, indent=2)
+    _write_json_abs(_resolve_any_rel_path(rel_path), doc, kind=_artifact_kind(rel_path))
 
 def remove_rel_path(rel_path: str | None) -> bool:
     if not rel_path:
@@ -655,35 +924,62 @@ def preferred_image_rel_path(image_rel: str | None) -> str | None:
     return rel
 
 
-def remove_product_images(product_id: str, image_path: str | None = None) -> tuple[int, list[str]]:
+# 产品图片所有已知落盘布局（save_image / convert_temp_upload_to_storage_image / move_image_to_category / 旧版平铺）；
+# 删除时按 product_id 直接推导候选路径逐个 stat，代价与图库规模无关，不再 rglob 整棵 images/ 树。
+_PRODUCT_IMAGE_SUBDIRS = ("", "tmp")
+_PRODUCT_IMAGE_STEM_SUFFIXES = ("", ".supp1")
+
+
+def product_image_candidate_rel_paths(
+    product_id: str,
+    image_path: str | None = None,
+    category: str | None = None,
+) -> list[str]:
+    stem = str(product_id or "").strip()
+    out: list[str] = []
+    seen: set[str] = set()
+
+    def append(rel: str) -> None:
+        if rel and rel not in seen:
+            seen.add(rel)
+            out.append(rel)
+
+    for rel in image_variant_rel_paths(image_path):
+        append(rel)
+    if not stem or stem != Path(stem).name:
+        return out
+
+    subdirs = list(_PRODUCT_IMAGE_SUBDIRS)
+    for item in sorted({*VALID_CATEGORIES, str(category or "").strip().lower()}):
+        if item:
+            subdirs.append(_safe_storage_segment(item, fallback="unknown"))
+    for suffix in _PRODUCT_IMAGE_STEM_SUFFIXES:
+        name = f"{stem}{suffix}"
+        for subdir in dict.fromkeys(subdirs):
+            rel_suffix = _normalize_image_rel_suffix(subdir)
+            append(f"images/webp{rel_suffix}/{name}.webp")
+            append(f"images/jpg{rel_suffix}/{name}.jpg")
+        for ext in sorted(ALLOWED_IMAGE_EXTS):
+            append(f"images/{name}{ext}")
+    return out
+
+
+def remove_product_images(
+    product_id: str,
+    image_path: str | None = None,
+    category: str | None = None,
+) -> tuple[int, list[str]]:
     """
     删除产品主图 + 同 trace_id 的图片变体（例如 .jpg/.png/.webp）。
     返回 (删除数量, 删除的相对路径列表)。
     """
-    ensure_dirs()
     removed_paths: list[str] = []
-
-    if image_path and remove_rel_path(image_path):
-        removed_paths.append(image_path.lstrip("/"))
-
-    images_root = _resolve_rel_path("images")
-    base = Path(settings.storage_dir).resolve()
-    prefix = f"{product_id}."
-
-    for path in images_root.rglob("*"):
-        if not path.is_file():
-            continue
-        name = path.name
-        if not name.startswith(prefix):
-            continue
+    for rel in product_image_candidate_rel_paths(product_id, image_path=image_path, category=category):
         try:
-            path.unlink()
-            rel = path.resolve().relative_to(base).as_posix()
-            if rel not in removed_paths:
+            if remove_rel_path(rel):
                 removed_paths.append(rel)
         except FileNotFoundError:
             continue
-
     return (len(removed_paths), removed_paths)
 
 
@@ -757,6 +1053,45 @@ def remove_rel_dir(rel_path: str | None) -> tuple[int, int]:
     removed_dirs += 1
     return (removed_files, removed_dirs)
 
+def remove_rel_path_sized(rel_path: str | None) -> int | None:
+    """删除单个文件并返回释放的字节数；文件不存在 / 路径非法返回 None。"""
+    if not rel_path:
+        return None
+    try:
+        abs_path = _resolve_any_rel_path(rel_path)
+        size = abs_path.stat().st_size
+        abs_path.unlink()
+    except (ValueError, FileNotFoundError, IsADirectoryError, NotADirectoryError):
+        return None
+    return size
+
+
+def remove_rel_dir_sized(rel_path: str | None) -> tuple[int, int, int]:
+    """删除目录树，返回 (文件数, 目录数含根, 释放字节数)。"""
+    if not rel_path:
+        return (0, 0, 0)
+    try:
+        abs_path = _resolve_any_rel_path(rel_path)
+    except ValueError:
+        return (0, 0, 0)
+    if not abs_path.is_dir():
+        return (0, 0, 0)
+
+    removed_files = 0
+    removed_dirs = 0
+    freed = 0
+    for root, dirs, files in os.walk(abs_path):
+        removed_dirs += len(dirs)
+        for name in files:
+            try:
+                freed += os.stat(os.path.join(root, name)).st_size
+            except FileNotFoundError:
+                continue
+            removed_files += 1
+    shutil.rmtree(abs_path, ignore_errors=True)
+    return (removed_files, removed_dirs + 1, freed)
+
+
 def exists_rel_path(rel_path: str | None) -> bool:
     if not rel_path:
         return False
@@ -766,6 +1101,17 @@ def exists_rel_path(rel_path: str | None) -> bool:
         return False
     return abs_path.exists()
 
+
+def rel_path_fingerprint(rel_path: str | None) -> str:
+    """基于 stat 的廉价内容指纹（mtime_ns:size），文件不存在返回空串；用于判断文档是否在两次扫描间被改写。"""
+    if not rel_path:
+        return ""
+    try:
+        stat = _resolve_any_rel_path(rel_path).stat()
+    except (ValueError, OSError):
+        return ""
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
 def cleanup_doubao_artifacts(days: int | None = None) -> dict:
     ensure_dirs()
     ttl_days = int(days if days is not None else settings.doubao_artifact_ttl_days)
@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Iterable
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from app.db.models import ProductStorageTombstone
+from app.services.storage import (
+    image_variant_rel_paths,
+    now_iso,
+    product_image_candidate_rel_paths,
+    remove_rel_dir_sized,
+    remove_rel_path_sized,
+)
+
+logger = logging.getLogger(__name__)
+
+# 产品删除的存储回收：
+# - 删除请求只删 DB 行，并在同一事务里写入 ProductStorageTombstone（待删文件清单），提交即返回，
+#   耗时只取决于被删产品数，与图库 / 产物目录规模无关
+# - 回收器按 deleted_at 顺序批量取 pending 墓碑：清单里的文件 + 按 product_id 推导的图片变体候选逐个 unlink，
+#   产物目录整棵删除，统计释放字节数；每批一次提交
+# - 单机 API 进程在响应发出后就地回收刚删的产品，并周期补扫遗留的 pending 墓碑；split / multi 部署由 worker 轮询，
+#   运维可随时跑脚本补扫
+# - 回收失败的墓碑记为 failed，按 attempts 指数退避写 next_attempt_at，到期后由补扫 / worker 重试
+STATUS_PENDING = "pending"
+STATUS_RECLAIMED = "reclaimed"
+STATUS_FAILED = "failed"
+RECLAIM_BATCH_SIZE = 200
+RECLAIM_RETRY_BASE_SECONDS = 60
+RECLAIM_RETRY_MAX_SECONDS = 6 * 3600
+
+
+@dataclass
+class StorageReclaimReport:
+    tombstones: int = 0
+    failed: int = 0
+    files_removed: int = 0
+    dirs_removed: int = 0
+    bytes_freed: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "tombstones": self.tombstones,
+            "failed": self.failed,
+            "files_removed": self.files_removed,
+            "dirs_removed": self.dirs_removed,
+            "bytes_freed": self.bytes_freed,
+        }
+
+
+def product_storage_manifest(
+    *,
+    product_id: str,
+    json_path: str | None,
+    image_path: str | None,
+    extra_files: Iterable[str | None] = (),
+    include_runs: bool = True,
+) -> dict[str, list[str]]:
+    files: list[str] = []
+    for rel in [json_path, *image_variant_rel_paths(image_path), *extra_files]:
+        value = str(rel or "").strip().lstrip("/")
+        if value and value not in files:
+            files.append(value)
+    dirs = [f"doubao_runs/{product_id}"] if include_runs else []
+    return {"files": files, "dirs": dirs}
+
+
+def enqueue_product_storage_reclaim(
+    db: Session,
+    *,
+    product_id: str,
+    category: str | None,
+    manifest: dict[str, list[str]],
+) -> None:
+    """在调用方的事务里登记墓碑（不提交）；同一产品重复删除时合并清单并重新置为 pending。"""
+    rec = db.get(ProductStorageTombstone, product_id)
+    if rec is None:
+        rec = ProductStorageTombstone(product_id=product_id)
+    else:
+        previous = _load_manifest(rec.manifest_json)
+        manifest = {
+            key: list(dict.fromkeys([*previous.get(key, []), *manifest.get(key, [])])) for key in ("files", "dirs")
+        }
+    rec.category = category
+    rec.manifest_json = json.dumps(manifest, ensure_ascii=False)
+    rec.status = STATUS_PENDING
+    rec.attempts = int(rec.attempts or 0)
+    rec.files_removed = 0
+    rec.dirs_removed = 0
+    rec.bytes_freed = 0
+    rec.last_error = None
+    rec.deleted_at = now_iso()
+    rec.reclaimed_at = None
+    rec.next_attempt_at = None
+    db.add(rec)
+
+
+def reclaim_retry_delay_seconds(attempts: int) -> int:
+    """第 attempts 次失败后的重试间隔：60s 起按 2 倍递增，封顶 6 小时。"""
+    exponent = min(max(0, int(attempts) - 1), 16)
+    return min(RECLAIM_RETRY_MAX_SECONDS, RECLAIM_RETRY_BASE_SECONDS * 2**exponent)
+
+
+def _reclaimable(*, include_failed: bool, now: str) -> Any:
+    pending = ProductStorageTombstone.status == STATUS_PENDING
+    if not include_failed:
+        return pending
+    due = (ProductStorageTombstone.status == STATUS_FAILED) & or_(
+        ProductStorageTombstone.next_attempt_at.is_(None), ProductStorageTombstone.next_attempt_at <= now
+    )
+    return or_(pending, due)
+
+
+def has_pending_storage_reclaim(db: Session, *, include_failed: bool = False) -> bool:
+    stmt = select(ProductStorageTombstone.product_id).where(_reclaimable(include_failed=include_failed, now=now_iso()))
+    return db.execute(stmt.limit(1)).first() is not None
+
+
+def reclaim_product_storage(
+    db: Session,
+    *,
+    product_ids: Iterable[str] | None = None,
+    batch_size: int = RECLAIM_BATCH_SIZE,
+    max_batches: int | None = None,
+    include_failed: bool = False,
+) -> StorageReclaimReport:
+    """
+    回收 pending 墓碑对应的文件；product_ids 为空时按 deleted_at 顺序处理全部积压。
+    include_failed=True 时一并重试退避已到期的 failed 墓碑（周期补扫 / worker 用）。
+    """
+    report = StorageReclaimReport()
+    scope = list(dict.fromkeys(str(item) for item in product_ids or () if str(item).strip()))
+    if product_ids is not None and not scope:
+        return report
+    limit = max(1, int(batch_size))
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        stmt = select(ProductStorageTombstone).where(_reclaimable(include_failed=include_failed, now=now_iso()))
+        if scope:
+            stmt = stmt.where(ProductStorageTombstone.product_id.in_(scope))
+        stmt = stmt.order_by(ProductStorageTombstone.deleted_at.asc(), ProductStorageTombstone.product_id.asc())
+        rows = list(db.execute(stmt.limit(limit)).scalars().all())
+        if not rows:
+            break
+        for rec in rows:
+            _reclaim_tombstone(rec, report)
+        db.commit()
+        batches += 1
+        if len(rows) < limit:
+            break
+    return report
+
+
+def retry_failed_storage_reclaim(db: Session) -> int:
+    rows = db.execute(
+        select(ProductStorageTombstone).where(ProductStorageTombstone.status == STATUS_FAILED)
+    ).scalars().all()
+    for rec in rows:
+        rec.status = STATUS_PENDING
+        rec.last_error = None
+        rec.next_attempt_at = None
+    db.commit()
+    return len(rows)
+
+
+def _load_manifest(raw: str | None) -> dict[str, list[str]]:
+    try:
+        doc = json.loads(raw or "{}")
+    except ValueError:
+        doc = {}
+    if not isinstance(doc, dict):
+        doc = {}
+    return {key: [str(item) for item in doc.get(key) or [] if str(item).strip()] for key in ("files", "dirs")}
+
+
+def _reclaim_tombstone(rec: ProductStorageTombstone, report: StorageReclaimReport) -> None:
+    manifest = _load_manifest(rec.manifest_json)
+    files = list(dict.fromkeys([*manifest["files"], *product_image_candidate_rel_paths(rec.product_id, category=rec.category)]))
+    removed_files = 0
+    removed_dirs = 0
+    freed = 0
+    rec.attempts = int(rec.attempts or 0) + 1
+    try:
+        for rel in files:
+            size = remove_rel_path_sized(rel)
+            if size is not None:
+                removed_files += 1
+                freed += size
+        for rel in manifest["dirs"]:
+            dir_files, dir_dirs, dir_bytes = remove_rel_dir_sized(rel)
+            removed_files += dir_files
+            removed_dirs += dir_dirs
+            freed += dir_bytes
+    except OSError as exc:
+        logger.warning("product storage reclaim failed: product_id=%s error=%s", rec.product_id, exc)
+        rec.status = STATUS_FAILED
+        rec.last_error = str(exc)
+        retry_at = datetime.utcnow() + timedelta(seconds=reclaim_retry_delay_seconds(rec.attempts))
+        rec.next_attempt_at = retry_at.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+        report.failed += 1
+    else:
+        rec.status = STATUS_RECLAIMED
+        rec.reclaimed_at = now_iso()
+        rec.next_attempt_at = None
+        report.tombstones += 1
+    rec.files_removed = int(rec.files_removed or 0) + removed_files
+    rec.dirs_removed = int(rec.dirs_removed or 0) + removed_dirs
+    rec.bytes_freed = int(rec.bytes_freed or 0) + freed
+    report.files_removed += removed_files
+    report.dirs_removed += removed_dirs
+    report.bytes_freed += freed
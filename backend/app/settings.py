@@ -43,6 +43,13 @@ class Settings(BaseSettings):
     asset_signed_url_ttl_seconds: int = 900
     asset_signing_secret: str = ""
     asset_signed_url_enforced: bool = False
+    # JSON 产物落盘：默认紧凑 JSON + 原子替换；
+    # 二进制编码（zstd | msgpack_zstd）需要 zstandard/msgpack，仅对下列 kind 且超过阈值的产物生效
+    storage_json_binary_codec: str = "none"
+    storage_json_binary_kinds_csv: str = "doubao_runs"
+    storage_json_binary_min_bytes: int = 64 * 1024
+    storage_json_zstd_level: int = 3
+    storage_atomic_fsync: bool = False
 
     # === 数据库 ===
     # 允许留空，实际默认值由 deploy profile 决定：
@@ -58,6 +65,23 @@ class Settings(BaseSettings):
     db_pool_timeout_seconds: int = 30
     db_pool_recycle_seconds: int = 1800
     db_pool_pre_ping: bool = True
+    # SQLite 性能模式（仅对 sqlite 生效）：连接建立时设置 WAL / synchronous=NORMAL / busy_timeout / cache / mmap
+    db_sqlite_performance_mode: bool = True
+    db_sqlite_busy_timeout_ms: int = 5000
+    # 页缓存大小（KiB，按连接计）
+    db_sqlite_cache_size_kib: int = 65536
+    # mmap 读映射上限（字节，0 关闭）
+    db_sqlite_mmap_size_bytes: int = 268435456
+    # 只追加的写密集路径（客户端事件）交给每个 engine 一个的写线程排队、合批提交，避免多线程在 SQLite busy 重试里互相踩
+    db_sqlite_single_writer: bool = True
+    # 写线程单次事务最多合并的写操作数
+    db_sqlite_write_batch_max: int = 256
+    # 写后计数器（对比使用次数等热点自增）：进程内累加，按间隔合批 INSERT ... ON CONFLICT DO UPDATE；
+    # 进程崩溃最多丢失一个刷盘间隔（或 max_pending 个键）内的增量
+    db_write_behind_counters: bool = True
+    db_write_behind_flush_seconds: float = 1.0
+    # 待刷键数达到该值时立即唤醒刷盘线程
+    db_write_behind_max_pending: int = 2000
     # phase-25 contract：
     # - single_node 保留 dev/emergency fallback 语义
     # - production profile 强制关闭 sqlite downgrade（即使存在 env override）
@@ -84,6 +108,21 @@ class Settings(BaseSettings):
     doubao_max_retries: int = 2
     doubao_retry_backoff_seconds: float = 1.5
     doubao_artifact_ttl_days: int = 14
+    # 豆包调用治理（同步/异步客户端共用，进程级）：
+    # - 全局在途上限；按模型令牌桶限速，"*" 为默认桶，留空不限速
+    #   DOUBAO_RATE_LIMITS_JSON='{"doubao-seed-2-0-pro-260215":{"rps":2,"burst":4},"*":{"rps":10,"burst":20}}'
+    # - 同一模型连续上游故障（超时/网络/408/429/5xx）达到阈值即熔断，冷却后放行单个探测请求
+    doubao_max_inflight: int = 32
+    doubao_rate_limits_json: str = ""
+    doubao_circuit_failure_threshold: int = 5
+    doubao_circuit_open_seconds: float = 30.0
+    doubao_governor_acquire_timeout_seconds: float = 60.0
+    # 批量能力（类型映射 / 产品画像 / 选择结果 / 对比总结）的稳定前缀复用：
+    # 指令 + 固定参数作为前缀存到服务端上下文缓存，之后每次只发变量后缀（需模型支持方舟 Responses 前缀缓存）
+    doubao_prompt_prefix_cache_enabled: bool = False
+    doubao_prompt_prefix_cache_ttl_seconds: int = 3600
+    # AIRun 请求 / 响应体超过该字节数时压缩后存到 ai_payload_blobs（按内容去重），ai_runs 只留摘要
+    ai_run_payload_inline_max_bytes: int = 1024
     # 任务成本估算（可选）：
     # AI_COST_PER_RUN_BY_MODEL_JSON='{"doubao-seed-2-0-mini-260215":0.004}'
     ai_cost_per_run_by_model_json: str = ""
@@ -97,20 +136,60 @@ class Settings(BaseSettings):
 
     # === 上传安全边界 ===
     max_upload_bytes: int = 8 * 1024 * 1024  # 8MB
+    # 上传图片 Pillow 编码进程池大小（0 = 在请求线程池内编码；2C4G 推荐 1）
+    image_encode_process_workers: int = 0
     # 上传分析后台任务并发上限（2C4G 推荐 2）
     upload_ingest_max_concurrency: int = 2
     # 移动端对比任务并发上限（2C4G 推荐 1）
     compare_job_max_concurrency: int = 1
     # worker 轮询 queued upload 任务的间隔（秒）
     worker_poll_interval_seconds: float = 1.0
+    # 单机部署下 API 进程补扫产品存储墓碑（遗留 pending + 退避到期的 failed）的间隔（秒），0 关闭；split / multi 由 worker 轮询
+    storage_reclaim_sweep_interval_seconds: float = 300.0
     # 产品工作台后台任务并发上限（2C4G 推荐 1）
     product_workbench_max_concurrency: int = 1
+    # 成分库构建时同时在途的模型调用数（单个构建任务内）
+    ingredient_build_model_concurrency: int = 4
+    # 产品类型映射 / 产品增强分析构建时同时在途的模型调用数（单个构建任务内）
+    product_workbench_model_concurrency: int = 4
+
+    # 移动端百科产品详情走物化快照（预序列化 JSON + 强 ETag，支持 If-None-Match → 304）
+    mobile_wiki_snapshot_enabled: bool = True
+    # 进程内热快照条目上限（冷快照从 mobile_wiki_product_snapshots 表读取）
+    mobile_wiki_snapshot_memory_max_entries: int = 512
+    # 对比页产品库（按品类最新 80 个产品卡片）进程内缓存：本进程内的产品增删改提交后立即失效；
+    # 其他进程（worker / 其他副本）的写入最迟在 TTL 后可见。0 关闭缓存
+    mobile_compare_library_cache_ttl_seconds: int = 30
+    # 成分别名映射的版本戳探测间隔（秒）：间隔内直接复用进程内映射、不查库；本进程的成分构建 / 删除提交后立即刷新，
+    # 其他进程（worker / 其他副本）的写入最迟在一个间隔后可见。0 表示每次取映射都探测版本戳
+    ingredient_alias_map_version_check_seconds: float = 5.0
+
+    # 请求级埋点：每个请求统计 SQL / 存储 / 模型调用，响应头带 Server-Timing，并汇总到 /metrics（Prometheus 文本格式）
+    request_metrics_enabled: bool = True
+    # 是否在响应头输出 Server-Timing（对公网暴露内部耗时不合适时可关，/metrics 汇总不受影响）
+    request_metrics_server_timing: bool = True
+
+    # 移动端埋点按月分区：PostgreSQL 为原生 RANGE 分区；SQLite 由维护任务把已结束的月份整月搬进分表。
+    # 超过保留期（月）的月份导出为 gzip JSON Lines 归档（storage_dir/archives/mobile_client_events/）后删除；0 不归档
+    mobile_event_retention_months: int = 6
+    # PostgreSQL 预建当月之后几个月的分区（避免新月份的写入落进 DEFAULT 分区）
+    mobile_event_partitions_ahead_months: int = 2
 
     # === 移动端地理逆解析（可选）===
     mobile_reverse_geocode_provider: str = ""
     mobile_reverse_geocode_key: str = ""
     mobile_reverse_geocode_endpoint: str = "https://restapi.amap.com/v3/geocode/regeo"
     mobile_reverse_geocode_timeout_seconds: float = 3.0
+    # 逆解析结果按 geohash 网格缓存的精度（7 ≈ 150m 见方；同一网格共用一次上游调用）
+    mobile_reverse_geocode_grid_precision: int = 7
+    # 进程内 LRU 条目上限（超出按最久未用淘汰）
+    mobile_reverse_geocode_cache_max_entries: int = 4096
+    # 成功结果的缓存有效期（秒，内存与本地持久层共用；默认 30 天）
+    mobile_reverse_geocode_cache_ttl_seconds: int = 2592000
+    # 上游失败结果的短期负缓存（秒，只在内存里，避免故障时每个请求都打上游）
+    mobile_reverse_geocode_failure_ttl_seconds: int = 60
+    # 本地持久网格缓存（SQLite 文件，重启 / 同机多副本共享）；留空则用 {storage_dir}/cache/mobile_reverse_geocode.sqlite3，"none" 关闭
+    mobile_reverse_geocode_store_path: str = ""
 
     # === Pydantic v2 配置 ===
     model_config = SettingsConfigDict(
@@ -6,6 +6,7 @@ from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
+from app.db import runtime_schema
 from app.db.models import Base
 from app.db.session import get_db
 from app.routes.ai import router as ai_router
@@ -15,6 +16,15 @@ from app.routes.products import router as products_router
 from app.settings import settings
 
 
+@pytest.fixture
+def sqlite_session_factory(tmp_path: Path):
+    """独立 SQLite 文件库（按运行时 schema 建表 / 索引）的会话工厂；engine 用 factory.kw["bind"] 取。"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'session_factory.db'}", connect_args={"check_same_thread": False})
+    runtime_schema.apply_runtime_schema(engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
 @pytest.fixture
 def test_client(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
     storage_dir = tmp_path / "storage"
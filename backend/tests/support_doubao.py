@@ -0,0 +1,16 @@
+import functools
+from typing import Any, Callable
+
+
+def install_fake_stage1_analyzer(monkeypatch: Any, module: Any, fake: Callable[..., dict[str, Any]]) -> None:
+    """
+    Patch both stage1 seams of the ingest routes with one fake:
+    the sync analyzer (upload jobs / stream / supplement) and the async one (/upload/stage1).
+    """
+
+    @functools.wraps(fake)
+    async def _fake_async(*args: Any, **kwargs: Any) -> dict[str, Any]:
+        return fake(*args, **kwargs)
+
+    monkeypatch.setattr(module, "_analyze_with_doubao_stage1", fake)
+    monkeypatch.setattr(module, "_analyze_with_doubao_stage1_async", _fake_async)
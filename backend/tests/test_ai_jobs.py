@@ -1,8 +1,16 @@
+import asyncio
+
 import pytest
+from sqlalchemy.orm import sessionmaker
 
+from app.ai import capabilities as capabilities_module
 from app.ai.capabilities import CapabilityExecutionResult
 from app.ai.errors import AIServiceError
 from app.ai import orchestrator as orchestrator_module
+from app.ai.run_payloads import load_run_payload_texts
+from app.db.models import AIJob, AIPayloadBlob, AIRun
+from app.db.session import get_db
+from app.scripts.backfill_ai_run_usage import backfill_ai_run_usage
 from app.settings import settings
 
 
@@ -241,3 +249,221 @@ def test_ai_metrics_summary_token_pricing(test_client, monkeypatch: pytest.Monke
     # (1,000,000-200,000)/1e6*3.2 + 100,000/1e6*16 + 200,000/1e6*0.64 = 4.288
     assert body["total_estimated_cost"] == pytest.approx(4.288)
     assert body["avg_task_cost"] == pytest.approx(4.288)
+
+
+def test_ai_metrics_summary_breakdown_uses_typed_usage_columns(test_client, monkeypatch: pytest.MonkeyPatch):
+    client, _ = test_client
+    monkeypatch.setattr(settings, "ai_cost_per_run_by_model_json", '{"doubao-seed-2-0-mini-260215": 0.5}')
+    monkeypatch.setattr(
+        settings,
+        "ai_model_pricing_per_mtoken_json",
+        '{"doubao-seed-2-0-pro-260215":{"input":2,"output":10,"cache_hit":0.5}}',
+    )
+
+    def fake_execute(capability: str, input_payload: dict, trace_id: str | None = None, event_callback=None):
+        model = input_payload["model"]
+        return CapabilityExecutionResult(
+            output={"analysis_text": "ok"},
+            prompt_key=capability,
+            prompt_version="v1",
+            model=model,
+            request_payload={"prompt": "test"},
+            response_payload={
+                "output_text": "ok",
+                "usage": {"prompt_tokens": 1_000_000, "completion_tokens": 100_000, "cache_read_input_tokens": 0},
+            },
+        )
+
+    monkeypatch.setattr(orchestrator_module, "execute_capability", fake_execute)
+    for idx, (capability, model) in enumerate(
+        [
+            ("doubao.ingredient_enrich", "doubao-seed-2-0-pro-260215"),
+            ("doubao.ingredient_enrich", "doubao-seed-2-0-mini-260215"),
+            ("doubao.mobile_compare_summary", "doubao-seed-2-0-pro-260215"),
+        ]
+    ):
+        resp = client.post(
+            "/api/ai/jobs",
+            json={
+                "capability": capability,
+                "input": {"ingredient": f"成分-{idx}", "model": model},
+                "trace_id": f"trace-breakdown-{idx}",
+                "run_immediately": True,
+            },
+        )
+        assert resp.status_code == 200
+        assert resp.json()["status"] == "succeeded"
+
+    # 指标不再回读 response_json：清空后仍应从写入时提取的 typed 列得到相同结果。
+    db_gen = client.app.dependency_overrides[get_db]()
+    db = next(db_gen)
+    try:
+        for run in db.query(AIRun).all():
+            assert run.input_tokens == 1_000_000
+            assert run.output_tokens == 100_000
+            run.response_json = None
+        db.commit()
+    finally:
+        db_gen.close()
+
+    by_model = client.get("/api/ai/metrics/summary", params={"since_hours": 24, "breakdown": "model"})
+    assert by_model.status_code == 200
+    body = by_model.json()
+    assert body["total_runs"] == 3
+    assert body["priced_runs"] == 3
+    assert body["total_input_tokens"] == 3_000_000
+    assert body["total_output_tokens"] == 300_000
+    # pro: 1e6/1e6*2 + 1e5/1e6*10 = 3.0（两次）；mini 按次计费 0.5
+    assert body["total_estimated_cost"] == pytest.approx(6.5)
+    assert body["breakdown_by"] == "model"
+    items = {item["key"]: item for item in body["breakdown"]}
+    assert items["doubao-seed-2-0-pro-260215"]["total_runs"] == 2
+    assert items["doubao-seed-2-0-pro-260215"]["total_estimated_cost"] == pytest.approx(6.0)
+    assert items["doubao-seed-2-0-mini-260215"]["total_estimated_cost"] == pytest.approx(0.5)
+    assert items["doubao-seed-2-0-pro-260215"]["p95_latency_ms"] is not None
+
+    by_capability = client.get(
+        "/api/ai/metrics/summary",
+        params={"since_hours": 24, "breakdown": "capability", "capability": "doubao.ingredient_enrich"},
+    )
+    assert by_capability.status_code == 200
+    cap_body = by_capability.json()
+    assert cap_body["total_runs"] == 2
+    assert [item["key"] for item in cap_body["breakdown"]] == ["doubao.ingredient_enrich"]
+    assert cap_body["breakdown"][0]["total_estimated_cost"] == pytest.approx(3.5)
+
+    invalid = client.get("/api/ai/metrics/summary", params={"breakdown": "trace"})
+    assert invalid.status_code == 422
+
+
+def test_ai_run_large_payloads_are_deduplicated_out_of_row_and_loaded_lazily(test_client, monkeypatch: pytest.MonkeyPatch):
+    client, _ = test_client
+    monkeypatch.setattr(settings, "ai_run_payload_inline_max_bytes", 256)
+    long_text = "成分分析" * 400
+
+    def fake_execute(capability: str, input_payload: dict, trace_id: str | None = None, event_callback=None):
+        return CapabilityExecutionResult(
+            output={"analysis_text": "ok"},
+            prompt_key=capability,
+            prompt_version="v1",
+            model="doubao-seed-2-0-mini-260215",
+            request_payload={"prompt": "test"},
+            response_payload={"output_text": long_text, "usage": {"input_tokens": 10, "output_tokens": 20}},
+        )
+
+    monkeypatch.setattr(orchestrator_module, "execute_capability", fake_execute)
+    job_ids = []
+    for _ in range(2):
+        # 两个 job 的输入完全相同：请求体只存一份。
+        resp = client.post(
+            "/api/ai/jobs",
+            json={
+                "capability": "doubao.ingredient_enrich",
+                "input": {"ingredient": "烟酰胺", "context": long_text},
+                "run_immediately": True,
+            },
+        )
+        assert resp.status_code == 200
+        assert resp.json()["status"] == "succeeded"
+        job_ids.append(resp.json()["id"])
+
+    db_gen = client.app.dependency_overrides[get_db]()
+    db = next(db_gen)
+    try:
+        runs = db.query(AIRun).all()
+        assert len(runs) == 2
+        for run in runs:
+            assert run.request_json == ""
+            assert run.response_json == ""
+            assert len(run.request_digest) == 64
+            assert run.output_tokens == 20
+        assert runs[0].request_digest == runs[1].request_digest
+        assert runs[0].response_digest == runs[1].response_digest
+        blobs = db.query(AIPayloadBlob).all()
+        assert len(blobs) == 2
+        assert all(blob.stored_bytes < blob.raw_bytes for blob in blobs)
+    finally:
+        db_gen.close()
+
+    listed = client.get("/api/ai/runs", params={"job_id": job_ids[0]}).json()
+    assert listed[0]["request"] is None
+    assert listed[0]["response"] is None
+    assert listed[0]["output_tokens"] == 20
+
+    with_payloads = client.get("/api/ai/runs", params={"job_id": job_ids[0], "include_payloads": True}).json()
+    assert with_payloads[0]["request"]["context"] == long_text
+    assert with_payloads[0]["response"]["output_text"] == long_text
+
+    detail = client.get(f"/api/ai/runs/{listed[0]['id']}")
+    assert detail.status_code == 200
+    assert detail.json()["request"] == {"ingredient": "烟酰胺", "context": long_text}
+    assert detail.json()["response"]["output_text"] == long_text
+    assert client.get("/api/ai/runs/missing").status_code == 404
+
+    # 行外存储的 run：用量回填与成本估算都要先按 response_digest 取回正文
+    db_gen = client.app.dependency_overrides[get_db]()
+    db = next(db_gen)
+    try:
+        for run in db.query(AIRun).all():
+            run.input_tokens = run.output_tokens = run.cached_tokens = run.estimated_cost = None
+        db.commit()
+        assert backfill_ai_run_usage(db)["updated"] == 2
+        runs = db.query(AIRun).all()
+        assert {(run.input_tokens, run.output_tokens) for run in runs} == {(10, 20)}
+        pricing = {"doubao-seed-2-0-mini-260215": {"input": 1_000_000.0, "output": 1_000_000.0, "cache_hit": 0.0}}
+        payloads = load_run_payload_texts(db, runs)
+        assert orchestrator_module._estimate_run_cost(runs[0], pricing, {}) is None
+        assert orchestrator_module._estimate_run_cost(
+            runs[0], pricing, {}, response_text=payloads[runs[0].id][1]
+        ) == pytest.approx(30.0)
+    finally:
+        db_gen.close()
+
+
+def test_two_stage_parse_async_uses_async_client_and_records_job(test_client, monkeypatch: pytest.MonkeyPatch):
+    client, storage_dir = test_client
+    image_rel = "images/webp/tmp/async-probe.png"
+    image_file = storage_dir / image_rel
+    image_file.parent.mkdir(parents=True, exist_ok=True)
+    image_file.write_bytes(b"\x89PNG\r\n\x1a\nfake")
+    monkeypatch.setattr(settings, "doubao_mode", "real")
+    monkeypatch.setattr(settings, "doubao_api_key", "dummy")
+    calls: list[str] = []
+
+    class FakeAsyncSdk:
+        async def chat_with_image(self, image_url, prompt, model=None, **kwargs):
+            assert image_url.startswith("data:image/png;base64,")
+            calls.append(f"image:{model}")
+            return {"output_text": "【品牌】异步品牌"}
+
+        async def chat_with_text(self, prompt, model=None, **kwargs):
+            assert "异步品牌" in prompt
+            calls.append(f"text:{model}")
+            return {"output_text": '{"product": {"brand": "异步品牌"}, "ingredients": []}', "usage": {"input_tokens": 3}}
+
+        async def close(self):
+            calls.append("close")
+
+    def no_sync_sdk():
+        raise AssertionError("sync Doubao client must not be built on the async path")
+
+    monkeypatch.setattr(capabilities_module, "_build_async_sdk", lambda: FakeAsyncSdk())
+    monkeypatch.setattr(capabilities_module, "_build_sdk_and_models", no_sync_sdk)
+    db_gen = client.app.dependency_overrides[get_db]()
+    db = next(db_gen)
+    monkeypatch.setattr(orchestrator_module, "SessionLocal", sessionmaker(bind=db.get_bind()))
+
+    output = asyncio.run(
+        orchestrator_module.run_capability_now_async("doubao.two_stage_parse", {"image_path": image_rel}, trace_id="trace-async")
+    )
+
+    try:
+        assert output["product"]["brand"] == "异步品牌"
+        assert output["evidence"]["doubao_pipeline_mode"] == "two-stage"
+        assert [item.split(":")[0] for item in calls] == ["image", "close", "text", "close"]
+        job = db.query(AIJob).one()
+        assert job.status == "succeeded"
+        assert job.capability == "doubao.two_stage_parse"
+        assert db.query(AIRun).one().status == "succeeded"
+    finally:
+        db_gen.close()
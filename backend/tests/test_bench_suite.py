@@ -0,0 +1,76 @@
+from pathlib import Path
+
+from app.benchmarks import generators
+from app.benchmarks.harness import BenchParams, compare_results, run_suite
+from app.benchmarks.scenarios import SCENARIOS
+from app.settings import settings
+
+
+def test_generators_are_deterministic_per_seed():
+    vocabulary = generators.ingredient_vocabulary(50)
+    doc_a = generators.synthetic_product_doc(7, category="shampoo", vocabulary=vocabulary, ingredients_per_product=12, seed=1)
+    doc_b = generators.synthetic_product_doc(7, category="shampoo", vocabulary=vocabulary, ingredients_per_product=12, seed=1)
+    doc_c = generators.synthetic_product_doc(7, category="shampoo", vocabulary=vocabulary, ingredients_per_product=12, seed=2)
+    assert doc_a == doc_b
+    assert doc_a != doc_c
+
+    ids = ["bench-shampoo-000001", "bench-bodywash-000002"]
+    events_a = list(generators.iter_mobile_client_events(200, seed=1, product_ids=ids))
+    events_b = list(generators.iter_mobile_client_events(200, seed=1, product_ids=ids))
+    assert events_a == events_b
+    assert len({item["event_id"] for item in events_a}) == 200
+    assert [item["created_at"] for item in events_a] == sorted(item["created_at"] for item in events_a)
+
+    assert generators.synthetic_image_bytes(3, seed=1, size=64) == generators.synthetic_image_bytes(3, seed=1, size=64)
+    assert generators.synthetic_image_bytes(3, seed=1, size=64) != generators.synthetic_image_bytes(4, seed=1, size=64)
+
+
+def test_run_suite_covers_every_scenario_and_restores_settings(tmp_path: Path):
+    before = (settings.storage_dir, settings.doubao_mode, settings.doubao_max_retries)
+    params = BenchParams(
+        products=20,
+        events=300,
+        sessions=20,
+        images=2,
+        image_size=64,
+        model_latency_ms=0.0,
+        model_latency_jitter_ms=0.0,
+        rounds=1,
+    )
+
+    result = run_suite(params, tmp_path)
+
+    assert (settings.storage_dir, settings.doubao_mode, settings.doubao_max_retries) == before
+    assert result["version"] == "bench-suite.v1"
+    assert result["params"]["products"] == 20
+    by_name = {item["name"]: item for item in result["benchmarks"]}
+    assert set(by_name) == set(SCENARIOS)
+    for name, item in by_name.items():
+        assert item.get("error") is None, (name, item.get("error"))
+        assert item["stats"]["rounds"] == 1
+        assert item["stats"]["median"] > 0
+    assert by_name["build_mobile_selection_results"]["extra_info"]["failed"] == 0
+    assert by_name["ingredient_library_build"]["extra_info"]["failed"] == 0
+    assert by_name["ingredient_library_noop_rebuild"]["extra_info"]["submitted_to_model"] == 0
+    assert result["fake_model"]["requests"] > 0
+
+
+def test_compare_results_flags_median_regressions():
+    def result(median_a: float, median_b: float) -> dict:
+        return {
+            "commit_info": {"id": "abc"},
+            "params": {"products": 10},
+            "benchmarks": [
+                {"fullname": "http::a", "stats": {"median": median_a}},
+                {"fullname": "http::b", "stats": {"median": median_b}},
+                {"fullname": "http::broken", "stats": None, "error": "boom"},
+            ],
+        }
+
+    report = compare_results(result(0.010, 0.020), result(0.0105, 0.030), max_regression_pct=10.0)
+
+    assert report["baseline_commit"] == "abc"
+    assert report["params_match"] is True
+    assert report["regressions"] == ["http::b"]
+    assert [row["name"] for row in report["scenarios"]] == ["http::a", "http::b"]
+    assert report["scenarios"][1]["change_pct"] == 50.0
@@ -1,6 +1,13 @@
+import asyncio
+import threading
+
+import httpx
 import pytest
+from openai import APITimeoutError
 
-from app.services.doubao_openai_client import DoubaoOpenAIClient
+from app.services import doubao_governor, doubao_openai_client
+from app.services.doubao_governor import DoubaoCallGovernor, DoubaoCircuitOpenError, DoubaoGovernorTimeoutError
+from app.services.doubao_openai_client import AsyncDoubaoOpenAIClient, DoubaoOpenAIClient
 
 
 class _FakeFinalResponse:
@@ -139,3 +146,214 @@ def test_stream_emits_reasoning_summary_events_without_polluting_output_deltas()
             "text": "结论A",
         },
     ]
+
+
+class _FakeAsyncEventStream:
+    def __init__(self, events):
+        self._events = list(events)
+        self.closed = False
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        for event in self._events:
+            yield event
+
+    async def close(self):
+        self.closed = True
+
+
+class _FakeAsyncResponses:
+    def __init__(self, *, stream_events=None, failures=None, delay_seconds: float = 0.0, tracker=None):
+        self.stream_events = stream_events or []
+        self.failures = list(failures or [])
+        self.delay_seconds = delay_seconds
+        self.tracker = tracker
+        self.calls = 0
+        self.last_stream = None
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        if self.failures:
+            raise self.failures.pop(0)
+        if self.tracker is not None:
+            self.tracker["inflight"] += 1
+            self.tracker["peak"] = max(self.tracker["peak"], self.tracker["inflight"])
+        try:
+            if self.delay_seconds:
+                await asyncio.sleep(self.delay_seconds)
+        finally:
+            if self.tracker is not None:
+                self.tracker["inflight"] -= 1
+        if kwargs.get("stream"):
+            self.last_stream = _FakeAsyncEventStream(self.stream_events)
+            return self.last_stream
+        return {"output_text": "async-ok"}
+
+
+class _FakeAsyncOpenAIClient:
+    def __init__(self, responses):
+        self.responses = responses
+
+
+def _timeout_error() -> APITimeoutError:
+    return APITimeoutError(request=httpx.Request("POST", "https://ark.example/api/v3/responses"))
+
+
+def _async_client(responses, *, governor=None, max_retries: int = 0) -> AsyncDoubaoOpenAIClient:
+    client = AsyncDoubaoOpenAIClient(
+        api_key="dummy",
+        endpoint="https://ark.cn-beijing.volces.com/api/v3",
+        model="doubao-seed-2-0-mini-260215",
+        timeout=5,
+        max_retries=max_retries,
+        retry_backoff_seconds=0.1,
+        governor=governor or DoubaoCallGovernor(max_inflight=8),
+    )
+    client.client = _FakeAsyncOpenAIClient(responses)
+    return client
+
+
+def test_async_client_stream_matches_sync_event_semantics():
+    events = [
+        {"type": "response.reasoning_summary_text.delta", "delta": "先看配方。"},
+        {"type": "response.output_text.delta", "delta": "结论A"},
+        {"type": "response.reasoning_summary_text.done", "text": "先看配方。"},
+        {"type": "response.output_text.done", "text": "结论A"},
+        {"type": "response.completed", "response": {"output_text": "结论A"}},
+    ]
+    responses = _FakeAsyncResponses(stream_events=events)
+    client = _async_client(responses)
+    deltas: list[str] = []
+    stream_events: list[dict] = []
+
+    result = asyncio.run(
+        client.chat_with_text(
+            "hello",
+            stream=True,
+            on_text_delta=lambda delta: deltas.append(delta),
+            on_stream_event=lambda event: stream_events.append(event),
+        )
+    )
+
+    assert result["output_text"] == "结论A"
+    assert deltas == ["结论A"]
+    assert [item["kind"] for item in stream_events] == [
+        "reasoning_summary_delta",
+        "output_text_delta",
+        "reasoning_summary_done",
+        "output_text_done",
+    ]
+    assert responses.last_stream.closed is True
+
+
+def test_async_client_retries_timeout_then_succeeds(monkeypatch):
+    slept: list[float] = []
+
+    async def fake_sleep(seconds):
+        slept.append(seconds)
+
+    monkeypatch.setattr(doubao_openai_client.asyncio, "sleep", fake_sleep)
+    responses = _FakeAsyncResponses(failures=[_timeout_error()])
+    client = _async_client(responses, max_retries=1)
+
+    result = asyncio.run(client.chat_with_text("hello"))
+
+    assert result == {"output_text": "async-ok"}
+    assert responses.calls == 2
+    assert len(slept) == 1 and slept[0] >= 0.1
+
+
+def test_governor_bounds_async_inflight_calls():
+    tracker = {"inflight": 0, "peak": 0}
+    governor = DoubaoCallGovernor(max_inflight=3)
+    responses = _FakeAsyncResponses(delay_seconds=0.02, tracker=tracker)
+    client = _async_client(responses, governor=governor)
+
+    async def run_many():
+        return await asyncio.gather(*(client.chat_with_text(f"q{idx}") for idx in range(12)))
+
+    results = asyncio.run(run_many())
+
+    assert len(results) == 12
+    assert tracker["peak"] == 3
+    assert governor.snapshot()["inflight"] == 0
+
+
+def test_async_slot_waiter_is_woken_by_sync_release_without_polling(monkeypatch):
+    governor = DoubaoCallGovernor(max_inflight=1, acquire_timeout_seconds=5)
+    sleeps: list[float] = []
+    real_sleep = asyncio.sleep
+
+    async def tracking_sleep(seconds, *args, **kwargs):
+        sleeps.append(seconds)
+        return await real_sleep(seconds, *args, **kwargs)
+
+    monkeypatch.setattr(doubao_governor.asyncio, "sleep", tracking_sleep)
+    held = threading.Event()
+    release = threading.Event()
+
+    def hold_sync_slot():
+        with governor.slot("m"):
+            held.set()
+            release.wait(timeout=5)
+
+    worker = threading.Thread(target=hold_sync_slot)
+    worker.start()
+    assert held.wait(timeout=5)
+
+    async def acquire():
+        threading.Timer(0.05, release.set).start()
+        async with governor.async_slot("m"):
+            return governor.snapshot()["inflight"]
+
+    assert asyncio.run(acquire()) == 1
+    worker.join(timeout=5)
+    assert sleeps == []
+    assert governor.snapshot()["inflight"] == 0
+
+
+def test_async_slot_wait_times_out_and_leaves_no_waiter():
+    governor = DoubaoCallGovernor(max_inflight=1, acquire_timeout_seconds=0.1)
+
+    async def contend():
+        async with governor.async_slot("m"):
+            with pytest.raises(DoubaoGovernorTimeoutError):
+                async with governor.async_slot("m"):
+                    pass
+        async with governor.async_slot("m"):
+            return governor.snapshot()["inflight"]
+
+    assert asyncio.run(contend()) == 1
+    assert governor.snapshot()["inflight"] == 0
+    assert not governor._async_waiters
+
+
+def test_circuit_breaker_fails_fast_then_recovers_after_cooldown(monkeypatch):
+    clock = {"now": 1000.0}
+    monkeypatch.setattr(doubao_governor.time, "monotonic", lambda: clock["now"])
+    governor = DoubaoCallGovernor(max_inflight=4, failure_threshold=2, open_seconds=30)
+    responses = _FakeAsyncResponses(failures=[_timeout_error(), _timeout_error()])
+    client = _async_client(responses, governor=governor)
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError, match="timeout"):
+            asyncio.run(client.chat_with_text("hello"))
+    with pytest.raises(DoubaoCircuitOpenError):
+        asyncio.run(client.chat_with_text("hello"))
+    assert responses.calls == 2
+
+    clock["now"] += 31
+    assert asyncio.run(client.chat_with_text("hello")) == {"output_text": "async-ok"}
+    assert governor.snapshot()["circuits"]["doubao-seed-2-0-mini-260215"]["state"] == "closed"
+
+
+def test_token_bucket_reserves_in_arrival_order():
+    governor = DoubaoCallGovernor(max_inflight=4, rate_limits={"*": {"rps": 2, "burst": 1}})
+
+    waits = [governor._admit("doubao-seed-2-0-pro-260215") for _ in range(3)]
+
+    assert waits[0] == 0.0
+    assert waits[1] == pytest.approx(0.5, abs=0.05)
+    assert waits[2] == pytest.approx(1.0, abs=0.05)
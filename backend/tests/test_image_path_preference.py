@@ -7,6 +7,7 @@ from app.platform.storage_backend import get_runtime_storage
 from app.routes import ingest as ingest_routes
 from app.routes import products as products_routes
 from app.settings import settings
+from app.services.mobile_wiki_snapshots import describe_mobile_wiki_snapshots, reset_mobile_wiki_snapshot_memory
 from app.services.storage import preferred_image_rel_path, product_analysis_rel_path
 from backend.tests.support_images import VALID_TEST_IMAGE_BYTES, install_fake_save_image
 
@@ -454,6 +455,61 @@ def test_mobile_wiki_product_detail_contains_resolved_ingredient_refs(test_clien
     assert refs[0]["ingredient_id"] == target_id
 
 
+def test_mobile_wiki_product_detail_serves_snapshot_with_etag(test_client, monkeypatch: pytest.MonkeyPatch):
+    client, _ = test_client
+    install_fake_save_image(monkeypatch, ingest_routes)
+    created = _ingest_manual_with_image(client, category="shampoo")
+    product_id = created["id"]
+    _install_fake_wiki_capabilities(
+        monkeypatch,
+        route_plans_by_product_name={
+            "Test Product": {"category": "shampoo", "primary_key": "deep-oil-control", "secondary_key": "moisture-balance"}
+        },
+    )
+    _build_wiki_ready_products(client, category="shampoo")
+    reset_mobile_wiki_snapshot_memory()
+
+    first = client.get(f"/api/mobile/wiki/products/{product_id}")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert etag.startswith('"') and etag.endswith('"')
+    assert first.json()["item"]["product"]["name"] == "Test Product"
+    assert first.json()["item"]["target_type_key"] == "deep-oil-control"
+
+    cached = client.get(f"/api/mobile/wiki/products/{product_id}")
+    assert cached.status_code == 200
+    assert cached.headers["etag"] == etag
+    assert cached.content == first.content
+
+    not_modified = client.get(f"/api/mobile/wiki/products/{product_id}", headers={"If-None-Match": f'W/"x", {etag}'})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["etag"] == etag
+    stats = describe_mobile_wiki_snapshots()
+    assert stats["builds"] == 1
+    assert stats["memory_hits"] == 2
+    assert stats["not_modified"] == 1
+
+    # 冷启动（清空进程内快照）从表里读回同一份字节。
+    reset_mobile_wiki_snapshot_memory()
+    from_store = client.get(f"/api/mobile/wiki/products/{product_id}", headers={"If-None-Match": etag})
+    assert from_store.status_code == 304
+    assert describe_mobile_wiki_snapshots()["store_hits"] == 1
+
+    renamed = client.patch(f"/api/products/{product_id}", json={"name": "Renamed Product"})
+    assert renamed.status_code == 200
+    rebuilt = client.get(f"/api/mobile/wiki/products/{product_id}", headers={"If-None-Match": etag})
+    assert rebuilt.status_code == 200
+    assert rebuilt.headers["etag"] != etag
+    assert rebuilt.json()["item"]["product"]["name"] == "Renamed Product"
+
+    monkeypatch.setattr(settings, "mobile_wiki_snapshot_enabled", False)
+    live = client.get(f"/api/mobile/wiki/products/{product_id}")
+    assert live.status_code == 200
+    assert "etag" not in live.headers
+    assert live.json() == rebuilt.json()
+
+
 def test_mobile_wiki_products_uses_backend_pagination(test_client, monkeypatch: pytest.MonkeyPatch):
     client, _ = test_client
     install_fake_save_image(monkeypatch, ingest_routes)
@@ -0,0 +1,196 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event
+
+from app.db.models import IngredientLibraryAlias, IngredientLibraryIndex, IngredientLibraryRedirect
+from app.routes import mobile as mobile_routes
+from app.services import ingredient_alias_map
+from app.services.storage import now_iso
+from app.settings import settings
+
+
+@pytest.fixture
+def alias_db(sqlite_session_factory):
+    ingredient_alias_map.reset_ingredient_alias_maps()
+    yield sqlite_session_factory.kw["bind"], sqlite_session_factory
+    ingredient_alias_map.reset_ingredient_alias_maps()
+
+
+def _add_ingredient(db, ingredient_id: str, *, status: str = "ready", category: str = "shampoo") -> None:
+    now = now_iso()
+    db.add(
+        IngredientLibraryIndex(
+            ingredient_id=ingredient_id,
+            category=category,
+            ingredient_name=ingredient_id,
+            ingredient_key=ingredient_id,
+            status=status,
+            first_seen_at=now,
+            last_seen_at=now,
+            last_generated_at=now,
+        )
+    )
+
+
+def _add_alias(db, name: str, ingredient_id: str, *, category: str = "shampoo", keys: list[str] | None = None) -> None:
+    now = now_iso()
+    for alias_key in keys or mobile_routes._build_mobile_wiki_alias_keys(name):
+        db.add(
+            IngredientLibraryAlias(
+                alias_id=f"{category}:{alias_key}",
+                category=category,
+                alias_key=alias_key,
+                alias_name=name,
+                ingredient_id=ingredient_id,
+                created_at=now,
+                updated_at=now,
+            )
+        )
+
+
+def _add_redirect(db, old_id: str, new_id: str, *, category: str = "shampoo") -> None:
+    now = now_iso()
+    db.add(
+        IngredientLibraryRedirect(
+            old_ingredient_id=old_id,
+            category=category,
+            new_ingredient_id=new_id,
+            reason="merge",
+            created_at=now,
+            updated_at=now,
+        )
+    )
+
+
+def test_alias_map_collapses_redirect_chains_and_folds_ready_status(alias_db):
+    _engine, SessionLocal = alias_db
+    with SessionLocal() as db:
+        for ingredient_id in ("ing-a", "ing-b", "ing-c", "ing-x", "ing-y"):
+            _add_ingredient(db, ingredient_id)
+        _add_ingredient(db, "ing-pending", status="pending")
+        _add_alias(db, "甘油", "ing-a")
+        _add_alias(db, "烟酰胺", "ing-pending")
+        _add_redirect(db, "ing-a", "ing-b")
+        _add_redirect(db, "ing-b", "ing-c")
+        _add_redirect(db, "ing-x", "ing-y")
+        _add_redirect(db, "ing-y", "ing-x")
+        _add_redirect(db, "ing-other", "ing-z", category="bodywash")
+        db.commit()
+
+        alias_map = ingredient_alias_map.load_ingredient_alias_map(db, "Shampoo")
+
+    assert alias_map.category == "shampoo"
+    assert alias_map.lookup("cn::甘油").ingredient_id == "ing-a"
+    assert alias_map.canonical_id("ing-a") == "ing-c"
+    assert alias_map.canonical_id("ING-B") == "ing-c"
+    assert alias_map.canonical_id("ing-c") == "ing-c"
+    # 环状重定向与逐跳查询一致：绕回已访问的节点即停。
+    assert alias_map.canonical_id("ing-x") == "ing-x"
+    assert alias_map.canonical_id("ing-other") == "ing-other"
+    assert alias_map.is_ready("ing-a")
+    assert not alias_map.is_ready("ing-pending")
+    with pytest.raises(TypeError):
+        alias_map.aliases["cn::新成分"] = alias_map.lookup("cn::甘油")
+
+
+def test_alias_map_reused_until_library_version_changes(alias_db, monkeypatch: pytest.MonkeyPatch):
+    _engine, SessionLocal = alias_db
+    monkeypatch.setattr(settings, "ingredient_alias_map_version_check_seconds", 0)
+    with SessionLocal() as db:
+        _add_ingredient(db, "ing-a")
+        _add_alias(db, "甘油", "ing-a")
+        db.commit()
+
+        first = ingredient_alias_map.load_ingredient_alias_map(db, "shampoo")
+        second = ingredient_alias_map.load_ingredient_alias_map(db, "shampoo")
+        assert second is first
+        assert ingredient_alias_map.describe_ingredient_alias_maps()["loads"] == 1
+
+        _add_ingredient(db, "ing-b")
+        _add_alias(db, "泛醇", "ing-b")
+        db.commit()
+        third = ingredient_alias_map.load_ingredient_alias_map(db, "shampoo")
+        assert third is not first
+        assert third.lookup("cn::泛醇").ingredient_id == "ing-b"
+        assert first.lookup("cn::泛醇") is None
+
+        ingredient_alias_map.refresh_ingredient_alias_maps(db, ["shampoo"])
+        stats = ingredient_alias_map.describe_ingredient_alias_maps()
+        assert stats["loads"] == 3
+        assert stats["categories"]["shampoo"]["aliases"] == len(third.aliases)
+
+
+def test_alias_map_probes_version_only_after_check_interval(alias_db, monkeypatch: pytest.MonkeyPatch):
+    _engine, SessionLocal = alias_db
+    clock = [1000.0]
+    monkeypatch.setattr(ingredient_alias_map.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(settings, "ingredient_alias_map_version_check_seconds", 5)
+    with SessionLocal() as db:
+        _add_ingredient(db, "ing-a")
+        _add_alias(db, "甘油", "ing-a")
+        db.commit()
+        first = ingredient_alias_map.load_ingredient_alias_map(db, "shampoo")
+
+        # 其他写入点（未调用 refresh）的提交在间隔内不可见，也不探测版本戳
+        _add_ingredient(db, "ing-b")
+        _add_alias(db, "泛醇", "ing-b")
+        db.commit()
+        clock[0] += 4
+        assert ingredient_alias_map.load_ingredient_alias_map(db, "shampoo") is first
+        assert ingredient_alias_map.describe_ingredient_alias_maps()["version_checks"] == 0
+
+        clock[0] += 2
+        latest = ingredient_alias_map.load_ingredient_alias_map(db, "shampoo")
+        assert latest is not first
+        assert latest.lookup("cn::泛醇").ingredient_id == "ing-b"
+        stats = ingredient_alias_map.describe_ingredient_alias_maps()
+        assert (stats["version_checks"], stats["loads"]) == (1, 2)
+
+        # 版本未变：到期探测一次后重新计时
+        clock[0] += 6
+        assert ingredient_alias_map.load_ingredient_alias_map(db, "shampoo") is latest
+        clock[0] += 1
+        assert ingredient_alias_map.load_ingredient_alias_map(db, "shampoo") is latest
+        stats = ingredient_alias_map.describe_ingredient_alias_maps()
+        assert (stats["version_checks"], stats["loads"]) == (2, 2)
+
+
+def test_mobile_wiki_refs_resolve_from_memory_without_queries(alias_db):
+    engine, SessionLocal = alias_db
+    with SessionLocal() as db:
+        _add_ingredient(db, "ing-a")
+        _add_ingredient(db, "ing-b")
+        _add_ingredient(db, "ing-c")
+        _add_alias(db, "甘油", "ing-a")
+        _add_alias(db, "Niacinamide", "ing-b")
+        # 中文全名指向另一个成分，英文括注指向 ing-b：同一条成分命中两个目标。
+        _add_alias(db, "烟酰胺 (Niacinamide)", "ing-c", keys=["cn::烟酰胺 (niacinamide)"])
+        _add_redirect(db, "ing-a", "ing-b")
+        db.commit()
+
+        ingredients = [
+            SimpleNamespace(name="甘油"),
+            SimpleNamespace(name="烟酰胺 (Niacinamide)"),
+            SimpleNamespace(name="未知成分"),
+        ]
+        mobile_routes._resolve_mobile_wiki_ingredient_refs(db=db, category="shampoo", ingredients=ingredients)
+
+        statements: list[str] = []
+
+        def _count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", _count)
+        try:
+            refs = mobile_routes._resolve_mobile_wiki_ingredient_refs(db=db, category="shampoo", ingredients=ingredients)
+        finally:
+            event.remove(engine, "before_cursor_execute", _count)
+
+    # 探测间隔内第二次解析整张成分表不再查库（版本戳也不取）
+    assert statements == []
+    assert [ref.status for ref in refs] == ["resolved", "conflict", "unresolved"]
+    assert refs[0].ingredient_id == "ing-b"
+    assert refs[0].matched_alias == "甘油"
+    assert refs[1].reason == "matched_multiple_targets=ing-b,ing-c"
+    assert refs[2].reason == "alias_not_found"
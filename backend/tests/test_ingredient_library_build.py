@@ -5,10 +5,11 @@ import pytest
 from sqlalchemy import create_engine, select
 from sqlalchemy.orm import sessionmaker
 
-from app.db.models import Base
+from app.db.models import Base, IngredientAggregate, IngredientAggregateMember
 from app.routes import ingest as ingest_routes
 from app.routes import products as products_routes
 from backend.tests.support_images import VALID_TEST_IMAGE_BYTES, install_fake_save_image
+from backend.tests.support_doubao import install_fake_stage1_analyzer
 
 
 def _install_fake_ingest_pipeline(monkeypatch: pytest.MonkeyPatch, plans: list[dict]) -> None:
@@ -73,7 +74,7 @@ def _install_fake_ingest_pipeline(monkeypatch: pytest.MonkeyPatch, plans: list[d
             "artifact": f"doubao_runs/{trace_id}/stage2_struct.json",
         }
 
-    monkeypatch.setattr(ingest_routes, "_analyze_with_doubao_stage1", fake_stage1)
+    install_fake_stage1_analyzer(monkeypatch, ingest_routes, fake_stage1)
     monkeypatch.setattr(ingest_routes, "_analyze_with_doubao_stage2", fake_stage2)
 
 
@@ -711,3 +712,313 @@ def test_ingredient_library_old_id_can_redirect_to_new_id_after_alias_merge(test
     redirected = client.get(f"/api/products/ingredients/library/bodywash/{old_id}")
     assert redirected.status_code == 200
     assert redirected.json()["item"]["ingredient_id"] == new_id
+
+
+def _fake_profile_result(input_payload: dict) -> dict:
+    return {
+        "ingredient_name": input_payload["ingredient"],
+        "category": input_payload["category"],
+        "summary": "ok",
+        "benefits": [],
+        "risks": [],
+        "usage_tips": [],
+        "suitable_for": [],
+        "avoid_for": [],
+        "confidence": 90,
+        "reason": "ok",
+        "analysis_text": "{}",
+        "model": "doubao-seed-2-0-pro-260215",
+    }
+
+
+def test_build_ingredient_library_noop_rebuild_uses_index_signature_only(test_client, monkeypatch: pytest.MonkeyPatch):
+    client, _ = test_client
+    _install_fake_ingest_pipeline(
+        monkeypatch,
+        [
+            {
+                "category": "shampoo",
+                "brand": "Dove",
+                "name": "Signature Column",
+                "one_sentence": "sig",
+                "ingredients": ["水", "甘油", "烟酰胺"],
+            }
+        ],
+    )
+    _ingest_one(client, "sig.jpg")
+    monkeypatch.setattr(
+        products_routes,
+        "run_capability_now",
+        lambda capability, input_payload, trace_id=None, event_callback=None: _fake_profile_result(input_payload),
+    )
+    first = client.post("/api/products/ingredients/library/build", json={"category": "shampoo"})
+    assert first.status_code == 200
+    assert first.json()["created"] == 3
+
+    db_gen = client.app.dependency_overrides[products_routes.get_db]()
+    db = next(db_gen)
+    try:
+        rows = db.execute(select(products_routes.IngredientLibraryIndex)).scalars().all()
+        assert len(rows) == 3
+        assert all(len(str(row.source_signature or "")) == 40 for row in rows)
+    finally:
+        db_gen.close()
+
+    def should_not_call(*args, **kwargs):
+        raise AssertionError("no-op rebuild must decide skips from the index, not per-ingredient storage reads")
+
+    original_exists = products_routes.exists_rel_path
+
+    def exists_without_profile_stat(rel_path):
+        if str(rel_path or "").startswith("ingredients/"):
+            should_not_call(rel_path)
+        return original_exists(rel_path)
+
+    monkeypatch.setattr(products_routes, "run_capability_now", should_not_call)
+    monkeypatch.setattr(products_routes, "_load_profile_source_signature", should_not_call)
+    monkeypatch.setattr(products_routes, "exists_rel_path", exists_without_profile_stat)
+    second = client.post("/api/products/ingredients/library/build", json={"category": "shampoo"})
+    assert second.status_code == 200
+    assert second.json()["skipped"] == 3
+    assert second.json()["submitted_to_model"] == 0
+
+
+def test_build_ingredient_library_runs_model_calls_concurrently_with_ordered_progress(test_client, monkeypatch: pytest.MonkeyPatch):
+    import threading
+    import time
+
+    client, _ = test_client
+    ingredients = ["成分A", "成分B", "成分C", "成分D", "成分E", "成分F"]
+    _install_fake_ingest_pipeline(
+        monkeypatch,
+        [
+            {
+                "category": "bodywash",
+                "brand": "Dove",
+                "name": "Concurrent Build",
+                "one_sentence": "pool",
+                "ingredients": ingredients,
+            }
+        ],
+    )
+    _ingest_one(client, "pool.jpg")
+    monkeypatch.setattr(products_routes.settings, "ingredient_build_model_concurrency", 3)
+
+    lock = threading.Lock()
+    state = {"active": 0, "peak": 0}
+    main_thread = threading.get_ident()
+
+    def fake_run_capability_now(capability: str, input_payload: dict, trace_id: str | None = None, event_callback=None):
+        with lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        try:
+            if event_callback:
+                event_callback({"type": "delta", "delta": f"{input_payload['ingredient']}…"})
+            # 第一个成分最慢：若进度按完成先后发出，顺序就会乱。
+            time.sleep(0.2 if input_payload["ingredient"] == "成分A" else 0.05)
+            if input_payload["ingredient"] == "成分D":
+                raise RuntimeError("mock model failure")
+            return _fake_profile_result(input_payload)
+        finally:
+            with lock:
+                state["active"] -= 1
+
+    monkeypatch.setattr(products_routes, "run_capability_now", fake_run_capability_now)
+
+    events: list[dict] = []
+    event_threads: set[int] = set()
+
+    def on_event(event: dict) -> None:
+        event_threads.add(threading.get_ident())
+        events.append(event)
+
+    db_gen = client.app.dependency_overrides[products_routes.get_db]()
+    db = next(db_gen)
+    try:
+        result = products_routes._build_ingredient_library_impl(
+            products_routes.IngredientLibraryBuildRequest(category="bodywash"),
+            db,
+            event_callback=on_event,
+        )
+    finally:
+        db_gen.close()
+
+    assert result.submitted_to_model == len(ingredients)
+    assert result.created == len(ingredients) - 1
+    assert result.failed == 1
+    assert 2 <= state["peak"] <= 3
+    assert event_threads == {main_thread}
+    finished = [e for e in events if e["step"] in {"ingredient_done", "ingredient_error", "ingredient_skip"}]
+    assert [e["index"] for e in finished] == list(range(1, len(ingredients) + 1))
+    assert sum(1 for e in events if e["step"] == "ingredient_model_delta") == len(ingredients)
+    assert [item.status for item in result.items].count("failed") == 1
+
+
+def test_build_ingredient_library_cancel_stops_submitting_model_calls(test_client, monkeypatch: pytest.MonkeyPatch):
+    client, _ = test_client
+    _install_fake_ingest_pipeline(
+        monkeypatch,
+        [
+            {
+                "category": "shampoo",
+                "brand": "Dove",
+                "name": "Cancel Build",
+                "one_sentence": "cancel",
+                "ingredients": ["甲", "乙", "丙", "丁", "戊"],
+            }
+        ],
+    )
+    _ingest_one(client, "cancel.jpg")
+    monkeypatch.setattr(products_routes.settings, "ingredient_build_model_concurrency", 2)
+    calls: list[str] = []
+
+    def fake_run_capability_now(capability: str, input_payload: dict, trace_id: str | None = None, event_callback=None):
+        calls.append(input_payload["ingredient"])
+        return _fake_profile_result(input_payload)
+
+    monkeypatch.setattr(products_routes, "run_capability_now", fake_run_capability_now)
+    checks = {"n": 0}
+
+    def stop_checker() -> bool:
+        checks["n"] += 1
+        return checks["n"] > 2
+
+    events: list[dict] = []
+    db_gen = client.app.dependency_overrides[products_routes.get_db]()
+    db = next(db_gen)
+    try:
+        with pytest.raises(products_routes.IngredientLibraryBuildCancelledError):
+            products_routes._build_ingredient_library_impl(
+                products_routes.IngredientLibraryBuildRequest(category="shampoo"),
+                db,
+                event_callback=events.append,
+                stop_checker=stop_checker,
+            )
+    finally:
+        db_gen.close()
+
+    assert len(calls) == 2
+    steps = [e["step"] for e in events]
+    assert steps[-1] == "ingredient_build_cancelled"
+    assert steps.count("ingredient_done") == 2
+
+
+def test_build_ingredient_library_incremental_aggregation_reparses_only_changed_products(
+    test_client, monkeypatch: pytest.MonkeyPatch
+):
+    from app.services.storage import load_json, save_json_at
+
+    client, _ = test_client
+    _install_fake_ingest_pipeline(
+        monkeypatch,
+        [
+            {
+                "category": "conditioner",
+                "brand": "Dove",
+                "name": "Incremental A",
+                "one_sentence": "a",
+                "ingredients": ["水", "甘油", "泛醇"],
+            },
+            {
+                "category": "conditioner",
+                "brand": "Dove",
+                "name": "Incremental B",
+                "one_sentence": "b",
+                "ingredients": ["水", "山嵛醇"],
+            },
+        ],
+    )
+    first_id = _ingest_one(client, "inc-a.jpg")
+    _ingest_one(client, "inc-b.jpg")
+    monkeypatch.setattr(
+        products_routes,
+        "run_capability_now",
+        lambda capability, input_payload, trace_id=None, event_callback=None: _fake_profile_result(input_payload),
+    )
+
+    first = client.post(
+        "/api/products/ingredients/library/build",
+        json={"category": "conditioner", "aggregation_mode": "verify"},
+    )
+    assert first.status_code == 200
+    assert first.json()["reparsed_products"] == 2
+    assert first.json()["created"] == 4
+
+    noop = client.post("/api/products/ingredients/library/build", json={"category": "conditioner"})
+    assert noop.status_code == 200
+    assert noop.json()["reparsed_products"] == 0
+    assert noop.json()["affected_ingredients"] == 0
+    assert noop.json()["skipped"] == 4
+
+    db_gen = client.app.dependency_overrides[products_routes.get_db]()
+    db = next(db_gen)
+    try:
+        # 聚合状态落在库里（进程重启 / 多进程共享），不依赖进程内缓存
+        assert db.query(IngredientAggregate).count() == 4
+        assert db.query(IngredientAggregateMember).count() == 2
+        json_path = db.get(products_routes.ProductIndex, first_id).json_path
+    finally:
+        db_gen.close()
+    doc = load_json(json_path)
+    doc["ingredients"].append({**doc["ingredients"][-1], "name": "角鲨烷", "rank": len(doc["ingredients"]) + 1})
+    save_json_at(json_path, doc)
+
+    changed = client.post(
+        "/api/products/ingredients/library/build",
+        json={"category": "conditioner", "aggregation_mode": "verify"},
+    )
+    assert changed.status_code == 200
+    body = changed.json()
+    assert body["aggregation_mode"] == "verify"
+    assert body["reparsed_products"] == 1
+    # 产品 A 的全部成分（水/甘油/泛醇 + 新增角鲨烷）共现统计都会变化；产品 B 独有的山嵛醇不受影响。
+    assert body["affected_ingredients"] == 4
+    assert body["unique_ingredients"] == 5
+    assert body["created"] == 1
+    assert body["skipped"] == 1
+
+
+def test_build_ingredient_library_verify_mode_rejects_divergent_incremental_state(
+    test_client, monkeypatch: pytest.MonkeyPatch
+):
+    client, _ = test_client
+    _install_fake_ingest_pipeline(
+        monkeypatch,
+        [
+            {
+                "category": "shampoo",
+                "brand": "Dove",
+                "name": "Verify Guard",
+                "one_sentence": "verify",
+                "ingredients": ["水", "甘油"],
+            }
+        ],
+    )
+    _ingest_one(client, "verify.jpg")
+    monkeypatch.setattr(
+        products_routes,
+        "run_capability_now",
+        lambda capability, input_payload, trace_id=None, event_callback=None: _fake_profile_result(input_payload),
+    )
+    assert client.post("/api/products/ingredients/library/build", json={"category": "shampoo"}).status_code == 200
+
+    db_gen = client.app.dependency_overrides[products_routes.get_db]()
+    db = next(db_gen)
+    try:
+        rows = db.query(IngredientAggregate).all()
+        assert rows
+        for rec in rows:
+            item = json.loads(rec.aggregate_json)
+            item["source_json"]["stats"]["mention_count"] = 99
+            rec.aggregate_json = json.dumps(item, ensure_ascii=False)
+        db.commit()
+    finally:
+        db_gen.close()
+
+    resp = client.post(
+        "/api/products/ingredients/library/build",
+        json={"category": "shampoo", "aggregation_mode": "verify"},
+    )
+    assert resp.status_code == 500
+    assert "ingredient_aggregate_verify" in resp.json()["detail"]
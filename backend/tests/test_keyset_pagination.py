@@ -0,0 +1,171 @@
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, inspect as sa_inspect, select, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db import runtime_schema
+from app.db.keyset import NEXT_CURSOR_HEADER, InvalidCursorError, decode_cursor, encode_cursor
+from app.db.models import MobileSelectionSession, ProductWorkbenchJob, UploadIngestJob
+from app.db.session import get_db
+from app.routes import mobile_selection as selection_routes
+
+
+def _db(client):
+    return next(client.app.dependency_overrides[get_db]())
+
+
+def _walk(client, path: str, params: dict) -> list[list[str]]:
+    pages: list[list[str]] = []
+    cursor = None
+    while True:
+        resp = client.get(path, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert resp.status_code == 200, resp.text
+        pages.append([item["job_id"] for item in resp.json()])
+        cursor = resp.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            return pages
+
+
+def test_upload_jobs_cursor_pages_are_stable_under_concurrent_inserts(test_client):
+    client, _ = test_client
+    db = _db(client)
+    # 时间戳有重复：靠 job_id 兜底保证顺序确定
+    stamps = ["2026-01-01T00:00:00Z", "2026-01-02T00:00:00Z", "2026-01-02T00:00:00Z", "2026-01-03T00:00:00Z"] * 2
+    for idx, ts in enumerate(stamps):
+        db.add(UploadIngestJob(job_id=f"job-{idx}", status="done", created_at=ts, updated_at=ts))
+    db.commit()
+    expected = [
+        row.job_id
+        for row in db.execute(
+            select(UploadIngestJob).order_by(UploadIngestJob.created_at.desc(), UploadIngestJob.job_id.desc())
+        ).scalars()
+    ]
+
+    first = client.get("/api/upload/jobs", params={"status": "done", "limit": 3})
+    cursor = first.headers[NEXT_CURSOR_HEADER]
+    # 翻页期间插入更新的任务：不会挤出 / 重复后续页里的行
+    db.add(UploadIngestJob(job_id="job-new", status="done", created_at="2026-02-01T00:00:00Z", updated_at="2026-02-01T00:00:00Z"))
+    # 尚未翻到的任务在翻页途中被更新（进度 / 状态对账刷新 updated_at）：按 created_at 翻页，位置不变、不会被漏掉
+    db.get(UploadIngestJob, expected[-1]).updated_at = "2026-03-01T00:00:00Z"
+    db.commit()
+    rest = _walk(client, "/api/upload/jobs", {"status": "done", "limit": 3, "cursor": cursor})
+
+    seen = [item["job_id"] for item in first.json()] + [job_id for page in rest for job_id in page]
+    assert seen == expected
+    assert [len(page) for page in rest] == [3, 2]
+
+    # 旧 offset 参数仍可用，且同样返回可切换到 keyset 的游标
+    legacy = client.get("/api/upload/jobs", params={"status": "done", "offset": 3, "limit": 3})
+    assert [item["job_id"] for item in legacy.json()] == expected[2:5]
+    assert legacy.headers[NEXT_CURSOR_HEADER]
+    db.close()
+
+
+def test_invalid_or_foreign_cursor_is_rejected(test_client):
+    client, _ = test_client
+    db = _db(client)
+    for idx in range(3):
+        ts = f"2026-01-0{idx + 1}T00:00:00Z"
+        db.add(ProductWorkbenchJob(job_id=f"wb-{idx}", job_type="dedup_suggest", status="done", created_at=ts, updated_at=ts))
+    db.commit()
+    db.close()
+
+    pages = _walk(client, "/api/products/dedup/jobs", {"limit": 2})
+    assert pages == [["wb-2", "wb-1"], ["wb-0"]]
+
+    upload_cursor = encode_cursor("upload_jobs", ["2026-01-02T00:00:00Z", "wb-1"])
+    other_type_cursor = encode_cursor("workbench_jobs:route_mapping_build", ["2026-01-02T00:00:00Z", "wb-1"])
+    for params in (
+        {"cursor": "not-a-cursor"},
+        {"cursor": upload_cursor},
+        {"cursor": other_type_cursor},
+        {"cursor": encode_cursor("workbench_jobs:dedup_suggest", ["2026-01-02T00:00:00Z", "wb-1"]), "offset": 5},
+    ):
+        resp = client.get("/api/products/dedup/jobs", params=params)
+        assert resp.status_code == 400, params
+
+
+def test_decode_cursor_checks_scope_and_arity():
+    cursor = encode_cursor("upload_jobs", ["2026-01-01T00:00:00Z", "job-1"])
+    assert decode_cursor(cursor, scope="upload_jobs", size=2) == ["2026-01-01T00:00:00Z", "job-1"]
+    assert decode_cursor("", scope="upload_jobs", size=2) is None
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, scope="upload_jobs", size=3)
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, scope="compare_sessions", size=2)
+
+
+def test_selection_history_pages_cross_from_pinned_to_unpinned(tmp_path: Path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'history.db'}", connect_args={"check_same_thread": False})
+    runtime_schema.apply_runtime_schema(engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with SessionLocal() as db:
+        for idx in range(7):
+            ts = f"2026-01-0{idx + 1}T00:00:00Z"
+            pinned = idx in {1, 4}
+            db.add(
+                MobileSelectionSession(
+                    id=f"sel-{idx}",
+                    owner_type="device",
+                    owner_id="owner-1",
+                    category="shampoo",
+                    rules_version="v1",
+                    answers_hash=f"hash-{idx}",
+                    route_key="route",
+                    route_title="route",
+                    answers_json="{}",
+                    result_json="{}",
+                    is_pinned=pinned,
+                    pinned_at=f"2026-02-0{idx}T00:00:00Z" if pinned else None,
+                    # sel-5 / sel-6 同一 created_at：id 兜底
+                    created_at=ts if idx < 6 else "2026-01-06T00:00:00Z",
+                    deleted_at="2026-03-01T00:00:00Z" if idx == 0 else None,
+                )
+            )
+        db.commit()
+
+        stmt = (
+            select(MobileSelectionSession)
+            .where(MobileSelectionSession.owner_type == "device")
+            .where(MobileSelectionSession.owner_id == "owner-1")
+            .where(MobileSelectionSession.deleted_at.is_(None))
+        )
+        full = selection_routes._fetch_selection_history_page(db=db, stmt=stmt, cursor=None, offset=0, limit=50)
+        expected = [row.id for row in full.rows]
+        assert expected == ["sel-4", "sel-1", "sel-6", "sel-5", "sel-3", "sel-2"]
+        assert full.next_cursor is None
+
+        for limit in (1, 2, 3, 4):
+            seen: list[str] = []
+            cursor = None
+            while True:
+                page = selection_routes._fetch_selection_history_page(
+                    db=db, stmt=stmt, cursor=cursor, offset=0, limit=limit
+                )
+                seen.extend(row.id for row in page.rows)
+                cursor = page.next_cursor
+                if cursor is None:
+                    break
+            assert seen == expected, limit
+    engine.dispose()
+
+
+def test_runtime_schema_rebuilds_indexes_whose_columns_changed(tmp_path: Path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}", connect_args={"check_same_thread": False})
+    runtime_schema.apply_runtime_schema(engine)
+    with engine.begin() as conn:
+        # 模拟老库：列表索引还是按 updated_at、没有追加主键
+        conn.execute(text("DROP INDEX ix_upload_ingest_jobs_scope"))
+        conn.execute(text("CREATE INDEX ix_upload_ingest_jobs_scope ON upload_ingest_jobs (status, updated_at)"))
+        conn.execute(text("CREATE INDEX ix_upload_ingest_jobs_updated_at ON upload_ingest_jobs (updated_at, job_id)"))
+        conn.execute(text("UPDATE runtime_schema_versions SET version = '2000-01-r0'"))
+    runtime_schema.reset_runtime_schema_memo()
+
+    runtime_schema.ensure_runtime_schema(engine)
+
+    indexes = {item["name"]: item["column_names"] for item in sa_inspect(engine).get_indexes("upload_ingest_jobs")}
+    assert indexes["ix_upload_ingest_jobs_scope"] == ["status", "created_at", "job_id"]
+    assert indexes["ix_upload_ingest_jobs_status_updated"] == ["status", "updated_at"]
+    assert "ix_upload_ingest_jobs_updated_at" not in indexes
+    engine.dispose()
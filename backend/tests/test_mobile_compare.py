@@ -9,6 +9,7 @@ from app.routes import ingest as ingest_routes
 from app.routes import mobile as mobile_routes
 from app.settings import settings
 from backend.tests.support_images import VALID_TEST_IMAGE_BYTES, install_fake_save_image
+from backend.tests.support_doubao import install_fake_stage1_analyzer
 
 
 def _install_fake_ingest_pipeline(monkeypatch: pytest.MonkeyPatch, plan: dict) -> None:
@@ -74,7 +75,7 @@ def _install_fake_ingest_pipeline(monkeypatch: pytest.MonkeyPatch, plan: dict) -
             "artifact": f"doubao_runs/{trace_id}/stage2_struct.json",
         }
 
-    monkeypatch.setattr(ingest_routes, "_analyze_with_doubao_stage1", fake_stage1)
+    install_fake_stage1_analyzer(monkeypatch, ingest_routes, fake_stage1)
     monkeypatch.setattr(ingest_routes, "_analyze_with_doubao_stage2", fake_stage2)
 
 
@@ -236,6 +237,16 @@ def test_mobile_compare_stream_success_and_fetch_result(test_client, monkeypatch
     monkeypatch.setattr(mobile_routes, "DoubaoPipelineService", FakePipeline)
     monkeypatch.setattr(mobile_routes, "run_capability_now", fake_run_capability_now)
 
+    session_artifact_writes: list[dict] = []
+    original_save_doubao_artifact = mobile_routes.save_doubao_artifact
+
+    def recording_save_doubao_artifact(product_id: str, stage: str, payload: dict) -> str:
+        if stage == mobile_routes.MOBILE_COMPARE_SESSION_STAGE:
+            session_artifact_writes.append(dict(payload))
+        return original_save_doubao_artifact(product_id, stage, payload)
+
+    monkeypatch.setattr(mobile_routes, "save_doubao_artifact", recording_save_doubao_artifact)
+
     stream_resp = client.post(
         "/api/mobile/compare/jobs/stream",
         json={
@@ -263,6 +274,10 @@ def test_mobile_compare_stream_success_and_fetch_result(test_client, monkeypatch
     assert result["pair_results"][0]["sections"][0]["key"] == "keep_benefits"
     assert len(result["pair_results"]) == 1
     assert result["trace_id"]
+    # 进度只写 DB index，终态才落一次 session 产物。
+    assert [item["status"] for item in session_artifact_writes] == ["done"]
+    assert len(session_artifact_writes[0]["targets_snapshot"]) == 2
+    assert session_artifact_writes[0]["job_payload"]["category"] == "shampoo"
 
     fetched = client.get(f"/api/mobile/compare/results/{result['compare_id']}")
     assert fetched.status_code == 200
@@ -0,0 +1,109 @@
+import pytest
+
+from app.db.models import ProductIndex
+from app.routes import mobile as mobile_routes
+from app.services.mobile_compare_library_cache import describe_compare_library_cache, reset_compare_library_cache
+from app.settings import settings
+
+
+@pytest.fixture
+def library_db(sqlite_session_factory, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "mobile_compare_library_cache_ttl_seconds", 300)
+    reset_compare_library_cache()
+    yield sqlite_session_factory
+    reset_compare_library_cache()
+
+
+def _add_product(db, product_id: str, *, category: str = "shampoo", name: str | None = None, created_at: str = "2026-01-01") -> None:
+    db.add(
+        ProductIndex(
+            id=product_id,
+            category=category,
+            brand="Brand",
+            name=name or product_id,
+            one_sentence="",
+            tags_json="[]",
+            json_path=f"products/{product_id}.json",
+            created_at=created_at,
+        )
+    )
+
+
+def _library(db, *, owner_id: str = "owner-1"):
+    return mobile_routes._build_mobile_compare_product_library(
+        db=db,
+        category="shampoo",
+        owner_type="device",
+        owner_id=owner_id,
+        recommendation_product_id=None,
+    )
+
+
+def test_library_cards_cached_until_product_commit(library_db):
+    SessionLocal = library_db
+    with SessionLocal() as db:
+        _add_product(db, "p-1", created_at="2026-01-01")
+        _add_product(db, "p-2", created_at="2026-01-02")
+        _add_product(db, "b-1", category="bodywash")
+        db.commit()
+
+    with SessionLocal() as db:
+        assert [item.product.id for item in _library(db).items] == ["p-2", "p-1"]
+        assert [item.product.id for item in _library(db, owner_id="owner-2").items] == ["p-2", "p-1"]
+    stats = describe_compare_library_cache()
+    assert stats["builds"] == 1
+    assert stats["hits"] == 1
+
+    # 其他品类的提交不影响本品类缓存。
+    with SessionLocal() as db:
+        db.get(ProductIndex, "b-1").name = "renamed-bodywash"
+        db.commit()
+        _library(db)
+    assert describe_compare_library_cache()["builds"] == 1
+
+    with SessionLocal() as db:
+        db.get(ProductIndex, "p-1").name = "renamed"
+        db.commit()
+        names = {item.product.id: item.product.name for item in _library(db).items}
+    assert names["p-1"] == "renamed"
+    assert describe_compare_library_cache()["builds"] == 2
+
+    with SessionLocal() as db:
+        db.delete(db.get(ProductIndex, "p-2"))
+        db.commit()
+        assert [item.product.id for item in _library(db).items] == ["p-1"]
+
+
+def test_rolled_back_write_keeps_cache_and_category_move_invalidates_both(library_db):
+    SessionLocal = library_db
+    with SessionLocal() as db:
+        _add_product(db, "p-1")
+        _add_product(db, "b-1", category="bodywash")
+        db.commit()
+        _library(db)
+
+    with SessionLocal() as db:
+        _add_product(db, "p-draft", created_at="2026-02-01")
+        db.flush()
+        db.rollback()
+        assert [item.product.id for item in _library(db).items] == ["p-1"]
+    assert describe_compare_library_cache()["builds"] == 1
+
+    with SessionLocal() as db:
+        db.get(ProductIndex, "p-1").category = "bodywash"
+        db.commit()
+        assert _library(db).items == []
+    assert describe_compare_library_cache()["builds"] == 2
+
+
+def test_ttl_zero_disables_cache(library_db, monkeypatch: pytest.MonkeyPatch):
+    SessionLocal = library_db
+    monkeypatch.setattr(settings, "mobile_compare_library_cache_ttl_seconds", 0)
+    with SessionLocal() as db:
+        _add_product(db, "p-1")
+        db.commit()
+        _library(db)
+        _library(db)
+    stats = describe_compare_library_cache()
+    assert stats["hits"] == 0
+    assert stats["entries"] == 0
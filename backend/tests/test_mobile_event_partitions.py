@@ -0,0 +1,178 @@
+import gzip
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+from sqlalchemy import func, inspect as sa_inspect, select
+
+from app.db import event_partitions
+from app.db.models import MobileClientEvent, MobileClientEventPartition
+from app.db.query_plans import capture_queries, explain_captured_queries
+from app.routes import products as products_routes
+from app.schemas import MobileAnalyticsFilterState
+from app.settings import settings
+
+MONTHS = ("2026-01", "2026-02", "2026-03", "2026-04")
+NOW = datetime(2026, 4, 15, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def events_db(tmp_path: Path, sqlite_session_factory, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "storage_dir", str(tmp_path / "storage"))
+    SessionLocal = sqlite_session_factory
+    with SessionLocal() as db:
+        for month_idx, month in enumerate(MONTHS):
+            for seq in range(4):
+                db.add(
+                    MobileClientEvent(
+                        event_id=f"evt-{month}-{seq}",
+                        owner_type="device",
+                        owner_id=f"owner-{seq % 2}",
+                        session_id=f"sess-{month_idx}",
+                        name="page_view" if seq % 2 == 0 else "compare_run_start",
+                        page="wiki_product_detail",
+                        category="shampoo" if seq < 3 else "bodywash",
+                        props_json=json.dumps({"seq": seq}),
+                        created_at=f"{month}-1{seq}T08:00:00.000000Z",
+                    )
+                )
+        db.commit()
+    return SessionLocal.kw["bind"], SessionLocal
+
+
+def _query_ids(SessionLocal, **kwargs) -> list[str]:
+    filters = MobileAnalyticsFilterState(**{key: kwargs.pop(key) for key in list(kwargs) if key in {"category", "owner_id"}})
+    with SessionLocal() as db:
+        rows = products_routes._query_mobile_client_events(db=db, filters=filters, **kwargs)
+    return [row.event_id for row, _props in rows]
+
+
+QUERY_CASES = {
+    "all": dict(start_iso="2026-01-01T00:00:00Z", end_iso="2026-04-30T23:59:59Z"),
+    "filtered": dict(
+        start_iso="2026-01-01T00:00:00Z", end_iso="2026-04-30T23:59:59Z", category="shampoo", names=["page_view"]
+    ),
+    "latest_limited": dict(start_iso="2026-01-12T00:00:00Z", end_iso="2026-03-12T23:59:59Z", desc=True, row_limit=5),
+    "owner": dict(start_iso="2026-02-01T00:00:00Z", end_iso="2026-04-30T23:59:59Z", owner_id="owner-1"),
+}
+
+
+def test_maintenance_rolls_closed_months_and_archives_expired_ones(events_db):
+    engine, SessionLocal = events_db
+    before = {name: _query_ids(SessionLocal, **dict(case)) for name, case in QUERY_CASES.items()}
+
+    report = event_partitions.maintain_mobile_client_event_partitions(engine, now=NOW, retention_months=2)
+
+    assert report.archive_before == "2026-02"
+    assert [item["month"] for item in report.archived] == ["2026-01"]
+    assert [item["month"] for item in report.rolled] == ["2026-02", "2026-03"]
+    tables = set(sa_inspect(engine).get_table_names())
+    assert {"mobile_client_events_p2026_02", "mobile_client_events_p2026_03"} <= tables
+    assert "mobile_client_events_p2026_01" not in tables
+    with SessionLocal() as db:
+        hot_months = {row[:7] for row in db.execute(select(MobileClientEvent.created_at)).scalars()}
+        registry = {row.month: row for row in db.execute(select(MobileClientEventPartition)).scalars()}
+    assert hot_months == {"2026-04"}
+    assert registry["2026-01"].storage == "archive" and registry["2026-01"].row_count == 4
+    assert registry["2026-03"].storage == "table" and registry["2026-03"].row_count == 4
+
+    archive = Path(settings.storage_dir) / registry["2026-01"].archive_path
+    lines = gzip.decompress(archive.read_bytes()).splitlines()
+    assert [json.loads(line)["event_id"] for line in lines] == [f"evt-2026-01-{seq}" for seq in range(4)]
+
+    # 分析查询结果（含顺序 / limit）与分区前一致：热表 + 月分表 + 归档
+    after = {name: _query_ids(SessionLocal, **dict(case)) for name, case in QUERY_CASES.items()}
+    assert after == before
+
+    again = event_partitions.maintain_mobile_client_event_partitions(engine, now=NOW, retention_months=2)
+    assert again.rolled == [] and again.archived == []
+
+
+def test_analytics_query_plan_only_touches_overlapping_shards(events_db):
+    engine, SessionLocal = events_db
+    event_partitions.maintain_mobile_client_event_partitions(engine, now=NOW, retention_months=0)
+
+    with capture_queries(engine) as captured, SessionLocal() as db:
+        products_routes._query_mobile_client_events(
+            db=db,
+            filters=MobileAnalyticsFilterState(category="shampoo"),
+            start_iso="2026-03-05T00:00:00Z",
+            end_iso="2026-04-20T00:00:00Z",
+        )
+    event_plans = [plan for plan in explain_captured_queries(engine, captured) if "mobile_client_events_union" in plan.statement]
+    assert len(event_plans) == 1
+    touched = event_plans[0].tables_touched()
+    assert set(touched) == {"mobile_client_events", "mobile_client_events_p2026_03"}
+    assert event_plans[0].full_table_scans(touched) == []
+
+    # 只查热月：不拼 UNION，直接打热表
+    with capture_queries(engine) as captured, SessionLocal() as db:
+        products_routes._query_mobile_client_events(
+            db=db, filters=MobileAnalyticsFilterState(), start_iso="2026-04-01T00:00:00Z", end_iso="2026-04-30T00:00:00Z"
+        )
+    plans = [plan for plan in explain_captured_queries(engine, captured) if "mobile_client_events" in plan.tables_touched()]
+    assert [plan.tables_touched() for plan in plans] == [["mobile_client_events"]]
+
+
+def test_late_rows_for_archived_month_are_merged_into_archive(events_db):
+    engine, SessionLocal = events_db
+    event_partitions.maintain_mobile_client_event_partitions(engine, now=NOW, retention_months=2)
+    with SessionLocal() as db:
+        db.add(
+            MobileClientEvent(
+                event_id="evt-late",
+                owner_type="device",
+                owner_id="owner-9",
+                name="page_view",
+                props_json="{}",
+                created_at="2026-01-31T23:59:59.000000Z",
+            )
+        )
+        db.commit()
+
+    report = event_partitions.maintain_mobile_client_event_partitions(engine, now=NOW, retention_months=2)
+
+    assert report.archived == [
+        {
+            "month": "2026-01",
+            "rows": 5,
+            "archive_path": "archives/mobile_client_events/2026-01.jsonl.gz",
+            "archive_bytes": report.archived[0]["archive_bytes"],
+        }
+    ]
+    with SessionLocal() as db:
+        assert db.execute(select(func.count()).select_from(MobileClientEvent)).scalar() == 4
+    assert _query_ids(SessionLocal, start_iso="2026-01-31T00:00:00Z", end_iso="2026-01-31T23:59:59.999999Z") == ["evt-late"]
+
+
+def test_postgres_partitioning_ddl_keeps_existing_months_and_indexes():
+    statements = event_partitions.postgres_partitioning_statements(["2026-01"], current_month="2026-03", ahead=1)
+
+    assert statements[0] == "ALTER TABLE mobile_client_events RENAME TO mobile_client_events_unpartitioned"
+    assert "PARTITION BY RANGE (created_at)" in statements[1]
+    partitions = [stmt for stmt in statements if "FOR VALUES FROM" in stmt]
+    assert partitions == [
+        "CREATE TABLE IF NOT EXISTS mobile_client_events_p2026_01 PARTITION OF mobile_client_events "
+        "FOR VALUES FROM ('2026-01') TO ('2026-02')",
+        "CREATE TABLE IF NOT EXISTS mobile_client_events_p2026_03 PARTITION OF mobile_client_events "
+        "FOR VALUES FROM ('2026-03') TO ('2026-04')",
+        "CREATE TABLE IF NOT EXISTS mobile_client_events_p2026_04 PARTITION OF mobile_client_events "
+        "FOR VALUES FROM ('2026-04') TO ('2026-05')",
+    ]
+    drop_at = statements.index("DROP TABLE mobile_client_events_unpartitioned")
+    assert statements.index("INSERT INTO mobile_client_events SELECT * FROM mobile_client_events_unpartitioned") < drop_at
+    assert statements[drop_at + 1] == "ALTER TABLE mobile_client_events ADD PRIMARY KEY (event_id, created_at)"
+    assert any("ix_mobile_client_events_owner_scope" in stmt for stmt in statements[drop_at + 2 :])
+    assert event_partitions.shift_month("2026-12", 1) == "2027-01"
+    assert event_partitions.shift_month("2026-01", -1) == "2025-12"
+
+
+def test_runtime_patch_and_migration_are_noops_on_sqlite(events_db):
+    engine, SessionLocal = events_db
+
+    assert event_partitions.ensure_event_partitioning(engine) == []
+    assert event_partitions.migrate_events_to_partitioned(engine, now=NOW) == []
+    assert "mobile_client_events_unpartitioned" not in set(sa_inspect(engine).get_table_names())
+    with SessionLocal() as db:
+        assert db.execute(select(func.count()).select_from(MobileClientEvent)).scalar() == len(MONTHS) * 4
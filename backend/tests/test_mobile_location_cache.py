@@ -0,0 +1,179 @@
+import json
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from app import main as main_module
+from app.services import mobile_location
+from app.settings import settings
+
+
+class _FakeUpstream:
+    def __init__(self, *, delay_seconds: float = 0.0, status: str = "1"):
+        self.delay_seconds = delay_seconds
+        self.status = status
+        self.calls: list[str] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, request, timeout=None):
+        _ = timeout
+        with self._lock:
+            self.calls.append(request.full_url)
+        if self.delay_seconds:
+            time.sleep(self.delay_seconds)
+        body = {
+            "status": self.status,
+            "info": "OK" if self.status == "1" else "INVALID_USER_KEY",
+            "regeocode": {
+                "formatted_address": "上海市浦东新区世纪大道",
+                "addressComponent": {
+                    "province": "上海市",
+                    "city": [],
+                    "district": "浦东新区",
+                    "adcode": "310115",
+                    "citycode": "021",
+                },
+            },
+        }
+        return _FakeResponse(json.dumps(body, ensure_ascii=False).encode("utf-8"))
+
+
+class _FakeResponse:
+    def __init__(self, body: bytes):
+        self._body = body
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def read(self) -> bytes:
+        return self._body
+
+
+@pytest.fixture
+def amap_settings(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "storage_dir", str(tmp_path / "storage"))
+    monkeypatch.setattr(settings, "mobile_reverse_geocode_provider", "amap")
+    monkeypatch.setattr(settings, "mobile_reverse_geocode_key", "test-key")
+    monkeypatch.setattr(settings, "mobile_reverse_geocode_store_path", "")
+    mobile_location.reset_mobile_location_cache(clear_store=True)
+    yield
+    mobile_location.reset_mobile_location_cache(clear_store=True)
+
+
+def test_geohash_encode_matches_reference_cells():
+    assert mobile_location.geohash_encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    assert mobile_location.geohash_encode(31.2304, 121.4737, 7) == "wtw3sjq"
+    lat, lon = mobile_location.geohash_center("wtw3sjq")
+    assert mobile_location.geohash_encode(lat, lon, 7) == "wtw3sjq"
+
+
+def test_reverse_geocode_reuses_grid_cell_and_persists_across_restart(amap_settings, monkeypatch: pytest.MonkeyPatch):
+    upstream = _FakeUpstream()
+    monkeypatch.setattr(mobile_location, "urlopen", upstream)
+
+    first = mobile_location.reverse_mobile_location(31.23040, 121.47370)
+    # 同一 7 位 geohash 网格里的另一个点（相差约 20m）
+    second = mobile_location.reverse_mobile_location(31.23050, 121.47380)
+    assert first["status"] == "resolved"
+    assert first["location_city"] == "上海市"
+    assert second == first
+    assert len(upstream.calls) == 1
+
+    stats = mobile_location.describe_mobile_location_cache()
+    assert stats["requests"] == 2
+    assert stats["memory_hits"] == 1
+    assert stats["upstream_calls"] == 1
+    assert stats["hit_ratio"] == 0.5
+    assert stats["store"]["rows"] == 1
+
+    # 模拟进程重启：内存清空，本地持久网格缓存仍在。
+    mobile_location.reset_mobile_location_cache()
+    third = mobile_location.reverse_mobile_location(31.23045, 121.47375)
+    assert third == first
+    assert len(upstream.calls) == 1
+    assert mobile_location.describe_mobile_location_cache()["store_hits"] == 1
+
+
+def test_reverse_geocode_coalesces_concurrent_lookups_for_same_cell(amap_settings, monkeypatch: pytest.MonkeyPatch):
+    upstream = _FakeUpstream(delay_seconds=0.2)
+    monkeypatch.setattr(mobile_location, "urlopen", upstream)
+
+    results: list[dict] = []
+    results_lock = threading.Lock()
+
+    def worker():
+        result = mobile_location.reverse_mobile_location(31.23040, 121.47370)
+        with results_lock:
+            results.append(result)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(upstream.calls) == 1
+    assert len(results) == 8
+    assert all(item["location_district"] == "浦东新区" for item in results)
+    stats = mobile_location.describe_mobile_location_cache()
+    assert stats["upstream_calls"] == 1
+    assert stats["coalesced"] + stats["memory_hits"] == 7
+
+
+def test_reverse_geocode_lru_evicts_and_failures_expire(amap_settings, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "mobile_reverse_geocode_store_path", "none")
+    monkeypatch.setattr(settings, "mobile_reverse_geocode_cache_max_entries", 2)
+    upstream = _FakeUpstream()
+    monkeypatch.setattr(mobile_location, "urlopen", upstream)
+
+    mobile_location.reverse_mobile_location(31.0, 121.0)
+    mobile_location.reverse_mobile_location(32.0, 121.0)
+    mobile_location.reverse_mobile_location(31.0, 121.0)  # 刷新为最近使用
+    mobile_location.reverse_mobile_location(33.0, 121.0)  # 淘汰 32.0
+    assert len(upstream.calls) == 3
+    mobile_location.reverse_mobile_location(31.0, 121.0)
+    assert len(upstream.calls) == 3
+    mobile_location.reverse_mobile_location(32.0, 121.0)
+    assert len(upstream.calls) == 4
+    assert mobile_location.describe_mobile_location_cache()["evictions"] == 2
+
+    # 失败结果只做短期负缓存，过期后重新请求上游，且不落持久层。
+    upstream.status = "0"
+    monkeypatch.setattr(settings, "mobile_reverse_geocode_failure_ttl_seconds", 60)
+    failed = mobile_location.reverse_mobile_location(40.0, 116.0)
+    assert failed["status"] == "failed"
+    assert mobile_location.reverse_mobile_location(40.0, 116.0)["status"] == "failed"
+    assert len(upstream.calls) == 5
+
+    real_time = time.time
+    monkeypatch.setattr(mobile_location.time, "time", lambda: real_time() + 120)
+    mobile_location.reverse_mobile_location(40.0, 116.0)
+    assert len(upstream.calls) == 6
+
+
+def test_mobile_location_cache_stats_exported_via_metrics(test_client, amap_settings, monkeypatch: pytest.MonkeyPatch):
+    client, _storage_dir = test_client
+    monkeypatch.setattr(mobile_location, "urlopen", _FakeUpstream())
+
+    for _ in range(3):
+        resp = client.post("/api/mobile/location/reverse", json={"latitude": 31.2304, "longitude": 121.4737})
+        assert resp.status_code == 200
+        assert resp.json()["location_city"] == "上海市"
+
+    # 统计不再挂在公开的 /api/mobile 下，只从 /metrics 输出，且不回显缓存文件路径
+    assert client.get("/api/mobile/location/reverse/cache").status_code in {404, 405}
+    stats = mobile_location.describe_mobile_location_cache()
+    assert stats["hit_ratio"] == pytest.approx(0.6667)
+    assert stats["grid_precision"] == 7
+    assert "path" not in stats["store"]
+
+    body = main_module.metrics().body.decode("utf-8")
+    assert "backend_mobile_location_cache_requests_total 3\n" in body
+    assert "backend_mobile_location_cache_upstream_calls_total 1\n" in body
+    assert "backend_mobile_location_cache_store_rows " in body
+    assert str(_storage_dir) not in body
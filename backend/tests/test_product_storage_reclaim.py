@@ -0,0 +1,209 @@
+import json
+import time
+from pathlib import Path
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models import ProductIndex, ProductRouteMappingIndex, ProductStorageTombstone
+from app.db.session import get_db
+from app.services import runtime_worker, storage_reclaim
+from app.services.storage import now_iso, product_image_candidate_rel_paths
+from app.services.storage_reclaim import reclaim_product_storage
+from app.settings import settings
+
+
+def _db(client):
+    return next(client.app.dependency_overrides[get_db]())
+
+
+def _seed_product(db, storage_dir: Path, product_id: str) -> list[Path]:
+    files = {
+        f"products/shampoo/{product_id}.json": b'{"product":{}}',
+        f"images/webp/shampoo/{product_id}.webp": b"w" * 300,
+        f"images/jpg/shampoo/{product_id}.jpg": b"j" * 500,
+        # 旧版平铺布局 / 补充图 / 上传中转目录：只能靠 product_id 推导出来
+        f"images/{product_id}.png": b"p" * 70,
+        f"images/webp/tmp/{product_id}.supp1.webp": b"s" * 11,
+        f"route_mappings/shampoo/{product_id}.json": b"{}",
+        f"doubao_runs/{product_id}/stage1_vision.json": b'{"ok":true}',
+    }
+    for rel, payload in files.items():
+        path = storage_dir / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(payload)
+    db.add(
+        ProductIndex(
+            id=product_id,
+            category="shampoo",
+            brand="A",
+            name=product_id,
+            image_path=f"images/webp/shampoo/{product_id}.webp",
+            json_path=f"products/shampoo/{product_id}.json",
+            created_at="2026-10-01T00:00:00.000000Z",
+        )
+    )
+    db.add(
+        ProductRouteMappingIndex(
+            product_id=product_id,
+            category="shampoo",
+            rules_version="v1",
+            fingerprint="fp",
+            storage_path=f"route_mappings/shampoo/{product_id}.json",
+            primary_route_key="route",
+            primary_route_title="route",
+            last_generated_at="2026-10-01T00:00:00.000000Z",
+        )
+    )
+    db.commit()
+    return [storage_dir / rel for rel in files]
+
+
+def test_split_profile_delete_only_writes_tombstone_and_worker_reclaims(test_client, monkeypatch: pytest.MonkeyPatch):
+    client, storage_dir = test_client
+    monkeypatch.setattr(settings, "deploy_profile", "split_runtime")
+    db = _db(client)
+    paths = _seed_product(db, Path(storage_dir), "p-1")
+    expected_bytes = sum(path.stat().st_size for path in paths)
+
+    # 删除与回收都不允许遍历 images/ 整棵树
+    def _no_tree_walk(self, pattern):
+        raise AssertionError(f"unexpected rglob({pattern!r}) on {self}")
+
+    monkeypatch.setattr(Path, "rglob", _no_tree_walk)
+
+    resp = client.delete("/api/products/p-1")
+    assert resp.status_code == 200
+    assert resp.json()["status"] == "deleted"
+    assert db.get(ProductIndex, "p-1") is None
+    assert db.get(ProductRouteMappingIndex, "p-1") is None
+    # API 只登记墓碑，文件留给 worker
+    assert all(path.exists() for path in paths)
+    tombstone = db.get(ProductStorageTombstone, "p-1")
+    assert tombstone.status == "pending"
+    assert "route_mappings/shampoo/p-1.json" in json.loads(tombstone.manifest_json)["files"]
+    db.close()
+
+    monkeypatch.setattr(runtime_worker, "SessionLocal", sessionmaker(autocommit=False, autoflush=False, bind=db.get_bind()))
+    assert runtime_worker.run_product_storage_reclaim_worker_once() is True
+    assert runtime_worker.run_product_storage_reclaim_worker_once() is False
+
+    assert not any(path.exists() for path in paths)
+    assert not (Path(storage_dir) / "doubao_runs" / "p-1").exists()
+    db = _db(client)
+    tombstone = db.get(ProductStorageTombstone, "p-1")
+    assert tombstone.status == "reclaimed"
+    assert tombstone.files_removed == len(paths)
+    assert tombstone.dirs_removed == 1
+    assert tombstone.bytes_freed == expected_bytes
+    db.close()
+
+
+def test_single_node_batch_delete_reclaims_after_response_in_batches(test_client):
+    client, storage_dir = test_client
+    db = _db(client)
+    paths = [path for idx in range(5) for path in _seed_product(db, Path(storage_dir), f"p-{idx}")]
+    db.close()
+
+    resp = client.post(
+        "/api/products/batch-delete",
+        json={"ids": [f"p-{idx}" for idx in range(5)], "keep_ids": ["p-4"], "remove_doubao_artifacts": True},
+    )
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["deleted_ids"] == ["p-0", "p-1", "p-2", "p-3"]
+    # 响应里是排入回收的记录路径：json + webp/jpg 两个变体 + 路由映射
+    assert body["removed_files"] == 4 * 4
+    assert body["removed_dirs"] == 4
+
+    kept = [path for path in paths if "p-4" in path.name or path.parent.name == "p-4"]
+    assert all(path.exists() for path in kept)
+    assert not any(path.exists() for path in paths if path not in kept)
+
+    db = _db(client)
+    rows = db.query(ProductStorageTombstone).all()
+    assert {row.product_id for row in rows} == {"p-0", "p-1", "p-2", "p-3"}
+    assert {row.status for row in rows} == {"reclaimed"}
+    # 已回收的墓碑不会被重复处理
+    assert reclaim_product_storage(db, batch_size=2).tombstones == 0
+    db.close()
+
+
+def test_reclaim_processes_backlog_in_bounded_batches(test_client, monkeypatch: pytest.MonkeyPatch):
+    client, storage_dir = test_client
+    monkeypatch.setattr(settings, "deploy_profile", "split_runtime")
+    db = _db(client)
+    for idx in range(5):
+        _seed_product(db, Path(storage_dir), f"p-{idx}")
+    db.close()
+    resp = client.post("/api/products/batch-delete", json={"ids": [f"p-{idx}" for idx in range(5)]})
+    assert resp.status_code == 200
+
+    db = _db(client)
+    first = reclaim_product_storage(db, batch_size=2, max_batches=1)
+    assert first.tombstones == 2
+    assert first.bytes_freed > 0
+    rest = reclaim_product_storage(db, batch_size=2)
+    assert rest.tombstones == 3
+    assert first.files_removed + rest.files_removed == 5 * 7
+    db.close()
+
+
+def test_product_image_candidates_are_bounded_and_cover_known_layouts():
+    candidates = product_image_candidate_rel_paths("p-1", "images/webp/shampoo/p-1.webp", "shampoo")
+    assert candidates[:2] == ["images/webp/shampoo/p-1.webp", "images/jpg/shampoo/p-1.jpg"]
+    assert {"images/p-1.webp", "images/jpg/tmp/p-1.supp1.jpg", "images/webp/bodywash/p-1.webp"} <= set(candidates)
+    assert len(candidates) == len(set(candidates))
+    # product_id 带路径分隔符时不推导候选，防止越出 images/
+    assert product_image_candidate_rel_paths("../p-1") == []
+
+
+def test_failed_reclaim_backs_off_and_single_node_sweeper_retries(test_client, monkeypatch: pytest.MonkeyPatch):
+    client, storage_dir = test_client
+    monkeypatch.setattr(settings, "deploy_profile", "split_runtime")
+    db = _db(client)
+    paths = _seed_product(db, Path(storage_dir), "p-1")
+    db.close()
+    assert client.delete("/api/products/p-1").status_code == 200
+
+    remove_rel_path_sized = storage_reclaim.remove_rel_path_sized
+
+    def _disk_error(rel):
+        raise OSError("disk busy")
+
+    monkeypatch.setattr(storage_reclaim, "remove_rel_path_sized", _disk_error)
+    monkeypatch.setattr(runtime_worker, "SessionLocal", sessionmaker(autocommit=False, autoflush=False, bind=_db(client).get_bind()))
+    assert runtime_worker.run_product_storage_reclaim_worker_once() is True
+    db = _db(client)
+    tombstone = db.get(ProductStorageTombstone, "p-1")
+    assert (tombstone.status, tombstone.attempts) == ("failed", 1)
+    assert tombstone.next_attempt_at > now_iso()
+    db.close()
+    # 退避未到期：补扫与 worker 都跳过
+    assert runtime_worker.run_product_storage_reclaim_worker_once() is False
+    assert [storage_reclaim.reclaim_retry_delay_seconds(n) for n in (1, 2, 3)] == [60, 120, 240]
+    assert storage_reclaim.reclaim_retry_delay_seconds(50) == storage_reclaim.RECLAIM_RETRY_MAX_SECONDS
+
+    db = _db(client)
+    db.get(ProductStorageTombstone, "p-1").next_attempt_at = "2000-01-01T00:00:00.000000Z"
+    db.commit()
+    db.close()
+    monkeypatch.setattr(storage_reclaim, "remove_rel_path_sized", remove_rel_path_sized)
+    # split / multi 部署由 worker 负责，API 进程不起补扫线程
+    assert runtime_worker.start_storage_reclaim_sweeper() is False
+
+    monkeypatch.setattr(settings, "deploy_profile", "single_node")
+    monkeypatch.setattr(settings, "storage_reclaim_sweep_interval_seconds", 60)
+    assert runtime_worker.start_storage_reclaim_sweeper() is True
+    try:
+        deadline = time.monotonic() + 5
+        while any(path.exists() for path in paths) and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert runtime_worker.describe_runtime_worker_state()["storage_reclaim_sweeper"]["running"] is True
+    finally:
+        assert runtime_worker.stop_storage_reclaim_sweeper() is True
+    assert not any(path.exists() for path in paths)
+    db = _db(client)
+    tombstone = db.get(ProductStorageTombstone, "p-1")
+    assert (tombstone.status, tombstone.attempts, tombstone.next_attempt_at) == ("reclaimed", 2, None)
+    db.close()
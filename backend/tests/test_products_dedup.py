@@ -5,6 +5,7 @@ import pytest
 from app.routes import ingest as ingest_routes
 from app.routes import products as products_routes
 from backend.tests.support_images import VALID_TEST_IMAGE_BYTES, install_fake_save_image
+from backend.tests.support_doubao import install_fake_stage1_analyzer
 
 
 def _install_fake_ingest_pipeline(monkeypatch: pytest.MonkeyPatch, plans: list[dict]) -> None:
@@ -69,7 +70,7 @@ def _install_fake_ingest_pipeline(monkeypatch: pytest.MonkeyPatch, plans: list[d
             "artifact": f"doubao_runs/{trace_id}/stage2_struct.json",
         }
 
-    monkeypatch.setattr(ingest_routes, "_analyze_with_doubao_stage1", fake_stage1)
+    install_fake_stage1_analyzer(monkeypatch, ingest_routes, fake_stage1)
     monkeypatch.setattr(ingest_routes, "_analyze_with_doubao_stage2", fake_stage2)
 
 
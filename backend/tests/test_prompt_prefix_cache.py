@@ -0,0 +1,199 @@
+import json
+
+import pytest
+
+from app.ai.capabilities import _load_route_mapping_decision_table, execute_capability
+from app.ai.prompts import load_prompt, render_prompt, render_prompt_parts
+from app.db.models import AIRun
+from app.db.session import get_db
+from app.services import doubao_openai_client
+from app.services.fake_responses_provider import FakeResponsesProvider
+from app.settings import settings
+
+
+@pytest.fixture(autouse=True)
+def _fresh_prefix_cache():
+    doubao_openai_client.reset_prefix_response_cache()
+    yield
+    doubao_openai_client.reset_prefix_response_cache()
+
+
+def _route_mapping_responder(_prompt: str) -> str:
+    decision_table = _load_route_mapping_decision_table("shampoo")
+    candidates = decision_table["route_candidates"]
+    scores = [
+        {"route_key": item["route_key"], "confidence": max(0, 80 - idx * 8), "reason": "fake"}
+        for idx, item in enumerate(candidates)
+    ]
+    return json.dumps(
+        {
+            "category": "shampoo",
+            "rules_version": str(decision_table.get("rules_version") or ""),
+            "primary_route": scores[0],
+            "secondary_route": scores[1],
+            "route_scores": scores,
+            "evidence": {"positive": [], "counter": []},
+            "confidence_reason": "fake provider",
+            "needs_review": False,
+        },
+        ensure_ascii=False,
+    )
+
+
+def _install_fake_provider(monkeypatch: pytest.MonkeyPatch, provider: FakeResponsesProvider) -> None:
+    monkeypatch.setattr(settings, "doubao_mode", "real")
+    monkeypatch.setattr(settings, "doubao_api_key", "fake-key")
+    monkeypatch.setattr(settings, "doubao_max_retries", 0)
+    monkeypatch.setattr(settings, "doubao_prompt_prefix_cache_enabled", True)
+    monkeypatch.setattr(doubao_openai_client, "OpenAI", lambda **_kwargs: provider)
+
+
+def _run_route_mapping(client, idx: int) -> dict:
+    resp = client.post(
+        "/api/ai/jobs",
+        json={
+            "capability": "doubao.route_mapping_shampoo",
+            "input": {"product_context_json": json.dumps({"product_id": f"p-{idx}", "ingredients": ["水", f"成分{idx}"]})},
+            "run_immediately": True,
+        },
+    )
+    assert resp.status_code == 200
+    job = resp.json()
+    assert job["status"] == "succeeded", job
+    return job
+
+
+def _load_runs(client) -> list[AIRun]:
+    db_gen = client.app.dependency_overrides[get_db]()
+    db = next(db_gen)
+    try:
+        runs = db.query(AIRun).order_by(AIRun.created_at.asc()).all()
+        db.expunge_all()
+        return runs
+    finally:
+        db_gen.close()
+
+
+def test_prompt_parts_keep_variable_params_out_of_prefix():
+    prompt = load_prompt("doubao.route_mapping_shampoo")
+    context = {"decision_table_json": '{"rules_version":"x"}', "product_context_json": '{"product_id":"p-1"}'}
+    parts = render_prompt_parts(prompt, context, variable=("product_context_json",))
+    other = render_prompt_parts(
+        prompt,
+        {**context, "product_context_json": '{"product_id":"p-2"}'},
+        variable=("product_context_json",),
+    )
+
+    assert parts.full == render_prompt(prompt, context)
+    assert '{"rules_version":"x"}' in parts.prefix
+    assert "p-1" not in parts.prefix
+    assert parts.suffix.startswith("product_context_json:\n")
+    assert "p-1" in parts.suffix
+    assert parts.prefix == other.prefix
+    assert parts.prefix_hash == other.prefix_hash
+
+
+def test_route_mapping_reuses_prompt_prefix_and_records_cached_tokens(test_client, monkeypatch: pytest.MonkeyPatch):
+    client, _ = test_client
+    provider = FakeResponsesProvider(_route_mapping_responder)
+    _install_fake_provider(monkeypatch, provider)
+
+    for idx in range(3):
+        _run_route_mapping(client, idx)
+
+    # 前缀只创建一次，三次调用都从服务端缓存读取前缀。
+    assert provider.stats["prefix_requests"] == 1
+    runs = _load_runs(client)
+    assert len(runs) == 3
+    full_prompt_tokens = len(
+        render_prompt(
+            load_prompt("doubao.route_mapping_shampoo"),
+            {
+                "decision_table_json": json.dumps(_load_route_mapping_decision_table("shampoo"), ensure_ascii=False),
+                "product_context_json": "{}",
+            },
+        )
+    )
+    for run in runs:
+        assert run.cached_tokens and run.cached_tokens > 0
+        # 变量后缀远小于完整提示词：未命中缓存的输入 token 只占很小一部分。
+        assert run.input_tokens - run.cached_tokens < full_prompt_tokens // 5
+
+    summary = client.get("/api/ai/metrics/summary", params={"since_hours": 24}).json()
+    assert summary["total_cached_tokens"] == sum(run.cached_tokens for run in runs)
+
+
+def test_capability_request_payload_reports_prefix_status(monkeypatch: pytest.MonkeyPatch):
+    provider = FakeResponsesProvider(_route_mapping_responder)
+    _install_fake_provider(monkeypatch, provider)
+
+    results = [
+        execute_capability("doubao.route_mapping_shampoo", {"product_context_json": json.dumps({"product_id": f"p-{idx}"})})
+        for idx in range(2)
+    ]
+
+    assert [item.request_payload["prompt_prefix_cache"] for item in results] == ["created", "reused"]
+    assert results[0].request_payload["prompt_prefix_hash"] == results[1].request_payload["prompt_prefix_hash"]
+    # 完整提示词仍随结果返回（artifact / 排查用），但只有后缀真正发送给了模型。
+    assert "p-1" in results[1].request_payload["prompt"]
+    assert results[1].response_payload["usage"]["input_tokens_details"]["cached_tokens"] > 0
+
+
+def test_route_mapping_falls_back_to_full_prompt_when_prefix_expired(test_client, monkeypatch: pytest.MonkeyPatch):
+    client, _ = test_client
+    provider = FakeResponsesProvider(_route_mapping_responder)
+    _install_fake_provider(monkeypatch, provider)
+
+    _run_route_mapping(client, 0)
+    provider.forget_prefixes()
+    _run_route_mapping(client, 1)
+    # 本地记录已在回退时丢弃：下一次重新创建前缀。
+    _run_route_mapping(client, 2)
+
+    runs = _load_runs(client)
+    assert [run.cached_tokens > 0 for run in runs] == [True, False, True]
+    assert provider.stats["prefix_requests"] == 2
+
+
+def test_prefix_cache_disabled_sends_single_full_prompt(test_client, monkeypatch: pytest.MonkeyPatch):
+    client, _ = test_client
+    provider = FakeResponsesProvider(_route_mapping_responder)
+    _install_fake_provider(monkeypatch, provider)
+    monkeypatch.setattr(settings, "doubao_prompt_prefix_cache_enabled", False)
+
+    _run_route_mapping(client, 0)
+
+    assert provider.stats == {**provider.stats, "requests": 1, "prefix_requests": 0, "cached_tokens": 0}
+    (run,) = _load_runs(client)
+    assert run.cached_tokens == 0
+
+
+def test_unsupported_prefix_cache_is_not_retried(test_client, monkeypatch: pytest.MonkeyPatch):
+    client, _ = test_client
+    provider = FakeResponsesProvider(_route_mapping_responder, supports_prefix_cache=False)
+    _install_fake_provider(monkeypatch, provider)
+
+    _run_route_mapping(client, 0)
+    _run_route_mapping(client, 1)
+
+    runs = _load_runs(client)
+    assert [run.cached_tokens for run in runs] == [0, 0]
+    # 第一次创建被拒后记为不支持，第二次直接发完整提示词。
+    assert provider.stats["requests"] == 3
+
+
+def test_transient_prefix_failure_falls_back_without_disabling_prefix_cache(test_client, monkeypatch: pytest.MonkeyPatch):
+    client, _ = test_client
+    provider = FakeResponsesProvider(_route_mapping_responder)
+    _install_fake_provider(monkeypatch, provider)
+    provider.fail_next_prefix_requests(429)
+
+    _run_route_mapping(client, 0)
+    _run_route_mapping(client, 1)
+
+    runs = _load_runs(client)
+    # 429 只让第一次调用回退到完整提示词；第二次重新创建前缀并命中缓存。
+    assert [run.cached_tokens > 0 for run in runs] == [False, True]
+    assert provider.stats["prefix_requests"] == 1
+    # 429 的前缀请求 + 完整提示词 + 第二次的前缀创建 + 后缀请求
+    assert provider.stats["requests"] == 4
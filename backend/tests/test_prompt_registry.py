@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+from app.ai import prompts as prompts_module
+from app.ai.capabilities import _load_route_mapping_decision_table, _load_route_mapping_decision_table_json
+from app.ai.errors import AIServiceError
+from app.ai.prompts import compile_template, load_prompt, render_prompt, reset_prompt_registry
+
+
+@pytest.fixture(autouse=True)
+def _fresh_registry():
+    reset_prompt_registry()
+    yield
+    reset_prompt_registry()
+
+
+def _install_tmp_prompt(monkeypatch: pytest.MonkeyPatch, tmp_path, text: str) -> os.PathLike:
+    monkeypatch.setattr(prompts_module, "PROMPTS_ROOT", tmp_path)
+    monkeypatch.setitem(prompts_module.DEFAULT_PROMPT_VERSIONS, "test.sample", "v1")
+    path = tmp_path / "test" / "sample" / "v1.md"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def test_load_prompt_is_cached_and_renders_like_regex_substitution():
+    first = load_prompt("doubao.stage2_struct")
+    second = load_prompt("doubao.stage2_struct")
+    assert first is second
+    assert first.placeholders == frozenset({"vision_text"})
+    assert len(first.prefix_hash) == 64
+
+    rendered = render_prompt(first, {"vision_text": "品牌：X"})
+    assert rendered == prompts_module._PLACEHOLDER.sub(lambda _m: "品牌：X", first.text)
+    assert render_prompt(first.text, {"vision_text": "品牌：X"}) == rendered
+
+    stats = prompts_module.prompt_registry_stats()
+    assert stats["loads"] == 1
+    assert stats["hits"] >= 1
+
+
+def test_load_prompt_hot_reloads_only_when_file_changes(monkeypatch: pytest.MonkeyPatch, tmp_path):
+    monkeypatch.setattr(prompts_module, "ASSET_RELOAD_CHECK_SECONDS", 0.0)
+    path = _install_tmp_prompt(monkeypatch, tmp_path, "系统说明\n输入：{{ payload }}")
+
+    bundle = load_prompt("test.sample")
+    assert load_prompt("test.sample") is bundle
+    assert render_prompt(bundle, {"payload": "a"}) == "系统说明\n输入：a"
+    original_hash = bundle.prefix_hash
+
+    path.write_text("新的系统说明\n输入：{{payload}}，补充：{{extra}}", encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    reloaded = load_prompt("test.sample")
+    assert reloaded is not bundle
+    assert reloaded.placeholders == frozenset({"payload", "extra"})
+    assert reloaded.prefix_hash != original_hash
+    assert prompts_module.prompt_registry_stats()["loads"] == 2
+
+
+def test_load_prompt_rejects_malformed_placeholder(monkeypatch: pytest.MonkeyPatch, tmp_path):
+    _install_tmp_prompt(monkeypatch, tmp_path, "输入：{{ payload-json }}")
+    with pytest.raises(AIServiceError) as exc_info:
+        load_prompt("test.sample")
+    assert exc_info.value.code == "prompt_template_invalid"
+
+
+def test_render_prompt_reports_missing_and_unresolved_params():
+    template = compile_template("A={{a}} B={{b}}")
+    with pytest.raises(AIServiceError) as missing:
+        template.render({"a": "1"})
+    assert missing.value.code == "prompt_param_missing"
+    with pytest.raises(AIServiceError) as unresolved:
+        template.render({"a": "{{c}}", "b": "2"})
+    assert unresolved.value.code == "prompt_param_unresolved"
+    assert template.render({"a": None, "b": 2}) == "A= B=2"
+
+
+def test_route_mapping_decision_table_is_loaded_once():
+    first = _load_route_mapping_decision_table("shampoo")
+    assert _load_route_mapping_decision_table("shampoo") is first
+    assert _load_route_mapping_decision_table_json("shampoo").startswith("{")
+    assert prompts_module.prompt_registry_stats()["loads"] == 1
@@ -0,0 +1,230 @@
+import pytest
+from sqlalchemy import inspect as sa_inspect, select, text
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.ai.orchestrator import AIOrchestrator
+from app.db import runtime_schema
+from app.db.keyset import encode_cursor
+from app.db.models import AIJob, AIRun, MobileSelectionSession, ProductWorkbenchJob, UploadIngestJob
+from app.db.query_plans import capture_queries, explain_captured_queries
+from app.routes import ingest as ingest_routes
+from app.routes import mobile as mobile_routes
+from app.routes import mobile_selection as selection_routes
+from app.routes import products as products_routes
+from app.services import runtime_worker
+
+HOT_TABLES = {
+    "mobile_selection_sessions",
+    "ai_jobs",
+    "ai_runs",
+    "upload_ingest_jobs",
+    "product_workbench_jobs",
+    "ingredient_library_build_jobs",
+    "mobile_compare_session_index",
+}
+TS = "2026-01-04T00:00:00Z"
+
+
+@pytest.fixture
+def plan_db(sqlite_session_factory, monkeypatch: pytest.MonkeyPatch):
+    SessionLocal = sqlite_session_factory
+    monkeypatch.setattr(runtime_worker, "SessionLocal", SessionLocal)
+    monkeypatch.setattr(products_routes, "SessionLocal", SessionLocal)
+    with SessionLocal() as db:
+        for idx in range(6):
+            ts = f"2026-01-0{idx + 1}T00:00:00Z"
+            db.add(
+                MobileSelectionSession(
+                    id=f"sel-{idx}",
+                    owner_type="device",
+                    owner_id="owner-1",
+                    category="shampoo",
+                    rules_version="v1",
+                    answers_hash=f"hash-{idx}",
+                    route_key="route",
+                    route_title="route",
+                    answers_json="{}",
+                    result_json="{}",
+                    is_pinned=idx == 0,
+                    pinned_at=ts if idx == 0 else None,
+                    deleted_at=ts if idx == 5 else None,
+                    created_at=ts,
+                )
+            )
+            db.add(AIJob(id=f"job-{idx}", capability="cap.a", status="succeeded", input_json="{}", created_at=ts))
+            db.add(AIRun(id=f"run-{idx}", job_id="job-1", capability="cap.a", status="succeeded", request_json="{}", created_at=ts))
+            db.add(UploadIngestJob(job_id=f"ingest-{idx}", status="done", created_at=ts, updated_at=ts))
+            db.add(
+                ProductWorkbenchJob(
+                    job_id=f"wb-{idx}", job_type="route_mapping_build", status="done", created_at=ts, updated_at=ts
+                )
+            )
+        db.commit()
+    return SessionLocal.kw["bind"], SessionLocal
+
+
+def _selection_request() -> Request:
+    # 用一个没有记录的 owner：只看查询计划，不必构造完整的选型结果载荷。
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": [(b"x-mobile-device-id", b"owner-2")]})
+
+
+# 名称 → (调用真实查询路径的函数, 是否要求排序也由索引提供)
+HOT_QUERY_CASES = {
+    "selection_latest": (
+        lambda db: selection_routes._latest_selection_session(db=db, owner_type="device", owner_id="owner-1", category="shampoo"),
+        True,
+    ),
+    "selection_history": (
+        lambda db: selection_routes.list_mobile_selection_sessions(
+            request=_selection_request(), response=Response(), category=None, cursor=None, offset=0, limit=20, db=db
+        ),
+        True,
+    ),
+    "selection_cleanup": (
+        lambda db: selection_routes._match_mobile_selection_cleanup_rows(
+            db=db, owner_type="device", owner_id="owner-1", older_than_days=30, exclude_pinned=True
+        ),
+        False,
+    ),
+    "ai_jobs_by_status": (lambda db: AIOrchestrator(db).list_jobs(status="failed", limit=20), True),
+    "ai_jobs_by_capability": (lambda db: AIOrchestrator(db).list_jobs(capability="cap.a", limit=20), True),
+    "ai_runs_by_job": (lambda db: AIOrchestrator(db).list_runs(job_id="job-1", limit=20), True),
+    "ai_metrics_window": (lambda db: AIOrchestrator(db).metrics_summary(since_hours=24 * 365 * 5), False),
+    "upload_jobs_by_status": (
+        lambda db: ingest_routes.list_upload_ingest_jobs(
+            response=Response(), status="done", cursor=None, offset=0, limit=30, db=db
+        ),
+        True,
+    ),
+    "upload_jobs_recent": (
+        lambda db: ingest_routes.list_upload_ingest_jobs(response=Response(), status=None, cursor=None, offset=0, limit=30, db=db),
+        True,
+    ),
+    "upload_worker_poll": (lambda db: runtime_worker.run_upload_ingest_worker_once(), True),
+    "workbench_jobs_by_type": (
+        lambda db: products_routes._list_product_workbench_jobs(
+            db=db, job_type="route_mapping_build", status=None, offset=0, limit=20
+        ),
+        True,
+    ),
+    "workbench_jobs_by_type_status": (
+        lambda db: products_routes._list_product_workbench_jobs(
+            db=db, job_type="route_mapping_build", status="done", offset=0, limit=20
+        ),
+        True,
+    ),
+    "workbench_worker_poll": (lambda db: products_routes.run_product_workbench_worker_once(), True),
+    # keyset 翻页：带游标的后续页同样是索引 seek + 索引序，不扫描、不排序
+    "selection_history_page_pinned": (
+        lambda db: selection_routes._fetch_selection_history_page(
+            db=db,
+            stmt=_selection_history_stmt(),
+            cursor=encode_cursor("selection_sessions", [True, TS, TS, "sel-9"]),
+            offset=0,
+            limit=2,
+        ),
+        True,
+    ),
+    "selection_history_page_unpinned": (
+        lambda db: selection_routes._fetch_selection_history_page(
+            db=db,
+            stmt=_selection_history_stmt(),
+            cursor=encode_cursor("selection_sessions", [False, None, TS, "sel-3"]),
+            offset=0,
+            limit=2,
+        ),
+        True,
+    ),
+    "upload_jobs_page": (
+        lambda db: ingest_routes.list_upload_ingest_jobs(
+            response=Response(), status="done", cursor=encode_cursor("upload_jobs", [TS, "ingest-3"]), offset=0, limit=2, db=db
+        ),
+        True,
+    ),
+    "workbench_jobs_page": (
+        lambda db: products_routes._list_product_workbench_jobs(
+            db=db,
+            job_type="route_mapping_build",
+            status=None,
+            cursor=encode_cursor("workbench_jobs:route_mapping_build", [TS, "wb-3"]),
+            offset=0,
+            limit=2,
+        ),
+        True,
+    ),
+    "ingredient_build_jobs_page": (
+        lambda db: products_routes.list_ingredient_library_build_jobs(
+            response=Response(),
+            status="done",
+            category=None,
+            cursor=encode_cursor("ingredient_build_jobs", [TS, "ing-3"]),
+            offset=0,
+            limit=2,
+            db=db,
+        ),
+        True,
+    ),
+    "compare_sessions_page": (
+        lambda db: mobile_routes._list_mobile_compare_sessions(
+            db=db,
+            owner_type="device",
+            owner_id="owner-1",
+            category=None,
+            cursor=encode_cursor("compare_sessions", [TS, "cmp-3"]),
+            offset=0,
+            limit=2,
+        ),
+        True,
+    ),
+}
+
+
+def _selection_history_stmt():
+    return (
+        select(MobileSelectionSession)
+        .where(MobileSelectionSession.owner_type == "device")
+        .where(MobileSelectionSession.owner_id == "owner-1")
+        .where(MobileSelectionSession.deleted_at.is_(None))
+    )
+
+
+@pytest.mark.parametrize("case", sorted(HOT_QUERY_CASES))
+def test_hot_query_shapes_use_indexes(plan_db, case: str):
+    engine, SessionLocal = plan_db
+    run, index_ordered = HOT_QUERY_CASES[case]
+    with SessionLocal() as db:
+        with capture_queries(engine) as queries:
+            run(db)
+    plans = [plan for plan in explain_captured_queries(engine, queries) if any(table in plan.statement for table in HOT_TABLES)]
+    assert plans, f"{case}: no query against hot tables was captured"
+    for plan in plans:
+        assert not plan.full_table_scans(HOT_TABLES), f"{case}: sequential scan\n{plan.statement}\n{plan.lines}"
+        if index_ordered:
+            assert not plan.sorts_without_index(), f"{case}: sort not served by index\n{plan.statement}\n{plan.lines}"
+
+
+def test_runtime_schema_drops_redundant_indexes_and_builds_composites(sqlite_session_factory):
+    engine = sqlite_session_factory.kw["bind"]
+    with engine.begin() as conn:
+        # 模拟老库：旧单列索引仍在，新复合 / 部分索引缺失。
+        conn.execute(text("DROP INDEX ix_mobile_selection_sessions_live_pinned"))
+        conn.execute(text("CREATE INDEX ix_mobile_selection_sessions_owner_id ON mobile_selection_sessions (owner_id)"))
+        conn.execute(text("CREATE INDEX ix_ai_jobs_status ON ai_jobs (status)"))
+        conn.execute(text("UPDATE runtime_schema_versions SET version = '2000-01-r0'"))
+    runtime_schema.reset_runtime_schema_memo()
+
+    runtime_schema.ensure_runtime_schema(engine)
+
+    inspector = sa_inspect(engine)
+    for table, redundant in runtime_schema.REDUNDANT_INDEXES.items():
+        names = {item["name"] for item in inspector.get_indexes(table)}
+        assert not names & set(redundant), table
+    selection_indexes = {item["name"] for item in inspector.get_indexes("mobile_selection_sessions")}
+    assert "ix_mobile_selection_sessions_live_pinned" in selection_indexes
+    with engine.connect() as conn:
+        sql = conn.execute(
+            text("SELECT sql FROM sqlite_master WHERE name = 'ix_mobile_selection_sessions_live_pinned'")
+        ).scalar_one()
+    assert "WHERE deleted_at IS NULL" in sql
+    engine.dispose()
@@ -0,0 +1,130 @@
+import re
+from pathlib import Path
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.ai import orchestrator as orchestrator_module
+from app.ai.capabilities import CapabilityExecutionResult
+from app.ai.orchestrator import AIOrchestrator
+from app.db.session import get_db
+from app.platform import request_metrics
+from app.services import storage
+from app.settings import settings
+
+
+@pytest.fixture
+def metrics_client(tmp_path: Path, sqlite_session_factory, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "storage_dir", str(tmp_path / "storage"))
+    monkeypatch.setattr(settings, "user_storage_dir", str(tmp_path / "user_storage"))
+    SessionLocal = sqlite_session_factory
+
+    def fake_execute(capability: str, input_payload: dict, trace_id: str | None = None, event_callback=None):
+        return CapabilityExecutionResult(
+            output={"analysis_text": "ok"},
+            prompt_key=capability,
+            prompt_version="v1",
+            model="fake-model",
+            request_payload={"prompt": "test"},
+            response_payload={"output_text": "ok"},
+        )
+
+    monkeypatch.setattr(orchestrator_module, "execute_capability", fake_execute)
+
+    app = FastAPI()
+    request_metrics.install_request_metrics(app)
+
+    def override_get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @app.get("/probe/{item_id}")
+    def probe(item_id: str, db: Session = Depends(get_db)):
+        db.execute(text("SELECT 1")).scalar()
+        db.execute(text("SELECT 2")).scalar()
+        rel = f"doubao_runs/{item_id}/probe.json"
+        storage.save_json_at(rel, {"item": item_id})
+        storage.load_json(rel)
+        AIOrchestrator(db).create_and_run("doubao.ingredient_enrich", {"ingredient": "甘油"})
+        return {"ok": True}
+
+    @app.get("/failing-query")
+    def failing_query(db: Session = Depends(get_db)):
+        try:
+            db.execute(text("SELECT * FROM missing_table")).all()
+        except OperationalError:
+            db.rollback()
+        db.execute(text("SELECT 1")).scalar()
+        return {"ok": True}
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter([b"data: 1\n\n", b"data: 2\n\n"]), media_type="text/event-stream")
+
+    app.dependency_overrides[get_db] = override_get_db
+    request_metrics.reset_request_metrics()
+    with TestClient(app) as client:
+        yield client
+    request_metrics.reset_request_metrics()
+
+
+def _server_timing(header: str) -> dict[str, dict[str, str]]:
+    out: dict[str, dict[str, str]] = {}
+    for entry in header.split(", "):
+        name, *params = entry.split(";")
+        out[name] = dict(param.split("=", 1) for param in params)
+    return out
+
+
+def test_server_timing_reports_db_storage_and_model(metrics_client):
+    resp = metrics_client.get("/probe/item-1")
+    assert resp.status_code == 200
+    timing = _server_timing(resp.headers["server-timing"])
+    assert set(timing) == {"db", "storage", "model", "total"}
+    # 两条显式 SELECT + 编排器建 job / run 与提交；只要求下限，避免绑死 ORM 细节。
+    assert int(re.match(r'"(\d+) queries"', timing["db"]["desc"]).group(1)) >= 4
+    assert timing["storage"]["desc"].startswith('"1 reads')
+    assert " / 1 writes" in timing["storage"]["desc"]
+    assert timing["model"]["desc"] == '"1 calls"'
+    assert float(timing["total"]["dur"]) >= float(timing["db"]["dur"])
+
+
+def test_metrics_aggregate_by_route_template(metrics_client):
+    for item_id in ("a", "b", "c"):
+        assert metrics_client.get(f"/probe/{item_id}").status_code == 200
+    assert metrics_client.get("/stream").text == "data: 1\n\ndata: 2\n\n"
+    assert metrics_client.get("/missing").status_code == 404
+
+    body = request_metrics.render_request_metrics()
+    assert 'backend_http_requests_total{method="GET",route="/probe/{item_id}",status="200"} 3' in body
+    assert 'backend_http_requests_total{method="GET",route="<unmatched>",status="404"} 1' in body
+    assert 'backend_http_request_duration_seconds_count{method="GET",route="/probe/{item_id}"} 3' in body
+    assert 'backend_http_request_duration_seconds_bucket{method="GET",route="/stream",le="+Inf"} 1' in body
+    assert 'backend_http_request_model_calls_total{method="GET",route="/probe/{item_id}"} 3' in body
+    assert 'backend_http_request_storage_writes_total{method="GET",route="/probe/{item_id}"} 3' in body
+    assert "/probe/a" not in body
+
+
+def test_disabled_metrics_skip_header_and_aggregation(metrics_client, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "request_metrics_enabled", False)
+    resp = metrics_client.get("/probe/off")
+    assert resp.status_code == 200
+    assert "server-timing" not in resp.headers
+    assert "/probe/{item_id}" not in request_metrics.render_request_metrics()
+
+
+def test_failed_statement_is_counted_and_does_not_skew_later_timings(metrics_client):
+    for _ in range(3):
+        resp = metrics_client.get("/failing-query")
+        assert resp.status_code == 200
+        timing = _server_timing(resp.headers["server-timing"])
+        # 抛错的语句与后续成功的语句各计一次；连接复用后也不会拿到上一条失败语句的起始时间
+        assert timing["db"]["desc"] == '"2 queries"'
@@ -8,6 +8,7 @@ from app.db.models import Base, ProductIndex, ProductRouteMappingIndex
 from app.services.storage import ensure_dirs, save_json_at
 from app.settings import settings
 from backend.tests.support_images import VALID_TEST_IMAGE_BYTES, install_fake_save_image
+from backend.tests.support_doubao import install_fake_stage1_analyzer
 
 
 def _install_fake_ingest_pipeline(monkeypatch: pytest.MonkeyPatch, plan: dict) -> None:
@@ -73,7 +74,7 @@ def _install_fake_ingest_pipeline(monkeypatch: pytest.MonkeyPatch, plan: dict) -
             "artifact": f"doubao_runs/{trace_id}/stage2_struct.json",
         }
 
-    monkeypatch.setattr(ingest_routes, "_analyze_with_doubao_stage1", fake_stage1)
+    install_fake_stage1_analyzer(monkeypatch, ingest_routes, fake_stage1)
     monkeypatch.setattr(ingest_routes, "_analyze_with_doubao_stage2", fake_stage2)
 
 
@@ -185,7 +186,7 @@ def test_route_mapping_build_reject_invalid_category(test_client):
     assert "Invalid category" in str(build_resp.json().get("detail"))
 
 
-def test_route_mapping_build_commits_each_completed_item(tmp_path, monkeypatch: pytest.MonkeyPatch):
+def test_route_mapping_build_commits_completed_items_in_batches(tmp_path, monkeypatch: pytest.MonkeyPatch):
     storage_dir = tmp_path / "storage"
     storage_dir.mkdir(parents=True, exist_ok=True)
     monkeypatch.setattr(settings, "storage_dir", str(storage_dir))
@@ -312,6 +313,9 @@ def test_route_mapping_build_commits_each_completed_item(tmp_path, monkeypatch:
         }
 
     monkeypatch.setattr(products_routes, "run_capability_now", fake_run_capability_now)
+    # 串行模式 + 每批 1 条：下一条模型调用开始前，上一条结果必须已提交。
+    monkeypatch.setattr(products_routes.settings, "product_workbench_model_concurrency", 1)
+    monkeypatch.setattr(products_routes, "_WORKBENCH_COMMIT_EVERY", 1)
 
     build_db = SessionLocal()
     try:
@@ -330,3 +334,211 @@ def test_route_mapping_build_commits_each_completed_item(tmp_path, monkeypatch:
     assert result.status == "ok"
     assert result.created == 2
     assert committed_mid_batch is True
+
+
+def _seed_route_mapping_products(tmp_path, monkeypatch: pytest.MonkeyPatch, count: int):
+    storage_dir = tmp_path / "storage"
+    storage_dir.mkdir(parents=True, exist_ok=True)
+    monkeypatch.setattr(settings, "storage_dir", str(storage_dir))
+    ensure_dirs()
+
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'test.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    product_ids = [f"prod-route-{idx:02d}" for idx in range(1, count + 1)]
+    seed_db = SessionLocal()
+    try:
+        for idx, product_id in enumerate(product_ids, start=1):
+            save_json_at(
+                f"products/shampoo/{product_id}.json",
+                {
+                    "product": {"category": "shampoo", "brand": "Dove", "name": f"Shampoo {idx}"},
+                    "summary": {
+                        "one_sentence": f"洗发测试 {idx}",
+                        "pros": ["温和清洁"],
+                        "cons": [],
+                        "who_for": ["普通头皮"],
+                        "who_not_for": [],
+                    },
+                    "ingredients": [
+                        {
+                            "name": "甘油 (Glycerin)",
+                            "rank": 1,
+                            "abundance_level": "major",
+                            "order_confidence": 92,
+                            "type": "保湿剂",
+                            "functions": ["保湿"],
+                            "risk": "low",
+                            "notes": "",
+                        },
+                    ],
+                    "evidence": {"doubao_raw": ""},
+                },
+            )
+            seed_db.add(
+                ProductIndex(
+                    id=product_id,
+                    category="shampoo",
+                    brand="Dove",
+                    name=f"Shampoo {idx}",
+                    one_sentence=f"洗发测试 {idx}",
+                    tags_json="[]",
+                    image_path=None,
+                    json_path=f"products/shampoo/{product_id}.json",
+                    # 倒序创建时间，使构建顺序与 product_ids 一致
+                    created_at=f"2026-03-10T00:{count - idx:02d}:00Z",
+                )
+            )
+        seed_db.commit()
+    finally:
+        seed_db.close()
+    return engine, SessionLocal, product_ids
+
+
+def _mock_route_mapping_result() -> dict:
+    return {
+        "category": "shampoo",
+        "rules_version": "2026-03-03.1",
+        "primary_route": {"route_key": "deep-oil-control", "route_title": "深层控油型", "confidence": 92, "reason": "mock"},
+        "secondary_route": {"route_key": "moisture-balance", "route_title": "水油平衡型", "confidence": 70, "reason": "mock"},
+        "route_scores": [
+            {"route_key": "deep-oil-control", "route_title": "深层控油型", "confidence": 92, "reason": "mock"},
+            {"route_key": "moisture-balance", "route_title": "水油平衡型", "confidence": 70, "reason": "mock"},
+            {"route_key": "gentle-soothing", "route_title": "温和舒缓型", "confidence": 54, "reason": "mock"},
+            {"route_key": "anti-hair-loss", "route_title": "防脱强韧型", "confidence": 30, "reason": "mock"},
+            {"route_key": "anti-dandruff-itch", "route_title": "去屑止痒型", "confidence": 20, "reason": "mock"},
+        ],
+        "evidence": {"positive": [], "counter": []},
+        "confidence_reason": "mock",
+        "needs_review": False,
+        "analysis_text": "{\"mock\":true}",
+        "model": "mock-pro",
+    }
+
+
+def test_route_mapping_build_runs_model_calls_concurrently_with_ordered_progress(
+    tmp_path,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    import threading
+    import time
+
+    engine, SessionLocal, product_ids = _seed_route_mapping_products(tmp_path, monkeypatch, count=6)
+    monkeypatch.setattr(products_routes.settings, "product_workbench_model_concurrency", 3)
+
+    lock = threading.Lock()
+    inflight = {"now": 0, "peak": 0}
+    calls: list[str] = []
+
+    def fake_run_capability_now(*, capability, input_payload, trace_id=None, event_callback=None):
+        with lock:
+            inflight["now"] += 1
+            inflight["peak"] = max(inflight["peak"], inflight["now"])
+            calls.append(str(trace_id))
+        try:
+            if event_callback:
+                event_callback({"type": "step", "stage": capability, "message": f"mock {trace_id}"})
+            # 越靠前的条目越慢：完成顺序与提交顺序相反，验证进度仍按 index 输出
+            time.sleep(0.02 * (len(product_ids) - product_ids.index(str(trace_id))))
+            return _mock_route_mapping_result()
+        finally:
+            with lock:
+                inflight["now"] -= 1
+
+    monkeypatch.setattr(products_routes, "run_capability_now", fake_run_capability_now)
+
+    events: list[dict] = []
+    build_db = SessionLocal()
+    try:
+        result = products_routes._build_product_route_mapping_impl(
+            products_routes.ProductRouteMappingBuildRequest(category="shampoo", force_regenerate=True),
+            db=build_db,
+            event_callback=events.append,
+        )
+    finally:
+        build_db.close()
+
+    assert result.status == "ok"
+    assert result.created == 6
+    assert [item.product_id for item in result.items] == product_ids
+    assert 1 < inflight["peak"] <= 3
+    done_indexes = [event["index"] for event in events if event.get("step") == "route_mapping_done"]
+    assert done_indexes == [1, 2, 3, 4, 5, 6]
+    assert any(event.get("step") == "route_mapping_model_step" for event in events)
+    plan_event = next(event for event in events if event.get("step") == "route_mapping_plan_done")
+    assert plan_event["planned_model_calls"] == 6
+
+    # 无变化重建：指纹全部命中，不再调模型，也不逐条 stat 映射文件
+    calls.clear()
+    stat_calls: list[str] = []
+    original_exists = products_routes.exists_rel_path
+
+    def counting_exists(rel_path):
+        stat_calls.append(str(rel_path))
+        return original_exists(rel_path)
+
+    monkeypatch.setattr(products_routes, "exists_rel_path", counting_exists)
+    rerun_db = SessionLocal()
+    try:
+        rerun = products_routes._build_product_route_mapping_impl(
+            products_routes.ProductRouteMappingBuildRequest(category="shampoo"),
+            db=rerun_db,
+            event_callback=None,
+        )
+    finally:
+        rerun_db.close()
+        engine.dispose()
+
+    assert rerun.skipped == 6
+    assert rerun.submitted_to_model == 0
+    assert calls == []
+    assert stat_calls == []
+
+
+def test_route_mapping_build_cancel_keeps_finished_items(tmp_path, monkeypatch: pytest.MonkeyPatch):
+    engine, SessionLocal, product_ids = _seed_route_mapping_products(tmp_path, monkeypatch, count=8)
+    monkeypatch.setattr(products_routes.settings, "product_workbench_model_concurrency", 2)
+
+    calls: list[str] = []
+
+    def fake_run_capability_now(*, capability, input_payload, trace_id=None, event_callback=None):
+        calls.append(str(trace_id))
+        return _mock_route_mapping_result()
+
+    monkeypatch.setattr(products_routes, "run_capability_now", fake_run_capability_now)
+
+    events: list[dict] = []
+    build_db = SessionLocal()
+    try:
+        with pytest.raises(products_routes.ProductWorkbenchJobCancelledError) as exc_info:
+            products_routes._build_product_route_mapping_impl(
+                products_routes.ProductRouteMappingBuildRequest(category="shampoo", force_regenerate=True),
+                db=build_db,
+                event_callback=events.append,
+                should_cancel=lambda: len(calls) >= 3,
+            )
+    finally:
+        build_db.close()
+
+    partial = exc_info.value.result
+    assert partial["status"] == "cancelled"
+    assert 3 <= partial["created"] < len(product_ids)
+    assert len(calls) == partial["created"]
+    done_indexes = [event["index"] for event in events if event.get("step") == "route_mapping_done"]
+    assert done_indexes == list(range(1, partial["created"] + 1))
+
+    check_db = SessionLocal()
+    try:
+        ready_ids = {
+            rec.product_id
+            for rec in check_db.query(ProductRouteMappingIndex).all()
+            if rec.status == "ready"
+        }
+    finally:
+        check_db.close()
+        engine.dispose()
+    assert ready_ids == set(product_ids[: partial["created"]])
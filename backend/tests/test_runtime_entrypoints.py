@@ -0,0 +1,85 @@
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.main as backend_main
+from app.db import runtime_schema
+from app.db.models import MobileCompareSessionIndex, ProductWorkbenchJob
+from app.routes import mobile as mobile_routes
+from app.routes import products as products_routes
+from app.scripts import bench_startup
+from app.services import runtime_worker
+from app.settings import settings
+
+
+def test_role_entrypoints_only_load_what_the_role_needs(tmp_path: Path):
+    env = bench_startup._child_env(tmp_path)
+
+    worker = bench_startup.measure_startup("worker", env=env)
+    api = bench_startup.measure_startup("api", env=env)
+
+    # worker 冷启动不导入任何业务路由 / schemas / OpenAI SDK / 图片编解码
+    assert worker["heavy_loaded"] == []
+    assert {"app.routes.products", "app.routes.mobile", "app.routes.ingest"} <= set(api["heavy_loaded"])
+    # OpenAI SDK 推迟到第一次真正构造豆包客户端
+    assert "openai" not in api["heavy_loaded"]
+    assert worker["modules"] < api["modules"]
+    assert worker["routes"] < api["routes"]
+
+
+def test_create_app_mounts_business_routes_only_for_api_role(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "runtime_role", settings.runtime_role)
+    monkeypatch.setattr(settings, "storage_dir", str(tmp_path / "storage"))
+    monkeypatch.setattr(settings, "user_storage_dir", str(tmp_path / "user_storage"))
+
+    worker_paths = {route.path for route in backend_main.create_app("worker").routes}
+    assert {"/healthz", "/readyz", "/metrics"} <= worker_paths
+    assert not any(path.startswith("/api/") or path in {"/images", "/user-images"} for path in worker_paths)
+
+    api_paths = {route.path for route in backend_main.create_app("api").routes}
+    assert {"/healthz", "/readyz", "/metrics", "/api/products", "/images", "/user-images"} <= api_paths
+
+
+def test_worker_pollers_probe_queue_before_delegating_to_route_modules(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'worker.db'}", connect_args={"check_same_thread": False})
+    runtime_schema.apply_runtime_schema(engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(runtime_worker, "SessionLocal", SessionLocal)
+    calls: list[str] = []
+
+    def _recorder(label: str):
+        def run_once() -> bool:
+            calls.append(label)
+            return True
+
+        return run_once
+
+    monkeypatch.setattr(mobile_routes, "run_mobile_compare_worker_once", _recorder("compare"))
+    monkeypatch.setattr(products_routes, "run_product_workbench_worker_once", _recorder("workbench"))
+
+    assert runtime_worker.run_mobile_compare_worker_once() is False
+    assert runtime_worker.run_product_workbench_worker_once() is False
+    assert calls == []
+
+    now = "2026-10-01T00:00:00.000000Z"
+    with SessionLocal() as db:
+        db.add(ProductWorkbenchJob(job_id="job-1", job_type="product_profile", status="queued", created_at=now, updated_at=now))
+        db.add(
+            MobileCompareSessionIndex(
+                compare_id="cmp-1",
+                owner_id="owner-1",
+                category="shampoo",
+                status="running",
+                stage="queued",
+                created_at=now,
+                updated_at=now,
+            )
+        )
+        db.commit()
+
+    assert runtime_worker.run_mobile_compare_worker_once() is True
+    assert runtime_worker.run_product_workbench_worker_once() is True
+    assert calls == ["compare", "workbench"]
+    engine.dispose()
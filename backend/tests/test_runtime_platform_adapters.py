@@ -403,6 +403,10 @@ def test_worker_loop_keeps_other_pollers_alive_when_upload_poller_fails(monkeypa
         calls.append("workbench")
         return False
 
+    def ok_storage_reclaim() -> bool:
+        calls.append("storage_reclaim")
+        return False
+
     class _StopAfterOneTick:
         def __init__(self) -> None:
             self._set = False
@@ -417,10 +421,11 @@ def test_worker_loop_keeps_other_pollers_alive_when_upload_poller_fails(monkeypa
     monkeypatch.setattr(runtime_worker, "run_upload_ingest_worker_once", fail_upload)
     monkeypatch.setattr(runtime_worker, "run_mobile_compare_worker_once", ok_compare)
     monkeypatch.setattr(runtime_worker, "run_product_workbench_worker_once", ok_workbench)
+    monkeypatch.setattr(runtime_worker, "run_product_storage_reclaim_worker_once", ok_storage_reclaim)
 
     runtime_worker._worker_loop(_StopAfterOneTick())
 
-    assert calls == ["upload", "compare", "workbench"]
+    assert calls == ["upload", "compare", "workbench", "storage_reclaim"]
 
 
 @pytest.mark.parametrize("deploy_profile", ["split_runtime", "multi_node"])
@@ -449,10 +454,11 @@ def test_worker_dark_start_profile_disables_api_routes_and_keeps_worker_poller(
     assert topology["upload_ingest_dispatch_mode"] == "worker_poller"
     assert topology["compare_dispatch_mode"] == "worker_poller"
     assert topology["product_workbench_dispatch_mode"] == "worker_poller"
+    assert topology["storage_reclaim_dispatch_mode"] == "worker_poller"
     assert worker_state["enabled"] is True
     assert worker_state["running"] is False
     assert worker_state["poll_interval_seconds"] > 0
-    assert worker_state["capabilities"] == ["upload_ingest", "mobile_compare", "product_workbench"]
+    assert worker_state["capabilities"] == ["upload_ingest", "mobile_compare", "product_workbench", "storage_reclaim"]
 
 
 def test_lock_backend_redis_contract_downgrades_to_local_when_enabled(monkeypatch) -> None:
@@ -0,0 +1,100 @@
+from sqlalchemy import create_engine, event, inspect as sa_inspect, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db import runtime_schema
+from app.db.models import Base, RuntimeSchemaVersion
+from app.routes import ingest as ingest_routes
+from app.routes import products as products_routes
+
+
+def _engine(tmp_path, name: str):
+    return create_engine(f"sqlite:///{tmp_path / name}", connect_args={"check_same_thread": False})
+
+
+def _count_statements(engine) -> dict[str, int]:
+    counter = {"n": 0}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(*_args, **_kwargs):
+        counter["n"] += 1
+
+    return counter
+
+
+def test_ensure_runtime_schema_is_memoized_per_engine(tmp_path) -> None:
+    engine = _engine(tmp_path, "memo.db")
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    counter = _count_statements(engine)
+
+    db = SessionLocal()
+    try:
+        ingest_routes._ensure_upload_ingest_job_table(db)
+        assert counter["n"] > 0
+        with engine.connect() as conn:
+            stamped = conn.execute(text("SELECT version FROM runtime_schema_versions")).scalar_one()
+        assert stamped == runtime_schema.RUNTIME_SCHEMA_VERSION
+
+        counter["n"] = 0
+        ingest_routes._ensure_upload_ingest_job_table(db)
+        products_routes._ensure_ingredient_build_job_table(db)
+        products_routes._ensure_product_workbench_job_table(db)
+        assert counter["n"] == 0
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def test_ensure_runtime_schema_trusts_current_version_stamp(tmp_path) -> None:
+    engine = _engine(tmp_path, "stamped.db")
+    runtime_schema.apply_runtime_schema(engine)
+    runtime_schema.reset_runtime_schema_memo()
+    counter = _count_statements(engine)
+
+    runtime_schema.ensure_runtime_schema(engine)
+    runtime_schema.ensure_runtime_schema(engine)
+
+    # 版本一致：只读一次版本戳，不做 inspect / checkfirst。
+    assert counter["n"] == 1
+    engine.dispose()
+
+
+def test_outdated_version_stamp_reapplies_patches(tmp_path) -> None:
+    engine = _engine(tmp_path, "outdated.db")
+    runtime_schema.apply_runtime_schema(engine)
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE product_workbench_jobs DROP COLUMN live_text_json"))
+        conn.execute(RuntimeSchemaVersion.__table__.update().values(version="2000-01-r0"))
+    runtime_schema.reset_runtime_schema_memo()
+
+    runtime_schema.ensure_runtime_schema(engine)
+
+    columns = {item["name"] for item in sa_inspect(engine).get_columns("product_workbench_jobs")}
+    assert "live_text_json" in columns
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT version FROM runtime_schema_versions")).scalar_one() == (
+            runtime_schema.RUNTIME_SCHEMA_VERSION
+        )
+    engine.dispose()
+
+
+def test_write_schema_version_upserts_existing_stamp(tmp_path) -> None:
+    engine = _engine(tmp_path, "upsert.db")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(
+            RuntimeSchemaVersion.__table__.insert().values(
+                schema_key=runtime_schema.RUNTIME_SCHEMA_KEY, version="2000-01-r0", verified_at="2000-01-01T00:00:00Z"
+            )
+        )
+    counter = _count_statements(engine)
+
+    runtime_schema._write_schema_version(engine)
+    runtime_schema._write_schema_version(engine)
+
+    # 单条 INSERT ... ON CONFLICT DO UPDATE，没有先删后插的竞争窗口
+    assert counter["n"] == 2
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT schema_key, version FROM runtime_schema_versions")).all()
+    assert rows == [(runtime_schema.RUNTIME_SCHEMA_KEY, runtime_schema.RUNTIME_SCHEMA_VERSION)]
+    engine.dispose()
@@ -0,0 +1,103 @@
+import threading
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models import Base, MobileClientEvent
+from app.db.session import _engine_kwargs_for, describe_sqlite_connection_pragmas, install_sqlite_performance_mode
+from app.db.write_queue import describe_sqlite_write_queue, run_serialized_write, sqlite_write_queue_for
+from app.settings import settings
+
+
+def _tuned_engine(tmp_path: Path):
+    url = f"sqlite:///{tmp_path / 'tuned.db'}"
+    engine = create_engine(url, **_engine_kwargs_for(url))
+    install_sqlite_performance_mode(engine)
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def _event(event_id: str) -> MobileClientEvent:
+    return MobileClientEvent(
+        event_id=event_id,
+        owner_type="device",
+        owner_id="device-1",
+        name="page_view",
+        props_json="{}",
+        created_at="2026-10-19T00:00:00.000000Z",
+    )
+
+
+def test_sqlite_performance_mode_applies_pragmas_on_connect(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "db_sqlite_performance_mode", True)
+    monkeypatch.setattr(settings, "db_sqlite_busy_timeout_ms", 7000)
+    engine = _tuned_engine(tmp_path)
+    try:
+        pragmas = describe_sqlite_connection_pragmas(engine)
+    finally:
+        engine.dispose()
+    assert pragmas["journal_mode"] == "wal"
+    assert pragmas["synchronous"] == 1
+    assert pragmas["busy_timeout"] == 7000
+    assert pragmas["cache_size"] == -int(settings.db_sqlite_cache_size_kib)
+    assert _engine_kwargs_for("sqlite:///x.db")["connect_args"] == {"check_same_thread": False, "timeout": 7.0}
+    assert _engine_kwargs_for("postgresql+psycopg://u:p@h/db")["connect_args"] == {}
+
+
+def test_single_writer_queue_group_commits_concurrent_writes(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "db_sqlite_single_writer", True)
+    engine = _tuned_engine(tmp_path)
+    SessionMaker = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    errors: list[Exception] = []
+
+    def writer(idx: int) -> None:
+        for seq in range(25):
+            with SessionMaker() as db:
+                try:
+                    run_serialized_write(db, lambda session, eid=f"evt-{idx}-{seq}": session.add(_event(eid)))
+                except Exception as exc:  # pragma: no cover - surfaced by assertion below
+                    errors.append(exc)
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    try:
+        with SessionMaker() as db:
+            assert db.execute(select(func.count()).select_from(MobileClientEvent)).scalar() == 200
+        stats = describe_sqlite_write_queue(engine)
+    finally:
+        engine.dispose()
+    assert errors == []
+    assert stats["jobs"] == 200
+    assert stats["batches"] <= 200
+
+
+def test_single_writer_queue_isolates_failing_write_from_batch(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "db_sqlite_single_writer", True)
+    engine = _tuned_engine(tmp_path)
+    SessionMaker = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    try:
+        with SessionMaker() as db:
+            run_serialized_write(db, lambda session: session.add(_event("evt-dup")))
+
+        write_queue = sqlite_write_queue_for(engine)
+        futures = [
+            write_queue.submit(lambda session: session.add(_event("evt-ok-1"))),
+            write_queue.submit(lambda session: session.add(_event("evt-dup"))),
+            write_queue.submit(lambda session: session.add(_event("evt-ok-2"))),
+        ]
+        assert futures[0].result(timeout=5) is None
+        assert futures[2].result(timeout=5) is None
+        with pytest.raises(Exception):
+            futures[1].result(timeout=5)
+
+        with SessionMaker() as db:
+            ids = set(db.execute(select(MobileClientEvent.event_id)).scalars().all())
+    finally:
+        engine.dispose()
+    assert ids == {"evt-dup", "evt-ok-1", "evt-ok-2"}
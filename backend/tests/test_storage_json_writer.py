@@ -0,0 +1,86 @@
+import json
+import os
+import stat
+
+import pytest
+
+from app.services import storage
+from app.settings import settings
+
+
+def _configure_storage(tmp_path, monkeypatch: pytest.MonkeyPatch):
+    storage_dir = tmp_path / "storage"
+    user_storage_dir = tmp_path / "user_storage"
+    monkeypatch.setattr(settings, "storage_dir", str(storage_dir))
+    monkeypatch.setattr(settings, "user_storage_dir", str(user_storage_dir))
+    return storage_dir
+
+
+def test_save_json_writes_compact_payload_atomically(tmp_path, monkeypatch) -> None:
+    storage_dir = _configure_storage(tmp_path, monkeypatch)
+    doc = {"product": {"brand": "多芬", "name": "洗发露"}, "ingredients": [{"name": "水", "rank": 1}]}
+
+    rel = storage.save_product_json("p-1", doc, category="shampoo")
+    storage.save_json_at(rel, {**doc, "summary": {"one_sentence": "更新"}})
+
+    abs_path = storage_dir / rel
+    raw = abs_path.read_text(encoding="utf-8")
+    assert "\n" not in raw
+    assert '"brand":"多芬"' in raw
+    assert storage.load_json(rel)["summary"] == {"one_sentence": "更新"}
+    leftovers = [item.name for item in abs_path.parent.iterdir() if item.name != abs_path.name]
+    assert leftovers == []
+
+
+def test_atomic_write_keeps_previous_file_when_encoding_fails(tmp_path, monkeypatch) -> None:
+    storage_dir = _configure_storage(tmp_path, monkeypatch)
+    rel = storage.save_doubao_artifact("trace-1", "stage1_context", {"status": "ok"})
+
+    with pytest.raises(TypeError):
+        storage.save_doubao_artifact("trace-1", "stage1_context", {"bad": object()})
+
+    assert storage.load_json(rel) == {"status": "ok"}
+    assert sorted(item.name for item in (storage_dir / "doubao_runs" / "trace-1").iterdir()) == ["stage1_context.json"]
+
+
+def test_atomic_write_keeps_existing_mode_and_defaults_to_umask(tmp_path, monkeypatch) -> None:
+    storage_dir = _configure_storage(tmp_path, monkeypatch)
+    rel = storage.save_product_json("p-mode", {"product": {}}, category="shampoo")
+    abs_path = storage_dir / rel
+
+    # 新建文件不沿用 mkstemp 的 0600，而是 umask 下的默认权限
+    assert stat.S_IMODE(os.stat(abs_path).st_mode) == 0o666 & ~storage._PROCESS_UMASK
+    os.chmod(abs_path, 0o640)
+    storage.save_json_at(rel, {"product": {"name": "更新"}})
+    assert stat.S_IMODE(os.stat(abs_path).st_mode) == 0o640
+
+
+def test_binary_codec_falls_back_to_compact_json_when_dependency_missing(tmp_path, monkeypatch) -> None:
+    storage_dir = _configure_storage(tmp_path, monkeypatch)
+    monkeypatch.setattr(settings, "storage_json_binary_codec", "zstd")
+    monkeypatch.setattr(settings, "storage_json_binary_min_bytes", 0)
+    monkeypatch.setattr(storage, "_load_zstd", lambda: None)
+
+    rel = storage.save_doubao_artifact("trace-2", "stage2_struct", {"text": "成分" * 100})
+
+    assert json.loads((storage_dir / rel).read_text(encoding="utf-8")) == {"text": "成分" * 100}
+
+
+@pytest.mark.parametrize("codec", ["zstd", "msgpack_zstd"])
+def test_binary_codec_round_trips_through_load_json(tmp_path, monkeypatch, codec: str) -> None:
+    pytest.importorskip("zstandard")
+    if codec == "msgpack_zstd":
+        pytest.importorskip("msgpack")
+    storage_dir = _configure_storage(tmp_path, monkeypatch)
+    monkeypatch.setattr(settings, "storage_json_binary_codec", codec)
+    monkeypatch.setattr(settings, "storage_json_binary_kinds_csv", "doubao_runs")
+    monkeypatch.setattr(settings, "storage_json_binary_min_bytes", 0)
+    payload = {"text": "成分" * 500, "items": [1, 2, 3]}
+
+    binary_rel = storage.save_doubao_artifact("trace-3", "stage2_struct", payload)
+    plain_rel = storage.save_product_json("p-3", payload)
+
+    assert (storage_dir / binary_rel).read_bytes().startswith(storage.JSON_BINARY_MAGIC)
+    assert not (storage_dir / plain_rel).read_bytes().startswith(storage.JSON_BINARY_MAGIC)
+    assert storage.load_json(binary_rel) == payload
+    assert storage.load_json(plain_rel) == payload
@@ -7,6 +7,7 @@ import pytest
 from fastapi import HTTPException
 
 from app.routes import ingest as ingest_routes
+from app.settings import settings
 from backend.tests.support_images import VALID_TEST_IMAGE_BYTES
 
 
@@ -113,6 +114,25 @@ def test_upload_job_can_run_to_done(test_client, monkeypatch: pytest.MonkeyPatch
     assert leftovers == []
 
 
+def test_upload_job_oversized_supplement_cleans_spooled_temp(test_client, monkeypatch: pytest.MonkeyPatch):
+    client, storage_dir = test_client
+    monkeypatch.setattr(settings, "max_upload_bytes", len(VALID_TEST_IMAGE_BYTES) + 8)
+    submitted: list[str] = []
+    monkeypatch.setattr(ingest_routes, "_submit_upload_ingest_job", lambda **kwargs: submitted.append(kwargs["job_id"]))
+
+    resp = client.post(
+        "/api/upload/jobs",
+        files={
+            "image": ("front.png", VALID_TEST_IMAGE_BYTES, "image/png"),
+            "supplement_image": ("back.png", VALID_TEST_IMAGE_BYTES * 4, "image/png"),
+        },
+    )
+    assert resp.status_code == 413
+    assert "Supplement image too large" in resp.text
+    assert submitted == []
+    assert list((storage_dir / "tmp_uploads").iterdir()) == []
+
+
 def test_upload_job_separates_reasoning_summary_from_output_text(test_client, monkeypatch: pytest.MonkeyPatch):
     client, storage_dir = test_client
     _install_fake_convert(monkeypatch, storage_dir)
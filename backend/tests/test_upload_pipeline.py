@@ -1,10 +1,13 @@
 import json
+import threading
 from pathlib import Path
 
 import pytest
 
 from app.routes import ingest as ingest_routes
+from app.settings import settings
 from backend.tests.support_images import VALID_TEST_IMAGE_BYTES, install_fake_save_image
+from backend.tests.support_doubao import install_fake_stage1_analyzer
 
 
 def _read_json(path: Path) -> dict:
@@ -23,7 +26,7 @@ def test_stage1_saves_context_artifact(test_client, monkeypatch: pytest.MonkeyPa
             "artifact": f"doubao_runs/{trace_id}/stage1_vision.json",
         }
 
-    monkeypatch.setattr(ingest_routes, "_analyze_with_doubao_stage1", fake_stage1)
+    install_fake_stage1_analyzer(monkeypatch, ingest_routes, fake_stage1)
 
     resp = client.post(
         "/api/upload/stage1",
@@ -55,7 +58,7 @@ def test_stage1_keeps_heic_extension_in_storage(test_client, monkeypatch: pytest
             "artifact": f"doubao_runs/{trace_id}/stage1_vision.json",
         }
 
-    monkeypatch.setattr(ingest_routes, "_analyze_with_doubao_stage1", fake_stage1)
+    install_fake_stage1_analyzer(monkeypatch, ingest_routes, fake_stage1)
 
     resp = client.post(
         "/api/upload/stage1",
@@ -81,7 +84,7 @@ def test_stage1_converts_png_to_jpg_in_storage(test_client, monkeypatch: pytest.
             "artifact": f"doubao_runs/{trace_id}/stage1_vision.json",
         }
 
-    monkeypatch.setattr(ingest_routes, "_analyze_with_doubao_stage1", fake_stage1)
+    install_fake_stage1_analyzer(monkeypatch, ingest_routes, fake_stage1)
 
     resp = client.post(
         "/api/upload/stage1",
@@ -105,6 +108,66 @@ def test_stage1_rejects_unsupported_extension_with_unknown_content_type(test_cli
     assert "Unsupported image extension" in resp.text
 
 
+def test_stage1_rejects_oversized_upload_before_saving(test_client, monkeypatch: pytest.MonkeyPatch):
+    client, storage_dir = test_client
+    monkeypatch.setattr(settings, "max_upload_bytes", 64)
+
+    def fail_save_image(*args, **kwargs):
+        raise AssertionError("save_image should not run for oversized upload")
+
+    monkeypatch.setattr(ingest_routes, "save_image", fail_save_image)
+
+    resp = client.post(
+        "/api/upload/stage1",
+        files={"image": ("big.png", b"x" * 65, "image/png")},
+    )
+    assert resp.status_code == 413
+    assert "Max 64 bytes" in resp.text
+    assert not (storage_dir / "images").exists()
+
+
+def test_stage1_runs_blocking_work_off_event_loop_thread(test_client, monkeypatch: pytest.MonkeyPatch):
+    client, _ = test_client
+    install_fake_save_image(monkeypatch, ingest_routes)
+    loop_threads: set[int] = set()
+    save_threads: set[int] = set()
+    model_threads: set[int] = set()
+
+    async def probe():
+        loop_threads.add(threading.get_ident())
+        return {"ok": True}
+
+    client.app.add_api_route("/__probe", probe, methods=["GET"])
+    assert client.get("/__probe").status_code == 200
+
+    fake_save_image = ingest_routes.save_image
+
+    def tracking_save_image(*args, **kwargs):
+        save_threads.add(threading.get_ident())
+        return fake_save_image(*args, **kwargs)
+
+    async def fake_stage1_async(image_rel: str, trace_id: str):
+        # 模型调用走异步客户端：在事件循环上 await，不占线程池
+        model_threads.add(threading.get_ident())
+        return {
+            "vision_text": "【品牌】测试品牌\n【产品名】测试产品\n【成分表原文】水、甘油",
+            "model": "doubao-stage1-mini",
+            "artifact": f"doubao_runs/{trace_id}/stage1_vision.json",
+        }
+
+    monkeypatch.setattr(ingest_routes, "save_image", tracking_save_image)
+    monkeypatch.setattr(ingest_routes, "_analyze_with_doubao_stage1_async", fake_stage1_async)
+
+    resp = client.post(
+        "/api/upload/stage1",
+        files={"image": ("sample.png", VALID_TEST_IMAGE_BYTES, "image/png")},
+    )
+    assert resp.status_code == 200
+    assert save_threads
+    assert not (save_threads & loop_threads)
+    assert model_threads <= loop_threads
+
+
 def test_stage2_creates_product_and_exposes_in_products_api(test_client, monkeypatch: pytest.MonkeyPatch):
     client, _ = test_client
     install_fake_save_image(monkeypatch, ingest_routes)
@@ -146,7 +209,7 @@ def test_stage2_creates_product_and_exposes_in_products_api(test_client, monkeyp
             "artifact": f"doubao_runs/{trace_id}/stage2_struct.json",
         }
 
-    monkeypatch.setattr(ingest_routes, "_analyze_with_doubao_stage1", fake_stage1)
+    install_fake_stage1_analyzer(monkeypatch, ingest_routes, fake_stage1)
     monkeypatch.setattr(ingest_routes, "_analyze_with_doubao_stage2", fake_stage2)
 
     stage1 = client.post(
@@ -237,7 +300,7 @@ def test_stage1_requires_supplement_then_reruns_with_two_images(test_client, mon
             "artifact": f"doubao_runs/{trace_id}/stage2_struct.json",
         }
 
-    monkeypatch.setattr(ingest_routes, "_analyze_with_doubao_stage1", fake_stage1)
+    install_fake_stage1_analyzer(monkeypatch, ingest_routes, fake_stage1)
     monkeypatch.setattr(ingest_routes, "_analyze_with_doubao_stage2", fake_stage2)
 
     stage1 = client.post(
@@ -322,7 +385,7 @@ def test_stage1_and_stage2_stream_endpoints(test_client, monkeypatch: pytest.Mon
             "artifact": f"doubao_runs/{trace_id}/stage2_struct.json",
         }
 
-    monkeypatch.setattr(ingest_routes, "_analyze_with_doubao_stage1", fake_stage1)
+    install_fake_stage1_analyzer(monkeypatch, ingest_routes, fake_stage1)
     monkeypatch.setattr(ingest_routes, "_analyze_with_doubao_stage2", fake_stage2)
 
     s1 = client.post(
@@ -0,0 +1,107 @@
+import threading
+
+import pytest
+from sqlalchemy import func, select
+
+from app.db import counters as counters_module
+from app.db.counters import (
+    describe_write_behind_counters,
+    flush_write_behind_counters,
+    increment_counter,
+    pending_counter_increments,
+)
+from app.db.models import MobileCompareUsageStat
+from app.routes import mobile as mobile_routes
+from app.settings import settings
+
+SPEC = mobile_routes.MOBILE_COMPARE_USAGE_COUNTER
+
+
+@pytest.fixture
+def counter_db(sqlite_session_factory, monkeypatch: pytest.MonkeyPatch):
+    # 刷盘间隔拉长，测试里只在显式 flush 时落库。
+    monkeypatch.setattr(settings, "db_write_behind_flush_seconds", 60.0)
+    return sqlite_session_factory.kw["bind"], sqlite_session_factory
+
+
+def _usage(SessionLocal, product_id: str) -> int | None:
+    with SessionLocal() as db:
+        row = db.get(MobileCompareUsageStat, ("device", "owner-1", "shampoo", product_id))
+        return None if row is None else int(row.usage_count)
+
+
+def test_concurrent_increments_flush_as_single_upsert(counter_db):
+    engine, SessionLocal = counter_db
+    with SessionLocal() as db:
+        db.add(
+            MobileCompareUsageStat(
+                owner_type="device", owner_id="owner-1", category="shampoo", product_id="p-existing", usage_count=5, updated_at="t0"
+            )
+        )
+        db.commit()
+
+    def worker() -> None:
+        with SessionLocal() as db:
+            for idx in range(50):
+                increment_counter(db, SPEC, ("device", "owner-1", "shampoo", "p-hot"), touched=f"t{idx:03d}")
+                if idx % 10 == 0:
+                    increment_counter(db, SPEC, ("device", "owner-1", "shampoo", "p-existing"), touched="t1")
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # 落库前数据库里还是旧值，读取方通过 pending 叠加读到自己的写入。
+    assert _usage(SessionLocal, "p-hot") is None
+    pending = pending_counter_increments(engine, SPEC, owner_id="owner-1", category="shampoo")
+    assert pending[("device", "owner-1", "shampoo", "p-hot")] == 400
+    with SessionLocal() as db:
+        overlay = mobile_routes._usage_count_by_product_id(db=db, owner_type="device", owner_id="owner-1", category="shampoo")
+    assert overlay == {"p-hot": 400, "p-existing": 45}
+
+    assert flush_write_behind_counters(engine) == 2
+    assert _usage(SessionLocal, "p-hot") == 400
+    assert _usage(SessionLocal, "p-existing") == 45
+    stats = describe_write_behind_counters(engine)
+    assert stats["increments"] == 440
+    assert stats["statements"] == 1
+    assert stats["pending_keys"] == 0
+    assert pending_counter_increments(engine, SPEC, owner_id="owner-1") == {}
+
+
+def test_failed_flush_keeps_increments_for_retry(counter_db, monkeypatch: pytest.MonkeyPatch):
+    engine, SessionLocal = counter_db
+    with SessionLocal() as db:
+        increment_counter(db, SPEC, ("device", "owner-1", "shampoo", "p-1"), touched="t1")
+
+    real_apply = counters_module._apply_increments
+    calls = {"n": 0}
+
+    def flaky_apply(db, spec, rows):
+        calls["n"] += 1
+        if calls["n"] == 1:
+            raise RuntimeError("database is locked")
+        return real_apply(db, spec, rows)
+
+    monkeypatch.setattr(counters_module, "_apply_increments", flaky_apply)
+    assert flush_write_behind_counters(engine) == 0
+    assert describe_write_behind_counters(engine)["flush_failures"] == 1
+    with SessionLocal() as db:
+        increment_counter(db, SPEC, ("device", "owner-1", "shampoo", "p-1"), touched="t2")
+    assert flush_write_behind_counters(engine) == 1
+    assert _usage(SessionLocal, "p-1") == 2
+
+
+def test_disabled_write_behind_upserts_inline(counter_db, monkeypatch: pytest.MonkeyPatch):
+    engine, SessionLocal = counter_db
+    monkeypatch.setattr(settings, "db_write_behind_counters", False)
+    with SessionLocal() as db:
+        for _ in range(3):
+            increment_counter(db, SPEC, ("device", "owner-1", "shampoo", "p-inline"), touched="t1")
+        db.commit()
+    assert _usage(SessionLocal, "p-inline") == 3
+    with SessionLocal() as db:
+        assert db.execute(select(func.count()).select_from(MobileCompareUsageStat)).scalar() == 1
+    assert pending_counter_increments(engine, SPEC) == {}
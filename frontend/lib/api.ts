@@ -831,9 +831,13 @@ export type AIRunView = {
   prompt_key?: string | null;
   prompt_version?: string | null;
   model?: string | null;
-  request: Record<string, unknown>;
+  request?: Record<string, unknown> | null;
   response?: Record<string, unknown> | null;
   latency_ms?: number | null;
+  input_tokens?: number | null;
+  output_tokens?: number | null;
+  cached_tokens?: number | null;
+  estimated_cost?: number | null;
   error_code?: string | null;
   error_http_status?: number | null;
   error_message?: string | null;
@@ -2870,11 +2874,13 @@ export async function fetchAIRuns(params?: {
   jobId?: string;
   offset?: number;
   limit?: number;
+  includePayloads?: boolean;
 }): Promise<AIRunView[]> {
   const search = new URLSearchParams();
   if (params?.jobId) search.set("job_id", params.jobId);
   if (typeof params?.offset === "number") search.set("offset", String(params.offset));
   if (typeof params?.limit === "number") search.set("limit", String(params.limit));
+  if (params?.includePayloads) search.set("include_payloads", "true");
   const query = search.toString();
   const path = query ? `/api/ai/runs?${query}` : "/api/ai/runs";
   return apiFetch<AIRunView[]>(path, {
@@ -2882,8 +2888,14 @@ export async function fetchAIRuns(params?: {
   });
 }
 
+export async function fetchAIRun(runId: string): Promise<AIRunView> {
+  return apiFetch<AIRunView>(`/api/ai/runs/${encodeURIComponent(runId)}`, {
+    cacheProfile: "dynamic",
+  });
+}
+
 export async function fetchLatestAIRunByJobId(jobId: string): Promise<AIRunView | null> {
-  const runs = await fetchAIRuns({ jobId, limit: 1, offset: 0 });
+  const runs = await fetchAIRuns({ jobId, limit: 1, offset: 0, includePayloads: true });
   return runs[0] || null;
 }
 